@@ -217,7 +217,7 @@ def main() -> int:
 
     # OpenTitan vmem files should always contain one single contiguous chunk.
     assert len(vmem.chunks) == 1
-    words = vmem.chunks[0].words
+    words = list(vmem.chunks[0].words)
 
     if width == 24:
         logger.info("Generating updatemem-compatible MEM file for OTP image.")
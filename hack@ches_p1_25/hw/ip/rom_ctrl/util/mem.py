@@ -3,18 +3,67 @@
 # Licensed under the Apache License, Version 2.0, see LICENSE for details.
 # SPDX-License-Identifier: Apache-2.0
 
+import io
+import mmap
 import re
+import struct
 import subprocess
+import sys
 import tempfile
-from typing import Any, BinaryIO, Dict, IO, List, Optional, TextIO, Tuple
+from array import array
+from itertools import repeat
+from typing import (Any, BinaryIO, Dict, IO, Iterable, List, MutableSequence,
+                    Optional, TextIO, Tuple, cast)
 
 from elftools.elf.elffile import ELFFile  # type: ignore
-from util.design.secded_gen import ecc_encode_some, load_secded_config  # type: ignore
+from util.design.secded_gen import load_secded_config, secded_codec  # type: ignore
+
+# Words of up to this many bits are stored in arrays of unsigned 64-bit
+# integers (typecode 'Q'), which take 8 bytes per word rather than the ~36 of a
+# list of Python ints. Wider words are kept in lists.
+ARRAY_WIDTH = 64
+
+# The address at the start of a line of a VMEM file.
+_VMEM_ADDR_RE = re.compile(r'@[0-9a-fA-F]+$')
+
+# Size of the text that MemChunk.write_vmem buffers before each write, and of
+# the blocks in which MemFile.load_vmem scans a file for comments.
+_WRITE_BUFFER_CHARS = 1 << 16
+_SCAN_BLOCK_SIZE = 1 << 16
+
+# The maximum number of words that MemFile._load_preproc reads before parsing
+# them.
+_PARSE_BATCH_WORDS = 1 << 14
+
+# Header of a binary sidecar file (see MemFile.write_sidecar): magic, width in
+# bits, bytes per word, number of chunks and 4 bytes of padding. It is
+# followed by a (base address, number of words) pair for each chunk and then
+# the words of all the chunks, each as a little-endian unsigned integer.
+_SIDECAR_MAGIC = b'OTMEMSC1'
+_SIDECAR_HEADER = struct.Struct('<8sIII4x')
+_SIDECAR_CHUNK = struct.Struct('<QQ')
+
+
+def word_array(width: int, words: Iterable[int] = ()) -> MutableSequence[int]:
+    '''Return a new mutable sequence holding words of width bits
+
+    This is an array of unsigned 64-bit integers if width is at most
+    ARRAY_WIDTH, and a list otherwise.
+
+    '''
+    if width <= ARRAY_WIDTH:
+        return array('Q', words)
+    return list(words)
 
 
 class MemChunk:
-    def __init__(self, base_addr: int, words: List[int]):
-        '''A contiguous list of words starting at base_addr'''
+    def __init__(self, base_addr: int, words: MutableSequence[int]):
+        '''A contiguous list of words starting at base_addr
+
+        words can be a list of ints or, to save memory on large images, an
+        array (see word_array).
+
+        '''
         self.base_addr = base_addr
         self.words = words
 
@@ -40,12 +89,32 @@ class MemChunk:
         # gain a character by adding a @ on the front of the address, but lose
         # it again by omitting the trailing space after the last word).
         nwords_on_line = max(1, (79 - addr_chars) // (1 + word_chars))
-        for start_idx in range(0, len(self.words), nwords_on_line):
-            line_addr = self.base_addr + start_idx
-            toks = [f'@{line_addr:0{addr_chars}X}']
-            for word in self.words[start_idx:start_idx + nwords_on_line]:
-                toks.append(f'{word:0{word_chars}X}')
-            outfile.write(' '.join(toks) + '\n')
+
+        # Format the lines into a buffer of bounded size, which is written
+        # out whenever it gets full, rather than writing each line separately
+        # or building the whole file in memory.
+        addr_fmt = '@{:0%dX}' % addr_chars
+        word_fmt = ' {:0%dX}' % word_chars
+        line_fmt = addr_fmt + word_fmt * nwords_on_line + '\n'
+        lines_per_write = max(1, _WRITE_BUFFER_CHARS //
+                              (2 + addr_chars +
+                               nwords_on_line * (1 + word_chars)))
+        buf = []  # type: List[str]
+        num_full = len(self.words) - len(self.words) % nwords_on_line
+        for start_idx in range(0, num_full, nwords_on_line):
+            buf.append(line_fmt.format(self.base_addr + start_idx,
+                                       *self.words[start_idx:
+                                                   start_idx + nwords_on_line]))
+            if len(buf) == lines_per_write:
+                outfile.write(''.join(buf))
+                buf.clear()
+
+        # The last line might be shorter.
+        if num_full < len(self.words):
+            tail = self.words[num_full:]
+            buf.append((addr_fmt + word_fmt * len(tail) + '\n')
+                       .format(self.base_addr + num_full, *tail))
+        outfile.write(''.join(buf))
 
     def add_ecc32(self, config: Dict[str, Any]) -> None:
         '''Add ECC32 integrity bits
@@ -54,7 +123,8 @@ class MemChunk:
         bits, to make 39-bit words.
 
         '''
-        self.words = ecc_encode_some(config, 'inv_hsiao', 32, self.words)[0]
+        codec = secded_codec(config, 'inv_hsiao', 32)
+        self.words = word_array(codec.n, codec.encode_many(self.words))
 
 
 class MemFile:
@@ -106,53 +176,138 @@ class MemFile:
         return (addr, words)
 
     @staticmethod
-    def _load_preproc(width: int, infile: IO[str]) -> 'MemFile':
+    def _parse_words(width: int, tokens: List[str],
+                     lines: List[str]) -> List[int]:
+        '''Parse word tokens from some lines of a preprocessed vmem file
+
+        This converts all the tokens in one go, which is much quicker than
+        going through them one at a time like _parse_line does. If one of them
+        is not a valid word, lines are parsed again with _parse_line to raise
+        the right error.
+
+        '''
+        try:
+            words = list(map(int, tokens, repeat(16)))
+            if not words or (min(words) >= 0 and not max(words) >> width):
+                return words
+        except ValueError:
+            pass
+
+        for line in lines:
+            MemFile._parse_line(width, line)
+        raise AssertionError('_parse_line accepted all the lines.')
+
+    @staticmethod
+    def _flush_words(width: int, chunk: Optional[MemChunk], tokens: List[str],
+                     lines: List[str]) -> None:
+        '''Parse the pending word tokens onto the end of chunk'''
+        if chunk is not None:
+            chunk.words.extend(MemFile._parse_words(width, tokens, lines))
+        tokens.clear()
+        lines.clear()
+
+    @staticmethod
+    def _load_preproc(width: int, infile: Iterable[str]) -> 'MemFile':
         '''Load a pre-processed file'''
         chunks = []
         next_chunk = None  # type: Optional[MemChunk]
+        chunk_end = 0
+
+        # The word tokens that have been read for next_chunk but not parsed
+        # yet, and the lines they came from (for error messages). These are
+        # parsed in batches of up to _PARSE_BATCH_WORDS words.
+        tokens = []  # type: List[str]
+        lines = []  # type: List[str]
+
         for line in infile:
+            line_tokens = line.split()
+
             # If the line is empty or whitespace, skip it.
-            if not line or line.isspace():
+            if not line_tokens:
                 continue
 
-            line_addr, line_words = MemFile._parse_line(width, line)
+            if _VMEM_ADDR_RE.match(line_tokens[0]) is None:
+                MemFile._flush_words(width, next_chunk, tokens, lines)
+                MemFile._parse_line(width, line)
+                raise AssertionError('_parse_line accepted a bad address.')
+            line_addr = int(line_tokens[0][1:], 16)
 
             # If there aren't actually any words on the line, skip it.
-            if not line_words:
+            if len(line_tokens) == 1:
                 continue
 
-            if next_chunk is None:
-                next_chunk = MemChunk(line_addr, line_words)
-                continue
+            if next_chunk is not None and line_addr != chunk_end:
+                MemFile._flush_words(width, next_chunk, tokens, lines)
+                if line_addr < chunk_end:
+                    raise ValueError("Cannot read data starting at {:#x}: "
+                                     "we're already at {:#x}, so this would "
+                                     "go backwards."
+                                     .format(line_addr, chunk_end))
 
-            # Glue the line onto the current chunk if there's no gap
-            chunk_end = next_chunk.next_addr()
-            if line_addr < chunk_end:
-                raise ValueError("Cannot read data starting at {:#x}: "
-                                 "we're already at {:#x}, so this would "
-                                 "go backwards."
-                                 .format(line_addr, chunk_end))
-            if line_addr == chunk_end:
-                next_chunk.words += line_words
-                continue
+                # If we're here, there's a gap between the current chunk and
+                # line_addr.
+                chunks.append(next_chunk)
+                next_chunk = None
 
-            # If we're here, there's a gap between the current chunk and
-            # line_addr.
-            chunks.append(next_chunk)
-            next_chunk = MemChunk(line_addr, line_words)
+            if next_chunk is None:
+                next_chunk = MemChunk(line_addr, word_array(width))
+                chunk_end = line_addr
+
+            # Glue the line onto the current chunk
+            del line_tokens[0]
+            tokens += line_tokens
+            lines.append(line)
+            chunk_end += len(line_tokens)
+            if len(tokens) >= _PARSE_BATCH_WORDS:
+                MemFile._flush_words(width, next_chunk, tokens, lines)
 
         if next_chunk is not None:
+            MemFile._flush_words(width, next_chunk, tokens, lines)
             chunks.append(next_chunk)
 
         return MemFile(width, chunks)
 
     @staticmethod
-    def load_vmem(width: int, infile: TextIO) -> 'MemFile':
+    def _might_need_cpp(infile: IO[Any]) -> bool:
+        '''Check whether a VMEM file might contain comments
+
+        This scans infile in blocks for characters that can start a comment
+        or a preprocessor directive and then seeks back to where it started.
+        If infile can't seek, it returns True.
+
+        '''
+        if not infile.seekable():
+            return True
+
+        start = infile.tell()
+        try:
+            while True:
+                block = infile.read(_SCAN_BLOCK_SIZE)
+                if not block:
+                    return False
+                if isinstance(block, bytes):
+                    block = block.decode('ascii', 'replace')
+                if '/' in block or '#' in block:
+                    return True
+        finally:
+            infile.seek(start)
+
+    @staticmethod
+    def load_vmem(width: int, infile: IO[Any]) -> 'MemFile':
         '''Read a VMEM file
 
-        This assumes that all words fit in the given width.
+        This assumes that all words fit in the given width. infile can be
+        opened in text or binary mode.
 
         '''
+        if not MemFile._might_need_cpp(infile):
+            # The file is read a line at a time, so this only needs memory for
+            # the words themselves.
+            if isinstance(infile, io.TextIOBase):
+                return MemFile._load_preproc(width, infile)
+            return MemFile._load_preproc(
+                width, (line.decode('ascii', 'replace') for line in infile))
+
         with tempfile.TemporaryFile('w+') as tmp:
             # First, run cpp as a subprocess to strip out any comments. These
             # are allowed by the vmem format as described in srec_vmem(5) and
@@ -250,20 +405,13 @@ class MemFile:
         # merging in the previous pass, we know this won't cause any overlaps.
         chunks = []  # type: List[MemChunk]
         for lma_word, _, data in merged_segments:
-            words = []
-            word = 0
-            for idx, byte in enumerate(data):
-                shift = 8 * (idx % 4)
-                word |= byte << shift
-                if idx % 4 == 3:
-                    words.append(word)
-                    word = 0
-            # idx here will be the index of the last byte. If data ended with a
-            # partial word, idx will be something other than 3 mod 4.
-            if idx % 4 != 3:
-                words.append(word)
-
-            chunks.append(MemChunk(lma_word, words))
+            words32 = array('I')
+            assert words32.itemsize == 4
+            words32.frombytes(data + bytes(-len(data) % 4))
+            if sys.byteorder != 'little':
+                words32.byteswap()
+
+            chunks.append(MemChunk(lma_word, word_array(32, words32)))
 
         return MemFile(32, chunks)
 
@@ -276,6 +424,82 @@ class MemFile:
         for chunk in self.chunks:
             chunk.write_vmem(self.width, outfile)
 
+    def write_sidecar(self, outfile: BinaryIO) -> None:
+        '''Write data to a binary sidecar file
+
+        This is a compact alternative to a VMEM file that load_sidecar can map
+        into memory without parsing anything. It starts with a header giving
+        the width and the base address and length of each chunk, followed by
+        the words of the chunks as little-endian 32-bit (for a width of at
+        most 32) or 64-bit unsigned integers. Words wider than 64 bits are not
+        supported.
+
+        '''
+        if self.width > 64:
+            raise ValueError('Cannot write {}-bit words to a sidecar file: '
+                             'the maximum width is 64.'.format(self.width))
+        typecode = 'I' if self.width <= 32 else 'Q'
+        word_bytes = 4 if typecode == 'I' else 8
+
+        outfile.write(_SIDECAR_HEADER.pack(_SIDECAR_MAGIC, self.width,
+                                           word_bytes, len(self.chunks)))
+        for chunk in self.chunks:
+            outfile.write(_SIDECAR_CHUNK.pack(chunk.base_addr,
+                                              len(chunk.words)))
+        for chunk in self.chunks:
+            words = array(typecode, chunk.words)
+            assert words.itemsize == word_bytes
+            if sys.byteorder != 'little':
+                words.byteswap()
+            outfile.write(words.tobytes())
+
+    @staticmethod
+    def load_sidecar(path: str) -> 'MemFile':
+        '''Read a binary sidecar file written by write_sidecar
+
+        On a little-endian machine, the words of each chunk are a memoryview
+        of a private memory mapping of the file, so they are only read from
+        disk when used and writing to them doesn't change the file.
+
+        '''
+        with open(path, 'rb') as handle:
+            if handle.seek(0, io.SEEK_END) == 0:
+                raise ValueError('{} is empty, so is not a sidecar file.'
+                                 .format(path))
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        view = memoryview(mapped)
+        if len(view) < _SIDECAR_HEADER.size:
+            raise ValueError('{} is too short to be a sidecar file.'
+                             .format(path))
+        magic, width, word_bytes, num_chunks = \
+            _SIDECAR_HEADER.unpack_from(view)
+        if magic != _SIDECAR_MAGIC or word_bytes not in [4, 8]:
+            raise ValueError('{} is not a sidecar file.'.format(path))
+
+        offset = _SIDECAR_HEADER.size
+        bounds = []
+        for _ in range(num_chunks):
+            bounds.append(_SIDECAR_CHUNK.unpack_from(view, offset))
+            offset += _SIDECAR_CHUNK.size
+
+        typecode = 'I' if word_bytes == 4 else 'Q'
+        chunks = []
+        for base_addr, num_words in bounds:
+            data = view[offset:offset + num_words * word_bytes]
+            offset += num_words * word_bytes
+            if len(data) != num_words * word_bytes:
+                raise ValueError('{} is truncated.'.format(path))
+            if sys.byteorder == 'little':
+                words = cast(MutableSequence[int], data.cast(typecode))
+            else:
+                swapped = array(typecode, data.tobytes())
+                swapped.byteswap()
+                words = swapped
+            chunks.append(MemChunk(base_addr, words))
+
+        return MemFile(width, chunks)
+
     def flatten(self, size: int) -> 'MemFile':
         '''Flatten into a single chunk, padding with zeroes
 
@@ -285,7 +509,7 @@ class MemFile:
         '''
         assert self.next_addr() <= size
 
-        acc = MemChunk(0, [])
+        acc = MemChunk(0, word_array(self.width))
         # Add each chunk
         for chunk in self.chunks:
             acc_end = acc.next_addr()
@@ -294,10 +518,10 @@ class MemFile:
             # If there's a gap before the chunk, pad it out with zeroes
             padding_len = chunk.base_addr - acc_end
             if padding_len:
-                acc.words += [0 for _ in range(padding_len)]
+                acc.words.extend(repeat(0, padding_len))
 
             assert acc.next_addr() == chunk.base_addr
-            acc.words += chunk.words
+            acc.words.extend(chunk.words)
 
         acc_end = acc.next_addr()
         assert acc_end == self.next_addr()
@@ -305,7 +529,7 @@ class MemFile:
         # If there's a gap after the last chunk, pad it out with zeroes
         padding_len = size - acc_end
         if padding_len:
-            acc.words += [0 for _ in range(padding_len)]
+            acc.words.extend(repeat(0, padding_len))
 
         assert acc.next_addr() == size
 
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from mem import MemChunk, MemFile
+
+
+class TestVmem(unittest.TestCase):
+
+    def test_write_vmem(self) -> None:
+        mem = MemFile(32, [MemChunk(0x10, list(range(9))),
+                           MemChunk(0x40, [0xdeadbeef])])
+        out = io.StringIO()
+        mem.write_vmem(out)
+        self.assertEqual(out.getvalue(),
+                         '@00000010 00000000 00000001 00000002 00000003 '
+                         '00000004 00000005 00000006\n'
+                         '@00000017 00000007 00000008\n'
+                         '@00000040 DEADBEEF\n')
+
+    def test_round_trip(self) -> None:
+        rnd = random.Random(1)
+        for width in [8, 32, 39, 64, 72]:
+            with self.subTest(width=width):
+                chunks = [MemChunk(0, [rnd.getrandbits(width)
+                                       for _ in range(1000)]),
+                          MemChunk(2000, [rnd.getrandbits(width)
+                                          for _ in range(3)])]
+                out = io.StringIO()
+                MemFile(width, chunks).write_vmem(out)
+                out.seek(0)
+                mem = MemFile.load_vmem(width, out)
+                self.assertEqual([(c.base_addr, list(c.words))
+                                  for c in mem.chunks],
+                                 [(c.base_addr, list(c.words))
+                                  for c in chunks])
+
+    def test_merge_lines(self) -> None:
+        text = '@0 1 2\n\n@2 3  4\n  @10 5\n'
+        mem = MemFile.load_vmem(8, io.StringIO(text))
+        self.assertEqual([(c.base_addr, list(c.words)) for c in mem.chunks],
+                         [(0, [1, 2, 3, 4]), (0x10, [5])])
+
+    def test_bad_lines(self) -> None:
+        for text in ['1 2 3\n', '@0 1 zz\n', '@0 100\n', '@4 1\n@0 2\n']:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    MemFile.load_vmem(8, io.StringIO(text))
+
+    @unittest.skipIf(shutil.which('cpp') is None, 'needs cpp')
+    def test_comments(self) -> None:
+        text = b'// A comment\n@0 1 /* two */ 2\n@2 3\n'
+        with tempfile.TemporaryFile() as handle:
+            handle.write(text)
+            handle.seek(0)
+            mem = MemFile.load_vmem(8, handle)
+        self.assertEqual([(c.base_addr, list(c.words)) for c in mem.chunks],
+                         [(0, [1, 2, 3])])
+
+
+class TestSidecar(unittest.TestCase):
+
+    def round_trip(self, mem: MemFile) -> MemFile:
+        handle, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(handle, 'wb') as outfile:
+                mem.write_sidecar(outfile)
+            return MemFile.load_sidecar(path)
+        finally:
+            os.remove(path)
+
+    def test_round_trip(self) -> None:
+        rnd = random.Random(2)
+        for width in [32, 39, 64]:
+            with self.subTest(width=width):
+                chunks = [MemChunk(0x100, [rnd.getrandbits(width)
+                                           for _ in range(100)]),
+                          MemChunk(0x1000, []),
+                          MemChunk(0x2000, [(1 << width) - 1])]
+                mem = self.round_trip(MemFile(width, chunks))
+                self.assertEqual(mem.width, width)
+                self.assertEqual([(c.base_addr, list(c.words))
+                                  for c in mem.chunks],
+                                 [(c.base_addr, list(c.words))
+                                  for c in chunks])
+
+                # The words can be changed and used like any others.
+                mem.chunks[0].words[0] = 1
+                flat = mem.flatten(0x2001)
+                self.assertEqual(flat.chunks[0].words[0x100], 1)
+
+    def test_too_wide(self) -> None:
+        with self.assertRaises(ValueError):
+            self.round_trip(MemFile(72, [MemChunk(0, [0])]))
+
+    def test_not_sidecar(self) -> None:
+        with tempfile.NamedTemporaryFile() as handle:
+            handle.write(b'@0 1 2 3\n' * 4)
+            handle.flush()
+            with self.assertRaises(ValueError):
+                MemFile.load_sidecar(handle.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,13 +6,13 @@
 
 import argparse
 import sys
-from typing import Dict, List, IO
+from typing import Dict, List, IO, Optional, Sequence, Tuple
 
 import hjson  # type: ignore
 from Crypto.Hash import cSHAKE256
 
 from mem import MemChunk, MemFile
-from util.design.prince import prince, sbox  # type: ignore
+from util.design.prince import Prince, sbox  # type: ignore
 from util.design.secded_gen import ecc_encode_some  # type: ignore
 from util.design.secded_gen import load_secded_config
 
@@ -122,6 +122,10 @@ class Scrambler:
         self.hash_file = hash_file
 
         self._addr_width = (rom_size_words - 1).bit_length()
+        self._prince = Prince(key, self.num_rounds_half)
+        # The logical address of each physical address and vice versa,
+        # computed on first use (see _addr_maps).
+        self._addr_map: Optional[Tuple[List[int], List[int]]] = None
 
     @staticmethod
     def _get_rom_ctrl(modules: List[object]) -> _UDict:
@@ -200,21 +204,45 @@ class Scrambler:
         # Add the 8 trailing zero words. We do it here, rather than passing
         # rom_size_words to mem.flatten, to make sure that we see the error if
         # mem is too big.
-        flattened.chunks[0].words += [0] * digest_size_words
+        flattened.chunks[0].words.extend([0] * digest_size_words)
 
         return flattened
 
     def get_keystream(self, log_addr: int, width: int) -> int:
-        assert (log_addr >> self._addr_width) == 0
+        return self.get_keystreams([log_addr], width)[0]
+
+    def get_keystreams(self, log_addrs: Sequence[int],
+                       width: int) -> List[int]:
+        '''Get the keystreams for the given logical addresses in one go'''
+        assert all((log_addr >> self._addr_width) == 0
+                   for log_addr in log_addrs)
         assert 0 < width <= 64
 
         data_nonce_width = 64 - self._addr_width
         data_scr_nonce = self.nonce & ((1 << data_nonce_width) - 1)
-        to_scramble = (data_scr_nonce << self._addr_width) | log_addr
-        full_keystream = int(
-            prince(to_scramble, self.key, self.num_rounds_half))
+        nonce_bits = data_scr_nonce << self._addr_width
+        full_keystreams = self._prince.encrypt_many(
+            nonce_bits | log_addr for log_addr in log_addrs)
+
+        mask = (1 << width) - 1
+        return [keystream & mask for keystream in full_keystreams]
 
-        return full_keystream & ((1 << width) - 1)
+    def _addr_maps(self) -> Tuple[List[int], List[int]]:
+        '''Get the address S&P permutation over the whole ROM
+
+        Returns a pair (phy_to_log, log_to_phy) of lists, where phy_to_log[i]
+        is addr_sp_dec(i) and log_to_phy[i] is addr_sp_enc(i).
+
+        '''
+        if self._addr_map is None:
+            phy_to_log = [self.addr_sp_dec(phy_addr)
+                          for phy_addr in range(self.rom_size_words)]
+            log_to_phy = [0] * self.rom_size_words
+            for phy_addr, log_addr in enumerate(phy_to_log):
+                assert 0 <= log_addr < self.rom_size_words
+                log_to_phy[log_addr] = phy_addr
+            self._addr_map = (phy_to_log, log_to_phy)
+        return self._addr_map
 
     def addr_sp_enc(self, log_addr: int) -> int:
         assert self._addr_width < 64
@@ -269,15 +297,18 @@ class Scrambler:
 
         assert width <= 64
 
-        scrambled = []
-        for phy_addr in range(self.rom_size_words):
-            log_addr = self.addr_sp_dec(phy_addr)
-            assert 0 <= log_addr < self.rom_size_words
+        # Compute the keystreams of all words in one go, in physical address
+        # order.
+        phy_to_log, _ = self._addr_maps()
+        keystreams = self.get_keystreams(phy_to_log, width)
 
-            clr_data = mem.chunks[0].words[log_addr]
+        clr_words = mem.chunks[0].words
+        scrambled = []
+        for log_addr, keystream in zip(phy_to_log, keystreams):
+            clr_data = clr_words[log_addr]
             assert 0 <= clr_data < (1 << width)
 
-            scrambled.append(self.scramble_word(width, log_addr, clr_data))
+            scrambled.append(keystream ^ clr_data)
 
         return MemFile(mem.width, [MemChunk(0, scrambled)])
 
@@ -301,9 +332,10 @@ class Scrambler:
         num_digest_words = 256 // 32
 
         # Read out the scrambled data in logical address order
-        to_hash = b''
+        _, log_to_phy = self._addr_maps()
+        to_hash = bytearray()
         for log_addr in range(self.rom_size_words - num_digest_words):
-            phy_addr = self.addr_sp_enc(log_addr)
+            phy_addr = log_to_phy[log_addr]
             scr_word = scr_chunk.words[phy_addr]
             # Note that a scrambled word with ECC amounts to 39bit. The
             # expression (39 + 7) // 8 calculates the amount of bytes that are
@@ -311,7 +343,7 @@ class Scrambler:
             to_hash += scr_word.to_bytes((39 + 7) // 8, byteorder='little')
 
         # Hash it
-        hash_obj = cSHAKE256.new(data=to_hash,
+        hash_obj = cSHAKE256.new(data=bytes(to_hash),
                                  custom='ROM_CTRL'.encode('UTF-8'))
         digest_bytes = hash_obj.read(bytes_per_word * num_digest_words)
         digest256 = int.from_bytes(digest_bytes, byteorder='little')
@@ -346,7 +378,7 @@ class Scrambler:
             # should have given us an invalid checksum.
             assert found_mismatch
 
-            phy_addr = self.addr_sp_enc(log_addr)
+            phy_addr = log_to_phy[log_addr]
             scr_chunk.words[phy_addr] = w32
             print(f'  {w32:#08x},', file = self.hash_file)
         print('};', file = self.hash_file)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark gen-flash-img.py on a full flash bank.
+
+Adds integrity and reliability ECC to, and scrambles, the 64-bit words of a
+random image (256 pages of 2 KiB by default, the size of a flash bank) with
+random scrambling keys. This is done word by word (_reformat_flash_word), and
+in stages (_reformat_flash_pages) with one and with --jobs processes, and
+checks that all give the same words.
+
+Usage:
+
+    python3 util/design/bench-flash-img.py --pages 256 --jobs 4
+"""
+
+import argparse
+import importlib
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import secded_gen  # noqa: E402
+
+gen_flash_img = importlib.import_module("gen-flash-img")
+
+
+def bench(name: str, func) -> object:
+    start = time.perf_counter()
+    result = func()
+    print('  {:<16} {:8.3f}s'.format(name, time.perf_counter() - start))
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages',
+                        type=int,
+                        default=256,
+                        help='Image size in flash pages (default: 256).')
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=os.cpu_count() or 1,
+                        help='Number of processes (default: all CPUs).')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=1,
+                        help='Seed of the random image (default: 1).')
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    num_words = args.pages * gen_flash_img.FLASH_PAGE_WORDS
+    words = [rnd.getrandbits(gen_flash_img.FLASH_WORD_SIZE)
+             for _ in range(num_words)]
+    word_addrs = list(range(num_words))
+    ecc_configs = secded_gen.load_secded_config()
+
+    for scrambling_enabled in [False, True]:
+        configs = gen_flash_img.FlashScramblingConfigs(
+            scrambling_enabled=scrambling_enabled,
+            addr_key=rnd.getrandbits(gen_flash_img.FLASH_ADDR_KEY_SIZE),
+            data_key=rnd.getrandbits(gen_flash_img.FLASH_DATA_KEY_SIZE))
+        print('{} words, scrambling {}:'.format(
+            num_words, 'enabled' if scrambling_enabled else 'disabled'))
+        serial = bench('word by word', lambda: [
+            gen_flash_img._reformat_flash_word(ecc_configs, w, a, configs)
+            for w, a in zip(words, word_addrs)
+        ])
+        for jobs in sorted({1, args.jobs}):
+            staged = bench(
+                'staged, -j {}'.format(jobs),
+                lambda: gen_flash_img._reformat_flash_pages(
+                    words, word_addrs, configs, jobs))
+            if staged != serial:
+                print('Reformatted words differ', file=sys.stderr)
+                return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
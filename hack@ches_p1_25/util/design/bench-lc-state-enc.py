@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark the generation of the life cycle state encoding.
+
+Generates the encoding of lc_ctrl_state.hjson without the cache, then twice
+with an empty cache directory (the second time, the words come from the
+cache) and fails if generating it without the cache takes longer than
+--max-time seconds.
+
+Usage:
+
+    python3 util/design/bench-lc-state-enc.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+import hjson
+from lib.LcStEnc import LcStEnc
+
+LC_STATE_DEFINITION_FILE = (Path(__file__).resolve().parents[2] /
+                            'hw/ip/lc_ctrl/data/lc_ctrl_state.hjson')
+
+
+def timed(name: str, cache_dir: str) -> Tuple[dict, float]:
+    with open(LC_STATE_DEFINITION_FILE, 'r') as infile:
+        config = hjson.load(infile)
+    os.environ['REGGEN_CACHE_DIR'] = cache_dir
+    start = time.perf_counter()
+    config = LcStEnc(config).config
+    secs = time.perf_counter() - start
+    print('  {:<10} {:8.3f}s'.format(name, secs))
+    return config, secs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-time',
+                        type=float,
+                        default=10,
+                        help='Max time in seconds to generate the encoding '
+                        'without the cache (default: 10).')
+    args = parser.parse_args()
+
+    print('LcStEnc:')
+    config, secs = timed('uncached', '')
+    with tempfile.TemporaryDirectory() as cache_dir:
+        timed('cold', cache_dir)
+        cached_config, _ = timed('warm', cache_dir)
+
+    if cached_config['genwords'] != config['genwords']:
+        print('Cached words differ', file=sys.stderr)
+        return 1
+    if secs > args.max_time:
+        print('Generating the encoding took longer than {}s'.format(
+            args.max_time), file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
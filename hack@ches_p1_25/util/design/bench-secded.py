@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark SECDED code generation and the encoding and decoding of a flash
+image.
+
+Generates each Hsiao code configured in secded_cfg.hjson and fails if any
+takes longer than --max-gen-time seconds. Then encodes the 64-bit words of a
+random image (1 MiB by default, the size of a flash bank) with the 72/64
+Hamming and Hsiao codes, both bit by bit (SecdedCodec.encode_serial) and with
+the table-driven encode_many, checks that both give the same codewords and
+decodes them again with decode_many.
+
+Usage:
+
+    python3 util/design/bench-secded.py --size 1048576
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Tuple
+
+import secded_gen
+
+WORD_BITS = 64
+
+
+def timed(name: str, func) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func()
+    secs = time.perf_counter() - start
+    print('  {:<18} {:8.3f}s'.format(name, secs))
+    return result, secs
+
+
+def bench(name: str, func) -> object:
+    return timed(name, func)[0]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size',
+                        type=int,
+                        default=1 << 20,
+                        help='Image size in bytes (default: 1 MiB).')
+    parser.add_argument('--seed',
+                        type=int,
+                        default=1,
+                        help='Seed of the random image (default: 1).')
+    parser.add_argument('--max-gen-time',
+                        type=float,
+                        default=10,
+                        help='Max time in seconds to generate a code '
+                        '(default: 10).')
+    args = parser.parse_args()
+
+    config = secded_gen.load_secded_config()
+    print('gen_code:')
+    for cfg in config['cfgs']:
+        if cfg['code_type'] not in ['hsiao', 'inv_hsiao']:
+            continue
+        name = '{} {}/{}'.format(cfg['code_type'], cfg['k'] + cfg['m'],
+                                 cfg['k'])
+        _, secs = timed(
+            name,
+            lambda: secded_gen.gen_code(cfg['code_type'], cfg['k'], cfg['m']))
+        if secs > args.max_gen_time:
+            print('Generating {} took longer than {}s'.format(
+                name, args.max_gen_time), file=sys.stderr)
+            return 1
+
+    rnd = random.Random(args.seed)
+    num_words = args.size // (WORD_BITS // 8)
+    words = [rnd.getrandbits(WORD_BITS) for _ in range(num_words)]
+
+    for codetype in ['hamming', 'hsiao']:
+        codec = secded_gen.secded_codec(config, codetype, WORD_BITS)
+        print('{} {}/{}, {} words:'.format(codetype, codec.n, codec.k,
+                                           num_words))
+        serial = bench('encode_serial',
+                       lambda: [codec.encode_serial(w) for w in words])
+        codewords = bench('encode_many', lambda: codec.encode_many(words))
+        if serial != codewords:
+            print('Codewords differ', file=sys.stderr)
+            return 1
+        datawords, errors = bench('decode_many',
+                                  lambda: codec.decode_many(codewords))
+        if datawords != words or any(errors):
+            print('Decoding failed', file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import importlib
+import random
+import tempfile
+import unittest
+
+import secded_gen
+
+gen_flash_img = importlib.import_module("gen-flash-img")
+
+
+class TestReformatFlashWords(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(1)
+        self.ecc_configs = secded_gen.load_secded_config()
+        num_words = 3 * gen_flash_img.FLASH_PAGE_WORDS + 5
+        self.words = [self.rnd.getrandbits(64) for _ in range(num_words)]
+        self.words[:2] = [0, (1 << 64) - 1]
+        # Include addresses that overlap with the key bits of operand a.
+        self.word_addrs = [self.rnd.getrandbits(20) for _ in self.words]
+
+    def check(self, configs, jobs):
+        expected = [
+            gen_flash_img._reformat_flash_word(self.ecc_configs, w, a, configs)
+            for w, a in zip(self.words, self.word_addrs)
+        ]
+        self.assertEqual(
+            gen_flash_img._reformat_flash_pages(self.words, self.word_addrs,
+                                                configs, jobs), expected)
+
+    def test_unscrambled(self):
+        self.check(gen_flash_img.FlashScramblingConfigs(), 1)
+
+    def test_scrambled(self):
+        configs = gen_flash_img.FlashScramblingConfigs(
+            scrambling_enabled=True,
+            addr_key=self.rnd.getrandbits(128),
+            data_key=self.rnd.getrandbits(128))
+        for jobs in [1, 2]:
+            with self.subTest(jobs=jobs):
+                self.check(configs, jobs)
+
+
+class TestReformatFlashVmem(unittest.TestCase):
+
+    def test_layout(self):
+        text = ('// A comment\n'
+                '@00000000 0000000000000001 0000000000000002\n'
+                '\n'
+                '@00000010 0000000000000003 @00000020 0000000000000004\n')
+        with tempfile.NamedTemporaryFile('w', suffix='.vmem') as handle:
+            handle.write(text)
+            handle.flush()
+            layout, words, word_addrs = gen_flash_img._load_flash_vmem(
+                handle.name)
+            lines = gen_flash_img._reformat_flash_vmem(
+                handle.name, gen_flash_img.FlashScramblingConfigs())
+        self.assertEqual(layout, [[('@00000000', 2)],
+                                  [('@00000010', 1), ('@00000020', 1)]])
+        self.assertEqual(list(words), [1, 2, 3, 4])
+        self.assertEqual(list(word_addrs), [0, 1, 0x10, 0x20])
+
+        codec = secded_gen.secded_codec(secded_gen.load_secded_config(),
+                                        'hamming', 68)
+        intg = secded_gen.secded_codec(secded_gen.load_secded_config(),
+                                       'hamming', 64)
+        full = ['{:019X}'.format(codec.encode(intg.encode(w) & ((1 << 68) - 1)))
+                for w in [1, 2, 3, 4]]
+        self.assertEqual(lines, [
+            '@00000000 {} {}'.format(full[0], full[1]),
+            '@00000010 {}@00000020 {}'.format(full[2], full[3])
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
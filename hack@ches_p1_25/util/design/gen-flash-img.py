@@ -8,16 +8,25 @@ r"""Takes a compiled VMEM image and processes it for loading into flash.
     (integrity and reliablity), and optionally, scrambles the data using the
     same XEX scrambling scheme used in the flash controller. This enables
     backdoor loading the flash on simulation platforms (e.g., DV and Verilator).
+
+    All words of the image are processed together, in stages: integrity ECC,
+    scrambling (XEX masks and PRINCE) and reliability ECC. With -j, the pages
+    of the image are split across several processes.
 """
 
 import argparse
+import functools
 import logging as log
 import re
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from enum import Enum
+from itertools import repeat
+from operator import xor
 from pathlib import Path
-from typing import List
+from typing import List, Sequence, Tuple
 
 import hjson
 from pyfinite import ffield
@@ -54,6 +63,7 @@ FLASH_ADDR_SIZE = 16  # bits
 FLASH_INTEGRITY_ECC_SIZE = 4  # bits
 FLASH_RELIABILITY_ECC_SIZE = 8  # bits
 FLASH_PRINCE_NUM_HALF_ROUNDS = 5
+FLASH_PAGE_SIZE = 2048  # bytes
 
 
 class FlashScramblingKeyType(Enum):
@@ -89,6 +99,8 @@ FLASH_GF_2_64 = ffield.FField(64,
 FLASH_VMEM_WORD_SIZE = (FLASH_WORD_SIZE + FLASH_INTEGRITY_ECC_SIZE +
                         FLASH_RELIABILITY_ECC_SIZE)
 VMEM_FORMAT_STR = " {:0" + f"{FLASH_VMEM_WORD_SIZE // 4}" + "X}"
+FLASH_PAGE_WORDS = FLASH_PAGE_SIZE * 8 // FLASH_WORD_SIZE
+FLASH_INTEGRITY_ECC_MASK = (2**FLASH_INTEGRITY_ECC_SIZE) - 1
 # ------------------------------------------------------------------------------
 
 
@@ -129,6 +141,47 @@ def _xex_scramble(data: int, word_addr: int, flash_addr_key: int,
                          FLASH_PRINCE_NUM_HALF_ROUNDS) ^ mask
 
 
+@functools.lru_cache(maxsize=4)
+def _xex_mask_tables(flash_addr_key: int) -> List[List[int]]:
+    """Returns lookup tables for the XEX masks of an address key.
+
+    The mask of a word is the GF(2^64) product of operand a (key bits and the
+    word address) and operand b (key bits). The product is linear in operand
+    a, so it is the XOR of the products of each byte of operand a, which are
+    looked up in one table per byte. The tables are in turn built from the
+    products of the single bits.
+    """
+    operand_b = flash_addr_key & FLASH_GF_OPERAND_B_MASK
+    bit_products = [
+        FLASH_GF_2_64.Multiply(1 << i, operand_b)
+        for i in range(FLASH_WORD_SIZE)
+    ]
+    tables = []
+    for i in range(0, FLASH_WORD_SIZE, 8):
+        table = [0] * 256
+        for value in range(1, 256):
+            low_bit = (value & -value).bit_length() - 1
+            table[value] = (table[value & (value - 1)] ^
+                            bit_products[i + low_bit])
+        tables.append(table)
+    return tables
+
+
+def _xex_masks(word_addrs: Sequence[int], flash_addr_key: int) -> List[int]:
+    """Returns the XEX masks of many words (see _xex_scramble)."""
+    t0, t1, t2, t3, t4, t5, t6, t7 = _xex_mask_tables(flash_addr_key)
+    key_bits = ((flash_addr_key & FLASH_GF_OPERAND_A_MASK) >>
+                (FLASH_WORD_SIZE - FLASH_ADDR_SIZE))
+    masks = []
+    for word_addr in word_addrs:
+        a = key_bits | word_addr
+        masks.append(t0[a & 0xff] ^ t1[(a >> 8) & 0xff] ^
+                     t2[(a >> 16) & 0xff] ^ t3[(a >> 24) & 0xff] ^
+                     t4[(a >> 32) & 0xff] ^ t5[(a >> 40) & 0xff] ^
+                     t6[(a >> 48) & 0xff] ^ t7[a >> 56])
+    return masks
+
+
 def _convert_array_2_int(data_array: List[int],
                          data_size: int,
                          little_endian=True) -> int:
@@ -284,9 +337,96 @@ def _compute_flash_scrambling_keys(
         scrambling_configs, FlashScramblingKeyType.DATA)
 
 
-def _reformat_flash_vmem(
-        flash_vmem_file: str,
-        scrambling_configs: FlashScramblingConfigs) -> List[str]:
+@functools.lru_cache(maxsize=None)
+def _flash_codecs() -> Tuple[secded_gen.SecdedCodec, secded_gen.SecdedCodec]:
+    """Returns the integrity and reliability ECC codecs."""
+    ecc_configs = secded_gen.load_secded_config()
+    return (secded_gen.secded_codec(ecc_configs, "hamming", FLASH_WORD_SIZE),
+            secded_gen.secded_codec(ecc_configs, "hamming",
+                                    FLASH_WORD_SIZE + FLASH_INTEGRITY_ECC_SIZE))
+
+
+def _reformat_flash_word(ecc_configs, data: int, word_addr: int,
+                         scrambling_configs: FlashScramblingConfigs) -> int:
+    """Adds ECC to, and potentially scrambles, a single flash word.
+
+    This is the word by word reference for _reformat_flash_words.
+    """
+    # `data_w_intg_ecc` will be in format {ECC bits, data bits}.
+    data_w_intg_ecc, _ = secded_gen.ecc_encode(ecc_configs, "hamming",
+                                               FLASH_WORD_SIZE, data)
+    # Due to storage constraints the first nibble of ECC is dropped.
+    data_w_intg_ecc &= 0xF_FFFF_FFFF_FFFF_FFFF
+    if scrambling_configs.scrambling_enabled:
+        intg_ecc = data_w_intg_ecc & (0xF << FLASH_WORD_SIZE)
+        data = _xex_scramble(data, word_addr, scrambling_configs.addr_key,
+                             scrambling_configs.data_key)
+        data_w_intg_ecc = intg_ecc | data
+    # `data_w_full_ecc` will be in format {reliablity ECC bits,
+    # integrity ECC bits, data bits}.
+    data_w_full_ecc, _ = secded_gen.ecc_encode(
+        ecc_configs, "hamming", FLASH_WORD_SIZE + FLASH_INTEGRITY_ECC_SIZE,
+        data_w_intg_ecc)
+    return data_w_full_ecc
+
+
+def _reformat_flash_words(
+        words: Sequence[int], word_addrs: Sequence[int],
+        scrambling_configs: FlashScramblingConfigs) -> List[int]:
+    """Adds ECC to, and potentially scrambles, many flash words.
+
+    Each stage runs over all words before the next one starts. The result is
+    the same as calling _reformat_flash_word for each word.
+    """
+    intg_codec, rel_codec = _flash_codecs()
+
+    # Integrity ECC, of which only the first nibble is kept due to storage
+    # constraints.
+    intg_eccs = [(codeword >> FLASH_WORD_SIZE) & FLASH_INTEGRITY_ECC_MASK
+                 for codeword in intg_codec.encode_many(words)]
+
+    if scrambling_configs.scrambling_enabled:
+        masks = _xex_masks(word_addrs, scrambling_configs.addr_key)
+        ciphers = prince.prince_many(map(xor, words, masks),
+                                     scrambling_configs.data_key,
+                                     FLASH_PRINCE_NUM_HALF_ROUNDS)
+        words = list(map(xor, ciphers, masks))
+
+    # Reliability ECC over {integrity ECC bits, data bits}.
+    return rel_codec.encode_many([(intg_ecc << FLASH_WORD_SIZE) | data
+                                  for intg_ecc, data in zip(intg_eccs, words)])
+
+
+def _reformat_flash_pages(words: Sequence[int], word_addrs: Sequence[int],
+                          scrambling_configs: FlashScramblingConfigs,
+                          jobs: int) -> List[int]:
+    """Runs _reformat_flash_words on groups of pages in up to jobs processes."""
+    pages = -(-len(words) // FLASH_PAGE_WORDS)
+    chunk_size = -(-pages // max(jobs, 1)) * FLASH_PAGE_WORDS
+    if jobs <= 1 or chunk_size >= len(words):
+        return _reformat_flash_words(words, word_addrs, scrambling_configs)
+
+    reformatted_words = []
+    with ProcessPoolExecutor(max_workers=jobs) as ex:
+        futures = [
+            ex.submit(_reformat_flash_words, words[i:i + chunk_size],
+                      word_addrs[i:i + chunk_size], scrambling_configs)
+            for i in range(0, len(words), chunk_size)
+        ]
+        for future in futures:
+            reformatted_words.extend(future.result())
+    return reformatted_words
+
+
+def _load_flash_vmem(
+        flash_vmem_file: str
+) -> Tuple[List[List[Tuple[str, int]]], array, array]:
+    """Reads the words of a (raw) flash VMEM file.
+
+    Returns the layout of the file, as a list of (address item, number of
+    words) pairs for each line, and arrays of the data words and of their
+    word addresses.
+    """
     # Open (raw) flash VMEM file and read into memory, skipping comment lines.
     try:
         flash_vmem = Path(flash_vmem_file).read_text()
@@ -294,51 +434,54 @@ def _reformat_flash_vmem(
         raise Exception(f"Unable to open {flash_vmem_file}")
     flash_vmem_lines = re.findall(r"^@.*$", flash_vmem, flags=re.MULTILINE)
 
-    # Load project SECDED configuration.
-    ecc_configs = secded_gen.load_secded_config()
-
-    # Add integrity/reliability ECC, and potentially scramble, each flash word.
-    reformatted_vmem_lines = []
+    layout = []
+    words = array("Q")
+    word_addrs = array("Q")
     for line in flash_vmem_lines:
         line_items = line.split()
-        reformatted_line = ""
-        address = None
-        address_offset = 0
-        data = None
-        for item in line_items:
-            # Process the address first.
-            if re.match(r"^@", item):
-                reformatted_line += item
-                address = int(item.lstrip("@"), 16)
-                address_offset = 0
-            # Process the data words.
-            else:
-                data = int(item, 16)
-                # `data_w_intg_ecc` will be in format {ECC bits, data bits}.
-                data_w_intg_ecc, _ = secded_gen.ecc_encode(
-                    ecc_configs, "hamming", FLASH_WORD_SIZE, data)
-                # Due to storage constraints the first nibble of ECC is dropped.
-                data_w_intg_ecc &= 0xF_FFFF_FFFF_FFFF_FFFF
-                if scrambling_configs.scrambling_enabled:
-                    intg_ecc = data_w_intg_ecc & (0xF << FLASH_WORD_SIZE)
-                    data = _xex_scramble(data, address + address_offset,
-                                         scrambling_configs.addr_key,
-                                         scrambling_configs.data_key)
-                    data_w_intg_ecc = intg_ecc | data
-                # `data_w_full_ecc` will be in format {reliablity ECC bits,
-                # integrity ECC bits, data bits}.
-                data_w_full_ecc, _ = secded_gen.ecc_encode(
-                    ecc_configs, "hamming",
-                    FLASH_WORD_SIZE + FLASH_INTEGRITY_ECC_SIZE,
-                    data_w_intg_ecc)
-                reformatted_line += str.format(VMEM_FORMAT_STR,
-                                               data_w_full_ecc)
-                address_offset += 1
-
-        # Append reformatted line to what will be the new output VMEM file.
-        reformatted_vmem_lines.append(reformatted_line)
-
-    return reformatted_vmem_lines
+        # Usually, the only address of a line is at its start.
+        if "@" in line[1:]:
+            starts = [i for i, item in enumerate(line_items)
+                      if item.startswith("@")]
+        else:
+            starts = [0]
+        segments = []
+        for start, stop in zip(starts, starts[1:] + [len(line_items)]):
+            address = int(line_items[start].lstrip("@"), 16)
+            data = line_items[start + 1:stop]
+            words.extend(map(int, data, repeat(16)))
+            word_addrs.extend(range(address, address + len(data)))
+            segments.append((line_items[start], len(data)))
+        layout.append(segments)
+
+    return layout, words, word_addrs
+
+
+def _format_flash_vmem(layout: List[List[Tuple[str, int]]],
+                       words: List[int]) -> List[str]:
+    """Formats reformatted words into VMEM lines with the given layout."""
+    fmt = VMEM_FORMAT_STR.format
+    lines = []
+    pos = 0
+    for segments in layout:
+        items = []
+        for address_item, num_words in segments:
+            items.append(address_item)
+            items.extend(map(fmt, words[pos:pos + num_words]))
+            pos += num_words
+        lines.append("".join(items))
+    return lines
+
+
+def _reformat_flash_vmem(flash_vmem_file: str,
+                         scrambling_configs: FlashScramblingConfigs,
+                         jobs: int = 1) -> List[str]:
+    # Read all words of the image, add integrity/reliability ECC, and
+    # potentially scramble them, and format them again in the same layout.
+    layout, words, word_addrs = _load_flash_vmem(flash_vmem_file)
+    reformatted_words = _reformat_flash_pages(words, word_addrs,
+                                              scrambling_configs, jobs)
+    return _format_flash_vmem(layout, reformatted_words)
 
 
 def main(argv: List[str]):
@@ -376,6 +519,15 @@ def main(argv: List[str]):
                         The mapping must be bijective - otherwise this will
                         generate an error.
                         """)
+    parser.add_argument("--jobs",
+                        "-j",
+                        type=int,
+                        metavar="<n>",
+                        default=1,
+                        help="""
+                        Number of processes to split the pages of the image
+                        across (default: 1).
+                        """)
     args = parser.parse_args(argv)
     scrambling_configs = FlashScramblingConfigs()
 
@@ -397,7 +549,8 @@ def main(argv: List[str]):
 
     # Reformat flash VMEM file to add integrity/reliablity ECC and scrambling.
     reformatted_vmem_lines = _reformat_flash_vmem(args.in_flash_vmem,
-                                                  scrambling_configs)
+                                                  scrambling_configs,
+                                                  args.jobs)
 
     # Write re-formatted output file. Use binary mode and a large buffer size
     # to improve performance.
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import random
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+import hjson
+from lib import LcStEnc as lc
+from lib.common import (MinHdSet, ecc_encode, get_hd, is_valid_codeword,
+                        scatter_bits)
+from topgen import secure_prng as sp
+
+LC_STATE_DEFINITION_FILE = (Path(__file__).resolve().parents[2] /
+                            'hw/ip/lc_ctrl/data/lc_ctrl_state.hjson')
+
+
+def load_config():
+    with open(LC_STATE_DEFINITION_FILE, 'r') as infile:
+        return hjson.load(infile)
+
+
+def incremental_codewords_reference(config, base_ecc, existing_words):
+    '''The incremental codewords of base_ecc, computed with bit strings.'''
+    ecc_width = config['secded']['ecc_width']
+    base_data = base_ecc[ecc_width:]
+    free_bits = base_data.count('0')
+    incr_cands = []
+    for k in range(1, 2**free_bits):
+        incr_cand = scatter_bits(base_data,
+                                 format(k, '0' + str(free_bits) + 'b'))
+        incr_cand_ecc = ecc_encode(config, incr_cand)
+        if int(base_ecc, 2) & ~int(incr_cand_ecc, 2):
+            continue
+        if incr_cand_ecc.count('1') > config['max_hw']:
+            continue
+        if all(get_hd(incr_cand_ecc, w) >= config['min_hd']
+               for w in existing_words + [base_ecc]):
+            incr_cands.append(incr_cand_ecc)
+    return incr_cands
+
+
+class TestIncrementalCodewords(unittest.TestCase):
+
+    def setUp(self):
+        self.config = load_config()
+        lc._validate_secded(self.config)
+        lc._validate_constraints(self.config)
+        self.encoder = lc.EccEncoder(self.config)
+        self.width = (self.config['secded']['data_width'] +
+                      self.config['secded']['ecc_width'])
+        self.rnd = random.Random(1)
+
+    def test_encoder(self):
+        for _ in range(100):
+            data = self.rnd.getrandbits(self.config['secded']['data_width'])
+            word = format(data, '016b')
+            codeword = self.encoder.encode(data)
+            self.assertEqual(format(codeword, '022b'),
+                             ecc_encode(self.config, word))
+            self.assertTrue(is_valid_codeword(self.config,
+                                              format(codeword, '022b')))
+
+    def test_matches_reference(self):
+        for _ in range(5):
+            existing = [
+                self.encoder.encode(self.rnd.getrandbits(16))
+                for _ in range(self.rnd.randrange(4))
+            ]
+            # Bases with only a few bits set have many supersets.
+            base = self.encoder.encode(
+                self.rnd.getrandbits(16) & self.rnd.getrandbits(16))
+            expected = incremental_codewords_reference(
+                self.config, format(base, '022b'),
+                [format(w, '022b') for w in existing])
+            actual = lc._get_incremental_codewords(
+                self.config, self.encoder, base,
+                MinHdSet(self.width, self.config['min_hd'], existing))
+            self.assertEqual([format(w, '022b') for w in actual], expected)
+
+
+class TestLcStEnc(unittest.TestCase):
+
+    # The time it takes to generate the encoding is measured by
+    # bench-lc-state-enc.py.
+
+    def generate(self):
+        lc_st_enc = lc.LcStEnc(load_config())
+        return lc_st_enc.config, sp.getrandbits(64)
+
+    def test_uncached(self):
+        with unittest.mock.patch.dict(os.environ, {'REGGEN_CACHE_DIR': ''}):
+            config, _ = self.generate()
+        self.assertGreaterEqual(config['stats']['min_hd'], config['min_hd'])
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                unittest.mock.patch.dict(os.environ,
+                                         {'REGGEN_CACHE_DIR': cache_dir}):
+            config, next_bits = self.generate()
+            self.assertEqual(
+                len(list((Path(cache_dir) / 'lc_state').glob('*.json'))), 1)
+
+            # The second time, the words and the state of the PRNG come from
+            # the cache.
+            with unittest.mock.patch.object(lc, '_get_new_state_word_pair',
+                                            side_effect=AssertionError):
+                cached_config, cached_next_bits = self.generate()
+            self.assertEqual(cached_config['genwords'], config['genwords'])
+            self.assertEqual(cached_config['stats'], config['stats'])
+            self.assertEqual(cached_next_bits, next_bits)
+
+            # Another seed gives another entry.
+            other = load_config()
+            other['seed'] += 1
+            lc.LcStEnc(other)
+            self.assertEqual(
+                len(list((Path(cache_dir) / 'lc_state').glob('*.json'))), 2)
+
+    def test_corrupted_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                unittest.mock.patch.dict(os.environ,
+                                         {'REGGEN_CACHE_DIR': cache_dir}):
+            config, next_bits = self.generate()
+            path, = (Path(cache_dir) / 'lc_state').glob('*.json')
+            entry = json.loads(path.read_text())
+            base, incr = entry['genwords']['lc_state'][0]
+
+            def swapped(entry):
+                # Both words are valid, but the pair is not incremental.
+                entry['genwords']['lc_state'][0] = [incr, base]
+
+            def short_state(entry):
+                entry['prng_state'] = entry['prng_state'][:3]
+
+            def bad_state(entry):
+                entry['prng_state'][0] = -1
+
+            def bad_bits(entry):
+                entry['prng_state'][3] = ['a']
+
+            def int_words(entry):
+                entry['genwords']['lc_state'][0] = [int(base, 2),
+                                                    int(incr, 2)]
+
+            def no_state(entry):
+                del entry['prng_state']
+
+            def validated_config():
+                lc_config = load_config()
+                lc._validate_secded(lc_config)
+                lc._validate_constraints(lc_config)
+                lc._validate_state_declarations(lc_config)
+                return lc_config
+
+            # The entry as written is valid.
+            lc_config = validated_config()
+            self.assertTrue(lc._cache_load(lc_config, path.stem))
+            self.assertEqual(lc_config['genwords'], config['genwords'])
+            self.assertEqual(lc_config['stats'], config['stats'])
+
+            for corrupt in [swapped, short_state, bad_state, bad_bits,
+                            int_words, no_state]:
+                with self.subTest(corruption=corrupt.__name__):
+                    bad_entry = json.loads(json.dumps(entry))
+                    corrupt(bad_entry)
+                    path.write_text(json.dumps(bad_entry))
+
+                    # The entry is rejected without touching the config or
+                    # the state of the PRNG.
+                    lc_config = validated_config()
+                    state = sp.getstate()
+                    self.assertFalse(lc._cache_load(lc_config, path.stem))
+                    self.assertNotIn('genwords', lc_config)
+                    self.assertNotIn('stats', lc_config)
+                    self.assertEqual(sp.getstate(), state)
+
+                    # And the words are generated (and stored) again.
+                    regen_config, regen_next_bits = self.generate()
+                    self.assertEqual(regen_config['genwords'],
+                                     config['genwords'])
+                    self.assertEqual(regen_config['stats'], config['stats'])
+                    self.assertEqual(regen_next_bits, next_bits)
+                    self.assertEqual(json.loads(path.read_text()), entry)
+
+
+if __name__ == '__main__':
+    unittest.main()
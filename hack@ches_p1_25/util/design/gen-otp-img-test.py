@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import copy
+import importlib
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+import hjson
+from lib.LcStEnc import LcStEnc
+from lib.OtpMemImg import OtpMemImg
+from lib.OtpMemMap import OtpMemMap
+
+gen_otp_img = importlib.import_module("gen-otp-img")
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+OTP_DATA = REPO_TOP / 'hw/ip/otp_ctrl/data'
+LC_STATE_DEFINITION_FILE = REPO_TOP / gen_otp_img.LC_STATE_DEFINITION_FILE
+MMAP_DEFINITION_FILE = REPO_TOP / gen_otp_img.MMAP_DEFINITION_FILE
+ADD_CFGS = [
+    'otp_ctrl_img_creator_sw_cfg.hjson', 'otp_ctrl_img_owner_sw_cfg.hjson',
+    'otp_ctrl_img_hw_cfg.hjson'
+]
+IMAGES = ['dev', 'rma']
+
+
+def _load(path):
+    with open(path, 'r') as infile:
+        return hjson.load(infile)
+
+
+def _img_cfg_path(name):
+    return OTP_DATA / 'otp_ctrl_img_{}.hjson'.format(name)
+
+
+def _memfile_body(otp_mem_img, add_cfgs):
+    for cfg in add_cfgs:
+        otp_mem_img.override_data(copy.deepcopy(cfg))
+    return otp_mem_img.streamout_memfile()[0]
+
+
+def _strip_header(text):
+    return ''.join(line for line in text.splitlines(keepends=True)
+                   if not line.startswith('//'))
+
+
+class TestOtpMemImg(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lc_state_cfg = _load(LC_STATE_DEFINITION_FILE)
+        cls.otp_mmap_cfg = _load(MMAP_DEFINITION_FILE)
+        cls.add_cfgs = [_load(OTP_DATA / f) for f in ADD_CFGS]
+        cls.img_cfgs = {name: _load(_img_cfg_path(name)) for name in IMAGES}
+
+        # The images generated from scratch, one at a time, as a separate run
+        # of gen-otp-img.py does.
+        cls.bodies = {}
+        for name in IMAGES:
+            img = OtpMemImg(copy.deepcopy(cls.lc_state_cfg),
+                            copy.deepcopy(cls.otp_mmap_cfg),
+                            copy.deepcopy(cls.img_cfgs[name]), '')
+            cls.bodies[name] = _memfile_body(img, cls.add_cfgs)
+
+    def test_from_parsed(self):
+        # Generate all images from the same parsed definitions, which must not
+        # be modified by any of them.
+        otp_mmap = OtpMemMap(copy.deepcopy(self.otp_mmap_cfg))
+        lc_state = LcStEnc(copy.deepcopy(self.lc_state_cfg))
+        mmap_config = copy.deepcopy(otp_mmap.config)
+        for _ in range(2):
+            for name in IMAGES:
+                with self.subTest(image=name):
+                    img = OtpMemImg.from_parsed(
+                        otp_mmap, lc_state,
+                        copy.deepcopy(self.img_cfgs[name]), '')
+                    self.assertEqual(_memfile_body(img, self.add_cfgs),
+                                     self.bodies[name])
+        self.assertEqual(otp_mmap.config, mmap_config)
+
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            batch_file = tmp_dir / 'batch.hjson'
+            batch_file.write_text(
+                hjson.dumps({
+                    'images': [{
+                        'img_cfg': str(_img_cfg_path(name)),
+                        'add_cfg': [str(OTP_DATA / f) for f in ADD_CFGS],
+                        'out': '{}.BITWIDTH.vmem'.format(name),
+                    } for name in IMAGES]
+                }))
+
+            argv = ['gen-otp-img.py', '--quiet', '--batch',
+                    str(batch_file), '-j', '2']
+            with unittest.mock.patch('sys.argv', argv):
+                with self.assertRaises(SystemExit) as cm:
+                    gen_otp_img.main()
+            self.assertEqual(cm.exception.code, 0)
+
+            for name in IMAGES:
+                with self.subTest(image=name):
+                    outputs = list(tmp_dir.glob('{}.*.vmem'.format(name)))
+                    self.assertEqual(len(outputs), 1)
+                    text = outputs[0].read_text()
+                    self.assertIn('--img-cfg ' + str(_img_cfg_path(name)),
+                                  text)
+                    self.assertNotIn('--jobs', text)
+                    self.assertEqual(_strip_header(text),
+                                     _strip_header(self.bodies[name]))
+
+    def test_batch_errors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_dir = Path(tmp_dir)
+            batch_file = tmp_dir / 'batch.hjson'
+            batch_file.write_text(
+                hjson.dumps({'images': [{
+                    'img_cfg': str(_img_cfg_path('dev'))
+                }]}))
+            args = unittest.mock.Mock(c_template=None)
+            with self.assertRaisesRegex(RuntimeError, 'neither out nor c_out'):
+                gen_otp_img._load_batch(batch_file, args)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,13 +8,18 @@ map definition file (hjson).
 import argparse
 import datetime
 import logging as log
+import os
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import hjson
 
 from lib.common import vmem_permutation_string, wrapped_docstring
+from lib.LcStEnc import LcStEnc
 from lib.OtpMemImg import OtpMemImg
+from lib.OtpMemMap import OtpMemMap
+from reggen import hjson_loader
 
 # Get the memory map definition.
 MMAP_DEFINITION_FILE = 'hw/ip/otp_ctrl/data/otp_ctrl_mmap.hjson'
@@ -46,6 +51,216 @@ def _override_seed(args, seed_name, config):
                 seed_name, new_seed))
 
 
+def _file_header(args):
+    '''Return the header comment of the generated files
+
+    This lists the command line arguments in args (a dict of argument names
+    and values) for reference.
+    '''
+    argstr = ''
+    for arg, argval in sorted(args.items()):
+        if argval:
+            if not isinstance(argval, list):
+                argval = [argval]
+            for a in argval:
+                argname = '-'.join(arg.split('_'))
+                # Get absolute paths for all files specified.
+                a = a.resolve() if isinstance(a, Path) else a
+                argstr += ' \\\n//   --' + argname + ' ' + str(a) + ''
+
+    dt = datetime.datetime.now(datetime.timezone.utc)
+    dtstr = dt.strftime("%a, %d %b %Y %H:%M:%S %Z")
+    return '// Generated on {} with\n// $ gen-otp-img.py {}\n//\n'.format(
+        dtstr, argstr)
+
+
+def _write_c_file(otp_mem_img, file_header, c_template, c_out):
+    '''Write the C version of an OTP image'''
+    log.info(f'Generating C file: {c_out}')
+    file_body = otp_mem_img.generate_c_file(file_header, c_template)
+    with open(c_out, 'wb') as outfile:
+        outfile.write(file_body.encode('utf-8'))
+
+
+def _write_memfile(otp_mem_img, file_header, out):
+    '''Write an OTP image as MEM file and return its path'''
+    memfile_body, bitness = otp_mem_img.streamout_memfile()
+
+    # If the out argument does not contain "BITWIDTH", it will not be changed.
+    memfile_path = Path(str(out).replace('BITWIDTH', str(bitness)))
+
+    # Use binary mode and a large buffer size to improve performance.
+    with open(memfile_path, 'wb', buffering=2097152) as outfile:
+        outfile.write(file_header.encode('utf-8'))
+        outfile.write(memfile_body.encode('utf-8'))
+    return memfile_path
+
+
+def _load_hjson(path):
+    with open(path, 'r') as infile:
+        return hjson_loader.load(infile)
+
+
+def _load_batch(batch_file, args):
+    '''Load the images of a batch file
+
+    The batch file is an Hjson file with a list of images, for example:
+
+        {
+            images: [
+                {
+                    img_cfg: "otp_ctrl_img_dev.hjson",
+                    add_cfg: ["otp_ctrl_img_hw_cfg.hjson"],
+                    img_seed: 1,
+                    out: "dev/otp-img.BITWIDTH.vmem",
+                    c_out: "dev/otp_img.c",
+                },
+            ]
+        }
+
+    Relative paths are relative to the directory of the batch file. add_cfg
+    and img_seed are optional, and at least one of out and c_out must be
+    given. Returns a list of dicts with the arguments of each image, as for a
+    separate run of this script, and the loaded image configurations.
+    '''
+    batch_cfg = _load_hjson(batch_file)
+    if not isinstance(batch_cfg.get('images'), list):
+        raise RuntimeError(
+            'Batch file {} must contain a list of images'.format(batch_file))
+
+    base_dir = batch_file.parent
+    images = []
+    for k, entry in enumerate(batch_cfg['images']):
+        entry = dict(entry)
+        if 'img_cfg' not in entry:
+            raise RuntimeError('Image {} in {} has no img_cfg'.format(
+                k, batch_file))
+        if 'out' not in entry and 'c_out' not in entry:
+            raise RuntimeError('Image {} in {} has neither out nor c_out'.
+                               format(k, batch_file))
+        if 'c_out' in entry and args.c_template is None:
+            raise RuntimeError('C output of image {} in {} requires the '
+                               '--c-template flag'.format(k, batch_file))
+
+        image = {
+            'img_cfg': base_dir / entry.pop('img_cfg'),
+            'add_cfg': [base_dir / f for f in entry.pop('add_cfg', [])],
+            'img_seed': entry.pop('img_seed', None),
+            'out': None,
+            'c_out': None,
+        }
+        for key in ['out', 'c_out']:
+            if key in entry:
+                image[key] = base_dir / entry.pop(key)
+        if entry:
+            raise RuntimeError('Unused keys {} in image {} of {}'.format(
+                ', '.join(entry.keys()), k, batch_file))
+
+        # Load the configurations and pick the image seeds here, so that the
+        # images are the same whatever the order in which they are generated.
+        image_args = argparse.Namespace(img_seed=image['img_seed'])
+        img_cfg = _load_hjson(image['img_cfg'])
+        _override_seed(image_args, 'img_seed', img_cfg)
+        add_cfgs = [_load_hjson(f) for f in image['add_cfg']]
+
+        images.append((image, img_cfg, add_cfgs))
+    return images
+
+
+# The memory map and the LC state encoding in the worker processes of a batch
+# (see _init_batch_worker).
+_batch_otp_mmap = None
+_batch_lc_state = None
+
+
+def _init_batch_worker(otp_mmap, lc_state, log_level):
+    '''Set up a worker process of a batch'''
+    global _batch_otp_mmap, _batch_lc_state
+    _batch_otp_mmap = otp_mmap
+    _batch_lc_state = lc_state
+    log.getLogger().setLevel(log_level)
+
+
+def _gen_batch_image(image, img_cfg, add_cfgs, common_args):
+    '''Generate one image of a batch
+
+    Returns an error message, or None if the image was generated.
+    '''
+    try:
+        otp_mem_img = OtpMemImg.from_parsed(_batch_otp_mmap, _batch_lc_state,
+                                            img_cfg, common_args['data_perm'])
+        for f, cfg in zip(image['add_cfg'], add_cfgs):
+            log.info(
+                'Processing additional image configuration file {}'.format(f))
+            otp_mem_img.override_data(cfg)
+    except RuntimeError as err:
+        return '{}: {}'.format(image['img_cfg'], err)
+
+    header_args = dict(common_args)
+    header_args.update(image)
+    header_args['img_seed'] = img_cfg['seed']
+    if not image['c_out']:
+        header_args['c_template'] = None
+    file_header = _file_header(header_args)
+
+    if image['c_out']:
+        _write_c_file(otp_mem_img, file_header, common_args['c_template'],
+                      image['c_out'])
+    if image['out']:
+        path = _write_memfile(otp_mem_img, file_header, image['out'])
+        log.info('Wrote {}'.format(path))
+    return None
+
+
+def _run_batch(args, lc_state_cfg, otp_mmap_cfg):
+    '''Generate all the images of a batch file
+
+    The OTP memory map and the life cycle state encoding are parsed once and
+    then shared by all images, which are generated by up to args.jobs worker
+    processes. Returns the exit code.
+    '''
+    images = _load_batch(args.batch, args)
+
+    otp_mmap = OtpMemMap(otp_mmap_cfg)
+    lc_state = LcStEnc(lc_state_cfg)
+
+    # The arguments that are the same for all images, for the file headers.
+    common_args = {
+        'lc_state_def': args.lc_state_def,
+        'mmap_def': args.mmap_def,
+        'lc_seed': args.lc_seed,
+        'otp_seed': args.otp_seed,
+        'data_perm': args.data_perm,
+        'c_template': args.c_template,
+    }
+
+    log.info('Generating {} OTP images.'.format(len(images)))
+    log_level = log.getLogger().getEffectiveLevel()
+    jobs = min(args.jobs, len(images))
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs,
+                                 initializer=_init_batch_worker,
+                                 initargs=(otp_mmap, lc_state,
+                                           log_level)) as ex:
+            futures = [
+                ex.submit(_gen_batch_image, image, img_cfg, add_cfgs,
+                          common_args)
+                for image, img_cfg, add_cfgs in images
+            ]
+            errors = [future.result() for future in futures]
+    else:
+        _init_batch_worker(otp_mmap, lc_state, log_level)
+        errors = [
+            _gen_batch_image(image, img_cfg, add_cfgs, common_args)
+            for image, img_cfg, add_cfgs in images
+        ]
+
+    errors = [err for err in errors if err is not None]
+    for err in errors:
+        log.error(err)
+    return 1 if errors else 0
+
+
 # TODO: this can be removed when we have moved to Python 3.8
 # in all regressions, since the extend action is only available
 # from that version onward.
@@ -195,6 +410,28 @@ def main():
                         C output path. Requires the --c-template flag to be
                         set. The --out flag is ignored when this flag is set.
                         ''')
+    parser.add_argument('--batch',
+                        type=Path,
+                        metavar='<path>',
+                        help='''
+                        Generate all the images listed in this Hjson file,
+                        parsing the memory map and life cycle state
+                        definitions only once. Each image has an img_cfg and
+                        optionally add_cfg and img_seed, which work like the
+                        command line options, and an out and/or c_out output
+                        path. Relative paths are relative to the batch file.
+                        --img-cfg, --add-cfg, --img-seed, --out and --c-out
+                        are ignored when this flag is set.
+                        ''')
+    parser.add_argument('--jobs',
+                        '-j',
+                        type=int,
+                        metavar='<n>',
+                        default=os.cpu_count() or 1,
+                        help='''
+                        Number of images of a --batch to generate in parallel.
+                        Defaults to the number of CPUs.
+                        ''')
 
     args = parser.parse_args()
 
@@ -203,13 +440,10 @@ def main():
 
     log.info('Loading LC state definition file {}'.format(args.lc_state_def))
     with open(args.lc_state_def, 'r') as infile:
-        lc_state_cfg = hjson.load(infile)
+        lc_state_cfg = hjson_loader.load(infile)
     log.info('Loading OTP memory map definition file {}'.format(args.mmap_def))
     with open(args.mmap_def, 'r') as infile:
-        otp_mmap_cfg = hjson.load(infile)
-    log.info('Loading main image configuration file {}'.format(args.img_cfg))
-    with open(args.img_cfg, 'r') as infile:
-        img_cfg = hjson.load(infile)
+        otp_mmap_cfg = hjson_loader.load(infile)
 
     # Set the initial random seed so that the generated image is
     # deterministically randomized.
@@ -218,6 +452,18 @@ def main():
     # If specified, override the seeds.
     _override_seed(args, 'lc_seed', lc_state_cfg)
     _override_seed(args, 'otp_seed', otp_mmap_cfg)
+
+    if args.batch:
+        try:
+            sys.exit(_run_batch(args, lc_state_cfg, otp_mmap_cfg))
+        except RuntimeError as err:
+            log.error(err)
+            exit(1)
+
+    log.info('Loading main image configuration file {}'.format(args.img_cfg))
+    with open(args.img_cfg, 'r') as infile:
+        img_cfg = hjson_loader.load(infile)
+
     _override_seed(args, 'img_seed', img_cfg)
 
     try:
@@ -229,7 +475,7 @@ def main():
                 'Processing additional image configuration file {}'.format(f))
             log.info('')
             with open(f, 'r') as infile:
-                cfg = hjson.load(infile)
+                cfg = hjson_loader.load(infile)
                 otp_mem_img.override_data(cfg)
             log.info('')
 
@@ -237,39 +483,18 @@ def main():
         log.error(err)
         exit(1)
 
-    # Print all defined args into header comment for reference
-    argstr = ''
-    for arg, argval in sorted(vars(args).items()):
-        if argval:
-            if not isinstance(argval, list):
-                argval = [argval]
-            for a in argval:
-                argname = '-'.join(arg.split('_'))
-                # Get absolute paths for all files specified.
-                a = a.resolve() if isinstance(a, Path) else a
-                argstr += ' \\\n//   --' + argname + ' ' + str(a) + ''
-
-    dt = datetime.datetime.now(datetime.timezone.utc)
-    dtstr = dt.strftime("%a, %d %b %Y %H:%M:%S %Z")
-    file_header = '// Generated on {} with\n// $ gen-otp-img.py {}\n//\n'.format(
-        dtstr, argstr)
+    # The batch options do not affect the image, so they are not listed.
+    header_args = {
+        k: v
+        for k, v in vars(args).items() if k not in ('batch', 'jobs')
+    }
+    file_header = _file_header(header_args)
 
     if args.c_out:
-        log.info(f'Generating C file: {args.c_out}')
-        file_body = otp_mem_img.generate_c_file(file_header, args.c_template)
-        with open(args.c_out, 'wb') as outfile:
-            outfile.write(file_body.encode('utf-8'))
+        _write_c_file(otp_mem_img, file_header, args.c_template, args.c_out)
         exit(0)
 
-    memfile_body, bitness = otp_mem_img.streamout_memfile()
-
-    # If the out argument does not contain "BITWIDTH", it will not be changed.
-    memfile_path = Path(args.out.replace('BITWIDTH', str(bitness)))
-
-    # Use binary mode and a large buffer size to improve performance.
-    with open(memfile_path, 'wb', buffering=2097152) as outfile:
-        outfile.write(file_header.encode('utf-8'))
-        outfile.write(memfile_body.encode('utf-8'))
+    _write_memfile(otp_mem_img, file_header, args.out)
 
 
 if __name__ == "__main__":
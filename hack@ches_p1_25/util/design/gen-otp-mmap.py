@@ -11,12 +11,12 @@ import sys
 from pathlib import Path
 from typing import Dict
 
-import hjson
 from mako import exceptions
 from mako.template import Template
 
 from lib.common import wrapped_docstring
 from lib.OtpMemMap import OtpMemMap
+from reggen import hjson_loader
 
 # This makes topgen libraries available to template files.
 sys.path.append(Path(__file__).parent)
@@ -102,7 +102,7 @@ def main():
     check_in_repo_top()
 
     with open(MMAP_DEFINITION_FILE, 'r') as infile:
-        config = hjson.load(infile)
+        config = hjson_loader.load(infile)
 
         # If specified, override the seed for random netlist constant computation.
         if args.seed:
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import contextlib
+import csv
+import importlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+thr = importlib.import_module("gen-rng-health-thresholds")
+
+# Thresholds printed by the script, as
+# (window_size, sigma, per_bit): [ADAPTP_HI, ADAPTP_LO, BUCKET_HI, BUCKET_LO,
+#                                 MARKOV_HI, MARKOV_LO].
+KNOWN_THRESHOLDS = {
+    (2048, 3.0, False): [0x444, 0x3bc, 0x31, 0x0, 0x230, 0x1d0],
+    (2048, 3.0, True): [0x122, 0xde, 0x31, 0x0, 0x98, 0x68],
+    (384, 4.42, False): [0xec, 0x94, 0x11, 0x0, 0x7f, 0x41],
+    (384, 4.9, True): [0x49, 0x17, 0x12, 0x0, 0x29, 0x7],
+    (2028, 3.0, False): [0x43a, 0x3b2, 0x31, 0x0, 0x22b, 0x1cb],
+    (16, 10.0, False): [0x10, 0x0, 0x4, 0x0, 0x8, 0x0],
+    (1023, 2.5, True): [0x94, 0x6b, 0x1a, 0x0, 0x4f, 0x31],
+}
+
+COLUMNS = ['ADAPTP_HI', 'ADAPTP_LO', 'BUCKET_HI', 'BUCKET_LO', 'MARKOV_HI',
+           'MARKOV_LO']
+
+
+def run_main(args):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out), unittest.mock.patch(
+            'sys.argv', ['gen-rng-health-thresholds.py'] + args):
+        thr.main()
+    return out.getvalue()
+
+
+class TestThresholds(unittest.TestCase):
+
+    def test_known_thresholds(self):
+        for (window_size, sigma, per_bit), expected in KNOWN_THRESHOLDS.items():
+            with self.subTest(window_size=window_size, sigma=sigma,
+                              per_bit=per_bit):
+                results = []
+                for test in thr._Test:
+                    results.extend(
+                        thr.thresholds(test, window_size, sigma, per_bit))
+                self.assertEqual(results, expected)
+
+    def test_threshold_calc(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertTrue(
+                thr.threshold_calc(thr._Test.MARKOV, 2048, 3.0, False))
+            self.assertFalse(thr.threshold_calc('FOO', 2048, 3.0, False))
+        self.assertEqual(out.getvalue(),
+                         'MARKOV_HI: 0x00000230\n'
+                         'MARKOV_LO: 0x000001d0\n'
+                         'Invalid test name FOO\n')
+
+    def test_grid(self):
+        window_sizes = [16, 384, 1023, 2028, 2048]
+        sigmas = [2.5, 3.0, 4.42, 4.9, 10.0]
+        for per_bit in [False, True]:
+            rows = thr.threshold_grid(window_sizes, sigmas, per_bit)
+            self.assertEqual(len(rows), len(window_sizes) * len(sigmas))
+            for row in rows:
+                key = (row['window_size'], row['sigma'], per_bit)
+                expected = []
+                for test in thr._Test:
+                    expected.extend(thr.thresholds(test, *key))
+                self.assertEqual([row[c] for c in COLUMNS], expected)
+                if key in KNOWN_THRESHOLDS:
+                    self.assertEqual(expected, KNOWN_THRESHOLDS[key])
+
+
+class TestMain(unittest.TestCase):
+
+    def test_text(self):
+        self.assertEqual(
+            run_main(['-w', '2048', '-s', '3', '-b']),
+            'Window size: 2048, per_bit: True, sigma: 3.00\n'
+            'ADAPTP_HI: 0x00000122\n'
+            'ADAPTP_LO: 0x000000de\n'
+            'BUCKET_HI: 0x00000031\n'
+            'BUCKET_LO: 0x00000000\n'
+            'MARKOV_HI: 0x00000098\n'
+            'MARKOV_LO: 0x00000068\n')
+
+    def test_csv(self):
+        rows = list(
+            csv.DictReader(
+                io.StringIO(run_main(['-w', '2048', '2028', '-s', '3',
+                                      '-f', 'csv']))))
+        self.assertEqual([(r['window_size'], r['sigma']) for r in rows],
+                         [('2048', '3.0'), ('2028', '3.0')])
+        self.assertEqual([int(rows[1][c]) for c in COLUMNS],
+                         KNOWN_THRESHOLDS[(2028, 3.0, False)])
+
+    def test_json(self):
+        rows = json.loads(
+            run_main(['-w', '384', '-s', '4.9', '4.42', '-b', '-f', 'json']))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['per_bit'], True)
+        self.assertEqual([rows[0][c] for c in COLUMNS],
+                         KNOWN_THRESHOLDS[(384, 4.9, True)])
+
+    def test_out(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'thresholds.out')
+            for fmt in ['text', 'csv', 'json']:
+                with self.subTest(fmt=fmt):
+                    args = ['-w', '2048', '-s', '3', '-b', '-f', fmt]
+                    self.assertEqual(run_main(args + ['-o', path]), '')
+                    with open(path) as outfile:
+                        self.assertEqual(outfile.read(), run_main(args))
+                    self.assertEqual(run_main(args + ['-o', '-']),
+                                     run_main(args))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -35,11 +35,22 @@ Notes:
 
 `--per-bit` must be set to reflect the `RNG_BIT_ENABLE` entropy src configuration.
 
+Several window sizes and sigma values can be given to sweep a grid of
+parameters. With `--format csv` or `--format json`, the thresholds of all
+combinations are written as a table with one row per combination, and one
+column per threshold (e.g. `ADAPTP_HI`). All formats are written to stdout,
+or to the file given with `--out`.
+
 """
 import argparse
+import contextlib
+import csv
 import enum
+import functools
+import json
 import math
 import sys
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple, Union
 
 # Matches the `RNG_BUS_WIDTH` in entropy_src_pkg.sv
 _RNG_BUS_WIDTH = 4
@@ -52,19 +63,12 @@ class _Test(enum.Enum):
     MARKOV = 'MARKOV'
 
 
-def threshold_calc(test: str, window_size: int, sigma: float,
-                   per_bit: bool) -> bool:
-    """Calculates and prints high and low entropy health test thresholds.
+@functools.lru_cache(maxsize=None)
+def _moments(test: _Test, window_size: int,
+             per_bit: bool) -> Optional[Tuple[float, float, float]]:
+    """Returns the number of trials, mean and standard deviation of a test.
 
-    Args:
-        test: Test name.
-        window_size: Window size in bits.
-        sigma: Number of standard deviations to provide between the range. This
-        assumes that the window is large enough to treat the test as normally
-        distributed.
-        per_bit: Set to true to calculate thresholds on a per RNG bit basis.
-    Returns:
-        False if unable to calculate the thresholds. True otherwise.
+    Returns None for an invalid test.
     """
     n: int = 0
     p: float = 0.5
@@ -78,11 +82,16 @@ def threshold_calc(test: str, window_size: int, sigma: float,
         half_window = window_size / 2
         n = (half_window / _RNG_BUS_WIDTH) if per_bit else half_window
     else:
-        print(f"Invalid test name {test}")
-        return False
+        return None
 
     mean = p * n
     stddev = math.sqrt(p * (1 - p) * n)
+    return n, mean, stddev
+
+
+def _thresholds(test: _Test, moments: Tuple[float, float, float],
+                sigma: float) -> Tuple[int, int]:
+    n, mean, stddev = moments
 
     low = 0 if test == _Test.BUCKET else math.floor(mean - sigma * stddev)
     high = math.ceil(mean + sigma * stddev)
@@ -93,12 +102,94 @@ def threshold_calc(test: str, window_size: int, sigma: float,
     low = 0 if low < 0 else low
     high = n if high > n else high
 
-    print(f"{test.value}_HI: 0x{int(high):08x}")
-    print(f"{test.value}_LO: 0x{int(low):08x}")
+    return int(high), int(low)
+
+
+@functools.lru_cache(maxsize=None)
+def thresholds(test: _Test, window_size: int, sigma: float,
+               per_bit: bool) -> Optional[Tuple[int, int]]:
+    """Calculates the high and low entropy health test thresholds.
+
+    See threshold_calc for the arguments. Returns the (high, low)
+    thresholds, or None if unable to calculate them.
+    """
+    moments = _moments(test, window_size, per_bit)
+    if moments is None:
+        return None
+    return _thresholds(test, moments, sigma)
+
+
+def threshold_calc(test: str, window_size: int, sigma: float,
+                   per_bit: bool) -> bool:
+    """Calculates and prints high and low entropy health test thresholds.
+
+    Args:
+        test: Test name.
+        window_size: Window size in bits.
+        sigma: Number of standard deviations to provide between the range. This
+        assumes that the window is large enough to treat the test as normally
+        distributed.
+        per_bit: Set to true to calculate thresholds on a per RNG bit basis.
+    Returns:
+        False if unable to calculate the thresholds. True otherwise.
+    """
+    result = thresholds(test, window_size, sigma, per_bit)
+    if result is None:
+        print(f"Invalid test name {test}")
+        return False
+    high, low = result
+
+    print(f"{test.value}_HI: 0x{high:08x}")
+    print(f"{test.value}_LO: 0x{low:08x}")
 
     return True
 
 
+def threshold_grid(
+        window_sizes: Iterable[int], sigmas: Iterable[float],
+        per_bit: bool) -> List[Dict[str, Union[int, float, bool]]]:
+    """Calculates the thresholds of all tests for a grid of parameters.
+
+    The mean and standard deviation of each test are only calculated once per
+    window size, for all sigma values. Returns one row per combination of
+    window size and sigma (in that order), with the parameters and the high
+    and low thresholds of each test (e.g. ADAPTP_HI and ADAPTP_LO).
+    """
+    sigmas = list(sigmas)
+    rows = []
+    for window_size in window_sizes:
+        moments = [(test, _moments(test, window_size, per_bit))
+                   for test in _Test]
+        for sigma in sigmas:
+            row = {
+                'window_size': window_size,
+                'per_bit': per_bit,
+                'sigma': sigma,
+            }
+            for test, test_moments in moments:
+                high, low = _thresholds(test, test_moments, sigma)
+                row[f"{test.value}_HI"] = high
+                row[f"{test.value}_LO"] = low
+            rows.append(row)
+    return rows
+
+
+def write_table(rows: List[Dict[str, Union[int, float, bool]]], fmt: str,
+                outfile: TextIO) -> None:
+    """Writes the rows of threshold_grid as a CSV or JSON table."""
+    if fmt == 'json':
+        json.dump(rows, outfile, indent=2)
+        outfile.write('\n')
+    elif fmt == 'csv':
+        writer = csv.DictWriter(outfile,
+                                fieldnames=list(rows[0]),
+                                lineterminator='\n')
+        writer.writeheader()
+        writer.writerows(rows)
+    else:
+        raise ValueError(f"Unsupported table format {fmt}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         prog="gen-rng-health-thresholds",
@@ -107,15 +198,17 @@ def main():
     parser.add_argument('--window_size',
                         '-w',
                         type=int,
-                        default=2028,
-                        help='Window size in bits.')
+                        nargs='+',
+                        default=[2028],
+                        help='Window size(s) in bits.')
     parser.add_argument('--sigma',
                         '-s',
                         type=float,
-                        default=3.0,
+                        nargs='+',
+                        default=[3.0],
                         help='''
-                        Number of standard deviations to support in the test
-                        window threshold.
+                        Number(s) of standard deviations to support in the
+                        test window threshold.
                         ''')
     parser.add_argument('--per_bit',
                         '-b',
@@ -125,17 +218,48 @@ def main():
                         Set to true to make calculations assuming single bit
                         entropy.
                         ''')
+    parser.add_argument('--format',
+                        '-f',
+                        choices=['text', 'csv', 'json'],
+                        default='text',
+                        help='''
+                        Output format. csv and json write one table for all
+                        combinations of window sizes and sigma values.
+                        ''')
+    parser.add_argument('--out',
+                        '-o',
+                        metavar='FILE',
+                        default=None,
+                        help='Output file (default: stdout).')
     args = parser.parse_args()
 
-    print(
-        f"Window size: {args.window_size:d}, per_bit: {args.per_bit}, sigma: {args.sigma:0.2f}"
-    )
-    results = [
-        threshold_calc(t, args.window_size, args.sigma, args.per_bit)
-        for t in _Test
-    ]
-    if not all(results):
-        sys.exit("Failed to calculate one or more thresholds.")
+    # Compute the tables before opening the output file, so that it is not
+    # truncated if that fails.
+    if args.format != 'text':
+        rows = threshold_grid(args.window_size, args.sigma, args.per_bit)
+
+    if args.out is None or args.out == '-':
+        out_cm = contextlib.nullcontext(sys.stdout)
+    else:
+        out_cm = open(args.out, 'w')
+    with out_cm as outfile:
+        if args.format != 'text':
+            write_table(rows, args.format, outfile)
+            return
+
+        with contextlib.redirect_stdout(outfile):
+            for window_size in args.window_size:
+                for sigma in args.sigma:
+                    print(
+                        f"Window size: {window_size:d}, per_bit: {args.per_bit}, "
+                        f"sigma: {sigma:0.2f}"
+                    )
+                    results = [
+                        threshold_calc(t, window_size, sigma, args.per_bit)
+                        for t in _Test
+                    ]
+                    if not all(results):
+                        sys.exit("Failed to calculate one or more thresholds.")
 
 
 if __name__ == "__main__":
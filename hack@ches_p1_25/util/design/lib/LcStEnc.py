@@ -3,13 +3,26 @@
 # SPDX-License-Identifier: Apache-2.0
 r"""Contains life cycle state encoding class which is
 used to generate new life cycle encodings.
+
+Generating the incrementally writable words takes most of the time. They only
+depend on the SECDED and Hamming constraints, the number of words and the
+state of the PRNG (and thus the seed), so they are cached in the "lc_state"
+subdirectory of reggen's cache directory (see reggen.lib.cache_dir()), keyed
+by a digest of all of these.
 """
+import hashlib
+import json
 import logging as log
+import os
 from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
 
 from Crypto.Hash import cSHAKE128
-from lib.common import (check_int, ecc_encode, get_hd, hd_histogram,
-                        is_valid_codeword, random_or_hexvalue, scatter_bits)
+from lib.common import (EccEncoder, MinHdSet, check_int, get_hd,
+                        is_valid_codeword, popcount, random_or_hexvalue)
+from reggen.lib import cache_dir
 from topgen import secure_prng as sp
 
 # Seed diversification constant for LcStEnc (this enables to use
@@ -26,88 +39,91 @@ LC_STATE_TYPES = {
     'auth_state': ['0', 'I{}', 'J{}']
 }
 
+# Bump this when the format of the cached words changes.
+_CACHE_VERSION = 2
 
-def _is_incremental_codeword(word1, word2):
-    '''Test whether word2 is incremental wrt word1.'''
-    if len(word1) != len(word2):
-        raise RuntimeError('Words are not of equal size')
-
-    _word1 = int(word1, 2)
-    _word2 = int(word2, 2)
-
-    # This basically checks that the second word does not
-    # clear any bits that are set to 1 in the first word.
-    return ((_word1 & _word2) == _word1)
 
+def _get_incremental_codewords(config, encoder, base_ecc, existing_words):
+    '''Get all possible incremental codewords fulfilling the constraints.
 
-def _get_incremental_codewords(config, base_ecc, existing_words):
-    '''Get all possible incremental codewords fulfilling the constraints.'''
-
-    base_data = base_ecc[config['secded']['ecc_width']:]
+    base_ecc is a codeword as an int (see EccEncoder), and existing_words a
+    MinHdSet of the words generated so far. Returns the candidates as ints,
+    in increasing order.
+    '''
+    data_width = config['secded']['data_width']
+    base_data = base_ecc & ((1 << data_width) - 1)
+    base_ecc_bits = base_ecc >> data_width
+    max_hw = config['max_hw']
+    min_hd = config['min_hd']
+    tables = encoder._tables
 
     # We only need to spin through data bits that have not been set yet.
-    # Hence, we first count how many bits are zero (and hence still
-    # modifyable). Then, we enumerate all possible combinations and scatter
-    # the bits of the enumerated values into the correct bit positions using
-    # the scatter_bits() function.
+    # Hence, we enumerate all non-empty subsets of the zero bits of base_data
+    # in increasing order, with the usual (bits - free) & free step. Since
+    # the ECC is linear, the ECC bits of base_data | bits are those of
+    # base_data XOR'ed with those of bits.
     incr_cands = []
-    free_bits = base_data.count('0')
-    for k in range(1, 2**free_bits):
-        # Get incremental dataword by scattering the enumeration bits
-        # into the zero bit positions in base_data.
-        incr_cand = scatter_bits(base_data,
-                                 format(k, '0' + str(free_bits) + 'b'))
-        incr_cand_ecc = ecc_encode(config, incr_cand)
+    free = ~base_data & ((1 << data_width) - 1)
+    bits = (0 - free) & free
+    while bits:
+        ecc = 0
+        rest = bits
+        for table in tables:
+            ecc ^= table[rest & 0xff]
+            rest >>= 8
 
         # Dataword is correct by construction, but we need to check whether
-        # the ECC bits are incremental.
-        if _is_incremental_codeword(base_ecc, incr_cand_ecc):
-            # Check whether the candidate fulfills the maximum
-            # Hamming weight constraint.
-            if incr_cand_ecc.count('1') <= config['max_hw']:
-                # Check Hamming distance wrt all existing words.
-                for w in existing_words + [base_ecc]:
-                    if get_hd(incr_cand_ecc, w) < config['min_hd']:
-                        break
-                else:
-                    incr_cands.append(incr_cand_ecc)
+        # the ECC bits are incremental, i.e. do not clear any bits that are
+        # set in the base word.
+        if not ecc & base_ecc_bits:
+            incr_cand_ecc = base_ecc | bits | (ecc << data_width)
+            # Check whether the candidate fulfills the maximum Hamming
+            # weight constraint, and the Hamming distance wrt the base word
+            # and all existing words.
+            if (popcount(incr_cand_ecc) <= max_hw and
+                    popcount(incr_cand_ecc ^ base_ecc) >= min_hd and
+                    existing_words.fits(incr_cand_ecc)):
+                incr_cands.append(incr_cand_ecc)
+        bits = (bits - free) & free
 
     return incr_cands
 
 
-def _get_new_state_word_pair(config, existing_words):
-    '''Randomly generate a new incrementally writable word pair'''
+def _get_new_state_word_pair(config, encoder, existing_words):
+    '''Randomly generate a new incrementally writable word pair
+
+    The new words are added to existing_words (a MinHdSet), and returned as
+    strings in the format of ecc_encode().
+    '''
+    width = config['secded']['data_width']
+    ecc_width = config['secded']['ecc_width']
+    word_format = '0' + str(width + ecc_width) + 'b'
     while 1:
         # Draw a random number and check whether it is unique and whether
         # the Hamming weight is in range.
-        width = config['secded']['data_width']
-        ecc_width = config['secded']['ecc_width']
-        base = sp.getrandbits(width)
-        base = format(base, '0' + str(width) + 'b')
-        base_cand_ecc = ecc_encode(config, base)
+        base_cand_ecc = encoder.encode(sp.getrandbits(width))
         # disallow all-zero and all-one states
-        pop_cnt = base_cand_ecc.count('1')
+        pop_cnt = popcount(base_cand_ecc)
         if pop_cnt >= config['min_hw'] and pop_cnt <= config['max_hw']:
 
             # Check Hamming distance wrt all existing words
-            for w in existing_words:
-                if get_hd(base_cand_ecc, w) < config['min_hd']:
-                    break
-            else:
+            if existing_words.fits(base_cand_ecc):
                 # Get encoded incremental candidates.
                 incr_cands_ecc = _get_incremental_codewords(
-                    config, base_cand_ecc, existing_words)
+                    config, encoder, base_cand_ecc, existing_words)
                 # there are valid candidates, draw one at random.
                 # otherwise we just start over.
                 if incr_cands_ecc:
                     incr_cand_ecc = sp.choice(incr_cands_ecc)
+                    existing_words.add(base_cand_ecc)
+                    existing_words.add(incr_cand_ecc)
+                    base_str = format(base_cand_ecc, word_format)
+                    incr_str = format(incr_cand_ecc, word_format)
                     log.info('word {}: {}|{} -> {}|{}'.format(
-                        int(len(existing_words) / 2),
-                        base_cand_ecc[ecc_width:], base_cand_ecc[0:ecc_width],
-                        incr_cand_ecc[ecc_width:], incr_cand_ecc[0:ecc_width]))
-                    existing_words.append(base_cand_ecc)
-                    existing_words.append(incr_cand_ecc)
-                    return (base_cand_ecc, incr_cand_ecc)
+                        int(len(existing_words) / 2) - 1,
+                        base_str[ecc_width:], base_str[0:ecc_width],
+                        incr_str[ecc_width:], incr_str[0:ecc_width]))
+                    return (base_str, incr_str)
 
 
 def _validate_words(config, words):
@@ -228,21 +244,158 @@ def _validate_state_declarations(config):
                             entry, state, typ))
 
 
+@lru_cache(maxsize=None)
+def _sources_digest() -> str:
+    '''Digest of the code that generates the words.'''
+    h = hashlib.sha256()
+    for path in [Path(__file__), Path(__file__).with_name('common.py'),
+                 Path(sp.__file__)]:
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _cache_key(config) -> str:
+    '''Digest of everything the generated words depend on.'''
+    inputs = {
+        'version': _CACHE_VERSION,
+        'sources': _sources_digest(),
+        'seed': config['seed'],
+        'secded': config['secded'],
+        'constraints': [config['min_hw'], config['max_hw'], config['min_hd']],
+        'num_words': [config['num_' + typ + '_words']
+                      for typ in LC_STATE_TYPES],
+        'prng_state': sp.getstate(),
+    }
+    text = json.dumps(inputs, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _cache_path(key: str) -> Optional[Path]:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    return directory / 'lc_state' / (key + '.json')
+
+
+def _check_prng_state(state):
+    '''Check the PRNG state of a cache entry, return it as a tuple
+
+    Raises ValueError or TypeError if it does not have the shape of the
+    states returned by sp.getstate().
+    '''
+    v, key, reseed_counter, returned_bits = state
+    for value, width in [(v, sp.secure_prng.blocklen),
+                         (key, sp.secure_prng.keylen)]:
+        if not isinstance(value, int) or not 0 <= value < (1 << width):
+            raise ValueError('Invalid PRNG state')
+    if not isinstance(reseed_counter, int) or reseed_counter < 1:
+        raise ValueError('Invalid PRNG reseed counter')
+    if not all(isinstance(b, int) and 0 <= b < 256 for b in returned_bits):
+        raise ValueError('Invalid PRNG returned bits')
+    return (v, key, reseed_counter, list(returned_bits))
+
+
+def _cache_load(config, key: str) -> bool:
+    '''Take the words from the cache entry with the given key
+
+    This also restores the state of the PRNG after generating the words, so
+    that later random draws do not change. Returns False if there is no valid
+    entry (or the cache is disabled), in which case neither config nor the
+    PRNG is modified.
+    '''
+    path = _cache_path(key)
+    if path is None:
+        return False
+    try:
+        with open(path, 'r') as infile:
+            entry = json.load(infile)
+        genwords = {}
+        for typ in LC_STATE_TYPES:
+            genwords[typ] = [(base, incr)
+                             for base, incr in entry['genwords'][typ]]
+            if len(genwords[typ]) != config['num_' + typ + '_words']:
+                return False
+        # Validate words, in case the entry has been corrupted. The
+        # incremental word of a pair can only set bits of its base word.
+        words = []
+        for base, incr in (pair for pairs in genwords.values()
+                           for pair in pairs):
+            if not isinstance(base, str) or not isinstance(incr, str):
+                raise TypeError('Codewords must be strings')
+            if int(base, 2) & ~int(incr, 2):
+                raise RuntimeError(
+                    'Codeword {} is not an increment of {}'.format(
+                        incr, base))
+            words.extend([base, incr])
+        _validate_words(config, words)
+        prng_state = _check_prng_state(entry['prng_state'])
+    except (OSError, ValueError, KeyError, TypeError, RuntimeError):
+        return False
+
+    log.info('Using cached words from {}'.format(path))
+    config['genwords'] = genwords
+    # The statistics only depend on the words (in the order of generation).
+    config['stats'] = MinHdSet(
+        config['secded']['data_width'] + config['secded']['ecc_width'],
+        config['min_hd'], [int(w, 2) for w in words]).stats()
+    sp.setstate(prng_state)
+    return True
+
+
+def _cache_store(config, key: str) -> None:
+    '''Store the generated words in the cache.
+
+    Failing to store them is not an error.
+    '''
+    path = _cache_path(key)
+    if path is None:
+        return
+    entry = {
+        'genwords': config['genwords'],
+        'prng_state': sp.getstate(),
+    }
+    # Write to a temporary file and rename it, so that concurrent readers
+    # never see a partially written entry.
+    tmp_path = path.with_name('{}.{}.tmp'.format(key, os.getpid()))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w') as outfile:
+            json.dump(entry, outfile)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
 def _generate_words(config):
-    '''Generate encoding words'''
-    config['genwords'] = {}  # dict holding the word pairs for each state type
-    existing_words = []  # temporary list of all words for uniqueness tests
-    for typ in LC_STATE_TYPES.keys():
-        config['genwords'][typ] = []
-        for k in range(config['num_' + typ + '_words']):
-            new_word = _get_new_state_word_pair(config, existing_words)
-            config['genwords'][typ].append(new_word)
+    '''Generate encoding words, or take them from the cache'''
+    key = _cache_key(config)
+    if not _cache_load(config, key):
+        # dict holding the word pairs for each state type
+        config['genwords'] = {}
+        encoder = EccEncoder(config)
+        # temporary set of all words for uniqueness tests
+        existing_words = MinHdSet(
+            config['secded']['data_width'] + config['secded']['ecc_width'],
+            config['min_hd'])
+        words = []
+        for typ in LC_STATE_TYPES.keys():
+            config['genwords'][typ] = []
+            for k in range(config['num_' + typ + '_words']):
+                new_word = _get_new_state_word_pair(config, encoder,
+                                                    existing_words)
+                config['genwords'][typ].append(new_word)
+                words.extend(new_word)
+
+        # Validate words (this must not fail at this point).
+        _validate_words(config, words)
 
-    # Validate words (this must not fail at this point).
-    _validate_words(config, existing_words)
+        # Calculate and store statistics
+        config['stats'] = existing_words.stats()
+        _cache_store(config, key)
 
-    # Calculate and store statistics
-    config['stats'] = hd_histogram(existing_words)
     log.info('')
     log.info('Hamming distance histogram:')
     log.info('')
@@ -58,11 +58,23 @@ def _present_64bit_encrypt(plain, key):
     return cipher.encrypt(plain)
 
 
+def _present_64bit_encrypt_many(plain_blocks, key):
+    '''Scramble many 64bit blocks with PRESENT cipher and the same key'''
+
+    assert all((plain >= 0) and (plain < 2**64) for plain in plain_blocks), \
+        'Data block is out of 64bit range'
+    assert (key >= 0) and (key < 2**128), \
+        'Key is out of 128bit range'
+
+    cipher = Present(key, rounds=32, keylen=128)
+    return cipher.encrypt_many(plain_blocks)
+
+
 def _present_64bit_digest(data_blocks, iv, const):
     '''Compute digest over multiple 64bit data blocks'''
 
-    # Make a deepcopy since we're going to modify and pad the list.
-    data_blocks = copy.deepcopy(data_blocks)
+    # Make a copy since we're going to modify and pad the list.
+    data_blocks = list(data_blocks)
 
     # We need to align the number of data blocks to 2x64bit
     # for the digest to work properly.
@@ -200,6 +212,29 @@ class OtpMemImg(OtpMemMap):
         # validation and image generation depends on them
         self.lc_state = LcStEnc(lc_state_config)
 
+        self._merge_img_config(img_config, data_perm)
+
+    @classmethod
+    def from_parsed(cls, otp_mmap, lc_state, img_config, data_perm):
+        '''Create an image from an already parsed memory map and LC encoding
+
+        This skips parsing the OTP memory map and generating the life cycle
+        state encoding, which takes most of the time, so that many images can
+        be generated from the same definitions. The memory map config is
+        copied, since the image data is merged into it, and lc_state is
+        shared.
+        '''
+        img = cls.__new__(cls)
+        img.config = copy.deepcopy(otp_mmap.config)
+        img.part_dict = otp_mmap.part_dict
+        img.part_layouts = otp_mmap.part_layouts
+        img.lc_state = lc_state
+        img._merge_img_config(img_config, data_perm)
+        return img
+
+    def _merge_img_config(self, img_config, data_perm):
+        '''Validate the main image configuration and merge its data'''
+
         # Validate memory image configuration
         log.info('')
         log.info('Parse OTP image specification.')
@@ -344,21 +379,24 @@ class OtpMemImg(OtpMemMap):
 
         log.info('> Adding {}item {} with size {}B and value{}:'.format(
             mubi_str, item['name'], item_size, mubi_val_str))
-        fmt_str = '{:0' + str(item_size * 2) + 'x}'
-        value_str = fmt_str.format(item['value'])
-        bytes_per_line = 8
-        j = 0
-        while value_str:
-            # Print out max 64bit per line
-            line_str = ''
-            for k in range(bytes_per_line):
-                num_chars = min(len(value_str), 2)
-                line_str += value_str[-num_chars:]
-                if k < bytes_per_line - 1:
-                    line_str += ' '
-                value_str = value_str[:len(value_str) - num_chars]
-            log.info('  {:06x}: '.format(j) + line_str)
-            j += bytes_per_line
+        # Formatting the value dump is slow for big items, so skip it if it
+        # is not printed anyway.
+        if log.getLogger().isEnabledFor(log.INFO):
+            fmt_str = '{:0' + str(item_size * 2) + 'x}'
+            value_str = fmt_str.format(item['value'])
+            bytes_per_line = 8
+            j = 0
+            while value_str:
+                # Print out max 64bit per line
+                line_str = ''
+                for k in range(bytes_per_line):
+                    num_chars = min(len(value_str), 2)
+                    line_str += value_str[-num_chars:]
+                    if k < bytes_per_line - 1:
+                        line_str += ' '
+                    value_str = value_str[:len(value_str) - num_chars]
+                log.info('  {:06x}: '.format(j) + line_str)
+                j += bytes_per_line
 
         # Key accounting
         item_check = item.copy()
@@ -392,40 +430,36 @@ class OtpMemImg(OtpMemMap):
         part_name = part['name']
         log.info('Streamout of partition {}'.format(part_name))
 
-        part_offset = part['offset']
         part_size = part['size']
         assert part_size % 8 == 0, 'Partition must be 64bit aligned'
 
-        # First chop up all items into individual bytes.
-        data_bytes = [0] * part_size
-        # Annotation is propagated into the MEM file as comments
-        annotation = ['unallocated'] * part_size
-        # Need to keep track of defined items for the scrambling.
-        # Undefined regions are left blank (0x0) in the memory.
-        defined = [False] * part_size
-        for item in part['items']:
-            for k in range(item['size']):
-                idx = item['offset'] - part_offset + k
-                annotation[idx] = part_name + ': ' + item['name']
-                if 'value' in item:
-                    data_bytes[idx] = ((item['value'] >> (8 * k)) & 0xFF)
-                    assert not defined[idx], "Unexpected item collision"
-                    defined[idx] = True
+        # Place the item values with the precomputed layout. Undefined regions
+        # are left blank (0x0) in the memory. Need to keep track of the
+        # defined 64bit blocks for the scrambling: if any of their bytes are
+        # defined, the whole block is considered defined.
+        layout = self.part_layouts[part_name]
+        value = 0
+        defined = 0
+        data_block_defined = [False] * (part_size // 8)
+        for item, (offset, size) in zip(part['items'], layout['items']):
+            if size and 'value' in item:
+                mask = (1 << (8 * size)) - 1
+                assert not defined & (mask << (8 * offset)), \
+                    "Unexpected item collision"
+                defined |= mask << (8 * offset)
+                value |= (item['value'] & mask) << (8 * offset)
+                for k in range(offset // 8, (offset + size + 7) // 8):
+                    data_block_defined[k] = True
 
         # Reshape this into 64bit blocks (this must be aligned at this point)
-        assert len(data_bytes) % 8 == 0, 'data_bytes must be 64bit aligned'
-
-        data_blocks = []
-        data_block_defined = []
-        for k, b in enumerate(data_bytes):
-            if (k % 8) == 0:
-                data_blocks.append(b)
-                data_block_defined.append(defined[k])
-            else:
-                data_blocks[k // 8] += (b << 8 * (k % 8))
-                # If any of the individual bytes are defined, the
-                # whole block is considered defined.
-                data_block_defined[k // 8] |= defined[k]
+        data_bytes = value.to_bytes(part_size, 'little')
+        data_blocks = [
+            int.from_bytes(data_bytes[k:k + 8], 'little')
+            for k in range(0, part_size, 8)
+        ]
+
+        # Annotation is propagated into the MEM file as comments
+        annotation = list(layout['annotation'])
 
         # Check if scrambling is needed
         if part['secret']:
@@ -440,10 +474,12 @@ class OtpMemImg(OtpMemMap):
                 raise RuntimeError(
                     'Scrambling key cannot be found {}'.format(key_sel))
 
-            for k in range(len(data_blocks)):
-                if data_block_defined[k]:
-                    data_blocks[k] = _present_64bit_encrypt(
-                        data_blocks[k], key['value'])
+            # Encrypt all defined blocks in one go with the same key.
+            idx = [k for k, d in enumerate(data_block_defined) if d]
+            ciphers = _present_64bit_encrypt_many(
+                [data_blocks[k] for k in idx], key['value'])
+            for k, cipher in zip(idx, ciphers):
+                data_blocks[k] = cipher
 
         # Check if digest calculation is needed
         if part['hw_digest']:
@@ -470,10 +506,8 @@ class OtpMemImg(OtpMemMap):
 
         # Convert to a list of bytes to make final packing into
         # OTP memory words independent of the cipher block size.
-        data = []
-        for block in data_blocks:
-            for k in range(8):
-                data.append((block >> (8 * k)) & 0xFF)
+        data = list(b''.join(block.to_bytes(8, 'little')
+                             for block in data_blocks))
 
         # Make sure this has the right size
         assert len(data) == part['size'], 'Partition size mismatch'
@@ -387,12 +387,41 @@ def _validate_mmap(config: Dict) -> Dict:
     return part_dict
 
 
+def _part_layouts(config: Dict) -> Dict:
+    '''Precompute where the items of each partition go in its data
+
+    For each partition, this returns a dict with a tuple (offset, size) for
+    each item, where offset is relative to the start of the partition, and the
+    annotation of each byte of the partition (for the comments in MEM files).
+    These only depend on the memory map, so they are computed once and then
+    reused for every image.
+    '''
+    layouts = {}
+    for part in config['partitions']:
+        part_offset = check_int(part['offset'])
+        annotation = ['unallocated'] * check_int(part['size'])
+        items = []
+        for item in part['items']:
+            offset = check_int(item['offset']) - part_offset
+            size = check_int(item['size'])
+            # Items may overlap, as long as at most one of them has a value
+            # (see OtpMemImg.streamout_partition). The last one annotates the
+            # bytes they share.
+            annotation[offset:offset + size] = \
+                [part['name'] + ': ' + item['name']] * size
+            items.append((offset, size))
+        layouts[part['name']] = {'items': items, 'annotation': annotation}
+    return layouts
+
+
 class OtpMemMap():
 
     # This holds the config dict.
     config = {}
     # This holds the partition/item index dict for fast access.
     part_dict = {}
+    # This holds the precomputed item layout of each partition.
+    part_layouts = {}
 
     def __init__(self, config):
 
@@ -423,6 +452,7 @@ class OtpMemMap():
         _validate_scrambling(config["scrambling"])
         # Validate memory map.
         self.part_dict = _validate_mmap(config)
+        self.part_layouts = _part_layouts(config)
 
         self.config = config
 
@@ -1,10 +1,11 @@
 # Python PRESENT implementation
-# Version: 1.2
-# Date: 01/27/2021
+# Version: 1.3
+# Date: 10/19/2026
 #
 # Version 1.0: Original Version from https://github.com/doegox/python-cryptoplus
 # Version 1.1: Minor modifications to run with Python >= 3.5
 # Version 1.2: Remove string to int conversions
+# Version 1.3: Table-driven rounds, cached key schedules and batch encryption
 #
 # =============================================================================
 # Copyright (c) 2008 Christophe Oosterlynck <christophe.oosterlynck_AT_gmail.com>
@@ -65,6 +66,8 @@ fully based on standard specifications: http://www.crypto.ruhr-uni-bochum.de/imp
 test vectors: http://www.crypto.ruhr-uni-bochum.de/imperia/md/content/texte/publications/conferences/slides/present_testvectors.zip
 """ # noqa: E501 E261
 
+import functools
+
 
 class Present:
     def __init__(self, key, rounds=32, keylen=128):
@@ -76,11 +79,9 @@ class Present:
                 """
         self.rounds = rounds
         if keylen == 80 and key < 2**80:
-            self.roundkeys = generateRoundkeys80(key,
-                                                 self.rounds)
+            self.roundkeys = _roundkeys80(key, self.rounds)
         elif keylen == 128 and key < 2**128:
-            self.roundkeys = generateRoundkeys128(key,
-                                                  self.rounds)
+            self.roundkeys = _roundkeys128(key, self.rounds)
         else:
             raise ValueError("keylen be 80 or 128")
 
@@ -90,13 +91,7 @@ class Present:
                 Input:  plaintext block as raw string
                 Output: ciphertext block as raw string
                 """
-        state = block
-        for i in range(self.rounds - 1):
-            state = addRoundKey(state, self.roundkeys[i])
-            state = sBoxLayer(state)
-            state = pLayer(state)
-        cipher = addRoundKey(state, self.roundkeys[-1])
-        return cipher
+        return self.encrypt_many([block])[0]
 
     def decrypt(self, block):
         """Decrypt 1 block (8 bytes)
@@ -104,13 +99,53 @@ class Present:
                 Input:  ciphertext block as raw string
                 Output: plaintext block as raw string
                 """
-        state = block
-        for i in range(self.rounds - 1):
-            state = addRoundKey(state, self.roundkeys[-i - 1])
-            state = pLayer_dec(state)
-            state = sBoxLayer_dec(state)
-        decipher = addRoundKey(state, self.roundkeys[0])
-        return decipher
+        return self.decrypt_many([block])[0]
+
+    def encrypt_many(self, blocks):
+        """Encrypt many blocks with the same key
+
+                Input:  iterable of 64-bit plaintext blocks as integers
+                Output: list of 64-bit ciphertext blocks as integers
+
+                Each round applies the S-box and permutation layers with one
+                table lookup per byte of the state (see _SP_TABLES).
+                """
+        t0, t1, t2, t3, t4, t5, t6, t7 = _SP_TABLES
+        roundkeys = self.roundkeys[:-1]
+        lastkey = self.roundkeys[-1]
+        ciphers = []
+        for state in blocks:
+            for roundkey in roundkeys:
+                state ^= roundkey
+                state = (t0[state & 0xff] ^ t1[(state >> 8) & 0xff] ^
+                         t2[(state >> 16) & 0xff] ^ t3[(state >> 24) & 0xff] ^
+                         t4[(state >> 32) & 0xff] ^ t5[(state >> 40) & 0xff] ^
+                         t6[(state >> 48) & 0xff] ^ t7[state >> 56])
+            ciphers.append(state ^ lastkey)
+        return ciphers
+
+    def decrypt_many(self, blocks):
+        """Decrypt many blocks with the same key
+
+                Input:  iterable of 64-bit ciphertext blocks as integers
+                Output: list of 64-bit plaintext blocks as integers
+                """
+        p0, p1, p2, p3, p4, p5, p6, p7 = _P_INV_TABLES
+        sbox_inv = _SBOX_INV_BYTE
+        roundkeys = self.roundkeys[:0:-1]
+        firstkey = self.roundkeys[0]
+        plains = []
+        for state in blocks:
+            for roundkey in roundkeys:
+                state ^= roundkey
+                state = (p0[state & 0xff] ^ p1[(state >> 8) & 0xff] ^
+                         p2[(state >> 16) & 0xff] ^ p3[(state >> 24) & 0xff] ^
+                         p4[(state >> 32) & 0xff] ^ p5[(state >> 40) & 0xff] ^
+                         p6[(state >> 48) & 0xff] ^ p7[state >> 56])
+                state = int.from_bytes(
+                    state.to_bytes(8, 'little').translate(sbox_inv), 'little')
+            plains.append(state ^ firstkey)
+        return plains
 
     def get_block_size(self):
         return 8
@@ -177,6 +212,16 @@ def generateRoundkeys128(key, rounds):
     return roundkeys
 
 
+@functools.lru_cache(maxsize=1024)
+def _roundkeys80(key, rounds):
+    return tuple(generateRoundkeys80(key, rounds))
+
+
+@functools.lru_cache(maxsize=1024)
+def _roundkeys128(key, rounds):
+    return tuple(generateRoundkeys128(key, rounds))
+
+
 def addRoundKey(state, roundkey):
     return state ^ roundkey
 
@@ -226,6 +271,22 @@ def pLayer_dec(state):
     return output
 
 
+# The S-box and permutation layers of a round, one table per byte of the
+# state: _SP_TABLES[i][b] is pLayer(sBoxLayer(state)) for the contribution of
+# byte i of the state if it has the value b. As pLayer is a bit permutation,
+# a round is the XOR of the entries for the eight bytes.
+_SP_TABLES = [[
+    pLayer((Sbox[b & 0xF] | (Sbox[b >> 4] << 4)) << (8 * i)) for b in range(256)
+] for i in range(8)]
+
+# The inverse permutation layer, one table per byte, and the inverse S-box
+# applied to both nibbles of a byte (for bytes.translate).
+_P_INV_TABLES = [[pLayer_dec(b << (8 * i)) for b in range(256)]
+                 for i in range(8)]
+_SBOX_INV_BYTE = bytes(Sbox_inv[b & 0xF] | (Sbox_inv[b >> 4] << 4)
+                       for b in range(256))
+
+
 def _test():
     import doctest
     doctest.testmod()
@@ -7,8 +7,10 @@ import random
 import re
 import sys
 import textwrap
+from array import array
 from math import ceil, log2
 from pathlib import Path
+from typing import Dict, Iterable, Iterator
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../'))
 
@@ -157,31 +159,77 @@ def get_hd(word1: str, word2: str) -> int:
     return bin(int(word1, 2) ^ int(word2, 2)).count('1')
 
 
-def hd_histogram(existing_words):
-    '''Build Hamming distance histogram'''
-    minimum_hd = len(existing_words[0])
-    maximum_hd = 0
-    minimum_hw = len(existing_words[0])
-    maximum_hw = 0
-    hist = [0] * (len(existing_words[0]) + 1)
-    for i, j in enumerate(existing_words):
-        minimum_hw = min(j.count('1'), minimum_hw)
-        maximum_hw = max(j.count('1'), maximum_hw)
-        if i < len(existing_words) - 1:
-            for k in existing_words[i + 1:]:
-                dist = get_hd(j, k)
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:
+    def popcount(word: int) -> int:
+        '''Count the bits set in a (non-negative) int.'''
+        return bin(word).count('1')
+
+
+class MinHdSet:
+    '''A set of words with a minimum pairwise Hamming distance.
+
+    The words are kept as ints, in an array of 64-bit words if they are narrow
+    enough. The distances from a candidate to all accepted words are computed
+    in one pass with XOR and popcount, rather than comparing binary strings
+    character by character.
+    '''
+
+    def __init__(self, width: int, min_hd: int, words: Iterable[int] = ()):
+        self.width = width
+        self.min_hd = min_hd
+        self.words = array('Q') if width <= 64 else []
+        self.words.extend(words)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.words)
+
+    def __contains__(self, word: int) -> bool:
+        return word in self.words
+
+    def distances(self, cand: int) -> Iterator[int]:
+        '''Hamming distances from cand to all words, in order.'''
+        return map(popcount, map(cand.__xor__, self.words))
+
+    def min_distance(self, cand: int) -> int:
+        '''Smallest distance from cand to any word (width + 1 if empty).'''
+        return min(self.distances(cand), default=self.width + 1)
+
+    def fits(self, cand: int) -> bool:
+        '''Whether cand is at least min_hd away from all words.'''
+        return self.min_distance(cand) >= self.min_hd
+
+    def add(self, word: int) -> None:
+        self.words.append(word)
+
+    def stats(self) -> Dict:
+        '''Build Hamming distance histogram and statistics'''
+        width = self.width
+        hist = [0] * (width + 1)
+        for i, word in enumerate(self.words):
+            for dist in map(popcount, map(word.__xor__, self.words[i + 1:])):
                 hist[dist] += 1
-                minimum_hd = min(dist, minimum_hd)
-                maximum_hd = max(dist, maximum_hd)
+        weights = list(map(popcount, self.words))
+        dists = [dist for dist, cnt in enumerate(hist) if cnt]
 
-    stats = {}
-    stats["hist"] = hist
-    stats["bars"] = hist_to_bars(hist, len(existing_words))
-    stats["min_hd"] = minimum_hd
-    stats["max_hd"] = maximum_hd
-    stats["min_hw"] = minimum_hw
-    stats["max_hw"] = maximum_hw
-    return stats
+        stats = {}
+        stats["hist"] = hist
+        stats["bars"] = hist_to_bars(hist, len(self.words))
+        stats["min_hd"] = min(dists, default=width)
+        stats["max_hd"] = max(dists, default=0)
+        stats["min_hw"] = min(weights + [width])
+        stats["max_hw"] = max(weights + [0])
+        return stats
+
+
+def hd_histogram(existing_words):
+    '''Build Hamming distance histogram'''
+    width = len(existing_words[0])
+    return MinHdSet(width, 0, [int(w, 2) for w in existing_words]).stats()
 
 
 def is_valid_codeword(config, codeword):
@@ -222,6 +270,45 @@ def ecc_encode(config, dataword):
     return codeword
 
 
+class EccEncoder:
+    '''Integer version of ecc_encode() for the SECDED config of a config.
+
+    Data words and codewords are ints, with the ECC bits above the data bits,
+    so int(ecc_encode(config, w), 2) == encoder.encode(int(w, 2)). The ECC
+    bits are a linear function of the data bits, and are computed with one
+    lookup table per data byte.
+    '''
+
+    def __init__(self, config):
+        self.data_width = config['secded']['data_width']
+        self.ecc_width = config['secded']['ecc_width']
+        self._masks = [sum(1 << k for k in fanin)
+                       for fanin in config['secded']['ecc_matrix']]
+        self._tables = [[self._ecc_serial(v << b) for v in range(256)]
+                        for b in range(0, self.data_width, 8)]
+
+    def _ecc_serial(self, dataword: int) -> int:
+        # Like ecc_encode(), ECC bits may refer to earlier ECC bits.
+        codeword = dataword
+        for j, mask in enumerate(self._masks):
+            bit = popcount(codeword & mask) & 1
+            codeword |= bit << (self.data_width + j)
+        return codeword >> self.data_width
+
+    def ecc(self, dataword: int) -> int:
+        '''Returns the ECC bits of dataword.'''
+        ecc = 0
+        for table in self._tables:
+            ecc ^= table[dataword & 0xff]
+            dataword >>= 8
+        return ecc
+
+    def encode(self, dataword: int) -> int:
+        '''Returns the codeword {ECC bits, data bits} of dataword.'''
+        assert 0 <= dataword < (1 << self.data_width)
+        return (self.ecc(dataword) << self.data_width) | dataword
+
+
 def scatter_bits(mask, bits):
     '''Scatter the bits into unset positions of mask.'''
     j = 0
@@ -4,7 +4,7 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import unittest
-from common import get_hd
+from common import MinHdSet, get_hd, hd_histogram
 
 
 class TestGetHd(unittest.TestCase):
@@ -27,5 +27,27 @@ class TestGetHd(unittest.TestCase):
         self.assertEqual(get_hd('100101', '010100'), 3)
 
 
+class TestMinHdSet(unittest.TestCase):
+
+    def test_fits(self):
+        words = MinHdSet(8, 3, [0b00111010])
+        self.assertEqual(list(words.distances(0b01001010)), [3])
+        self.assertTrue(words.fits(0b01001010))
+        self.assertFalse(words.fits(0b10011010))
+        self.assertIn(0b00111010, words)
+        self.assertTrue(MinHdSet(8, 3).fits(0))
+
+    def test_wide_words(self):
+        words = MinHdSet(72, 2, [1 << 71])
+        self.assertEqual(words.min_distance((1 << 71) | 1), 1)
+        self.assertTrue(words.fits(3))
+
+    def test_hd_histogram(self):
+        stats = hd_histogram(['0011', '0101', '1110'])
+        self.assertEqual(stats['hist'], [0, 0, 1, 2, 0])
+        self.assertEqual((stats['min_hd'], stats['max_hd']), (2, 3))
+        self.assertEqual((stats['min_hw'], stats['max_hw']), (2, 3))
+
+
 if __name__ == '__main__':
     unittest.main()
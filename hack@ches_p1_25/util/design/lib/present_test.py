@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import random
+import unittest
+
+from Present import Present, pLayer, sBoxLayer
+
+
+def encrypt_reference(cipher, block):
+    '''Encrypts block with the bit-level S-box and permutation layers.'''
+    state = block
+    for roundkey in cipher.roundkeys[:-1]:
+        state = pLayer(sBoxLayer(state ^ roundkey))
+    return state ^ cipher.roundkeys[-1]
+
+
+class TestPresent(unittest.TestCase):
+
+    def test_vectors(self):
+        # Test vectors from the PRESENT paper (80-bit keys) and the one used
+        # by OtpMemImg (128-bit key).
+        vectors = [
+            (0x0, 80, 0x0, 0x5579c1387b228445),
+            (0xffffffffffffffffffff, 80, 0x0, 0xe72c46c0f5945049),
+            (0x0, 80, 0xffffffffffffffff, 0xa112ffc72f68417b),
+            (0xffffffffffffffffffff, 80, 0xffffffffffffffff,
+             0x3333dcd3213210d2),
+            (0x0123456789abcdef0123456789abcdef, 128, 0x0123456789abcdef,
+             0x0e9d28685e671dd6),
+        ]
+        for key, keylen, plain, cipher in vectors:
+            present = Present(key, keylen=keylen)
+            self.assertEqual(present.encrypt(plain), cipher)
+            self.assertEqual(present.decrypt(cipher), plain)
+
+    def test_many(self):
+        rnd = random.Random(1)
+        for keylen in [80, 128]:
+            present = Present(rnd.getrandbits(keylen), keylen=keylen)
+            blocks = [rnd.getrandbits(64) for _ in range(64)]
+            ciphers = present.encrypt_many(blocks)
+            self.assertEqual(
+                ciphers, [encrypt_reference(present, b) for b in blocks])
+            self.assertEqual(present.decrypt_many(ciphers), blocks)
+
+
+if __name__ == '__main__':
+    unittest.main()
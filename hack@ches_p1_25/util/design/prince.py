@@ -4,7 +4,8 @@
 # SPDX-License-Identifier: Apache-2.0
 '''Implementation of PRINCE cipher for use in ROM/FLASH scrambling scripts.'''
 
-from typing import List
+from functools import lru_cache
+from typing import Callable, Iterable, List, Tuple
 
 PRINCE_SBOX4 = [
     0xb, 0xf, 0x3, 0x2,
@@ -129,8 +130,11 @@ def prince_inv_round(rc: int, key: int, data: int) -> int:
     return data
 
 
-def prince(data: int, key: int, num_rounds_half: int) -> int:
-    '''Run the PRINCE cipher
+def prince_reference(data: int, key: int, num_rounds_half: int) -> int:
+    '''Run the PRINCE cipher, one layer and one nibble at a time
+
+    This is the straightforward model of the cipher. The table-driven Prince
+    class (which prince() uses) is checked against it.
 
     This uses the new keyschedule proposed by Dinur in "Cryptanalytic
     Time-Memory-Data Tradeoffs for FX-Constructions with Applications to PRINCE
@@ -173,3 +177,147 @@ def prince(data: int, key: int, num_rounds_half: int) -> int:
     data ^= k0_prime
 
     return data
+
+
+def _key_halves(key: int) -> Tuple[int, int, int]:
+    k1 = key & ((1 << 64) - 1)
+    k0 = key >> 64
+    k0_rot1 = ((k0 & 1) << 63) | (k0 >> 1)
+    k0_prime = k0_rot1 ^ (k0 >> 63)
+    return k0, k1, k0_prime
+
+
+def _byte_tables(sbox4: List[int],
+                 linear: Callable[[int], int]) -> List[List[int]]:
+    '''Tables for linear(sbox(data, 64, sbox4)), one per byte of data.
+
+    Entry b of table i is the contribution of byte i of data if it has the
+    value b. As the S-box works on nibbles and linear is linear, the whole
+    layer is the XOR of the entries for the eight bytes of data.
+    '''
+    sbox8 = [sbox4[b & 0xf] | (sbox4[b >> 4] << 4) for b in range(256)]
+    return [[linear(sbox8[b] << (8 * i)) for b in range(256)]
+            for i in range(8)]
+
+
+@lru_cache(maxsize=None)
+def _round_tables() -> Tuple[List[List[int]], List[List[int]],
+                             List[List[int]], bytes]:
+    '''The lookup tables of the rounds of Prince.
+
+    fwd is a forward round without the key and round constant: the S-box,
+    prince_mult_prime and the row shift. mid is the S-box followed by
+    prince_mult_prime (the middle layer before its inverse S-box). inv is the
+    inverse S-box followed by the linear part of an inverse round, which lets
+    the inverse rounds run as (see Prince.encrypt_many):
+
+      z' = inv(z) ^ (linear part of an inverse round applied to rc ^ key)
+
+    with the inverse S-box of the last round applied by sbox_inv, which maps
+    each byte through the inverse S-box (for bytes.translate).
+    '''
+    def fwd_linear(data: int) -> int:
+        return prince_shiftrows(prince_mult_prime(data), False)
+
+    def inv_linear(data: int) -> int:
+        return prince_mult_prime(prince_shiftrows(data, True))
+
+    fwd = _byte_tables(PRINCE_SBOX4, fwd_linear)
+    mid = _byte_tables(PRINCE_SBOX4, prince_mult_prime)
+    inv = _byte_tables(PRINCE_SBOX4_INV, inv_linear)
+    sbox_inv = bytes(PRINCE_SBOX4_INV[b & 0xf] | (PRINCE_SBOX4_INV[b >> 4] << 4)
+                     for b in range(256))
+    return fwd, mid, inv, sbox_inv
+
+
+class Prince:
+    '''The PRINCE cipher with a fixed key, for encrypting many blocks
+
+    Each layer of a round is computed with one table lookup per byte of the
+    state (see _round_tables), and the round keys and constants are combined
+    once for all blocks. The result is the same as prince_reference().
+    '''
+
+    def __init__(self, key: int, num_rounds_half: int) -> None:
+        assert 0 <= key < (1 << 128)
+        assert 0 <= num_rounds_half <= 5
+
+        k0, k1, k0_prime = _key_halves(key)
+        self._whiten_in = k0 ^ k1 ^ PRINCE_ROUND_CONSTS[0]
+        self._whiten_out = PRINCE_ROUND_CONSTS[11] ^ k1 ^ k0_prime
+
+        # The constants XOR'ed into the state by each forward round and, in
+        # the coordinates described in _round_tables, by each inverse round.
+        self._fwd_consts = []
+        for hri in range(num_rounds_half):
+            round_idx = 1 + hri
+            rk = k0 if round_idx & 1 else k1
+            self._fwd_consts.append(PRINCE_ROUND_CONSTS[round_idx] ^ rk)
+        self._inv_consts = []
+        for hri in range(num_rounds_half):
+            round_idx = 11 - num_rounds_half + hri
+            rk = k1 if round_idx & 1 else k0
+            const = PRINCE_ROUND_CONSTS[round_idx] ^ rk
+            self._inv_consts.append(
+                prince_mult_prime(prince_shiftrows(const, True)))
+
+    def encrypt(self, data: int) -> int:
+        '''Encrypt a 64-bit block'''
+        return self.encrypt_many([data])[0]
+
+    def encrypt_many(self, blocks: Iterable[int]) -> List[int]:
+        '''Encrypt many 64-bit blocks'''
+        fwd, mid, inv, sbox_inv = _round_tables()
+        f0, f1, f2, f3, f4, f5, f6, f7 = fwd
+        m0, m1, m2, m3, m4, m5, m6, m7 = mid
+        i0, i1, i2, i3, i4, i5, i6, i7 = inv
+        whiten_in = self._whiten_in
+        whiten_out = self._whiten_out
+        fwd_consts = self._fwd_consts
+        inv_consts = self._inv_consts
+
+        ciphers = []
+        for data in blocks:
+            assert 0 <= data < (1 << 64)
+            x = data ^ whiten_in
+            for const in fwd_consts:
+                x = (f0[x & 0xff] ^ f1[(x >> 8) & 0xff] ^
+                     f2[(x >> 16) & 0xff] ^ f3[(x >> 24) & 0xff] ^
+                     f4[(x >> 32) & 0xff] ^ f5[(x >> 40) & 0xff] ^
+                     f6[(x >> 48) & 0xff] ^ f7[x >> 56] ^ const)
+            x = (m0[x & 0xff] ^ m1[(x >> 8) & 0xff] ^
+                 m2[(x >> 16) & 0xff] ^ m3[(x >> 24) & 0xff] ^
+                 m4[(x >> 32) & 0xff] ^ m5[(x >> 40) & 0xff] ^
+                 m6[(x >> 48) & 0xff] ^ m7[x >> 56])
+            for const in inv_consts:
+                x = (i0[x & 0xff] ^ i1[(x >> 8) & 0xff] ^
+                     i2[(x >> 16) & 0xff] ^ i3[(x >> 24) & 0xff] ^
+                     i4[(x >> 32) & 0xff] ^ i5[(x >> 40) & 0xff] ^
+                     i6[(x >> 48) & 0xff] ^ i7[x >> 56] ^ const)
+            x = int.from_bytes(x.to_bytes(8, 'little').translate(sbox_inv),
+                               'little')
+            ciphers.append(x ^ whiten_out)
+        return ciphers
+
+
+@lru_cache(maxsize=16)
+def _prince_cipher(key: int, num_rounds_half: int) -> Prince:
+    return Prince(key, num_rounds_half)
+
+
+def prince(data: int, key: int, num_rounds_half: int) -> int:
+    '''Run the PRINCE cipher
+
+    This uses the new keyschedule proposed by Dinur in "Cryptanalytic
+    Time-Memory-Data Tradeoffs for FX-Constructions with Applications to PRINCE
+    and PRIDE".
+
+    '''
+    assert 0 <= data < (1 << 64)
+    return _prince_cipher(key, num_rounds_half).encrypt(data)
+
+
+def prince_many(blocks: Iterable[int], key: int,
+                num_rounds_half: int) -> List[int]:
+    '''Run the PRINCE cipher on many blocks with the same key'''
+    return _prince_cipher(key, num_rounds_half).encrypt_many(blocks)
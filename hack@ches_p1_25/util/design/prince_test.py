@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import random
+import unittest
+
+from prince import Prince, prince, prince_many, prince_reference
+
+
+class TestPrince(unittest.TestCase):
+
+    def test_matches_reference(self):
+        rnd = random.Random(1)
+        for num_rounds_half in range(6):
+            for _ in range(50):
+                data = rnd.getrandbits(64)
+                key = rnd.getrandbits(128)
+                self.assertEqual(prince(data, key, num_rounds_half),
+                                 prince_reference(data, key, num_rounds_half))
+
+    def test_many(self):
+        rnd = random.Random(2)
+        key = rnd.getrandbits(128)
+        blocks = [rnd.getrandbits(64) for _ in range(64)] + [0, 2**64 - 1]
+        expected = [prince_reference(b, key, 3) for b in blocks]
+        self.assertEqual(prince_many(blocks, key, 3), expected)
+        self.assertEqual(Prince(key, 3).encrypt_many(iter(blocks)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
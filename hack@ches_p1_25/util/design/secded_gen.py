@@ -19,7 +19,7 @@ import math
 import random
 import hjson
 import subprocess
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Tuple
 from pathlib import Path
 
 COPYRIGHT = """// Copyright lowRISC contributors (OpenTitan project).
@@ -89,6 +89,15 @@ SECDED_CFG_PATH = Path(PROJ_ROOT) / SECDED_CFG_FILE
 # to choose constants for Hsiao codes.
 _RND_SEED = 123
 
+# The number of random subsets the Hsiao code search tries before it falls
+# back to balancing the fan-in deterministically (see _balance_fanin). All the
+# codes in secded_cfg.hjson are found well within this, so their constants do
+# not depend on the fallback.
+_HSIAO_MAX_SHUFFLES = 1000
+
+# The maximum number of swaps _balance_fanin makes to reach the ideal fan-in.
+_HSIAO_MAX_SWAPS = 10000
+
 
 def min_paritysize(k):
     # SECDED --> Hamming distance 'd': 4
@@ -347,73 +356,193 @@ def verify(cfgs):
     return error
 
 
-def _ecc_pick_code(config: Dict[str, Any], codetype: str, k: int) -> Tuple[int, List[int], int]:
-    # first check to see if bit width is supported among configuration
+class SecdedCodec:
+    '''Integer SECDED encoder and decoder for one code.
 
-    codes = None
-    bitmasks = None
-    m = None
-    for cfg in config['cfgs']:
-        if cfg['k'] == k and cfg['code_type'] == codetype:
-            m = cfg['m']
-            codes = gen_code(codetype, k, m)
-            bitmasks = calc_bitmasks(k, m, codes, False)
-            invert = 1 if codetype in ['inv_hsiao', 'inv_hamming'] else 0
-            return (m, bitmasks, invert)
+    The ECC bits of a code are an affine function of the data bits: the
+    parity over the data bits selected by a mask, XOR'ed with a constant for
+    the inverted codes. Hamming codes also feed earlier ECC bits into later
+    ones, which keeps the function affine. So they are computed with one
+    lookup table per data byte, each giving the contribution of that byte to
+    the ECC bits, and the syndrome of a codeword likewise with one table per
+    codeword byte. The tables are built once per code with the bit-serial
+    encoder, encode_serial(), which matches the RTL encoder bit by bit.
 
-    # error if k not supported
-    raise Exception(f'ECC for length {k} of type {codetype} unsupported')
+    Data words and codewords are plain ints, and the *_many methods accept
+    any iterable of ints (lists, array.array or NumPy buffers).
+    '''
+
+    def __init__(self, codetype: str, k: int, m: int) -> None:
+        self.codetype = codetype
+        self.k = k
+        self.m = m
+        self.n = k + m
+        codes = gen_code(codetype, k, m)
+        self._enc_masks = calc_bitmasks(k, m, codes, False)
+        self._dec_masks = calc_bitmasks(k, m, codes, True)
+        # The ECC bits that are inverted (see print_enc function).
+        self.invert = 0
+        if codetype in ['inv_hsiao', 'inv_hamming']:
+            self.invert = sum((j % 2) << j for j in range(m))
+
+        self._ecc_zero = self.encode_serial(0) >> k
+        self._enc_tables = [
+            self._byte_table(b, k, lambda w: (self.encode_serial(w) >> k) ^
+                             self._ecc_zero)
+            for b in range(0, k, 8)
+        ]
+        self._syn_tables = [
+            self._byte_table(b, self.n, self._syndrome_serial)
+            for b in range(0, self.n, 8)
+        ]
+
+        # The syndrome of a flipped data bit, and the error flags of each
+        # syndrome (bit 0: single error, bit 1: double error), as in
+        # print_dec.
+        self._syn_to_bit = {sum(1 << x for x in codes[i]): i
+                            for i in range(k)}
+        self._syn_to_err = [self._error_flags(s) for s in range(1 << m)]
+
+    @staticmethod
+    def _byte_table(b: int, width: int,
+                    func: Callable[[int], int]) -> List[int]:
+        # The values of func for each value of the byte at bit b of a word of
+        # the given width, with all other bits zero.
+        return [func(v << b) for v in range(1 << min(8, width - b))]
+
+    def _error_flags(self, syndrome: int) -> int:
+        if not syndrome:
+            return 0
+        if self.codetype in ['hamming', 'inv_hamming']:
+            single = syndrome >> (self.m - 1)
+        else:
+            single = bin(syndrome).count('1') & 1
+        return 1 if single else 2
+
+    def encode_serial(self, dataword: int) -> int:
+        '''Returns the codeword of dataword, computed bit by bit.'''
+        assert 0 <= dataword < (1 << self.k)
+        codeword = dataword
+        for j, mask in enumerate(self._enc_masks):
+            bit = bin(codeword & mask).count('1') & 1
+            codeword |= bit << (self.k + j)
+        # Like the RTL encoder, invert after computing all ECC bits, which
+        # matters for Hamming codes where later ECC bits cover earlier ones.
+        return codeword ^ (self.invert << self.k)
+
+    def _syndrome_serial(self, codeword: int) -> int:
+        # The linear part of the syndrome (without the inversion).
+        syndrome = 0
+        for j, mask in enumerate(self._dec_masks):
+            syndrome |= (bin(codeword & mask).count('1') & 1) << j
+        return syndrome
+
+    def encode(self, dataword: int) -> int:
+        '''Returns the codeword {ECC bits, data bits} of dataword.'''
+        assert 0 <= dataword < (1 << self.k)
+        ecc = self._ecc_zero
+        for b, table in enumerate(self._enc_tables):
+            ecc ^= table[(dataword >> (8 * b)) & 0xff]
+        return dataword | (ecc << self.k)
+
+    def encode_many(self, datawords: Iterable[int]) -> List[int]:
+        '''Returns the codewords of datawords.'''
+        k = self.k
+        limit = 1 << k
+        ecc_zero = self._ecc_zero
+        tables = list(enumerate(self._enc_tables))
+        codewords = []
+        for dataword in datawords:
+            dataword = int(dataword)
+            assert 0 <= dataword < limit
+            ecc = ecc_zero
+            for b, table in tables:
+                ecc ^= table[(dataword >> (8 * b)) & 0xff]
+            codewords.append(dataword | (ecc << k))
+        return codewords
+
+    def syndrome(self, codeword: int) -> int:
+        '''Returns the syndrome of codeword, zero if there is no error.'''
+        assert 0 <= codeword < (1 << self.n)
+        codeword ^= self.invert << self.k
+        syndrome = 0
+        for b, table in enumerate(self._syn_tables):
+            syndrome ^= table[(codeword >> (8 * b)) & 0xff]
+        return syndrome
+
+    def decode(self, codeword: int) -> Tuple[int, int]:
+        '''Returns the corrected data word of codeword and the error flags.
+
+        Like the RTL decoder, bit 0 of the error flags is set for a single
+        (corrected) error and bit 1 for a double (uncorrectable) error.
+        '''
+        syndrome = self.syndrome(codeword)
+        dataword = codeword & ((1 << self.k) - 1)
+        bit = self._syn_to_bit.get(syndrome)
+        if bit is not None:
+            dataword ^= 1 << bit
+        return dataword, self._syn_to_err[syndrome]
+
+    def decode_many(self,
+                    codewords: Iterable[int]) -> Tuple[List[int], List[int]]:
+        '''Returns the corrected data words and error flags of codewords.'''
+        k = self.k
+        limit = 1 << self.n
+        data_mask = (1 << k) - 1
+        invert = self.invert << k
+        tables = list(enumerate(self._syn_tables))
+        syn_to_bit = self._syn_to_bit
+        syn_to_err = self._syn_to_err
+        datawords = []
+        errors = []
+        for codeword in codewords:
+            codeword = int(codeword)
+            assert 0 <= codeword < limit
+            dataword = codeword & data_mask
+            codeword ^= invert
+            syndrome = 0
+            for b, table in tables:
+                syndrome ^= table[(codeword >> (8 * b)) & 0xff]
+            if syndrome:
+                bit = syn_to_bit.get(syndrome)
+                if bit is not None:
+                    dataword ^= 1 << bit
+            datawords.append(dataword)
+            errors.append(syn_to_err[syndrome])
+        return datawords, errors
 
 
 @functools.lru_cache(maxsize=None)
-def _ecc_encode(k: int,
-                m: int, bitmasks: List[int], invert: int,
-                dataword: int) -> int:
-    assert 0 <= dataword < (1 << k)
-
-    # represent supplied dataword as a binary string
-    word_bin = format(dataword, '0' + str(k) + 'b')
-
-    codeword = word_bin
-    for k, mask in enumerate(bitmasks):
-        bit = 0
-        log.debug(f'codeword: {codeword}')
-        log.debug(f'mask: {hex(mask)}')
-        mask = (format(mask, '0' + str(k + m) + 'b'))
-
-        # reverse codeword for index selection
-        # This is because the LSB is the farthest entry in the string
-        codeword_rev = codeword[::-1]
-        for idx, f in enumerate(mask[::-1]):
-            if int(f):
-                bit ^= int(codeword_rev[idx])
+def _secded_codec(codetype: str, k: int, m: int) -> SecdedCodec:
+    return SecdedCodec(codetype, k, m)
 
-        # Add ECC bit inversion if needed (see print_enc function).
-        bit ^= (invert & k % 2)
-        codeword = str(bit) + codeword
-    return codeword
 
+def secded_codec(config: Dict[str, Any], codetype: str, k: int) -> SecdedCodec:
+    '''Returns the codec of the code of the given type for k data bits.
 
-def ecc_encode(config: Dict[str, Any], codetype: str, k: int, dataword: int) -> Tuple[int, int]:
-    log.info(f"Encoding ECC for {hex(dataword)}")
+    The codec of each code in config is only built once.
+    '''
+    for cfg in config['cfgs']:
+        if cfg['k'] == k and cfg['code_type'] == codetype:
+            return _secded_codec(codetype, k, cfg['m'])
+
+    # error if k not supported
+    raise Exception(f'ECC for length {k} of type {codetype} unsupported')
 
-    m, bitmasks, invert = _ecc_pick_code(config, codetype, k)
-    codeword = _ecc_encode(k, m, bitmasks, invert, dataword)
 
-    # Debug printouts
-    log.debug(f'original hex: {hex(dataword)}')
-    log.debug(f'codeword hex: {hex(int(codeword,2))}')
-    return int(codeword, 2), m
+def ecc_encode(config: Dict[str, Any], codetype: str, k: int, dataword: int) -> Tuple[int, int]:
+    log.info("Encoding ECC for %#x", dataword)
+
+    codec = secded_codec(config, codetype, k)
+    return codec.encode(dataword), codec.m
 
 
 def ecc_encode_some(config: Dict[str, Any],
                     codetype: str,
                     k: int,
-                    datawords: int) -> Tuple[List[int], int]:
-    m, bitmasks, invert = _ecc_pick_code(config, codetype, k)
-    codewords = [int(_ecc_encode(k, m, bitmasks, invert, w), 2)
-                 for w in datawords]
-    return codewords, m
+                    datawords: Iterable[int]) -> Tuple[List[int], int]:
+    codec = secded_codec(config, codetype, k)
+    return codec.encode_many(datawords), codec.m
 
 
 def gen_code(codetype, k, m):
@@ -539,15 +668,21 @@ def _hsiao_code(k, m):
 
             # Calculate each row fan-in with current
             fanins = calc_fanin(m, codes)
+            tries = 0
             while required_row != 0:
+                if tries == _HSIAO_MAX_SHUFFLES:
+                    subset = _balance_fanin(candidate, required_row, fanins,
+                                            fanin_ideal)
+                    required_row = 0
+                    break
+                tries += 1
+
                 # Let's shuffle
                 # Shuffling makes the sequence randomized --> it reduces the
                 # fanin as the code takes randomly at the end of the round
 
-                # TODO: There should be a clever way to find the subset without
-                # random retrying.
-                # Suggested this algorithm
-                #    https://en.wikipedia.org/wiki/Assignment_problem
+                # If this takes too long, _balance_fanin picks the subset
+                # deterministically instead.
                 random.shuffle(candidate)
 
                 # Take a subset
@@ -576,6 +711,61 @@ def _hsiao_code(k, m):
     return codes
 
 
+def _balance_fanin(candidate, count, fanins, fanin_ideal):
+    """Pick count rows from candidate, keeping the fan-in within fanin_ideal.
+
+    fanins is the fan-in of each column of the rows picked so far. The rows
+    are picked greedily, each time the one whose most loaded column is the
+    least loaded (ties broken by the total load, then by the order in
+    candidate). If that exceeds the ideal fan-in, rows are then swapped with
+    unused ones as long as this reduces the excess fan-in, up to
+    _HSIAO_MAX_SWAPS times. The result does not depend on the PRNG.
+    """
+    loads = list(fanins)
+    unused = sorted(candidate)
+    subset = []
+    for _ in range(count):
+        best = min(unused,
+                   key=lambda row: (max(loads[i] for i in row),
+                                    sum(loads[i] for i in row)))
+        unused.remove(best)
+        subset.append(best)
+        for i in best:
+            loads[i] += 1
+
+    def excess(loads):
+        return sum(max(0, load - fanin_ideal) for load in loads)
+
+    for _ in range(_HSIAO_MAX_SWAPS):
+        current = excess(loads)
+        if not current:
+            break
+        swap = None
+        for x, row in enumerate(subset):
+            if all(loads[i] <= fanin_ideal for i in row):
+                continue
+            for y, other in enumerate(unused):
+                new_loads = list(loads)
+                for i in row:
+                    new_loads[i] -= 1
+                for i in other:
+                    new_loads[i] += 1
+                if excess(new_loads) < current:
+                    swap = (x, y, new_loads)
+                    break
+            if swap is not None:
+                break
+        if swap is None:
+            break
+        x, y, loads = swap
+        subset[x], unused[y] = unused[y], subset[x]
+
+    if max(loads) > fanin_ideal:
+        log.warning("Hsiao code: max fan-in %d exceeds the ideal fan-in %d",
+                    max(loads), fanin_ideal)
+    return subset
+
+
 def _inv_hamming_code(k, m):
     return _hamming_code(k, m)
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import random
+import unittest
+import unittest.mock
+from array import array
+
+import secded_gen
+
+
+class TestSecdedCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.config = secded_gen.load_secded_config()
+        self.rnd = random.Random(1)
+
+    def codecs(self):
+        for cfg in self.config['cfgs']:
+            yield secded_gen.secded_codec(self.config, cfg['code_type'],
+                                          cfg['k'])
+
+    def test_encode_matches_serial(self):
+        for codec in self.codecs():
+            words = [self.rnd.getrandbits(codec.k) for _ in range(64)]
+            words += [0, (1 << codec.k) - 1]
+            expected = [codec.encode_serial(w) for w in words]
+            self.assertEqual([codec.encode(w) for w in words], expected)
+            self.assertEqual(codec.encode_many(words), expected)
+
+    def test_encode_many_array(self):
+        codec = secded_gen.secded_codec(self.config, 'inv_hsiao', 32)
+        words = array('L', [self.rnd.getrandbits(32) for _ in range(16)])
+        self.assertEqual(codec.encode_many(words),
+                         [codec.encode(w) for w in words])
+
+    def test_known_codeword(self):
+        # With all-zero data, only the inverted (odd) ECC bits are set.
+        codewords, m = secded_gen.ecc_encode_some(self.config, 'inv_hsiao',
+                                                  32, [0])
+        self.assertEqual(m, 7)
+        self.assertEqual(codewords, [0x2a00000000])
+
+    def test_decode(self):
+        for codec in self.codecs():
+            for _ in range(32):
+                word = self.rnd.getrandbits(codec.k)
+                codeword = codec.encode(word)
+                self.assertEqual(codec.syndrome(codeword), 0)
+                self.assertEqual(codec.decode(codeword), (word, 0))
+
+                i, j = self.rnd.sample(range(codec.n), 2)
+                self.assertEqual(codec.decode(codeword ^ (1 << i)), (word, 1))
+                _, err = codec.decode(codeword ^ (1 << i) ^ (1 << j))
+                self.assertEqual(err, 2)
+
+    def test_decode_many(self):
+        codec = secded_gen.secded_codec(self.config, 'hamming', 64)
+        words = [self.rnd.getrandbits(64) for _ in range(16)]
+        codewords = codec.encode_many(words)
+        codewords[3] ^= 1 << 5
+        datawords, errors = codec.decode_many(codewords)
+        self.assertEqual(datawords, words)
+        self.assertEqual(errors, [0, 0, 0, 1] + [0] * 12)
+
+    def test_unsupported(self):
+        with self.assertRaises(Exception):
+            secded_gen.secded_codec(self.config, 'hsiao', 12)
+
+
+class TestHsiaoCode(unittest.TestCase):
+
+    # The time it takes to generate the codes is measured by bench-secded.py.
+
+    def check_code(self, codes, k, m):
+        self.assertEqual(len(set(codes)), k)
+        for row in codes:
+            self.assertEqual(len(row) % 2, 1)
+        fanins = secded_gen.calc_fanin(m, codes)
+        self.assertLessEqual(max(fanins), secded_gen.ideal_fanin(k, m))
+
+    def test_configured_codes(self):
+        config = secded_gen.load_secded_config()
+        for cfg in config['cfgs']:
+            if cfg['code_type'] not in ['hsiao', 'inv_hsiao']:
+                continue
+            k, m = cfg['k'], cfg['m']
+            with self.subTest(k=k, m=m, code_type=cfg['code_type']):
+                codes = secded_gen.gen_code(cfg['code_type'], k, m)
+                self.check_code(codes, k, m)
+
+                # The code must not change, or the generated encoder would
+                # no longer match the checked in RTL.
+                suffix = secded_gen.CODE_OPTIONS[cfg['code_type']]
+                rtl = (secded_gen.PROJ_ROOT / 'hw/ip/prim/rtl' /
+                       'prim_secded{}_{}_{}_enc.sv'.format(suffix, k + m, k))
+                if not rtl.exists():
+                    continue
+                self.assertIn(secded_gen.print_enc(k + m, k, m, codes,
+                                                   cfg['code_type']),
+                              rtl.read_text())
+
+    def test_balanced_fallback(self):
+        # Without any random tries, the deterministic fallback must still
+        # reach the ideal fan-in, also for codes the random search does not
+        # find in reasonable time.
+        with unittest.mock.patch.object(secded_gen, '_HSIAO_MAX_SHUFFLES', 0):
+            for k, m in [(16, 6), (64, 8), (96, 8), (120, 9), (128, 9)]:
+                with self.subTest(k=k, m=m):
+                    codes = secded_gen.gen_code('hsiao', k, m)
+                    self.check_code(codes, k, m)
+                    self.assertEqual(secded_gen.gen_code('hsiao', k, m),
+                                     codes)
+
+
+if __name__ == '__main__':
+    unittest.main()
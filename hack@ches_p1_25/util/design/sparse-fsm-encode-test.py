@@ -159,6 +159,28 @@ class TestIdempotency(unittest.TestCase):
         self.assertTrue(len(set(outputs)) == 1)
 
 
+class TestLexicode(unittest.TestCase):
+
+    def test_dense_code(self):
+        """The greedy construction finds codes the random search does not."""
+        generator = enc.EncodingGenerator(min_hd=6,
+                                          num_states=120,
+                                          encoding_len=16,
+                                          seed=7,
+                                          language="sv",
+                                          avoid_zero=False,
+                                          lexicode=True)
+        with unittest.mock.patch.object(enc, 'MAX_RESTARTS', 0):
+            generator.generate()
+        self.assertEqual(len(set(generator.encodings)), 120)
+        self.assertEqual(generator.stats['min_hd'], 6)
+        self.assertGreaterEqual(generator.stats['min_hw'], 1)
+        self.assertLess(generator.stats['max_hw'], 16)
+        for k in generator.encodings:
+            self.assertNotIn(format(int(k, 2) ^ 0xffff, '016b'),
+                             generator.encodings)
+
+
 class TestBackwardsCompatibility(unittest.TestCase):
 
     def test_backwards_compatibility(self):
@@ -18,17 +18,25 @@ It is recommended to set this value to 4-5 for security critical FSMs.
 The custom seed s can be used to make subsequent runs of the script
 deterministic. If not specified, the script randomly picks a seed.
 
+For dense parameterizations where random draws rarely succeed, --lexicode
+first tries a greedy construction: candidates are visited in counting order
+(XOR-ed with a random mask drawn from the seed) and every candidate that
+fulfills the constraints is accepted. The random search is used as a fallback
+if that does not yield enough states.
+
 """
 import argparse
 import logging as log
 import math
 import random
 import sys
+from typing import List
 
-from lib.common import get_hd, hd_histogram, wrapped_docstring
+from lib.common import MinHdSet, popcount, wrapped_docstring
 
 MAX_DRAWS = 10000
 MAX_RESTARTS = 10000
+MAX_LEXICODE_CANDIDATES = 1 << 20
 
 SV_INSTRUCTIONS = """
 ------------------------------------------------------
@@ -58,9 +66,8 @@ RUST_INSTRUCTIONS = """
 class EncodingGenerator:
 
     def __init__(self, min_hd: int, num_states: int, encoding_len: int,
-                 seed: int, language: str,
-                 avoid_zero: bool) -> "EncodingGenerator":
-        self.encodings = []
+                 seed: int, language: str, avoid_zero: bool,
+                 lexicode: bool = False) -> "EncodingGenerator":
         self.num_states = num_states
         self.encoding_len = encoding_len
         self.seed = seed
@@ -68,23 +75,60 @@ class EncodingGenerator:
         self.language = language
         self.min_hd = min_hd
         self.min_popcnt = min_hd if self.avoid_zero else 1
+        self.lexicode = lexicode
+        # The accepted encodings, as ints.
+        self.codes = MinHdSet(encoding_len, min_hd)
+
+    @property
+    def encodings(self) -> List[str]:
+        """The accepted encodings as binary strings."""
+        fmt = '0' + str(self.encoding_len) + 'b'
+        return [format(k, fmt) for k in self.codes]
+
+    @encodings.setter
+    def encodings(self, encodings: List[str]) -> None:
+        self.codes = MinHdSet(self.encoding_len, self.min_hd,
+                              [int(k, 2) for k in encodings])
 
     def _check_candidate(self, cand: str) -> bool:
+        """Check that a candidate binary string satisfies the requirements."""
+        return self._check_word(int(cand, 2))
+
+    def _check_word(self, cand: int) -> bool:
         """Check that a candidate integer satisfies the requirements."""
         # disallow all-zero and all-one states
-        pop_cnt = cand.count('1')
+        pop_cnt = popcount(cand)
         if pop_cnt >= self.encoding_len or pop_cnt < self.min_popcnt:
             return False
-        for k in self.encodings:
-            # disallow candidates that are the complement of other states
-            # The ~ operator cannot be used here as it returns a 2's complement
-            # result. XOR with 1's instead to invert the bits.
-            if int(cand, 2) ^ ((1 << self.encoding_len) - 1) == int(k, 2):
-                return False
-            # disallow candidates that are too close to other states
-            if get_hd(cand, k) < self.min_hd:
-                return False
-        return True
+        # disallow candidates that are the complement of other states
+        # The ~ operator cannot be used here as it returns a 2's complement
+        # result. XOR with 1's instead to invert the bits.
+        if cand ^ ((1 << self.encoding_len) - 1) in self.codes:
+            return False
+        # disallow candidates that are too close to other states
+        return self.codes.fits(cand)
+
+    def _generate_lexicode(self) -> bool:
+        """Greedily accept candidates in counting order.
+
+        The candidates are XOR-ed with a mask drawn from the seed. This does
+        not change their distances to each other, but spreads the encodings
+        over all bits. Returns False if not enough states were found among
+        the first MAX_LEXICODE_CANDIDATES candidates.
+        """
+        rand = random.Random()
+        rand.seed(self.seed)
+        mask = rand.getrandbits(self.encoding_len)
+
+        self.encodings = []
+        for k in range(min(1 << self.encoding_len, MAX_LEXICODE_CANDIDATES)):
+            cand = k ^ mask
+            if self._check_word(cand):
+                self.codes.add(cand)
+                if len(self.codes) == self.num_states:
+                    return True
+        self.encodings = []
+        return False
 
     def generate(self) -> None:
         """Generate encodings satisfying the desired constraints.
@@ -97,7 +141,17 @@ class EncodingGenerator:
         However, due to the sparse nature of the state space, this
         probabilistic heuristic works pretty well for most practical cases, and
         it scales favorably to large N.
+
+        If lexicode is set, the greedy construction in _generate_lexicode is
+        tried first.
         """
+        if self.lexicode:
+            if self._generate_lexicode():
+                self.stats = self.codes.stats()
+                return
+            log.info('Greedy construction did not find enough states, '
+                     'falling back to random search.')
+
         num_draws = 0
         num_restarts = 0
 
@@ -105,7 +159,7 @@ class EncodingGenerator:
         rand.seed(self.seed)
         rnd = rand.getrandbits(self.encoding_len)
 
-        while len(self.encodings) < self.num_states:
+        while len(self.codes) < self.num_states:
             # if we iterate for too long, start over.
             if num_draws >= MAX_DRAWS:
                 num_draws = 0
@@ -126,12 +180,11 @@ class EncodingGenerator:
             # draw a candidate and check whether it fulfills the minimum
             # distance requirement with respect to other encodings.
             rnd = rand.getrandbits(self.encoding_len)
-            cand = format(rnd, '0' + str(self.encoding_len) + 'b')
-            if self._check_candidate(cand):
-                self.encodings.append(cand)
+            if self._check_word(rnd):
+                self.codes.add(rnd)
 
         # Get Hamming distance statistics.
-        self.stats = hd_histogram(self.encodings)
+        self.stats = self.codes.stats()
 
     def _print_comment(self):
         if self.language == "c":
@@ -151,7 +204,8 @@ class EncodingGenerator:
         print(
             f"{comment} Encoding generated with:\n"
             f"{comment} $ ./util/design/sparse-fsm-encode.py -d {self.min_hd} -m {self.num_states} -n {self.encoding_len} \\\n"  # noqa: E501
-            f"{comment}     -s {self.seed} --language={self.language}\n"
+            f"{comment}     -s {self.seed} --language={self.language}"
+            f"{' --lexicode' if self.lexicode else ''}\n"
             f"{comment}\n"
             f"{comment} Hamming distance histogram:\n"
             f"{comment}")
@@ -178,7 +232,7 @@ class EncodingGenerator:
         state_str = ""
         for j, k in enumerate(self.encodings):
             pad = " " * (len(str(self.num_states)) - len(str(j)))
-            comma = "," if j < len(self.encodings) - 1 else ""
+            comma = "," if j < len(self.codes) - 1 else ""
             print(fmt_str.format(j, pad, self.encoding_len, k) + comma)
             state_str += f"    State{j}: ;\n"
 
@@ -268,6 +322,10 @@ def main():
                         action='store_true',
                         help=('Also enforce a minimum hamming '
                               'distance from the zero word.'))
+    parser.add_argument('--lexicode',
+                        action='store_true',
+                        help=('Try a greedy construction before falling '
+                              'back to the random search.'))
 
     args = parser.parse_args()
 
@@ -314,7 +372,8 @@ def main():
                                   encoding_len=args.n,
                                   seed=args.s,
                                   language=args.language,
-                                  avoid_zero=args.avoid_zero)
+                                  avoid_zero=args.avoid_zero,
+                                  lexicode=args.lexicode)
     generator.generate()
     generator.print_code()
 
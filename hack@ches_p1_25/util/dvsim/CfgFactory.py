@@ -5,8 +5,10 @@
 import logging as log
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 from CfgJson import load_hjson
+from utils import get_hjson_cache_dir, set_hjson_cache_dir
 
 import FormalCfg
 import CdcCfg
@@ -65,9 +67,35 @@ def _load_cfg(path, initial_values):
     return (found_cls, hjson_data)
 
 
-def _make_child_cfg(path, args, initial_values):
+def _load_cfgs(paths, initial_values):
+    '''Load several config files in parallel.
+
+    Parsing hjson is slow, so the (independent) config files and the files
+    they import are loaded in a pool of worker processes. initial_values is
+    passed to _load_cfg for each of them.
+
+    Returns a dict mapping each path to a (cls, hjson_data) pair. Raises a
+    RuntimeError if any of them fails to load.
+    '''
+    if len(paths) <= 1:
+        return {path: _load_cfg(path, initial_values.copy()) for path in paths}
+
+    max_workers = min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers,
+                             initializer=set_hjson_cache_dir,
+                             initargs=(get_hjson_cache_dir(), )) as executor:
+        futures = {
+            path: executor.submit(_load_cfg, path, initial_values.copy())
+            for path in paths
+        }
+        return {path: future.result() for path, future in futures.items()}
+
+
+def _make_child_cfg(path, args, initial_values, loaded=None):
     try:
-        cls, hjson_data = _load_cfg(path, initial_values)
+        if loaded is None:
+            loaded = _load_cfg(path, initial_values)
+        cls, hjson_data = loaded
     except RuntimeError as err:
         log.error(str(err))
         sys.exit(1)
@@ -85,6 +113,31 @@ def _make_child_cfg(path, args, initial_values):
     return cls(path, hjson_data, args, None)
 
 
+class _ChildCfgFactory:
+    '''Makes the child configs of a primary config.
+
+    Calling an instance with the path to a child config file loads it and
+    returns the config object. The load_all() method can be used to load
+    several child config files in parallel first, passing the loaded data of
+    each when making its config object.
+    '''
+
+    def __init__(self, args, initial_values):
+        self.args = args
+        self.initial_values = initial_values
+
+    def __call__(self, path, loaded=None):
+        return _make_child_cfg(path, self.args, self.initial_values.copy(),
+                               loaded)
+
+    def load_all(self, paths):
+        try:
+            return _load_cfgs(paths, self.initial_values)
+        except RuntimeError as err:
+            log.error(str(err))
+            sys.exit(1)
+
+
 def make_cfg(path, args, proj_root):
     '''Make a flow config by loading the config file at path
 
@@ -105,9 +158,7 @@ def make_cfg(path, args, proj_root):
         log.error(str(err))
         sys.exit(1)
 
-    def factory(child_path):
-        child_ivs = initial_values.copy()
-        child_ivs['flow'] = hjson_data['flow']
-        return _make_child_cfg(child_path, args, child_ivs)
+    child_ivs = initial_values.copy()
+    child_ivs['flow'] = hjson_data['flow']
 
-    return cls(path, hjson_data, args, factory)
+    return cls(path, hjson_data, args, _ChildCfgFactory(args, child_ivs))
@@ -9,6 +9,7 @@ import shlex
 from pathlib import Path
 from typing import List
 
+from JobJournal import job_key
 from JobTime import JobTime
 from LauncherFactory import get_launcher
 from sim_utils import (get_cov_summary_table, get_job_runtime,
@@ -472,7 +473,15 @@ class RunTest(Deploy):
         self.test_obj = test
         self.index = index
         self.build_seed = sim_cfg.build_seed
-        self.seed = RunTest.get_seed()
+
+        # When resuming a regression, run the test with the same seed as in
+        # the run being resumed.
+        record = sim_cfg.journal_records.get(
+            job_key(self.target, test.name, index))
+        if record is not None and "seed" in record:
+            self.seed = int(record["seed"])
+        else:
+            self.seed = RunTest.get_seed()
         # Systemverilog accepts seeds with a maximum size of 32 bits.
         self.svseed = int(self.seed) & 0xFFFFFFFF
         self.simulated_time = JobTime()
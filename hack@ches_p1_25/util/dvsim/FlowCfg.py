@@ -14,6 +14,7 @@ from shutil import which
 import hjson
 from results_server import NoGCPError, ResultsServer
 from CfgJson import set_target_attribute
+from JobJournal import JobJournal, journal_path, load_journal
 from LauncherFactory import get_launcher_cls
 from Scheduler import Scheduler
 from utils import (VERBOSE, clean_odirs, find_and_substitute_wildcards,
@@ -80,6 +81,10 @@ class FlowCfg():
         # slated for dispatch.
         self.deploy = []
 
+        # The latest record of each job in the journal of the run being resumed
+        # (see JobJournal.py), keyed by the job key.
+        self.journal_records = {}
+
         # Timestamp
         self.timestamp_long = args.timestamp_long
         self.timestamp = args.timestamp
@@ -126,8 +131,7 @@ class FlowCfg():
         if not self.is_primary_cfg:
             self.cfgs.append(self)
         else:
-            for entry in self.use_cfgs:
-                self._load_child_cfg(entry, mk_config)
+            self._load_child_cfgs(self.use_cfgs, mk_config)
 
         if self.rel_path == "":
             self.rel_path = os.path.dirname(self.flow_cfg_file).replace(
@@ -191,14 +195,16 @@ class FlowCfg():
                 log.error("Parse error!\n%s", self.cfgs)
                 sys.exit(1)
 
-    def create_instance(self, mk_config, flow_cfg_file):
+    def create_instance(self, mk_config, flow_cfg_file, loaded=None):
         '''Create a new instance of this class for the given config file.
 
         mk_config is a factory method (passed explicitly to avoid a circular
-        dependency between this file and CfgFactory.py).
+        dependency between this file and CfgFactory.py). If the config file
+        has already been loaded with mk_config.load_all(), the result is
+        passed as 'loaded'.
 
         '''
-        new_instance = mk_config(flow_cfg_file)
+        new_instance = mk_config(flow_cfg_file, loaded)
 
         # Sanity check to make sure the new object is the same class as us: we
         # don't yet support heterogeneous primary configurations.
@@ -212,31 +218,65 @@ class FlowCfg():
 
         return new_instance
 
-    def _load_child_cfg(self, entry, mk_config):
-        '''Load a child configuration for a primary cfg'''
-        if type(entry) is str:
-            # Treat this as a file entry. Substitute wildcards in cfg_file
-            # files since we need to process them right away.
-            cfg_file = subst_wildcards(entry, self.__dict__, ignore_error=True)
-            self.cfgs.append(self.create_instance(mk_config, cfg_file))
-
-        elif type(entry) is dict:
-            # Treat this as a cfg expanded in-line
-            temp_cfg_file = self._conv_inline_cfg_to_hjson(entry)
-            if not temp_cfg_file:
-                return
-            self.cfgs.append(self.create_instance(mk_config, temp_cfg_file))
-
-            # Delete the temp_cfg_file once the instance is created
+    def _is_selected_cfg(self, name):
+        '''Returns False if a child cfg is known to be unselected.
+
+        If the name can't be determined before the cfg is elaborated (for
+        example, if it has wildcards in it), the cfg is assumed to be
+        selected and left to prune_selected_cfgs().
+        '''
+        if self.select_cfgs is None:
+            return True
+        if type(name) is not str or "{" in name:
+            return True
+        return name in self.select_cfgs
+
+    def _load_child_cfgs(self, entries, mk_config):
+        '''Load the child configurations of a primary cfg.
+
+        The child cfg files (and the files they import) are loaded in
+        parallel first. If --select-cfgs is passed, the cfgs that are not
+        selected are not elaborated at all.
+        '''
+        cfg_files = []
+        temp_cfg_files = []
+        for entry in entries:
+            if type(entry) is str:
+                # Treat this as a file entry. Substitute wildcards in cfg_file
+                # files since we need to process them right away.
+                cfg_files.append(
+                    subst_wildcards(entry, self.__dict__, ignore_error=True))
+
+            elif type(entry) is dict:
+                # Treat this as a cfg expanded in-line
+                if not self._is_selected_cfg(entry.get("name")):
+                    continue
+                temp_cfg_file = self._conv_inline_cfg_to_hjson(entry)
+                if not temp_cfg_file:
+                    continue
+                cfg_files.append(temp_cfg_file)
+                temp_cfg_files.append(temp_cfg_file)
+
+            else:
+                log.error(
+                    "Type of entry \"%s\" in the \"use_cfgs\" key is invalid: "
+                    "%s", entry, str(type(entry)))
+                sys.exit(1)
+
+        loaded = mk_config.load_all(cfg_files)
+        for cfg_file in cfg_files:
+            _, hjson_data = loaded[cfg_file]
+            if not self._is_selected_cfg(hjson_data.get("name")):
+                log.log(VERBOSE, "Skipping cfg %s (not selected)", cfg_file)
+                continue
+            self.cfgs.append(
+                self.create_instance(mk_config, cfg_file, loaded[cfg_file]))
+
+        # Delete the temp cfg files once the instances are created
+        for temp_cfg_file in temp_cfg_files:
             log.log(VERBOSE, "Deleting temp cfg file:\n%s", temp_cfg_file)
             rm_path(temp_cfg_file, ignore_error=True)
 
-        else:
-            log.error(
-                "Type of entry \"%s\" in the \"use_cfgs\" key is invalid: %s",
-                entry, str(type(entry)))
-            sys.exit(1)
-
     def _conv_inline_cfg_to_hjson(self, idict):
         '''Dump a temp hjson file in the scratch space from input dict.
         This method is to be called only by a primary cfg'''
@@ -340,8 +380,9 @@ class FlowCfg():
     def prune_selected_cfgs(self):
         '''Prune the list of configs for a primary config file.'''
 
-        # This should run after self.cfgs has been set
-        assert self.cfgs
+        # This should run after self.cfgs has been set. The unselected child
+        # cfgs of a primary cfg may have been skipped already.
+        assert self.cfgs or self.select_cfgs is not None
 
         # If the user didn't pass --select-cfgs, we don't do anything.
         if self.select_cfgs is None:
@@ -376,6 +417,10 @@ class FlowCfg():
             sys.exit(1)
 
         for item in self.cfgs:
+            # Load the journal before creating the deploy objects, so that the
+            # resumed tests are run with the same seeds as before.
+            if self.args.resume:
+                item.journal_records = load_journal(journal_path(item))
             item._create_deploy_objects()
 
     def deploy_objects(self):
@@ -391,7 +436,20 @@ class FlowCfg():
             log.error("Nothing to run!")
             sys.exit(1)
 
-        return Scheduler(deploy, get_launcher_cls(), self.interactive).run()
+        # Record the status of all jobs in a journal, so that the regression
+        # can be resumed if it is interrupted. When resuming, the jobs that
+        # passed already are not run again, but their results are merged with
+        # the ones that are.
+        journal = JobJournal(self.args.resume)
+        deploy, results = journal.prune_passed(deploy)
+        try:
+            if deploy:
+                results.update(
+                    Scheduler(deploy, get_launcher_cls(), self.interactive,
+                              journal).run())
+        finally:
+            journal.close()
+        return results
 
     def _gen_results(self, results):
         '''
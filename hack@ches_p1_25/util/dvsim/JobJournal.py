@@ -0,0 +1,193 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""An append-only journal of job status transitions, used to resume an
+interrupted regression.
+"""
+
+import datetime
+import hashlib
+import json
+import logging as log
+import os
+
+from utils import VERBOSE
+
+# Name of the journal file in each cfg's scratch path.
+JOURNAL_NAME = "dvsim_journal.jsonl"
+
+# Targets whose passing jobs may be skipped when resuming. The remaining
+# targets (coverage merging and reporting) aggregate the results of the jobs
+# they depend on, so they are always rerun.
+_RESUMABLE_TARGETS = ["build", "run"]
+
+
+def journal_path(cfg):
+    '''Returns the path to the journal of the given cfg.'''
+    return os.path.join(cfg.scratch_path, JOURNAL_NAME)
+
+
+def job_key(target, name, index=None):
+    '''Returns the key that identifies a job across invocations of dvsim.
+
+    The full name of a test run includes its seed, which is picked randomly on
+    each invocation, so runs are identified by their reseed index instead.
+    '''
+    key = "{}:{}".format(target, name)
+    if index is not None:
+        key += ":{}".format(index)
+    return key
+
+
+def _item_key(item):
+    return job_key(item.target, item.name, getattr(item, "index", None))
+
+
+def load_journal(path):
+    '''Loads a journal and returns the latest record for each job.
+
+    Returns a dict mapping the job key to its latest record. If the journal
+    does not exist, an empty dict is returned. A partially written last line
+    (if dvsim died while writing it) is ignored.
+    '''
+    records = {}
+    try:
+        with open(path, "r", encoding="UTF-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    log.warning("Ignoring malformed line in %s: %r", path,
+                                line)
+                    continue
+                records[record["key"]] = record
+    except FileNotFoundError:
+        log.warning("No job journal found at %s. Running all jobs.", path)
+    return records
+
+
+class JobJournal:
+    '''Records the status transitions of jobs in each cfg's journal.
+
+    Each line in the journal is a JSON object describing one status
+    transition of a job: its key, status, seed, log path and the hash of its
+    inputs (its command, exports and the input hashes of the jobs it depends
+    on). When a regression is resumed, a job that passed in an earlier run
+    whose input hash is unchanged is not run again.
+    '''
+
+    def __init__(self, resume):
+        # If resuming, the records are appended to the existing journals,
+        # else the journals are started afresh.
+        self.resume = resume
+
+        # Open journal files, keyed by cfg.
+        self._files = {}
+
+        # Memoized input hashes, keyed by item.
+        self._input_hashes = {}
+
+    def _get_file(self, cfg):
+        f = self._files.get(cfg)
+        if f is None:
+            path = journal_path(cfg)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            f = open(path, "a" if self.resume else "w", encoding="UTF-8")
+            self._files[cfg] = f
+        return f
+
+    def input_hash(self, item):
+        '''Returns the hash of everything that determines a job's outcome.'''
+
+        digest = self._input_hashes.get(item)
+        if digest is not None:
+            return digest
+
+        h = hashlib.sha256()
+        h.update(item.cmd.encode("UTF-8"))
+        for key, value in sorted(item.exports.items()):
+            h.update("\n{}={}".format(key, value).encode("UTF-8"))
+        for dep in item.dependencies:
+            h.update(self.input_hash(dep).encode("UTF-8"))
+        digest = h.hexdigest()
+        self._input_hashes[item] = digest
+        return digest
+
+    def record(self, item, status):
+        '''Appends a status transition of a job to its cfg's journal.'''
+
+        record = {
+            "key": _item_key(item),
+            "full_name": item.full_name,
+            "status": status,
+            "time": datetime.datetime.now().isoformat(),
+            "input_hash": self.input_hash(item),
+            "log_path": item.get_log_path(),
+        }
+        if hasattr(item, "seed"):
+            record["seed"] = str(item.seed)
+
+        if status == "P":
+            record["job_runtime"] = item.job_runtime.get()
+            if hasattr(item, "simulated_time"):
+                record["simulated_time"] = item.simulated_time.get()
+
+        elif status in ["F", "K"] and item.launcher is not None:
+            fail_msg = item.launcher.fail_msg
+            record["fail_msg"] = {
+                "line_number": fail_msg.line_number,
+                "message": fail_msg.message,
+            }
+
+        f = self._get_file(item.sim_cfg)
+        f.write(json.dumps(record) + "\n")
+        # Flush right away so that the journal is complete even if dvsim
+        # dies.
+        f.flush()
+
+    def prune_passed(self, items):
+        '''Removes the jobs that passed in the run being resumed.
+
+        A job is skipped if its latest record in the journal shows that it
+        passed with the same input hash, and all of the jobs it depends on
+        are skipped too. The runtime information of the skipped jobs is
+        restored from the journal so that they can be reported alongside the
+        jobs that are run.
+
+        'items' is the list of Deploy objects to run, in dependency order.
+
+        Returns a tuple (items_to_run, skipped), where skipped is a dict
+        mapping each skipped item to its status ('P').
+        '''
+        skipped = {}
+        if not self.resume:
+            return items, skipped
+
+        item_set = set(items)
+        for item in items:
+            if item.target not in _RESUMABLE_TARGETS:
+                continue
+            record = item.sim_cfg.journal_records.get(_item_key(item))
+            if record is None or record["status"] != "P":
+                continue
+            if record["input_hash"] != self.input_hash(item):
+                log.log(VERBOSE, "[resume]: Inputs of %s have changed",
+                        item.full_name)
+                continue
+            if any(dep in item_set and dep not in skipped
+                   for dep in item.dependencies):
+                continue
+
+            item.job_runtime.set(*record["job_runtime"])
+            if "simulated_time" in record:
+                item.simulated_time.set(*record["simulated_time"])
+            skipped[item] = "P"
+
+        log.info("[resume]: Skipping %d jobs that passed already, running %d.",
+                 len(skipped), len(items) - len(skipped))
+        return [item for item in items if item not in skipped], skipped
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
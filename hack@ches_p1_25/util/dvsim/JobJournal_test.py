@@ -0,0 +1,209 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+'''pytest-based testing for the job journal in JobJournal.py'''
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest  # noqa: E402
+from JobJournal import (JobJournal, job_key, journal_path,  # noqa: E402
+                        load_journal)
+from JobTime import JobTime  # noqa: E402
+from Launcher import ErrorMessage  # noqa: E402
+
+
+class FakeCfg:
+    '''The parts of a SimCfg that the journal uses.'''
+
+    def __init__(self, scratch_path):
+        self.scratch_path = scratch_path
+        self.journal_records = {}
+
+
+class FakeLauncher:
+
+    def __init__(self, message):
+        self.fail_msg = ErrorMessage(line_number=12, message=message,
+                                     context=[])
+
+
+class FakeItem:
+    '''The parts of a Deploy object that the journal uses.'''
+
+    def __init__(self, cfg, target, name, cmd, index=None, dependencies=()):
+        self.sim_cfg = cfg
+        self.target = target
+        self.name = name
+        self.cmd = cmd
+        self.exports = {'VAR': 'value'}
+        self.dependencies = list(dependencies)
+        self.job_runtime = JobTime()
+        self.launcher = None
+        if index is not None:
+            self.index = index
+            self.seed = 1000 + index
+            self.simulated_time = JobTime()
+            self.full_name = '{}.{}'.format(name, self.seed)
+        else:
+            self.full_name = name
+
+    def get_log_path(self):
+        return os.path.join(self.sim_cfg.scratch_path, self.full_name + '.log')
+
+
+@pytest.fixture
+def cfg(tmp_path):
+    return FakeCfg(str(tmp_path))
+
+
+def _make_items(cfg, run_cmd='run foo'):
+    build = FakeItem(cfg, 'build', 'default', 'make build')
+    runs = [
+        FakeItem(cfg, 'run', 'foo', run_cmd, index=i, dependencies=[build])
+        for i in range(2)
+    ]
+    return [build] + runs
+
+
+def _record_run(cfg, items, statuses):
+    '''Records the transitions of a run in which items end with statuses.'''
+    journal = JobJournal(resume=False)
+    for item, status in zip(items, statuses):
+        journal.record(item, 'D')
+        if status == 'P':
+            item.job_runtime.set(2.5, 's')
+            if hasattr(item, 'simulated_time'):
+                item.simulated_time.set(10, 'us')
+        elif status in ['F', 'K']:
+            item.launcher = FakeLauncher('failed')
+        if status is not None:
+            journal.record(item, status)
+    journal.close()
+
+
+def _resume(cfg, items):
+    cfg.journal_records = load_journal(journal_path(cfg))
+    return JobJournal(resume=True).prune_passed(items)
+
+
+def test_round_trip(cfg):
+    items = _make_items(cfg)
+    build, run0, run1 = items
+    _record_run(cfg, items, ['P', 'P', 'F'])
+
+    records = load_journal(journal_path(cfg))
+    assert set(records) == {'build:default', 'run:foo:0', 'run:foo:1'}
+    assert records['build:default']['status'] == 'P'
+    assert records['build:default']['job_runtime'] == [2.5, 's']
+    assert 'seed' not in records['build:default']
+    assert records['run:foo:0']['status'] == 'P'
+    assert records['run:foo:0']['seed'] == '1000'
+    assert records['run:foo:0']['full_name'] == 'foo.1000'
+    assert records['run:foo:0']['simulated_time'] == [10.0, 'us']
+    assert records['run:foo:0']['log_path'] == run0.get_log_path()
+    assert records['run:foo:1']['status'] == 'F'
+    assert records['run:foo:1']['fail_msg'] == {
+        'line_number': 12,
+        'message': 'failed'
+    }
+    assert (records['run:foo:0']['input_hash'] ==
+            JobJournal(resume=False).input_hash(run0))
+    assert job_key('run', 'foo', 1) == 'run:foo:1'
+
+
+def test_missing_journal(cfg):
+    assert load_journal(journal_path(cfg)) == {}
+    items = _make_items(cfg)
+    assert _resume(cfg, items) == (items, {})
+
+
+def test_truncated_last_line(cfg):
+    items = _make_items(cfg)
+    _record_run(cfg, items, ['P', 'P', 'P'])
+    with open(journal_path(cfg), 'a', encoding='UTF-8') as f:
+        f.write(json.dumps({'key': 'run:foo:1', 'status': 'F'})[:20])
+
+    records = load_journal(journal_path(cfg))
+    assert len(records) == 3
+    assert records['run:foo:1']['status'] == 'P'
+
+
+def test_prune_passed(cfg):
+    items = _make_items(cfg)
+    _record_run(cfg, items, ['P', 'P', 'F'])
+
+    # Rebuild the items, as a new invocation of dvsim would.
+    build, run0, run1 = _make_items(cfg)
+    to_run, skipped = _resume(cfg, [build, run0, run1])
+    assert to_run == [run1]
+    assert skipped == {build: 'P', run0: 'P'}
+    # The runtimes of the skipped jobs are restored for the report.
+    assert build.job_runtime.get() == (2.5, 's')
+    assert run0.simulated_time.get() == (10.0, 'us')
+
+
+def test_no_resume(cfg):
+    items = _make_items(cfg)
+    _record_run(cfg, items, ['P', 'P', 'P'])
+    cfg.journal_records = load_journal(journal_path(cfg))
+    assert JobJournal(resume=False).prune_passed(items) == (items, {})
+
+
+def test_interrupted_job_reruns(cfg):
+    items = _make_items(cfg)
+    # The second run was dispatched, but never finished.
+    _record_run(cfg, items, ['P', 'P', None])
+
+    build, run0, run1 = _make_items(cfg)
+    to_run, skipped = _resume(cfg, [build, run0, run1])
+    assert to_run == [run1]
+
+
+def test_changed_inputs_rerun(cfg):
+    items = _make_items(cfg)
+    _record_run(cfg, items, ['P', 'P', 'P'])
+
+    # The command of the tests changed, but not the one of the build.
+    build, run0, run1 = _make_items(cfg, run_cmd='run foo +new_plusarg')
+    to_run, skipped = _resume(cfg, [build, run0, run1])
+    assert to_run == [run0, run1]
+    assert skipped == {build: 'P'}
+
+    # A change in the exports of the build changes the input hash of the
+    # tests too, so everything is rerun.
+    build, run0, run1 = _make_items(cfg)
+    build.exports['VAR'] = 'other'
+    to_run, skipped = _resume(cfg, [build, run0, run1])
+    assert to_run == [build, run0, run1]
+    assert skipped == {}
+
+
+def test_failed_dependency_reruns(cfg):
+    items = _make_items(cfg)
+    # A previous resume could leave passing tests of a failing build in
+    # the journal.
+    _record_run(cfg, items, ['F', 'P', 'P'])
+
+    build, run0, run1 = _make_items(cfg)
+    to_run, skipped = _resume(cfg, [build, run0, run1])
+    assert to_run == [build, run0, run1]
+    assert skipped == {}
+
+
+def test_unresumable_targets_rerun(cfg):
+    build, run0, run1 = _make_items(cfg)
+    cov = FakeItem(cfg, 'cov_merge', 'cov_merge', 'merge',
+                   dependencies=[run0, run1])
+    _record_run(cfg, [build, run0, run1, cov], ['P', 'P', 'P', 'P'])
+
+    build, run0, run1 = _make_items(cfg)
+    cov = FakeItem(cfg, 'cov_merge', 'cov_merge', 'merge',
+                   dependencies=[run0, run1])
+    to_run, skipped = _resume(cfg, [build, run0, run1, cov])
+    assert to_run == [cov]
+    assert set(skipped) == {build, run0, run1}
@@ -2,12 +2,270 @@
 # Licensed under the Apache License, Version 2.0, see LICENSE for details.
 # SPDX-License-Identifier: Apache-2.0
 
+import atexit
 import datetime
+import logging as log
 import os
 import shlex
+import signal
 import subprocess
+from pathlib import Path
 
 from Launcher import ErrorMessage, Launcher, LauncherError
+from utils import VERBOSE, clean_odirs
+
+# Exit code returned by coreutils' timeout command when the job timed out.
+_TIMEOUT_EXIT_CODE = 124
+
+
+class LocalBatch:
+    """A group of runs of the same test executed by a single wrapper process.
+
+    This is the local equivalent of an LSF job array. The seeds of a test are
+    collected into batches of up to LocalLauncher.batch_size launchers. When
+    the first launcher in a batch is dispatched, a single bash script is
+    created and launched, which runs each seed back to back (or up to
+    LocalLauncher.batch_parallel of them at a time). Each seed still writes
+    its own log file in its own output directory. As each seed starts, the
+    script appends a line with its index and start time to a status file
+    shared by the batch, and as it completes, a line with its index, exit code
+    and runtime, which the launchers read to determine their outcome.
+    """
+
+    def __init__(self, cfg, name):
+        self.cfg = cfg
+        self.name = name
+
+        # The launchers of the jobs in this batch, in the order they are run.
+        self.jobs = []
+
+        # Popen object of the wrapper process and the file it logs to.
+        self.process = None
+        self.log_fd = None
+
+        # The status file written by the wrapper and its open handle. Start
+        # times parsed so far are maintained as a dict mapping the job index
+        # to a datetime, and results as a dict mapping the job index to an
+        # (exit_code, runtime_secs) tuple.
+        self.status_path = None
+        self.status_fd = None
+        self.status_partial = ""
+        self.start_times = {}
+        self.results = {}
+
+        # Flags indicating that the wrapper process has been launched and that
+        # it has exited.
+        self.launched = False
+        self.exited = False
+
+    def add(self, job):
+        """Adds a launcher to the batch and returns its index in it."""
+
+        self.jobs.append(job)
+        return len(self.jobs)
+
+    def is_full(self):
+        return len(self.jobs) >= LocalLauncher.batch_size
+
+    def _make_script(self, exports):
+        """Creates the wrapper script and returns its path.
+
+        Like the LSF job script, it is a case statement switching on the job
+        index, which avoids creating a script per job. Any exports that differ
+        from the ones the wrapper is launched with are set in the job's own
+        subshell. Like LocalLauncher._do_launch(), the command is split with
+        shlex and run without a shell, so its words are quoted here to keep
+        bash from expanding them.
+        """
+
+        status_path = shlex.quote(str(self.status_path))
+        lines = ["#!/usr/bin/env bash\n\n", "run_job() {\n",
+                 "  local start=$SECONDS\n",
+                 "  echo \"$1 start $(date +%s)\" >> {}\n".format(status_path),
+                 "  case $1 in\n"]
+        for job in self.jobs:
+            deploy = job.deploy
+            cmd = " ".join(shlex.quote(arg) for arg in shlex.split(deploy.cmd))
+            timeout_mins = deploy.get_timeout_mins()
+            if timeout_mins and not deploy.gui:
+                # Like LocalLauncher._kill(), only the job's process is sent
+                # SIGTERM, followed by SIGKILL 2 seconds later. The
+                # --foreground option keeps it in the wrapper's process group,
+                # so that killing the batch kills it too.
+                cmd = "timeout --foreground -k 2 {} {}".format(
+                    timeout_mins * 60, cmd)
+
+            job_exports = {
+                k: v
+                for k, v in deploy.exports.items()
+                if exports.get(k) != v
+            }
+            env = "".join("export {}={}; ".format(k, shlex.quote(v))
+                          for k, v in sorted(job_exports.items()))
+
+            log_path = shlex.quote(deploy.get_log_path())
+            lines += [
+                "  {})\n".format(job.batch_index),
+                "    ({}printf '[Executing]:\\n%s\\n\\n' {}; {}) > {} "
+                "2>&1;;\n".format(env, shlex.quote(deploy.cmd), cmd, log_path)
+            ]
+
+        lines += [
+            "  *)\n",
+            "    echo \"ERROR: Illegal job index: $1\" 1>&2; return 1;;\n",
+            "  esac\n",
+            "  local status=$?\n",
+            "  echo \"$1 $status $((SECONDS - start))\" >> {}\n".format(
+                status_path),
+            "}\n\n",
+            "running=0\n",
+            "for i in $(seq 1 {}); do\n".format(len(self.jobs)),
+            "  run_job $i &\n",
+            "  running=$((running + 1))\n",
+            "  if [ $running -ge {} ]; then\n".format(
+                LocalLauncher.batch_parallel),
+            "    wait -n\n",
+            "    running=$((running - 1))\n",
+            "  fi\n",
+            "done\n",
+            "wait\n",
+        ]
+
+        job_script = Path(LocalLauncher.jobs_dir[self.cfg], self.name)
+        try:
+            with open(job_script, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+        except IOError as e:
+            raise LauncherError("ERROR: Failed to write {}:\n{}".format(
+                job_script, e))
+
+        log.log(VERBOSE, "[job_script]: %s", job_script)
+        return job_script
+
+    def launch(self):
+        """Prepares the output directories of all jobs and runs the batch."""
+
+        self.launched = True
+        try:
+            self._launch()
+        except LauncherError:
+            self.exited = True
+            raise
+        LocalLauncher.launched_batches.append(self)
+
+    def _launch(self):
+        for job in self.jobs:
+            job._pre_launch()
+
+        # All jobs in the batch run the same test with the same build, so
+        # they share the environment of the first one.
+        exports = self.jobs[0]._get_exports()
+        self.status_path = Path(LocalLauncher.jobs_dir[self.cfg],
+                                self.name + ".status")
+        job_script = self._make_script(exports)
+
+        # Dump the env vars once for the whole batch, next to the script.
+        with open(str(job_script) + ".env_vars",
+                  "w",
+                  encoding="UTF-8",
+                  errors="surrogateescape") as f:
+            for var in sorted(exports.keys()):
+                f.write("{}={}\n".format(var, exports[var]))
+
+        try:
+            self.log_fd = open(str(job_script) + ".out",
+                               "w",
+                               encoding="UTF-8",
+                               errors="surrogateescape")
+            # Run the wrapper in its own session so that the whole process
+            # group can be killed, including the jobs it spawned.
+            self.process = subprocess.Popen(
+                ["/usr/bin/env", "bash", str(job_script)],
+                stdout=self.log_fd,
+                stderr=self.log_fd,
+                env=exports,
+                start_new_session=True)
+        except (OSError, subprocess.SubprocessError) as e:
+            raise LauncherError('IO Error: {}\nSee {}'.format(
+                e, job_script))
+
+    def poll(self):
+        """Reads the results of the jobs that have completed since the last
+        poll."""
+
+        if self.exited:
+            return
+
+        # Check whether the wrapper has exited before reading the status file
+        # so that the results of all jobs it ran are visible below.
+        exited = self.process.poll() is not None
+
+        if self.status_fd is None:
+            try:
+                self.status_fd = open(self.status_path, "r")
+            except FileNotFoundError:
+                pass
+
+        if self.status_fd is not None:
+            # A line may be partially written at this time. Hold on to it and
+            # complete it on the next poll.
+            lines = (self.status_partial + self.status_fd.read()).split("\n")
+            self.status_partial = lines.pop()
+            for line in lines:
+                index, exit_code, secs = line.split()
+                if exit_code == "start":
+                    self.start_times[int(index)] = (
+                        datetime.datetime.fromtimestamp(int(secs)))
+                else:
+                    self.results[int(index)] = (int(exit_code), int(secs))
+
+        if exited:
+            self.exited = True
+            self._close()
+
+    def get_start_time(self, index):
+        """Returns the time at which a job started, or None if it has not yet
+        started."""
+
+        self.poll()
+        return self.start_times.get(index)
+
+    def get_result(self, index):
+        """Returns (exit_code, runtime_secs) of a job, if it has completed.
+
+        Returns None if the job has not yet completed. If the wrapper exited
+        without recording a result for this job, exit_code is None.
+        """
+
+        self.poll()
+        if index in self.results:
+            return self.results[index]
+        if self.exited:
+            return None, 0
+        return None
+
+    def kill(self):
+        """Kills the wrapper and all the jobs it is running."""
+
+        if self.exited or self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.exited = True
+        self._close()
+
+    def _close(self):
+        if self.log_fd:
+            self.log_fd.close()
+            self.log_fd = None
+        if self.status_fd:
+            self.status_fd.close()
+            self.status_fd = None
 
 
 class LocalLauncher(Launcher):
@@ -15,6 +273,45 @@ class LocalLauncher(Launcher):
     Implementation of Launcher to launch jobs in the user's local workstation.
     """
 
+    # Max number of seeds of the same test that are run by a single wrapper
+    # process. Batching is disabled if this is 1.
+    batch_size = 1
+
+    # Max number of seeds run in parallel within a batch.
+    batch_parallel = 1
+
+    # A hidden directory specific to a cfg, where we put the batch scripts.
+    jobs_dir = {}
+
+    # Open batches, keyed by cfg and then by job name and test.
+    batches = {}
+
+    # Batches that have been launched. The seeds in a batch that the scheduler
+    # has not yet dispatched are not known to it, so on exit, any batch that
+    # is still running is killed.
+    launched_batches = []
+
+    @staticmethod
+    def kill_batches():
+        for batch in LocalLauncher.launched_batches:
+            batch.kill()
+
+    @staticmethod
+    def prepare_workspace(project, repo_top, args):
+        if LocalLauncher.batch_size > 1:
+            atexit.register(LocalLauncher.kill_batches)
+
+    @staticmethod
+    def prepare_workspace_for_cfg(cfg):
+        if LocalLauncher.batch_size <= 1:
+            return
+
+        # Create the job dir.
+        LocalLauncher.jobs_dir[cfg] = Path(cfg.scratch_path, "local",
+                                           cfg.timestamp)
+        clean_odirs(odir=LocalLauncher.jobs_dir[cfg], max_odirs=2)
+        os.makedirs(Path(LocalLauncher.jobs_dir[cfg]), exist_ok=True)
+
     def __init__(self, deploy):
         '''Initialize common class members.'''
 
@@ -23,7 +320,42 @@ class LocalLauncher(Launcher):
         # Popen object when launching the job.
         self.process = None
 
-    def _do_launch(self):
+        # The batch this job belongs to, if any, and its index in it.
+        self.batch = None
+        self.batch_index = None
+        if self._is_batchable():
+            self._add_to_batch()
+
+    def _is_batchable(self):
+        '''Returns True if the job can be run as a part of a batch.
+
+        Only test runs are batched. Jobs that need the user's terminal are
+        not.
+        '''
+        return (LocalLauncher.batch_size > 1 and
+                self.deploy.target == "run" and
+                not self.deploy.gui and
+                not self.deploy.sim_cfg.interactive)
+
+    def _add_to_batch(self):
+        '''Adds self to an open batch of the same test, or starts a new one.
+
+        The launchers of all jobs are created before the scheduler dispatches
+        any of them, so the batches are complete by the time they launch.
+        '''
+        cfg = self.deploy.sim_cfg
+        key = "{}_{}".format(self.deploy.job_name, self.deploy.name)
+        cfg_batches = LocalLauncher.batches.setdefault(cfg, {})
+        key_batches = cfg_batches.setdefault(key, [])
+        if not key_batches or key_batches[-1].is_full():
+            key_batches.append(
+                LocalBatch(cfg, "{}.{}".format(key, len(key_batches))))
+        self.batch = key_batches[-1]
+        self.batch_index = self.batch.add(self)
+
+    def _get_exports(self):
+        '''Returns the environment the job is to be launched with.'''
+
         # Update the shell's env vars with self.exports. Values in exports must
         # replace the values in the shell's env vars if the keys match.
         exports = os.environ.copy()
@@ -38,6 +370,21 @@ class LocalLauncher(Launcher):
         if 'MAKEFLAGS' in exports:
             del exports['MAKEFLAGS']
 
+        return exports
+
+    def launch(self):
+        if self.batch is None:
+            super().launch()
+            return
+
+        # The whole batch is launched when the first of its jobs is
+        # dispatched. The jobs dispatched later are already running (or done),
+        # so there is nothing more to be done for them.
+        if not self.batch.launched:
+            self.batch.launch()
+
+    def _do_launch(self):
+        exports = self._get_exports()
         self._dump_env_vars(exports)
 
         if not self.deploy.sim_cfg.interactive:
@@ -96,6 +443,9 @@ class LocalLauncher(Launcher):
         must not be called again once it has returned 'P' or 'F'.
         '''
 
+        if self.batch is not None:
+            return self._poll_batch()
+
         assert self.process is not None
         elapsed_time = datetime.datetime.now() - self.start_time
         self.job_runtime_secs = elapsed_time.total_seconds()
@@ -119,12 +469,58 @@ class LocalLauncher(Launcher):
         self._post_finish(status, err_msg)
         return self.status
 
+    def _poll_batch(self):
+        '''Check status of the job run as a part of a batch.'''
+
+        # The jobs of a batch are all prepared when it is launched, but a job
+        # may be queued behind others in the batch, so its runtime counts from
+        # the time at which the wrapper started it.
+        start_time = self.batch.get_start_time(self.batch_index)
+        if start_time is not None:
+            self.start_time = start_time
+        result = self.batch.get_result(self.batch_index)
+        if result is None:
+            if start_time is None:
+                self.job_runtime_secs = 0
+            else:
+                elapsed_time = datetime.datetime.now() - self.start_time
+                self.job_runtime_secs = elapsed_time.total_seconds()
+            return 'D'
+
+        exit_code, self.job_runtime_secs = result
+        if exit_code is None:
+            self._post_finish(
+                'K',
+                ErrorMessage(line_number=None,
+                             message='Batch exited before running the job',
+                             context=[]))
+            return 'K'
+
+        if exit_code == _TIMEOUT_EXIT_CODE:
+            timeout_message = 'Job timed out after {} minutes'.format(
+                self.deploy.get_timeout_mins())
+            self._post_finish(
+                'K',
+                ErrorMessage(line_number=None,
+                             message=timeout_message,
+                             context=[timeout_message]))
+            return 'K'
+
+        self.exit_code = exit_code
+        status, err_msg = self._check_status()
+        self._post_finish(status, err_msg)
+        return self.status
+
     def _kill(self):
         '''Kill the running process.
 
         Try to kill the running process. Send SIGTERM first, wait a bit,
         and then send SIGKILL if it didn't work.
         '''
+        if self.batch is not None:
+            self.batch.kill()
+            return
+
         assert self.process is not None
         self.process.terminate()
         try:
@@ -145,8 +541,9 @@ class LocalLauncher(Launcher):
             ErrorMessage(line_number=None, message='Job killed!', context=[]))
 
     def _post_finish(self, status, err_msg):
-        self._close_process()
-        self.process = None
+        if self.batch is None:
+            self._close_process()
+            self.process = None
         super()._post_finish(status, err_msg)
 
     def _close_process(self):
@@ -0,0 +1,211 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+'''pytest-based testing for the batched runs in LocalLauncher.py'''
+
+import datetime
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest  # noqa: E402
+from LocalLauncher import _TIMEOUT_EXIT_CODE, LocalBatch, LocalLauncher  # noqa: E402
+
+# Seconds to wait for a batch to complete before giving up.
+WAIT_SECS = 30
+
+
+class FakeDeploy:
+    '''The parts of a Deploy object that a batch uses.'''
+
+    def __init__(self, cmd, log_path, timeout_mins=None, exports=None):
+        self.cmd = cmd
+        self.log_path = log_path
+        self.timeout_mins = timeout_mins
+        self.exports = exports or {}
+        self.gui = False
+
+    def get_timeout_mins(self):
+        return self.timeout_mins
+
+    def get_log_path(self):
+        return self.log_path
+
+
+class FakeJob:
+    '''The parts of a LocalLauncher that a batch uses.'''
+
+    def __init__(self, batch, deploy):
+        self.deploy = deploy
+        self.batch_index = batch.add(self)
+        self.pre_launched = False
+
+    def _pre_launch(self):
+        self.pre_launched = True
+
+    def _get_exports(self):
+        return os.environ.copy()
+
+
+def _group_alive(pgid):
+    '''Returns True if any process of the group has not yet exited.
+
+    Zombies are ignored, as they may be left unreaped once their parent is
+    gone.
+    '''
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join('/proc', pid, 'stat')) as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after it.
+        fields = stat[stat.rindex(')') + 2:].split()
+        if int(fields[2]) == pgid and fields[0] != 'Z':
+            return True
+    return False
+
+
+def _wait_for(cond):
+    deadline = time.monotonic() + WAIT_SECS
+    while not cond():
+        assert time.monotonic() < deadline, 'timed out waiting for batch'
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(LocalLauncher, 'batch_size', 4)
+    monkeypatch.setattr(LocalLauncher, 'batch_parallel', 4)
+    monkeypatch.setattr(LocalLauncher, 'jobs_dir', {})
+    monkeypatch.setattr(LocalLauncher, 'launched_batches', [])
+
+    cfg = object()
+    LocalLauncher.jobs_dir[cfg] = tmp_path
+    batch = LocalBatch(cfg, 'test.0')
+    yield batch
+    batch.kill()
+
+
+def _add_job(batch, tmp_path, name, cmd, timeout_mins=None, exports=None):
+    log_path = str(tmp_path / '{}.log'.format(name))
+    return FakeJob(batch, FakeDeploy(cmd, log_path, timeout_mins, exports))
+
+
+def _read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def test_batch_results(batch, tmp_path):
+    passing = _add_job(batch, tmp_path, 'pass', 'echo passed')
+    failing = _add_job(batch, tmp_path, 'fail',
+                       'bash -c "echo failed; exit 3"')
+    timeout = _add_job(batch, tmp_path, 'timeout', 'sleep 30',
+                       timeout_mins=1 / 60)
+    exports = _add_job(batch, tmp_path, 'exports', 'printenv BATCH_TEST_VAR',
+                       exports={'BATCH_TEST_VAR': 'a b'})
+    jobs = [passing, failing, timeout, exports]
+    assert [job.batch_index for job in jobs] == [1, 2, 3, 4]
+    assert batch.is_full()
+
+    batch.launch()
+    assert all(job.pre_launched for job in jobs)
+    assert LocalLauncher.launched_batches == [batch]
+
+    # Nothing is known about a job before it completes.
+    assert batch.get_result(timeout.batch_index) is None
+
+    _wait_for(lambda: all(batch.get_result(job.batch_index) is not None
+                          for job in jobs) and batch.exited)
+    assert batch.get_result(passing.batch_index)[0] == 0
+    assert batch.get_result(failing.batch_index)[0] == 3
+    assert (batch.get_result(timeout.batch_index)[0] ==
+            _TIMEOUT_EXIT_CODE)
+    assert batch.get_result(exports.batch_index)[0] == 0
+    assert batch.get_result(5) == (None, 0)
+
+    # Each job logs the command followed by its output to its own file.
+    assert (_read(passing.deploy.log_path) ==
+            '[Executing]:\necho passed\n\npassed\n')
+    assert (_read(failing.deploy.log_path) ==
+            '[Executing]:\nbash -c "echo failed; exit 3"\n\nfailed\n')
+    assert _read(timeout.deploy.log_path) == '[Executing]:\nsleep 30\n\n'
+    assert _read(exports.deploy.log_path).endswith('\n\na b\n')
+
+
+def test_batch_kill(batch, tmp_path):
+    done = _add_job(batch, tmp_path, 'done', 'echo done')
+    running = _add_job(batch, tmp_path, 'running',
+                       'bash -c "sleep 30 & sleep 30; wait"')
+
+    batch.launch()
+    pgid = batch.process.pid
+    _wait_for(lambda: batch.get_result(done.batch_index) is not None)
+    assert batch.get_result(done.batch_index)[0] == 0
+    assert batch.get_result(running.batch_index) is None
+    assert _group_alive(pgid)
+
+    batch.kill()
+    assert batch.exited
+    assert batch.log_fd is None and batch.status_fd is None
+
+    # All processes spawned by the batch are gone, the job that was killed
+    # has no exit code and the one that completed keeps its result.
+    _wait_for(lambda: not _group_alive(pgid))
+    assert batch.get_result(running.batch_index) == (None, 0)
+    assert batch.get_result(done.batch_index)[0] == 0
+    assert _read(done.deploy.log_path) == '[Executing]:\necho done\n\ndone\n'
+
+    # Killing it again is harmless.
+    batch.kill()
+
+
+def test_batch_no_shell(batch, tmp_path):
+    # The command is run without a shell, as it is outside of a batch.
+    cmd = 'echo $BATCH_TEST_VAR "a  b" \'*\' ; `true`'
+    job = _add_job(batch, tmp_path, 'no_shell', cmd,
+                   exports={'BATCH_TEST_VAR': 'x'})
+    batch.launch()
+    _wait_for(lambda: batch.get_result(job.batch_index) is not None)
+    assert batch.get_result(job.batch_index)[0] == 0
+
+    output = subprocess.run(shlex.split(cmd), stdout=subprocess.PIPE,
+                            universal_newlines=True, check=True).stdout
+    assert output == '$BATCH_TEST_VAR a  b * ; `true`\n'
+    assert _read(job.deploy.log_path) == '[Executing]:\n{}\n\n{}'.format(
+        cmd, output)
+
+
+def test_batch_start_times(batch, tmp_path, monkeypatch):
+    monkeypatch.setattr(LocalLauncher, 'batch_parallel', 1)
+    go = tmp_path / 'go'
+    first = _add_job(batch, tmp_path, 'first',
+                     'bash -c "until [ -e {} ]; do sleep 0.05; done"'.format(go))
+    second = _add_job(batch, tmp_path, 'second', 'echo second')
+
+    # Start times are recorded with a resolution of a second.
+    launched = datetime.datetime.now().replace(microsecond=0)
+    batch.launch()
+    _wait_for(lambda: batch.get_start_time(first.batch_index) is not None)
+    assert batch.get_start_time(first.batch_index) >= launched
+
+    # The second job is queued behind the first one, so it has not started.
+    assert batch.get_start_time(second.batch_index) is None
+    assert batch.get_result(first.batch_index) is None
+
+    go.touch()
+    _wait_for(lambda: batch.get_result(second.batch_index) is not None and
+              batch.exited)
+    assert batch.get_result(first.batch_index)[0] == 0
+    assert batch.get_result(second.batch_index)[0] == 0
+    assert (batch.get_start_time(first.batch_index) <=
+            batch.get_start_time(second.batch_index) <=
+            datetime.datetime.now())
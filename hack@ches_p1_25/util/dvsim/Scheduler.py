@@ -4,10 +4,11 @@
 
 import logging as log
 import threading
+import time
 from signal import SIGINT, SIGTERM, signal
 
 from Launcher import LauncherError
-from StatusPrinter import get_status_printer
+from StatusPrinter import get_progress_stream, get_status_printer
 from Timer import Timer
 from utils import VERBOSE
 
@@ -48,9 +49,26 @@ def get_next_item(arr, index):
 class Scheduler:
     '''An object that runs one or more Deploy items'''
 
-    def __init__(self, items, launcher_cls, interactive):
+    # Destination of the JSON lines progress stream (see
+    # StatusPrinter.ProgressStream), or None. This is set in dvsim.py.
+    progress_dest = None
+
+    # Maximum length of the list of running items shown in the status.
+    max_running_str_len = 30
+
+    # Minimum time in seconds between two updates of the status of the targets
+    # that changed, in between the periodic refreshes (it is capped to the
+    # refresh interval). This keeps targets whose jobs complete at a high
+    # rate from being printed on every poll.
+    dirty_refresh_gap = 2
+
+    def __init__(self, items, launcher_cls, interactive, journal=None):
         self.items = items
 
+        # An optional JobJournal, in which the status transitions of the items
+        # are recorded.
+        self.journal = journal
+
         # 'scheduled[target][cfg]' is a list of Deploy objects for the chosen
         # target and cfg. As items in _scheduled are ready to be run (once
         # their dependencies pass), they are moved to the _queued list, where
@@ -65,6 +83,7 @@ class Scheduler:
         self.status_printer.print_header(
             msg="Q: queued, D: dispatched, P: passed, F: failed, K: killed, "
             "T: total")
+        self.progress_stream = get_progress_stream(Scheduler.progress_dest)
 
         # Sets of items, split up by their current state. The sets are
         # disjoint and their union equals the keys of self.item_to_status.
@@ -86,6 +105,13 @@ class Scheduler:
         self._total = {}
         self.last_target_polled_idx = -1
         self.last_item_polled_idx = {}
+
+        # Targets whose items changed status since the status was last
+        # updated. Only these are updated on the next refresh.
+        self._dirty_targets = set()
+
+        # The time.monotonic() of the last update of the status.
+        self._last_status_update = None
         for target in self._scheduled:
             self._queued[target] = []
             self._running[target] = []
@@ -124,7 +150,7 @@ class Scheduler:
         targets and cfgs.
         '''
 
-        timer = Timer()
+        timer = Timer(self.status_printer.refresh_interval)
 
         # Catch one SIGINT and tell the runner to quit. On a second, die.
         stop_now = threading.Event()
@@ -159,11 +185,18 @@ class Scheduler:
                     self._kill()
 
                 hms = timer.hms()
-                changed = self._poll(hms) or timer.check_time()
+                self._poll(hms)
                 self._dispatch(hms)
-                if changed:
-                    if self._check_if_done(hms):
-                        break
+
+                # Update the status of the targets that changed. Once per
+                # refresh interval, also update the targets that are still in
+                # progress, so that their elapsed time keeps ticking.
+                done = self._check_if_done()
+                tick = timer.check_time()
+                if self._status_due(done, tick, timer.print_interval):
+                    self._update_status(hms, refresh_all=tick)
+                if done:
+                    break
 
                 # This is essentially sleep(1) to wait a second between each
                 # polling loop. But we do it with a bounded wait on stop_now so
@@ -176,6 +209,9 @@ class Scheduler:
 
         # Cleanup the status printer.
         self.status_printer.exit()
+        if self.progress_stream is not None:
+            self.progress_stream.write("done")
+            self.progress_stream.close()
 
         # We got to the end without anything exploding. Return the results.
         return self.item_to_status
@@ -247,6 +283,7 @@ class Scheduler:
             assert next_item not in self._queued[next_item.target]
             self.item_to_status[next_item] = 'Q'
             self._queued[next_item.target].append(next_item)
+            self._dirty_targets.add(next_item.target)
             self._remove_from_scheduled(next_item)
 
     def _cancel_successors(self, item):
@@ -386,6 +423,7 @@ class Scheduler:
                 self._running[target].pop(self.last_item_polled_idx[target])
                 self.last_item_polled_idx[target] -= 1
                 self.item_to_status[item] = status
+                self._record(item, status)
                 log.log(level, "[%s]: [%s]: [status] [%s: %s]", hms, target,
                         item.full_name, status)
 
@@ -470,6 +508,8 @@ class Scheduler:
                 except LauncherError as err:
                     log.error('{}'.format(err))
                     self._kill_item(item)
+                    continue
+                self._record(item, 'D')
 
     def _kill(self):
         '''Kill any running items and cancel any that are waiting'''
@@ -486,30 +526,77 @@ class Scheduler:
             for item in [item for item in self._running[target]]:
                 self._kill_item(item)
 
-    def _check_if_done(self, hms):
-        '''Check if we are done executing all jobs.
+    def _check_if_done(self):
+        '''Check if we are done executing all jobs.'''
 
-        Also, prints the status of currently running jobs.
-        '''
-
-        done = True
         for target in self._scheduled:
             done_cnt = sum([
                 len(self._passed[target]),
                 len(self._failed[target]),
                 len(self._killed[target])
             ])
-            done = done and (done_cnt == self._total[target])
+            if done_cnt != self._total[target]:
+                return False
+        return True
 
-            # Skip if a target has not even begun executing.
-            if not (self._queued[target] or self._running[target] or
-                    done_cnt > 0):
-                continue
+    def _running_str(self, target):
+        '''Returns the list of running items in a target as a string.
+
+        Only as many items as can be shown in the status are listed.
+        '''
+
+        names = []
+        length = 0
+        for item in self._running[target]:
+            if length > self.max_running_str_len:
+                break
+            names.append(item.full_name)
+            length += len(item.full_name) + 2
+        return ", ".join(names)
+
+    def _status_due(self, done, tick, refresh_interval):
+        '''Returns whether the status should be updated now.
+
+        It is on each refresh tick (every refresh_interval seconds) and once
+        all jobs are done. In between, the targets that changed are updated
+        when at least dirty_refresh_gap seconds have passed since the last
+        update.
+        '''
+
+        if done or tick:
+            return True
+        if not self._dirty_targets:
+            return False
+        if self._last_status_update is None:
+            return True
+        gap = min(self.dirty_refresh_gap, refresh_interval)
+        return time.monotonic() - self._last_status_update >= gap
+
+    def _update_status(self, hms, refresh_all=False):
+        '''Prints the status of the targets that changed since the last call.
+
+        If refresh_all is set, the targets that have begun executing but are
+        not yet done are printed as well, even if they did not change.
+        '''
+
+        # Iterate over the targets in order, so that they are printed in the
+        # same order every time.
+        for target in self._targets:
+            done_cnt = sum([
+                len(self._passed[target]),
+                len(self._failed[target]),
+                len(self._killed[target])
+            ])
+            dirty = target in self._dirty_targets
+            if not dirty:
+                in_progress = ((self._queued[target] or
+                                self._running[target] or done_cnt > 0) and
+                               done_cnt != self._total[target])
+                if not (refresh_all and in_progress):
+                    continue
 
             perc = done_cnt / self._total[target] * 100
 
-            running = ", ".join(
-                [f"{item.full_name}" for item in self._running[target]])
             msg = self.msg_fmt.format(len(self._queued[target]),
                                       len(self._running[target]),
                                       len(self._passed[target]),
@@ -520,8 +607,36 @@ class Scheduler:
                                               msg=msg,
                                               hms=hms,
                                               perc=perc,
-                                              running=running)
-        return done
+                                              running=self._running_str(target))
+            # The progress stream only gets the targets that changed.
+            if dirty and self.progress_stream is not None:
+                self.progress_stream.write("target",
+                                           target=target,
+                                           queued=len(self._queued[target]),
+                                           running=len(self._running[target]),
+                                           passed=len(self._passed[target]),
+                                           failed=len(self._failed[target]),
+                                           killed=len(self._killed[target]),
+                                           total=self._total[target],
+                                           perc=perc)
+        self._dirty_targets.clear()
+        self._last_status_update = time.monotonic()
+
+    def _record(self, item, status):
+        '''Record a status transition of the item.
+
+        The item's target is marked for a status update, and the transition is
+        written to the journal and the progress stream, if there are any.
+        '''
+
+        self._dirty_targets.add(item.target)
+        if self.journal is not None:
+            self.journal.record(item, status)
+        if self.progress_stream is not None:
+            self.progress_stream.write("job",
+                                       target=item.target,
+                                       name=item.full_name,
+                                       status=status)
 
     def _cancel_item(self, item, cancel_successors=True):
         '''Cancel an item and optionally all of its successors.
@@ -531,6 +646,7 @@ class Scheduler:
         '''
 
         self.item_to_status[item] = 'K'
+        self._record(item, 'K')
         self._killed[item.target].add(item)
         if item in self._queued[item.target]:
             self._queued[item.target].remove(item)
@@ -545,6 +661,7 @@ class Scheduler:
 
         item.launcher.kill()
         self.item_to_status[item] = 'K'
+        self._record(item, 'K')
         self._killed[item.target].add(item)
         self._running[item.target].remove(item)
         self._cancel_successors(item)
@@ -0,0 +1,183 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+'''pytest-based testing for the status updates of Scheduler.py'''
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest  # noqa: E402
+from Scheduler import Scheduler  # noqa: E402
+from StatusPrinter import StatusPrinter  # noqa: E402
+
+
+class FakeLauncher:
+    '''A launcher whose job passes on its second poll.'''
+
+    max_parallel = 4
+    max_poll = 100
+    poll_freq = 0.001
+
+    def __init__(self, item):
+        self.item = item
+        self.polls = 0
+
+    def launch(self):
+        pass
+
+    def poll(self):
+        self.polls += 1
+        return 'P' if self.polls > 1 else 'D'
+
+    def kill(self):
+        pass
+
+
+class FakeItem:
+    '''The parts of a Deploy object that the scheduler uses.'''
+
+    def __init__(self, target, name, dependencies=()):
+        self.target = target
+        self.sim_cfg = 'cfg'
+        self.full_name = name
+        self.dependencies = list(dependencies)
+        self.needs_all_dependencies_passing = True
+        self.weight = 1
+        self.launcher = None
+
+    def create_launcher(self):
+        self.launcher = FakeLauncher(self)
+
+
+class RecordingPrinter(StatusPrinter):
+    '''Records the targets whose status is printed.'''
+
+    def __init__(self):
+        super().__init__()
+        self.updates = []
+
+    def update_target(self, target, hms, msg, perc, running):
+        self.updates.append((target, msg))
+
+
+class RecordingStream:
+    '''Records the events written to the progress stream.'''
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, event, **fields):
+        self.events.append(dict(fields, event=event))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sched():
+    build = FakeItem('build', 'build')
+    runs = [FakeItem('run', 'run.{}'.format(i), [build]) for i in range(2)]
+    sched = Scheduler([build] + runs, FakeLauncher, interactive=True)
+    sched.status_printer = RecordingPrinter()
+    sched.progress_stream = RecordingStream()
+    return sched
+
+
+def _printed(sched):
+    '''Returns the targets printed since the last call.'''
+    targets = [target for target, _ in sched.status_printer.updates]
+    sched.status_printer.updates.clear()
+    return targets
+
+
+def _target_events(sched):
+    '''Returns the targets written to the progress stream since the last
+    call.'''
+    targets = [e['target'] for e in sched.progress_stream.events
+               if e['event'] == 'target']
+    sched.progress_stream.events.clear()
+    return targets
+
+
+def test_dirty_targets(sched):
+    # Nothing is printed until something changes.
+    sched._update_status('00:00:00')
+    assert _printed(sched) == []
+
+    sched._enqueue_successors(None)
+    assert sched._dirty_targets == {'build'}
+    sched._update_status('00:00:00')
+    assert _printed(sched) == ['build']
+    assert _target_events(sched) == ['build']
+    assert sched._dirty_targets == set()
+
+    sched._update_status('00:00:01')
+    assert _printed(sched) == []
+
+    # On a refresh tick, the targets in progress are printed even if they did
+    # not change, but not written to the progress stream.
+    sched._update_status('00:00:02', refresh_all=True)
+    assert _printed(sched) == ['build']
+    assert _target_events(sched) == []
+
+    # The build passes, which enqueues the runs.
+    sched._dispatch('00:00:03')
+    sched._poll('00:00:03')
+    sched._poll('00:00:03')
+    assert sched._dirty_targets == {'build', 'run'}
+    sched._update_status('00:00:03')
+    assert _printed(sched) == ['build', 'run']
+    assert _target_events(sched) == ['build', 'run']
+
+    # The build is done, so it is no longer printed on refresh ticks.
+    sched._update_status('00:00:04', refresh_all=True)
+    assert _printed(sched) == ['run']
+
+
+def test_status_due(sched):
+    # Done and refresh ticks always update the status.
+    assert sched._status_due(True, False, 5)
+    assert sched._status_due(False, True, 5)
+    assert not sched._status_due(False, False, 5)
+
+    # The first change is printed at once.
+    sched._dirty_targets.add('build')
+    assert sched._status_due(False, False, 5)
+
+    # Later ones once dirty_refresh_gap has passed since the last update.
+    sched._update_status('00:00:00')
+    sched._dirty_targets.add('build')
+    assert not sched._status_due(False, False, 5)
+    assert sched._status_due(False, True, 5)
+    sched._last_status_update = time.monotonic() - sched.dirty_refresh_gap
+    assert sched._status_due(False, False, 5)
+
+    # Or the refresh interval, if that is shorter.
+    sched._last_status_update = time.monotonic() - 1
+    assert not sched._status_due(False, False, 5)
+    assert sched._status_due(False, False, 1)
+
+
+def test_run(sched):
+    results = sched.run()
+    assert sorted(results.values()) == ['P', 'P', 'P']
+
+    events = sched.progress_stream.events
+    assert events[-1]['event'] == 'done'
+    jobs = [(e['name'], e['status']) for e in events if e['event'] == 'job']
+    assert jobs[:2] == [('build', 'D'), ('build', 'P')]
+    assert sorted(jobs[2:]) == [('run.0', 'D'), ('run.0', 'P'),
+                                ('run.1', 'D'), ('run.1', 'P')]
+
+    # The last event of each target has all of its jobs passed.
+    last = {}
+    for e in events:
+        if e['event'] == 'target':
+            last[e['target']] = e
+    assert {t: (e['passed'], e['total'], e['perc'])
+            for t, e in last.items()} == {'build': (1, 1, 100.0),
+                                          'run': (2, 2, 100.0)}
@@ -136,6 +136,9 @@ class SimCfg(FlowCfg):
         self.cov_merge_deploy = None
         self.cov_report_deploy = None
         self.results_summary = OrderedDict()
+        # Machine-readable index of the failure buckets (see
+        # SimResults.bucket_index()), written next to the results page.
+        self.bucket_index = None
 
         super().__init__(flow_cfg_file, hjson_data, args, mk_config)
 
@@ -882,6 +885,7 @@ class SimCfg(FlowCfg):
         if results.buckets:
             self.errors_seen = True
             results_str += "\n".join(create_bucket_report(results.buckets))
+        self.bucket_index = results.bucket_index()
 
         self.results_md = results_str
         return results_str
@@ -935,6 +939,19 @@ class SimCfg(FlowCfg):
         print(self.results_summary_md)
         return self.results_summary_md
 
+    def write_results(self, html_filename, text_md, json_str=None):
+        """Write results to files.
+
+        In addition to the files written by FlowCfg.write_results(), this
+        writes the failure bucket index to failure_buckets.json in
+        self.results_dir.
+        """
+        super().write_results(html_filename, text_md, json_str)
+
+        if self.bucket_index is not None:
+            with open(self.results_dir / "failure_buckets.json", "w") as f:
+                json.dump(self.bucket_index, f, indent=2)
+
     def _publish_results(self, results_server: ResultsServer):
         '''Publish coverage results to the opentitan web server.'''
         super()._publish_results(results_server)
@@ -6,9 +6,13 @@ Class describing simulation results
 """
 
 import collections
+import logging as log
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 from Testplan import Result
+from utils import VERBOSE
 
 _REGEX_REMOVE = [
     # Remove UVM time.
@@ -64,6 +68,76 @@ _REGEX_STAR = [
     re.compile(r'(?<=instance)\s*=\s*\S+'),
 ]
 
+# Each of the regex lists above is applied in order, with each regex working on
+# the output of the previous one. If none of the regexes in a list can match
+# the message, the whole list is skipped. This is checked with a single scan
+# of the message, for the alternation of all regexes in _REGEX_REMOVE, and for
+# the literals or characters that every match of a regex in _REGEX_STRIP and
+# _REGEX_STAR must contain. Note that the hex numbers after an equal sign or a
+# colon need not contain any digit, as in "exp=dead act=beef".
+_SCANNERS = [
+    re.compile('|'.join('(?:{})'.format(regex.pattern)
+                        for regex in _REGEX_REMOVE)),
+    re.compile(r'top\.|Assertion '),
+    re.compile(r"\d|'h|instance|[=:] ?[a-fA-F]"),
+]
+
+# Signatures of the failure messages seen so far, keyed by the raw message.
+# Many failures share the exact same message, and the results of each cfg are
+# generated more than once (as markdown and as json).
+_signature_cache = {}
+
+# Number of unique, not yet seen, failure messages above which they are
+# bucketized in a process pool.
+_PARALLEL_MIN_MSGS = 2000
+
+# Maximum number of example failures listed per bucket in the bucket index.
+_MAX_BUCKET_EXAMPLES = 5
+
+
+def bucketize(fail_msg):
+    '''Returns the failure signature (bucket) of a failure message.
+
+    The signature is obtained by removing the timestamps, stripping the
+    hierarchical paths and replacing the numbers in the message with '*'.
+    '''
+    bucket = fail_msg
+    # Remove stuff.
+    if _SCANNERS[0].search(bucket):
+        for regex in _REGEX_REMOVE:
+            bucket = regex.sub('', bucket)
+    # Strip stuff.
+    if _SCANNERS[1].search(bucket):
+        for regex in _REGEX_STRIP:
+            bucket = regex.sub(r'\g<1>', bucket)
+    # Replace with '*'.
+    if _SCANNERS[2].search(bucket):
+        for regex in _REGEX_STAR:
+            bucket = regex.sub('*', bucket)
+    return bucket
+
+
+def bucketize_all(fail_msgs):
+    '''Returns a dict mapping each of the given failure messages to its bucket.
+
+    The signatures are cached across calls. If there are many messages that
+    have not been seen before, they are bucketized in a process pool.
+    '''
+    new_msgs = [msg for msg in set(fail_msgs) if msg not in _signature_cache]
+    if len(new_msgs) >= _PARALLEL_MIN_MSGS and (os.cpu_count() or 1) > 1:
+        log.log(VERBOSE, "Bucketizing %d failure messages in parallel",
+                len(new_msgs))
+        workers = os.cpu_count()
+        chunksize = max(1, len(new_msgs) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            buckets = executor.map(bucketize, new_msgs, chunksize=chunksize)
+            _signature_cache.update(zip(new_msgs, buckets))
+    else:
+        for msg in new_msgs:
+            _signature_cache[msg] = bucketize(msg)
+
+    return {msg: _signature_cache[msg] for msg in fail_msgs}
+
 
 class SimResults:
     '''An object wrapping up a table of results for some tests
@@ -79,22 +153,35 @@ class SimResults:
         self.table = []
         self.buckets = collections.defaultdict(list)
         self._name_to_row = {}
+
+        failures = []
         for item in items:
-            self._add_item(item, results)
+            if self._add_item(item, results):
+                failures.append(item)
+
+        # Bucketize all failures in one go, so that identical messages are
+        # only processed once.
+        buckets = bucketize_all(
+            [item.launcher.fail_msg.message for item in failures])
+        for item in failures:
+            fail_msg = item.launcher.fail_msg
+            self.buckets[buckets[fail_msg.message]].append(
+                (item, fail_msg.line_number, fail_msg.context))
 
     def _add_item(self, item, results):
-        '''Recursively add a single item to the table of results'''
+        '''Add a single item to the table of results
+
+        Returns True if the item failed, in which case it needs to be added to
+        the failure buckets.
+        '''
         status = results[item]
-        if status in ["F", "K"]:
-            bucket = self._bucketize(item.launcher.fail_msg.message)
-            self.buckets[bucket].append(
-                (item, item.launcher.fail_msg.line_number,
-                 item.launcher.fail_msg.context))
 
         # Runs get added to the table directly
         if item.target == "run":
             self._add_run(item, status)
 
+        return status in ["F", "K"]
+
     def _add_run(self, item, status):
         '''Add an entry to table for item'''
         row = self._name_to_row.get(item.name)
@@ -116,14 +203,40 @@ class SimResults:
         row.total += 1
 
     def _bucketize(self, fail_msg):
-        bucket = fail_msg
-        # Remove stuff.
-        for regex in _REGEX_REMOVE:
-            bucket = regex.sub('', bucket)
-        # Strip stuff.
-        for regex in _REGEX_STRIP:
-            bucket = regex.sub(r'\g<1>', bucket)
-        # Replace with '*'.
-        for regex in _REGEX_STAR:
-            bucket = regex.sub('*', bucket)
-        return bucket
+        return bucketize(fail_msg)
+
+    def bucket_index(self):
+        '''Returns a machine-readable index of the failure buckets.
+
+        The index is a list of dicts, one per bucket, sorted by descending
+        number of failures. Each entry holds the signature, the number of
+        failures and failing tests, the first failure seen and a few example
+        failures, each with the test name, seed, log path and the line number
+        of the failure message in the log.
+        '''
+
+        def failure_to_dict(item, line):
+            return {
+                'name': item.name,
+                'seed': str(item.seed) if hasattr(item, 'seed') else None,
+                'log_file_path': item.get_log_path(),
+                'log_file_line_num': line,
+            }
+
+        index = []
+        by_tests = sorted(self.buckets.items(),
+                          key=lambda i: len(i[1]),
+                          reverse=True)
+        for bucket, tests in by_tests:
+            examples = [
+                failure_to_dict(item, line)
+                for item, line, _ in tests[:_MAX_BUCKET_EXAMPLES]
+            ]
+            index.append({
+                'identifier': bucket,
+                'count': len(tests),
+                'unique_tests': len({item.name for item, _, _ in tests}),
+                'first_seen': examples[0],
+                'examples': examples,
+            })
+        return index
@@ -0,0 +1,68 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+'''pytest-based testing for the failure bucketizing in SimResults.py'''
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest  # noqa: E402
+import SimResults  # noqa: E402
+from SimResults import bucketize, bucketize_all  # noqa: E402
+
+CORPUS = [
+    'UVM_ERROR @   1234.5 ns: (cip_base_vseq.sv:123) [tb.dut] mismatch',
+    'UVM_FATAL [10.0 ps] reached timeout',
+    'Offending \'(a == b)\' (time 1000 PS) Assertion tb.dut.u_foo.FooA_A',
+    'UVM_ERROR: Check failed in tb_top.dut.u_reg.u_ctrl_reg: bad value',
+    'UVM_ERROR: mismatch exp=dead act=beef',
+    'UVM_ERROR: mismatch exp = dead act = beef',
+    'Error: addr: face, data: cafe.',
+    'reg=abc;',
+    'reg[3]=fab',
+    'data 0xdeadbeef does not match \'h cafe',
+    'timeout after 10.5ns in 3 cycles',
+    'item(7) dropped at count=12, total=100.',
+    'seq5 fifo0[2] has 12 items',
+    'instance = tb.dut.u_foo expected ack',
+    'Assertion failed: no numbers here',
+    'a plain message',
+    '   leading   and   extra   spaces',
+    '',
+]
+
+
+def _bucketize_unfiltered(fail_msg):
+    '''Reference bucketize, applying every regex without the prefilter.'''
+    bucket = fail_msg
+    for regex in SimResults._REGEX_REMOVE:
+        bucket = regex.sub('', bucket)
+    for regex in SimResults._REGEX_STRIP:
+        bucket = regex.sub(r'\g<1>', bucket)
+    for regex in SimResults._REGEX_STAR:
+        bucket = regex.sub('*', bucket)
+    return bucket
+
+
+@pytest.mark.parametrize('msg', CORPUS)
+def test_bucketize_matches_unfiltered(msg):
+    assert bucketize(msg) == _bucketize_unfiltered(msg)
+
+
+def test_bucketize_digit_free_hex():
+    assert (bucketize('UVM_ERROR: mismatch exp=dead act=beef') ==
+            'UVM_ERROR: mismatch exp=* act=*')
+    assert (bucketize('Error: addr: face, data: cafe.') ==
+            'Error: addr: *, data: *.')
+    assert bucketize('reg=abc;') == 'reg=*;'
+
+
+def test_bucketize_all():
+    msgs = CORPUS + CORPUS[:3]
+    buckets = bucketize_all(msgs)
+    assert set(buckets) == set(msgs)
+    for msg in msgs:
+        assert buckets[msg] == _bucketize_unfiltered(msg)
@@ -2,8 +2,12 @@
 # Licensed under the Apache License, Version 2.0, see LICENSE for details.
 # SPDX-License-Identifier: Apache-2.0
 
+import io
+import json
 import logging as log
+import socket
 import sys
+import time
 
 try:
     import enlighten
@@ -20,6 +24,10 @@ class StatusPrinter:
     same.
     """
 
+    # Minimum interval in seconds between two updates of the status. If None,
+    # the --print-interval (Timer.print_interval) is used.
+    refresh_interval = None
+
     def __init__(self):
         pass
 
@@ -121,6 +129,10 @@ class EnlightenStatusPrinter(TtyStatusPrinter):
     example - it needs to be attached to a TTY enabled stream.
     '''
 
+    # The status bars are redrawn in place, so they can be refreshed more
+    # often than the log lines printed by TtyStatusPrinter.
+    refresh_interval = 1
+
     def __init__(self):
         super().__init__()
 
@@ -165,6 +177,79 @@ class EnlightenStatusPrinter(TtyStatusPrinter):
             self.status_target[target].close()
 
 
+class ProgressStream:
+    '''Writes the progress of the jobs as JSON lines, for use by dashboards.
+
+    Each line is a JSON object with an "event" field, which is one of:
+      job:    A job changed its status. The object holds the target, the
+              job's full name and its new status (D, P, F or K).
+      target: The counts of the jobs in a target changed. The object holds
+              the target, the number of queued, running, passed, failed and
+              killed jobs, the total and the percentage of completion.
+      done:   All jobs have completed.
+    All objects also hold the wall clock time at which they were written.
+
+    The destination is given as "fd:N" to write to an open file descriptor,
+    "unix:PATH" to connect to a local (Unix domain) stream socket, or a path to
+    write to a file (or a named pipe). If the stream cannot be written, a
+    warning is printed and the stream is closed; the jobs are not affected.
+    '''
+
+    def __init__(self, dest):
+        self.dest = dest
+        if dest.startswith("fd:"):
+            self._file = open(int(dest[3:]), "w", buffering=1, closefd=False)
+        elif dest.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(dest[5:])
+            # socket.makefile() does not line buffer text files, so wrap the
+            # binary file to send each event as soon as it is written.
+            self._file = io.TextIOWrapper(sock.makefile("wb"),
+                                          line_buffering=True)
+            sock.close()
+        else:
+            self._file = open(dest, "w", buffering=1)
+
+    def write(self, event, **fields):
+        '''Writes an event with the given fields as a JSON line.'''
+
+        if self._file is None:
+            return
+
+        record = {"event": event, "time": time.time()}
+        record.update(fields)
+        try:
+            self._file.write(json.dumps(record) + "\n")
+        except OSError as e:
+            log.warning("Closing the progress stream %s: %s", self.dest, e)
+            self.close()
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+
+def get_progress_stream(dest):
+    """Factory method that returns a progress stream instance.
+
+    Returns None if dest is None. Exits with an error if the destination
+    cannot be opened.
+    """
+    if dest is None:
+        return None
+
+    try:
+        return ProgressStream(dest)
+    except (OSError, ValueError) as e:
+        log.error("Failed to open the progress stream %s: %s", dest, e)
+        sys.exit(1)
+
+
 def get_status_printer(interactive):
     """Factory method that returns a status printer instance.
 
@@ -0,0 +1,98 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+'''pytest-based testing for the progress stream of StatusPrinter.py'''
+
+import json
+import os
+import socket
+import sys
+
+sys.path.append(os.path.dirname(__file__))
+
+import pytest  # noqa: E402
+from StatusPrinter import ProgressStream, get_progress_stream  # noqa: E402
+
+
+def _write_events(stream):
+    stream.write("job", target="build", name="build", status="P")
+    stream.write("done")
+    stream.close()
+
+
+def _check_events(text):
+    events = [json.loads(line) for line in text.splitlines()]
+    assert [e["event"] for e in events] == ["job", "done"]
+    assert events[0]["status"] == "P"
+    assert all(isinstance(e["time"], float) for e in events)
+
+
+def test_file(tmp_path):
+    path = tmp_path / "progress.jsonl"
+    stream = get_progress_stream(str(path))
+    _write_events(stream)
+    _check_events(path.read_text())
+
+    # Writes after close are dropped.
+    stream.write("done")
+    _check_events(path.read_text())
+
+
+def test_fd():
+    rd, wr = os.pipe()
+    with os.fdopen(rd) as reader:
+        try:
+            stream = ProgressStream("fd:{}".format(wr))
+            stream.write("job", target="build", name="build", status="P")
+            # The stream is line buffered, so the reader sees each event as
+            # it is written.
+            assert json.loads(reader.readline())["event"] == "job"
+            stream.write("done")
+            stream.close()
+            # The descriptor is owned by the caller and is not closed.
+            os.fstat(wr)
+        finally:
+            os.close(wr)
+        assert json.loads(reader.readline())["event"] == "done"
+
+
+def test_unix(tmp_path):
+    path = str(tmp_path / "progress.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen(1)
+        stream = ProgressStream("unix:" + path)
+        conn, _ = server.accept()
+        with conn, conn.makefile("r") as reader:
+            stream.write("job", target="build", name="build", status="P")
+            assert json.loads(reader.readline())["event"] == "job"
+            stream.write("done")
+            stream.close()
+            assert json.loads(reader.readline())["event"] == "done"
+            assert reader.read() == ""
+
+
+def test_unix_peer_closed(tmp_path):
+    path = str(tmp_path / "progress.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(path)
+        server.listen(1)
+        stream = ProgressStream("unix:" + path)
+        conn, _ = server.accept()
+        conn.close()
+        # The first write may still succeed; the stream is closed once a write
+        # fails, and later writes are dropped.
+        for _ in range(2):
+            stream.write("job", target="build", name="build", status="P")
+        assert stream._file is None
+        stream.write("done")
+
+
+def test_bad_dest(tmp_path):
+    assert get_progress_stream(None) is None
+    for dest in [str(tmp_path / "missing" / "progress.jsonl"),
+                 "unix:" + str(tmp_path / "missing.sock"),
+                 "fd:x"]:
+        with pytest.raises(SystemExit):
+            get_progress_stream(dest)
@@ -15,9 +15,11 @@ class Timer:
 
     print_interval = 5
 
-    def __init__(self):
+    def __init__(self, print_interval=None):
         self.start = time.monotonic()
-        self.next_print = self.start + Timer.print_interval
+        if print_interval is not None:
+            self.print_interval = print_interval
+        self.next_print = self.start + self.print_interval
         self.first_print = True
 
     def period(self):
@@ -49,8 +51,8 @@ class Timer:
         if now < self.next_print:
             return False
 
-        self.next_print += Timer.print_interval
+        self.next_print += self.print_interval
         if self.next_print <= now:
-            self.next_print = now + Timer.print_interval
+            self.next_print = now + self.print_interval
 
         return True
@@ -36,9 +36,10 @@ import LocalLauncher
 import SgeLauncher
 from CfgFactory import make_cfg
 from Deploy import RunTest
+from Scheduler import Scheduler
 from Timer import Timer
 from utils import (TS_FORMAT, TS_FORMAT_LONG, VERBOSE, rm_path,
-                   run_cmd_with_timeout)
+                   run_cmd_with_timeout, set_hjson_cache_dir)
 
 # TODO: add dvsim_cfg.hjson to retrieve this info
 version = 0.1
@@ -104,6 +105,19 @@ def read_max_parallel(arg):
             '({!r}): must be a positive integer.'.format(arg))
 
 
+def read_positive_int(arg):
+    '''Take value for an option that must be a positive integer'''
+    try:
+        int_val = int(arg)
+        if int_val <= 0:
+            raise ValueError('bad value')
+        return int_val
+
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'Bad argument ({!r}): must be a positive integer.'.format(arg))
+
+
 def resolve_max_parallel(arg):
     '''Pick a value of max_parallel, defaulting to 16 or $DVSIM_MAX_PARALLEL'''
     if arg is not None:
@@ -356,6 +370,25 @@ def parse_args():
                             'is used. Only applicable when launching jobs '
                             'locally.'))
 
+    disg.add_argument("--batch-seeds",
+                      type=read_positive_int,
+                      default=1,
+                      metavar="N",
+                      help=('Run up to N seeds of the same test in a single '
+                            'wrapper process, rather than launching a '
+                            'process per seed. Each seed still gets its own '
+                            'run directory and log. Only applicable when '
+                            'launching jobs locally.'))
+
+    disg.add_argument("--batch-parallel",
+                      type=read_positive_int,
+                      default=1,
+                      metavar="M",
+                      help=('Run up to M seeds of a batch (see --batch-seeds) '
+                            'in parallel. Note that each dispatched batch may '
+                            'then run up to M jobs in parallel, on top of '
+                            'the --max-parallel limit.'))
+
     pathg = parser.add_argument_group('File management')
 
     pathg.add_argument("--scratch-root",
@@ -625,6 +658,13 @@ def parse_args():
                      metavar="N",
                      help="Print status every N seconds.")
 
+    dvg.add_argument("--progress-stream",
+                     metavar="DEST",
+                     help=("Also write the progress of the jobs as JSON "
+                           "lines to DEST, which is either 'fd:N' (an open "
+                           "file descriptor), 'unix:PATH' (a local stream "
+                           "socket) or a file path."))
+
     dvg.add_argument("--verbose",
                      nargs="?",
                      choices=['default', 'debug'],
@@ -634,6 +674,14 @@ def parse_args():
                            'messages. With --verbose=debug, the volume of '
                            'messages is even higher.'))
 
+    dvg.add_argument("--resume",
+                     action='store_true',
+                     help=("Resume the previous (possibly interrupted) run "
+                           "using the job journal in the scratch area. Jobs "
+                           "that passed already are not run again if their "
+                           "inputs are unchanged. The remaining tests are "
+                           "run with the same seeds as before."))
+
     dvg.add_argument("--dry-run",
                      "-n",
                      action='store_true',
@@ -653,6 +701,9 @@ def parse_args():
         sys.exit()
     if args.interactive and args.reseed != 1:
         args.reseed = 1
+    if args.resume and args.purge:
+        log.error("--resume and --purge cannot be set together")
+        sys.exit(1)
 
     # We want the --list argument to default to "all categories", but allow
     # filtering. If args.list is None, then --list wasn't supplied. If it is
@@ -701,6 +752,9 @@ def main():
     # core files.
     (Path(args.scratch_root) / 'FUSESOC_IGNORE').touch()
 
+    # Cache parsed hjson files in the scratch area across invocations.
+    set_hjson_cache_dir(os.path.join(args.scratch_root, '.hjson_cache'))
+
     args.cfg = os.path.abspath(args.cfg)
     if args.remote:
         cfg_path = args.cfg.replace(proj_root_src + "/", "")
@@ -721,7 +775,10 @@ def main():
 
     # Register the common deploy settings.
     Timer.print_interval = args.print_interval
+    Scheduler.progress_dest = args.progress_stream
     LocalLauncher.LocalLauncher.max_parallel = args.max_parallel
+    LocalLauncher.LocalLauncher.batch_size = args.batch_seeds
+    LocalLauncher.LocalLauncher.batch_parallel = args.batch_parallel
     SgeLauncher.SgeLauncher.max_parallel = args.max_parallel
     Launcher.Launcher.max_odirs = args.max_odirs
     LauncherFactory.set_launcher_type(args.local)
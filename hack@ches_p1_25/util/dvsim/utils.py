@@ -5,8 +5,10 @@ r"""
 Utility functions common across dvsim.
 """
 
+import hashlib
 import logging as log
 import os
+import pickle
 import re
 import shlex
 import shutil
@@ -78,15 +80,80 @@ def run_cmd_with_timeout(cmd, timeout=-1, exit_on_failure=1):
     return (result, status)
 
 
+# Parsed hjson files, keyed by (path, mtime, size). The values are pickled, so
+# that each caller gets its own copy of the parsed data that it can modify.
+_hjson_cache = {}
+
+# Directory where parsed hjson files are cached across invocations, keyed by
+# the hash of their contents. Disabled if None.
+_hjson_cache_dir = None
+
+# Bump this when the cached representation changes.
+_HJSON_CACHE_VERSION = 1
+
+
+def set_hjson_cache_dir(path):
+    '''Enable the on-disk cache of parsed hjson files in the given directory.
+
+    Parsing hjson is slow, so the parsed data is pickled and saved to disk,
+    keyed by the hash of the file contents. This is also used to initialize
+    the worker processes that load cfgs in parallel.
+    '''
+    global _hjson_cache_dir
+    _hjson_cache_dir = path
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+
+
+def get_hjson_cache_dir():
+    return _hjson_cache_dir
+
+
+def _parse_hjson_cached(hjson_file):
+    '''Returns the parsed hjson file as pickled data.'''
+
+    stat = os.stat(hjson_file)
+    key = (os.path.realpath(hjson_file), stat.st_mtime_ns, stat.st_size)
+    data = _hjson_cache.get(key)
+    if data is not None:
+        return data
+
+    with open(hjson_file, 'rb') as f:
+        text = f.read()
+
+    cache_path = None
+    if _hjson_cache_dir is not None:
+        digest = hashlib.sha256(text)
+        digest.update(str(_HJSON_CACHE_VERSION).encode())
+        cache_path = Path(_hjson_cache_dir, digest.hexdigest() + ".pickle")
+        try:
+            data = cache_path.read_bytes()
+        except OSError:
+            pass
+
+    if data is None:
+        log.debug("Parsing %s", hjson_file)
+        data = pickle.dumps(hjson.loads(text.decode('utf-8'),
+                                        use_decimal=True))
+        if cache_path is not None:
+            # Write to a temporary file first so that concurrent readers never
+            # see a partially written file.
+            tmp_path = cache_path.with_suffix(".{}.tmp".format(os.getpid()))
+            try:
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                log.debug("Failed to cache parsed %s: %s", hjson_file, e)
+
+    _hjson_cache[key] = data
+    return data
+
+
 # Parse hjson and return a dict
 def parse_hjson(hjson_file):
     hjson_cfg_dict = None
     try:
-        log.debug("Parsing %s", hjson_file)
-        f = open(hjson_file, 'r')
-        text = f.read()
-        hjson_cfg_dict = hjson.loads(text, use_decimal=True)
-        f.close()
+        hjson_cfg_dict = pickle.loads(_parse_hjson_cached(hjson_file))
     except Exception as e:
         log.fatal(
             "Failed to parse \"%s\" possibly due to bad path or syntax error.\n%s",
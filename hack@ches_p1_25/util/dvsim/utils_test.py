@@ -6,7 +6,8 @@
 
 import os
 import pytest
-from .utils import _subst_wildcards, subst_wildcards
+from . import utils
+from .utils import _subst_wildcards, parse_hjson, subst_wildcards
 
 
 def test_subst_wildcards():
@@ -78,3 +79,31 @@ def test_subst_wildcards():
                                 'bar': 'q',
                                 'p_xyz_q': 'baz'
                             }) == 'baz')
+
+
+def test_parse_hjson_cache(tmp_path, monkeypatch):
+    '''Check that cached hjson data is reused and can't be corrupted.'''
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(utils, '_hjson_cache', {})
+    monkeypatch.setattr(utils, '_hjson_cache_dir', None)
+    utils.set_hjson_cache_dir(str(cache_dir))
+
+    path = tmp_path / 'cfg.hjson'
+    path.write_text('{\n  name: foo\n  items: ["a", "b"]\n}\n')
+
+    first = parse_hjson(str(path))
+    assert first == {'name': 'foo', 'items': ['a', 'b']}
+    assert len(list(cache_dir.iterdir())) == 1
+
+    # Callers get their own copy of the data, which they may modify.
+    first['items'] += ['c']
+    assert parse_hjson(str(path))['items'] == ['a', 'b']
+
+    # The on-disk cache is used when the file is not in the memory cache.
+    utils._hjson_cache.clear()
+    assert parse_hjson(str(path)) == {'name': 'foo', 'items': ['a', 'b']}
+
+    # A modified file is parsed again.
+    path.write_text('{\n  name: bar\n}\n')
+    assert parse_hjson(str(path)) == {'name': 'bar'}
+    assert len(list(cache_dir.iterdir())) == 2
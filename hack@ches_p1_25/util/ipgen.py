@@ -11,6 +11,7 @@ from pathlib import Path
 
 from ipgen import (IpBlockRenderer, IpConfig, IpTemplate, TemplateParseError,
                    TemplateRenderError)
+from reggen import profiling
 
 
 def init_logging(verbose: bool) -> None:
@@ -36,7 +37,9 @@ def action_generate(ip_template: IpTemplate, args: argparse.Namespace) -> None:
 
     # Render the IP template into an IP block.
     renderer = IpBlockRenderer(ip_template, ip_config)
-    renderer.render(output_path, overwrite_output_dir)
+    renderer.render(output_path,
+                    overwrite_output_dir,
+                    use_cache=not args.no_cache)
 
     print(f"Wrote IP block {ip_config.instance_name!r} "
           f"from template {ip_template.name!r} to '{output_path}'.")
@@ -78,6 +81,7 @@ def main() -> int:
         required=True,
         help='IP template directory',
     )
+    profiling.add_arguments(parent_parser)
 
     subparsers = parser.add_subparsers(
         metavar='ACTION',
@@ -124,11 +128,20 @@ def main() -> int:
         type=argparse.FileType('r'),
         help="path to a configuration file",
     )
+    parser_generate.add_argument(
+        "--no-cache",
+        required=False,
+        default=False,
+        action="store_true",
+        help="always render the IP block, instead of copying a cached one "
+        "rendered with the same template and configuration",
+    )
     parser_generate.set_defaults(func=action_generate)
 
     # Parse command line arguments, parse IP template, and invoke subparsers
     args = parser.parse_args()
     init_logging(args.verbose)
+    profiling.start_from_args('ipgen', args)
 
     try:
         ip_template = IpTemplate.from_template_path(args.template_dir)
@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Any, Dict, Optional, Union
 
 import hjson  # type: ignore
+from reggen import hjson_loader
 from reggen.lib import check_int, check_keys, check_list, check_name, check_str
 from reggen.params import BaseParam, Params
 
@@ -153,7 +154,8 @@ class IpTemplate:
 
         # Read the template description from file.
         try:
-            tpldesc_obj = hjson.load(open(tpldesc_file, 'r'), use_decimal=True)
+            tpldesc_obj = hjson_loader.load(open(tpldesc_file, 'r'),
+                                            use_decimal=True)
         except (OSError, FileNotFoundError) as e:
             raise TemplateParseError(
                 f"Unable to read template description file {tpldesc_file!s}: "
@@ -276,7 +278,7 @@ class IpConfig:
     def from_text(cls, template_params: TemplateParams, txt: str,
                   where: str) -> 'IpConfig':
         """Load an IpConfig from an Hjson description in txt"""
-        raw = hjson.loads(txt, use_decimal=True, encoding="UTF-8")
+        raw = hjson_loader.loads(txt, use_decimal=True)
         return cls.from_raw(template_params, raw, where)
 
     def to_file(self, file_path: Path, header: Optional[str] = ""):
@@ -0,0 +1,136 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+"""A cache of rendered IP blocks.
+
+Rendering an IP template means rendering all of its Mako templates and running
+reggen on the result, which takes seconds for the larger templates. The result
+only depends on the files of the template, the IP configuration (the instance
+name and the parameter values) and the code of ipgen and reggen, so it is
+cached in the "ipgen" subdirectory of reggen's cache directory (see
+reggen.lib.cache_dir()), keyed by a digest of all of these. On a hit, the
+cached IP block is copied to the output directory instead of rendering it
+again. This also applies across tops, when they render a template with the
+same configuration.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from reggen.incremental import digest_inputs
+from reggen.lib import cache_dir
+
+from .lib import IpConfig, IpTemplate
+
+# Bump this when the layout of the cache changes.
+_CACHE_VERSION = 1
+
+# The code that renders an IP block, apart from reggen (which digest_inputs()
+# covers). The templates of the IP blocks import topgen.lib.
+_GENERATOR_SOURCES = [
+    Path(__file__).parent,
+    Path(__file__).parents[1] / 'topgen' / 'lib.py',
+]
+
+log = logging.getLogger(__name__)
+
+
+def _digest_tree(path: Path) -> str:
+    """Return a digest of the names and contents of the files below path."""
+    h = hashlib.sha256()
+    for file in sorted(p for p in path.rglob('*') if p.is_file()):
+        h.update(str(file.relative_to(path)).encode('utf-8'))
+        h.update(hashlib.sha256(file.read_bytes()).digest())
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _generator_digest() -> str:
+    h = hashlib.sha256()
+    for path in _GENERATOR_SOURCES:
+        if path.is_dir():
+            files = sorted(p for p in path.glob('*.py')
+                           if not p.name.startswith('._'))
+        else:
+            files = [path]
+        for file in files:
+            h.update(file.name.encode('utf-8'))
+            h.update(hashlib.sha256(file.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def _cache_path() -> Optional[Path]:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    return directory / 'ipgen'
+
+
+def render_key(ip_template: IpTemplate, ip_config: IpConfig) -> str:
+    """Return the key of the rendered IP block in the cache."""
+    # The parameter values are canonicalized as JSON with sorted keys. Hjson
+    # parameter values may contain Decimals, which are keyed by their text.
+    params = json.dumps(ip_config.param_values, sort_keys=True, default=str)
+    return digest_inputs([
+        _CACHE_VERSION,
+        _generator_digest(),
+        ip_template.name,
+        _digest_tree(ip_template.template_path),
+        ip_config.instance_name,
+        params,
+    ])
+
+
+def restore(key: str, output_dir: Path) -> bool:
+    """Copy the cached IP block with the given key to output_dir.
+
+    output_dir must not exist. Returns True on a hit, False if there is no
+    cached IP block with that key (or the cache is disabled).
+    """
+    cache_path = _cache_path()
+    if cache_path is None:
+        return False
+
+    entry = cache_path / key
+    if not entry.is_dir():
+        return False
+
+    try:
+        shutil.copytree(entry, output_dir, copy_function=shutil.copy)
+    except OSError as e:
+        log.warning(f'Unable to copy the cached IP block {entry}: {e!s}')
+        shutil.rmtree(output_dir, ignore_errors=True)
+        return False
+
+    log.info(f'Using the cached IP block {entry}')
+    return True
+
+
+def store(key: str, output_dir: Path) -> None:
+    """Store the IP block rendered in output_dir in the cache.
+
+    Failing to store it is not an error.
+    """
+    cache_path = _cache_path()
+    if cache_path is None:
+        return
+
+    # Copy to a temporary directory and rename it, so that concurrent readers
+    # never see a partially written entry.
+    entry = cache_path / key
+    tmp_entry = cache_path / f'{key}.{os.getpid()}.tmp'
+    try:
+        cache_path.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(output_dir, tmp_entry)
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Another process may have stored the same entry in the meantime.
+        pass
+    finally:
+        shutil.rmtree(tmp_entry, ignore_errors=True)
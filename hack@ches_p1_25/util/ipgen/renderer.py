@@ -12,9 +12,12 @@ from typing import Dict, Optional, Union
 import reggen.gen_rtl
 from mako import exceptions as mako_exceptions  # type: ignore
 from mako.lookup import TemplateLookup as MakoTemplateLookup  # type: ignore
+from reggen import profiling
 from reggen.countermeasure import CounterMeasure
 from reggen.ip_block import IpBlock
+from reggen.template_loader import get_lookup
 
+from . import render_cache
 from .lib import IpConfig, IpTemplate, TemplateParameter, TemplateRenderError
 
 _HJSON_LICENSE_HEADER = ("""// Copyright lowRISC contributors (OpenTitan project).
@@ -87,9 +90,8 @@ class IpTemplateRendererBase:
             # this directory using relative paths.
             # Use strict_undefined to throw a NameError if undefined variables
             # are used within a template.
-            self._lookup = MakoTemplateLookup(
-                directories=[str(self.ip_template.template_path)],
-                strict_undefined=True)
+            self._lookup = get_lookup(
+                [str(self.ip_template.template_path)], strict_undefined=True)
         return self._lookup
 
     def _tplfunc_instance_vlnv(self, template_vlnv_str: str) -> str:
@@ -218,10 +220,21 @@ class IpBlockRenderer(IpTemplateRendererBase):
       A template at <PATH>.tpl will write results to <PATH> in the output
       directory.
     - Run reggen to generate the register interface.
+
+    Rendered IP blocks are cached (see render_cache), so that rendering the
+    same template with the same configuration again only copies the result.
     """
 
-    def render(self, output_dir: Path, overwrite_output_dir: bool) -> None:
-        """ Render the IP template into output_dir. """
+    def render(self,
+               output_dir: Path,
+               overwrite_output_dir: bool,
+               use_cache: bool = True) -> None:
+        """ Render the IP template into output_dir.
+
+        If use_cache is set, a previously rendered IP block with the same
+        template files and configuration is copied instead of rendering it
+        again, and the IP block is added to the cache otherwise.
+        """
 
         # Ensure that we operate on an absolute path for output_dir.
         output_dir = output_dir.resolve()
@@ -239,61 +252,17 @@ class IpBlockRenderer(IpTemplateRendererBase):
                 f"Output staging directory '{output_dir_staging}' already "
                 "exists. Remove it and try again.")
 
-        template_path = self.ip_template.template_path
-
         try:
-            # Copy everything but the templates and the template description.
-            ignore = shutil.ignore_patterns('*.tpl', '*.tpldesc.hjson')
-            shutil.copytree(template_path, output_dir_staging, ignore=ignore)
-
-            # Render templates.
-            for template_filepath in template_path.glob('**/*.tpl'):
-                template_filepath_rel = template_filepath.relative_to(
-                    template_path)
-
-                # Put the output file into the same relative directory as the
-                # template. The output file will also have the same name as the
-                # template, just without the '.tpl' suffix.
-                outdir_path = output_dir_staging / template_filepath_rel.parent
-
-                self._render_mako_template_to_file(template_filepath,
-                                                   outdir_path)
-
-            # Generate register interface through reggen.
-            hjson_path = (output_dir_staging / 'data' /
-                          (self.ip_template.name + '.hjson'))
-            if "module_instance_name" in self.ip_config.param_values:
-                hjson_path = (
-                    output_dir_staging / 'data' /
-                    self.ip_config.param_values["module_instance_name"] +
-                    '.hjson')
-            if not hjson_path.exists():
-                raise TemplateRenderError(
-                    "Invalid template: The IP description file "
-                    f"{str(hjson_path)!r} does not exist.")
-            rtl_path = output_dir_staging / 'rtl'
-            rtl_path.mkdir(exist_ok=True)
-
-            obj = IpBlock.from_path(str(hjson_path), [])
-
-            # If this block has countermeasures, we grep for RTL annotations in
-            # all .sv implementation files and check whether they match up
-            # with what is defined inside the Hjson.
-            sv_files = rtl_path.glob('*.sv')
-            rtl_names = CounterMeasure.search_rtl_files(sv_files)
-            obj.check_cm_annotations(rtl_names, str(hjson_path))
-
-            # TODO: Pass on template parameters to reggen? Or enable the user
-            # to set a different set of parameters in the renderer?
-            reggen.gen_rtl.gen_rtl(obj, str(rtl_path))
-
-            # Write IP configuration (to reproduce the generation process).
-            # TODO: Should the ipconfig file be written to the instance name,
-            # or the template name?
-            self.ip_config.to_file(
-                output_dir_staging / 'data' /
-                f'{self.ip_config.instance_name}.ipconfig.hjson',
-                header=_HJSON_LICENSE_HEADER)
+            cache_key = None
+            if use_cache:
+                cache_key = render_cache.render_key(self.ip_template,
+                                                    self.ip_config)
+            if cache_key is None or not render_cache.restore(
+                    cache_key, output_dir_staging):
+                with profiling.timed(self.ip_config.instance_name, 'ipgen'):
+                    self._render_to_dir(output_dir_staging)
+                if cache_key is not None:
+                    render_cache.store(cache_key, output_dir_staging)
 
             # Safely overwrite the existing directory if necessary:
             #
@@ -333,3 +302,61 @@ class IpBlockRenderer(IpTemplateRendererBase):
             # Ensure that the staging directory is removed at the end. Ignore
             # errors as the directory should not exist at this point actually.
             shutil.rmtree(output_dir_staging, ignore_errors=True)
+
+    def _render_to_dir(self, output_dir: Path) -> None:
+        """ Render the IP template into output_dir, which must not exist. """
+
+        template_path = self.ip_template.template_path
+
+        # Copy everything but the templates and the template description.
+        ignore = shutil.ignore_patterns('*.tpl', '*.tpldesc.hjson')
+        shutil.copytree(template_path, output_dir, ignore=ignore)
+
+        # Render templates.
+        for template_filepath in template_path.glob('**/*.tpl'):
+            template_filepath_rel = template_filepath.relative_to(
+                template_path)
+
+            # Put the output file into the same relative directory as the
+            # template. The output file will also have the same name as the
+            # template, just without the '.tpl' suffix.
+            outdir_path = output_dir / template_filepath_rel.parent
+
+            self._render_mako_template_to_file(template_filepath,
+                                               outdir_path)
+
+        # Generate register interface through reggen.
+        hjson_path = (output_dir / 'data' /
+                      (self.ip_template.name + '.hjson'))
+        if "module_instance_name" in self.ip_config.param_values:
+            hjson_path = (
+                output_dir / 'data' /
+                self.ip_config.param_values["module_instance_name"] +
+                '.hjson')
+        if not hjson_path.exists():
+            raise TemplateRenderError(
+                "Invalid template: The IP description file "
+                f"{str(hjson_path)!r} does not exist.")
+        rtl_path = output_dir / 'rtl'
+        rtl_path.mkdir(exist_ok=True)
+
+        obj = IpBlock.from_path(str(hjson_path), [])
+
+        # If this block has countermeasures, we grep for RTL annotations in
+        # all .sv implementation files and check whether they match up
+        # with what is defined inside the Hjson.
+        sv_files = rtl_path.glob('*.sv')
+        rtl_names = CounterMeasure.search_rtl_files(sv_files)
+        obj.check_cm_annotations(rtl_names, str(hjson_path))
+
+        # TODO: Pass on template parameters to reggen? Or enable the user
+        # to set a different set of parameters in the renderer?
+        reggen.gen_rtl.gen_rtl(obj, str(rtl_path))
+
+        # Write IP configuration (to reproduce the generation process).
+        # TODO: Should the ipconfig file be written to the instance name,
+        # or the template name?
+        self.ip_config.to_file(
+            output_dir / 'data' /
+            f'{self.ip_config.instance_name}.ipconfig.hjson',
+            header=_HJSON_LICENSE_HEADER)
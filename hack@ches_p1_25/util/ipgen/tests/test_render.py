@@ -30,6 +30,8 @@ def rendertest_dirs(tmp_path) -> None:
     RENDERTEST_HJSON = """
 {
   name: "rendertest"
+  cip_id: 1
+  version: "1.0.0"
   clocking: [
     {clock: "clk_i", reset: "rst_ni", idle: "idle_o", primary: true},
   ]
@@ -122,3 +124,43 @@ ${item}
     # Check that the template parameters are rendered correctly.
     assert (out_dir / 'test.txt').is_file()
     assert (out_dir / 'test.txt').read_text() == 'duper\n1000000\nof\nthings\n'
+
+
+def test_render_cache(rendertest_dirs, tmp_path, monkeypatch) -> None:
+    """ Test that a render with the same configuration comes from the cache.
+    """
+
+    (template_dir, out_dir) = rendertest_dirs
+    monkeypatch.setenv('REGGEN_CACHE_DIR', str(tmp_path / 'cache'))
+
+    (template_dir / 'test.txt.tpl').write_text('param1=${param1}')
+
+    params = TemplateParams()
+    params.add(BaseParam(name='param1', desc=None, param_type='string'))
+    ip_template = IpTemplate('rendertest', params, template_dir)
+
+    def render(value: str, dest) -> None:
+        ip_config = IpConfig(ip_template.params, 'inst_rendertest',
+                             {'param1': value})
+        IpBlockRenderer(ip_template, ip_config).render(
+            dest, overwrite_output_dir=True)
+
+    render('somevalue', out_dir)
+
+    # Rendering again (here: into another directory) must not render any
+    # templates, but give the same files.
+    def fail(self, output_dir) -> None:
+        raise AssertionError('rendered instead of using the cache')
+
+    with monkeypatch.context() as m:
+        m.setattr(IpBlockRenderer, '_render_to_dir', fail)
+        render('somevalue', tmp_path / 'out2')
+    assert ((tmp_path / 'out2' / 'test.txt').read_text() ==
+            'param1=somevalue')
+
+    # Other parameter values or a changed template are rendered again.
+    render('othervalue', out_dir)
+    assert (out_dir / 'test.txt').read_text() == 'param1=othervalue'
+    (template_dir / 'test.txt.tpl').write_text('param1 is ${param1}')
+    render('othervalue', out_dir)
+    assert (out_dir / 'test.txt').read_text() == 'param1 is othervalue'
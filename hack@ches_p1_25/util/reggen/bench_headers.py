@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark generating the C, Rust and Tock headers of all IP blocks.
+
+Compares the per-IP path, which runs regtool once for each IP block and each
+of -D, -R and --tock (as the build does), with the bulk path, which runs
+regtool --headers once for all IP blocks. Checks that both paths give the same
+headers.
+
+Run from the util directory:
+
+    python3 -m reggen.bench_headers
+"""
+
+import argparse
+import filecmp
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from reggen.bench_ip_block import REPO_TOP, find_ip_descriptions
+from reggen.gen_headers import C_HEADER, RUST_HEADER, TOCK_HEADER
+from reggen.ip_block import IpBlock
+
+REGTOOL = str(REPO_TOP / 'util' / 'regtool.py')
+
+# The regtool option for each header and its name in the output directory.
+HEADERS = [('-D', C_HEADER), ('-R', RUST_HEADER), ('--tock', TOCK_HEADER)]
+
+
+def run_per_ip(paths: List[Path], names: List[str], outdir: str) -> float:
+    '''Generates the headers with a regtool run per IP block and header.
+
+    Returns the time it took in seconds.
+    '''
+    start = time.perf_counter()
+    for path, name in zip(paths, names):
+        for option, header in HEADERS:
+            outfile = str(Path(outdir) / header.format(name))
+            cmd = [sys.executable, REGTOOL, '-q', option, '-o', outfile]
+            subprocess.run(cmd + [str(path)], check=True)
+    return time.perf_counter() - start
+
+
+def run_bulk(paths: List[Path], outdir: str) -> float:
+    '''Generates the headers with one regtool run for all IP blocks.
+
+    Returns the time it took in seconds.
+    '''
+    start = time.perf_counter()
+    cmd = [sys.executable, REGTOOL, '-q', '--headers', '-t', outdir]
+    subprocess.run(cmd + [str(path) for path in paths], check=True)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=1,
+                        help='Number of runs of each path (default: 1).')
+    args = parser.parse_args()
+
+    # Skip the descriptions that do not load (e.g. templated ones).
+    paths = []
+    names = []
+    for path in find_ip_descriptions(REPO_TOP):
+        try:
+            block = IpBlock.from_path(str(path), [])
+        except (ValueError, KeyError) as err:
+            print('Skipping {}: {}'.format(path, err), file=sys.stderr)
+            continue
+        paths.append(path)
+        names.append(block.name.lower())
+
+    print('Generating the headers of {} IP blocks'.format(len(paths)))
+
+    with tempfile.TemporaryDirectory() as per_ip_dir, \
+            tempfile.TemporaryDirectory() as bulk_dir:
+        for _ in range(args.repeat):
+            print('per IP: {:8.3f}s'.format(
+                run_per_ip(paths, names, per_ip_dir)))
+            print('bulk:   {:8.3f}s'.format(run_bulk(paths, bulk_dir)))
+
+        headers = [header.format(name)
+                   for name in names for _, header in HEADERS]
+        _, mismatch, errors = filecmp.cmpfiles(per_ip_dir, bulk_dir, headers,
+                                               shallow=False)
+        if mismatch or errors:
+            print('Headers differ: {}'.format(', '.join(mismatch + errors)),
+                  file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
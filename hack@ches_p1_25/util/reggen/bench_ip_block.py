@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark loading all IP blocks, with and without the IpBlock cache.
+
+Loads the description of every IP in hw/ip and hw/top_*/ip*, first with the
+cache disabled, then with a cold and a warm cache in a temporary directory.
+
+Run from the util directory:
+
+    python3 -m reggen.bench_ip_block
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from reggen.ip_block import IpBlock
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+
+
+def find_ip_descriptions(repo_top: Path) -> List[Path]:
+    '''Returns the paths of the IP descriptions in the repository.
+
+    An IP description is data/<name>.hjson in an IP directory <name>.
+    '''
+    ip_dirs = list((repo_top / 'hw' / 'ip').iterdir())
+    for top_dir in (repo_top / 'hw').glob('top_*'):
+        for ips_dir in top_dir.glob('ip*'):
+            if ips_dir.is_dir():
+                ip_dirs += list(ips_dir.iterdir())
+
+    paths = []
+    for ip_dir in sorted(ip_dirs):
+        path = ip_dir / 'data' / (ip_dir.name + '.hjson')
+        if path.is_file():
+            paths.append(path)
+    return paths
+
+
+def load_all(paths: List[Path]) -> float:
+    '''Loads all IP blocks and returns the time it took in seconds.'''
+    start = time.perf_counter()
+    for path in paths:
+        IpBlock.from_path(str(path), [])
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='Number of warm runs (default: 3).')
+    args = parser.parse_args()
+
+    paths = find_ip_descriptions(REPO_TOP)
+
+    # Skip the descriptions that do not load (e.g. templated ones).
+    loadable = []
+    for path in paths:
+        os.environ['REGGEN_CACHE_DIR'] = ''
+        try:
+            IpBlock.from_path(str(path), [])
+        except (ValueError, KeyError) as err:
+            print('Skipping {}: {}'.format(path, err), file=sys.stderr)
+            continue
+        loadable.append(path)
+
+    print('Loading {} IP blocks'.format(len(loadable)))
+
+    os.environ['REGGEN_CACHE_DIR'] = ''
+    print('no cache:   {:8.3f}s'.format(load_all(loadable)))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        os.environ['REGGEN_CACHE_DIR'] = cache_dir
+        print('cold cache: {:8.3f}s'.format(load_all(loadable)))
+        for _ in range(args.repeat):
+            print('warm cache: {:8.3f}s'.format(load_all(loadable)))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,11 +8,11 @@ Generate C header from validated register JSON tree
 import io
 import logging as log
 import sys
-import textwrap
 import warnings
 from typing import List, Optional, Set, TextIO
 
 
+from reggen import symbols
 from reggen.field import Field
 from reggen.ip_block import IpBlock
 from reggen.params import LocalParam
@@ -35,19 +35,8 @@ def to_snake_case(s: str) -> str:
     return ''.join(val)
 
 
-def as_define(s: str) -> str:
-    s = s.upper()
-    r = ''
-    for i in range(0, len(s)):
-        r += s[i] if s[i].isalnum() else '_'
-    return r
-
-
-def first_line(s: str) -> str:
-    """Returns the first line of a multi-line string"""
-
-    # Just return the 's' if it is empty or 'None'.
-    return s.splitlines()[0] if s else s
+as_define = symbols.as_define
+first_line = symbols.first_line
 
 
 def format_comment(s: str) -> str:
@@ -55,9 +44,7 @@ def format_comment(s: str) -> str:
 
     Returns wrapped string including newline and // comment characters.
     """
-    return '\n'.join(
-        textwrap.wrap(
-            s, width=77, initial_indent='// ', subsequent_indent='// ')) + '\n'
+    return symbols.wrap_comment(s, 77, '// ')
 
 
 def gen_define(name: str,
@@ -121,40 +108,38 @@ def gen_cdefine_register(outstr: TextIO,
     def uint_literal(n: int) -> str:
         return hex(n) + 'u'
 
-    rname = reg.name
-    offset = reg.offset
+    syms = symbols.register_symbols(reg, comp)
+    defname = syms.define
 
-    genout(outstr, format_comment(first_line(reg.desc)))
-    defname = as_define(comp + '_' + rname)
+    genout(outstr, format_comment(syms.desc))
     genout(
         outstr,
-        gen_define(defname + '_REG_OFFSET', [], hex(offset), existing_defines))
+        gen_define(defname + '_REG_OFFSET', [], hex(syms.offset),
+                   existing_defines))
     genout(
         outstr,
         gen_define(defname + '_REG_RESVAL', [],
-                   uint_literal(reg.resval), existing_defines))
+                   uint_literal(syms.resval), existing_defines))
 
-    for field in reg.fields:
-        dname = defname + '_' + as_define(field.name)
-        field_width = field.bits.width()
+    for field in syms.fields:
+        dname = field.define
 
-        if field_width == 1:
+        if field.width == 1:
             # single bit
             genout(
                 outstr,
-                gen_define(dname + '_BIT', [], str(field.bits.lsb),
+                gen_define(dname + '_BIT', [], str(field.lsb),
                            existing_defines))
         else:
             # multiple bits (unless it is the whole register)
-            if field_width != width:
-                mask = field.bits.bitmask() >> field.bits.lsb
+            if field.width != width:
                 genout(
                     outstr,
-                    gen_define(dname + '_MASK', [], uint_literal(mask),
+                    gen_define(dname + '_MASK', [], uint_literal(field.mask),
                                existing_defines))
                 genout(
                     outstr,
-                    gen_define(dname + '_OFFSET', [], str(field.bits.lsb),
+                    gen_define(dname + '_OFFSET', [], str(field.lsb),
                                existing_defines))
                 genout(
                     outstr,
@@ -162,15 +147,12 @@ def gen_cdefine_register(outstr: TextIO,
                         dname + '_FIELD', [],
                         '((bitfield_field32_t) {{ .mask = {dname}_MASK, .index = {dname}_OFFSET }})'
                         .format(dname=dname), existing_defines))
-        if field.enum is not None:
-            for enum in field.enum:
-                ename = as_define(enum.name)
-                value = hex(enum.value)
+        if field.enums is not None:
+            for enum in field.enums:
                 genout(
                     outstr,
-                    gen_define(
-                        defname + '_' + as_define(field.name) +
-                        '_VALUE_' + ename, [], value, existing_defines))
+                    gen_define(dname + '_VALUE_' + enum.define, [],
+                               hex(enum.value), existing_defines))
     genout(outstr, '\n')
     return
 
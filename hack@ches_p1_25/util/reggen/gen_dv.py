@@ -12,13 +12,14 @@ from typing import Dict, List, Union, Optional
 import yaml
 
 from mako import exceptions  # type: ignore
-from mako.lookup import TemplateLookup  # type: ignore
 import importlib_resources
 
+from reggen.incremental import write_if_changed
 from reggen.ip_block import IpBlock
 from reggen.multi_register import MultiRegister
 from reggen.register import Register
 from reggen.window import Window
+from reggen.template_loader import get_lookup
 
 
 class DvBaseNames:
@@ -106,9 +107,7 @@ def gen_core_file(outdir: str,
         },
     }
     core_file_path = os.path.join(outdir, lblock + '_ral_pkg.core')
-    with open(core_file_path, 'w') as core_file:
-        core_file.write('CAPI=2:\n')
-        yaml.dump(core_data, core_file, encoding='utf-8')
+    write_if_changed(core_file_path, 'CAPI=2:\n' + yaml.dump(core_data))
 
 
 def get_dv_base_names_objects(dv_base_names: List[str]) -> Dict[str, DvBaseNames]:
@@ -152,7 +151,7 @@ def get_block_base_name(dv_base_names_map: Dict[str, DvBaseNames], block: str) -
 def gen_dv(block: IpBlock, dv_base_names: List[str], outdir: str) -> int:
     '''Generate DV files for an IpBlock'''
 
-    lookup = TemplateLookup(directories=[str(importlib_resources.files('reggen'))])
+    lookup = get_lookup([str(importlib_resources.files('reggen'))])
     uvm_reg_tpl = lookup.get_template('uvm_reg.sv.tpl')
 
     # Generate the RAL package(s). For a device interface with no name we
@@ -176,16 +175,16 @@ def gen_dv(block: IpBlock, dv_base_names: List[str], outdir: str) -> int:
         file_name = mod_base + '_ral_pkg.sv'
         generated.append(file_name)
         reg_top_path = os.path.join(outdir, file_name)
-        with open(reg_top_path, 'w', encoding='UTF-8') as fout:
-            try:
-                fout.write(uvm_reg_tpl.render(rb=rb,
-                                              block=block,
-                                              esc_if_name=mod_base,
-                                              reg_block_path=reg_block_path,
-                                              dv_base_names=block_dv_base_names))
-            except:  # noqa F722 for template Exception handling
-                log.error(exceptions.text_error_template().render())
-                return 1
+        try:
+            text = uvm_reg_tpl.render(rb=rb,
+                                      block=block,
+                                      esc_if_name=mod_base,
+                                      reg_block_path=reg_block_path,
+                                      dv_base_names=block_dv_base_names)
+        except:  # noqa F722 for template Exception handling
+            log.error(exceptions.text_error_template().render())
+            return 1
+        write_if_changed(reg_top_path, text)
 
     gen_core_file(outdir, lblock, dv_base_names, generated)
     return 0
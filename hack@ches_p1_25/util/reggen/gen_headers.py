@@ -0,0 +1,59 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+"""
+Generate the C, Rust and Tock headers of a block in one go
+"""
+
+import io
+import os
+from typing import Optional
+
+from reggen import gen_cheader, gen_rust, gen_tock
+from reggen.incremental import write_if_changed
+from reggen.ip_block import IpBlock
+
+from version_file import VersionInformation
+
+# The name of each header, given the name of the block. The C and Tock headers
+# are named like the ones the build generates with regtool -D and --tock.
+C_HEADER = '{}_regs.h'
+RUST_HEADER = '{}_consts.rs'
+TOCK_HEADER = '{}_regs.rs'
+
+
+def gen_headers(block: IpBlock, outdir: str, src_file: Optional[str],
+                src_lic: Optional[str], src_copy: str,
+                version: VersionInformation) -> int:
+    '''Generates the C, Rust and Tock headers of block in outdir
+
+    The headers are the same as the outputs of regtool -D, -R and --tock. All
+    three take the register, field and enum names from the same symbol table
+    (see reggen.symbols), which is built once per process. Each header is
+    only written if its content changes.
+    '''
+    name = block.name.lower()
+    os.makedirs(outdir, exist_ok=True)
+
+    outstr = io.StringIO()
+    ret = gen_cheader.gen_cdefines(block, outstr, src_lic, src_copy)
+    if ret:
+        return ret
+    write_if_changed(os.path.join(outdir, C_HEADER.format(name)),
+                     outstr.getvalue())
+
+    outstr = io.StringIO()
+    ret = gen_rust.gen_rust(block, outstr, src_lic, src_copy)
+    if ret:
+        return ret
+    write_if_changed(os.path.join(outdir, RUST_HEADER.format(name)),
+                     outstr.getvalue())
+
+    outstr = io.StringIO()
+    ret = gen_tock.gen_tock(block, outstr, src_file, src_lic, src_copy,
+                            version)
+    if ret:
+        return ret
+    write_if_changed(os.path.join(outdir, TOCK_HEADER.format(name)),
+                     outstr.getvalue())
+    return 0
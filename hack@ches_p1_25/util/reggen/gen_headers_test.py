@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import unittest
+from pathlib import Path
+
+from reggen import gen_cheader, gen_rust
+from reggen.ip_block import IpBlock
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+OTP_CTRL_HJSON = REPO_TOP / 'hw' / 'ip' / 'otp_ctrl' / 'data' / 'otp_ctrl.hjson'
+
+
+def _line_before(text, prefix):
+    '''Returns the line before the first one that starts with prefix.'''
+    lines = text.splitlines()
+    for idx, line in enumerate(lines):
+        if line.startswith(prefix):
+            return lines[idx - 1]
+    raise AssertionError('No line starts with {!r}'.format(prefix))
+
+
+class TestEmptyDescription(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.block = IpBlock.from_path(str(OTP_CTRL_HJSON), [])
+        outstr = io.StringIO()
+        assert gen_cheader.gen_cdefines(cls.block, outstr, None, '') == 0
+        cls.c_header = outstr.getvalue()
+        outstr = io.StringIO()
+        assert gen_rust.gen_rust(cls.block, outstr, None, '') == 0
+        cls.rust_header = outstr.getvalue()
+
+    def _register(self, name):
+        for reg_block in self.block.reg_blocks.values():
+            for reg in reg_block.flat_regs:
+                if reg.name == name:
+                    return reg
+        raise AssertionError('No register {}'.format(name))
+
+    def test_empty(self):
+        # The CSRs of the prim register block have empty descriptions, for
+        # which both headers have an empty line instead of a comment.
+        self.assertEqual(self._register('CSR0').desc, '')
+        self.assertEqual(
+            _line_before(self.c_header, '#define OTP_CTRL_CSR0_REG_OFFSET '),
+            '')
+        self.assertEqual(
+            _line_before(self.rust_header,
+                         'pub const OTP_CTRL_CSR0_REG_OFFSET:'), '')
+
+    def test_not_empty(self):
+        desc = self._register('STATUS').desc
+        comment = '// ' + desc.splitlines()[0]
+        self.assertEqual(comment, '// OTP status register.')
+        self.assertEqual(
+            _line_before(self.c_header, '#define OTP_CTRL_STATUS_REG_OFFSET '),
+            comment)
+        self.assertEqual(
+            _line_before(self.rust_header,
+                         'pub const OTP_CTRL_STATUS_REG_OFFSET:'), comment)
+
+
+if __name__ == '__main__':
+    unittest.main()
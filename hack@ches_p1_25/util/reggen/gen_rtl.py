@@ -3,12 +3,9 @@
 # SPDX-License-Identifier: Apache-2.0
 """Generate SystemVerilog designs from IpBlock object"""
 
-import logging as log
 import os
 from typing import Dict, Optional, Tuple
 
-from mako import exceptions  # type: ignore
-from mako.template import Template  # type: ignore
 import importlib_resources
 
 from reggen.ip_block import IpBlock
@@ -16,6 +13,7 @@ from reggen.lib import check_int
 from reggen.multi_register import MultiRegister
 from reggen.reg_base import RegBase
 from reggen.register import Register
+from reggen.template_loader import get_template, render_many
 
 
 def escape_name(name: str) -> str:
@@ -92,11 +90,12 @@ def get_reg_tx_type(block: IpBlock, reg: RegBase, hw2reg: bool) -> str:
 
 
 def gen_rtl(block: IpBlock, outdir: str) -> int:
-    # Read Register templates
-    reg_top_tpl = Template(
-        filename=str(importlib_resources.files('reggen') / 'reg_top.sv.tpl'))
-    reg_pkg_tpl = Template(
-        filename=str(importlib_resources.files('reggen') / 'reg_pkg.sv.tpl'))
+    # Read Register templates (they are only loaded once per process, see
+    # reggen.template_loader)
+    reg_top_tpl = get_template(
+        str(importlib_resources.files('reggen') / 'reg_top.sv.tpl'))
+    reg_pkg_tpl = get_template(
+        str(importlib_resources.files('reggen') / 'reg_pkg.sv.tpl'))
 
     # In case the generated package contains alias definitions, we add
     # the alias implementation identifier to the package name so that it
@@ -109,18 +108,13 @@ def gen_rtl(block: IpBlock, outdir: str) -> int:
     # module(s) and the block itself.
     reg_pkg_path = os.path.join(outdir, block.name.lower() + alias_impl +
                                 "_reg_pkg.sv")
-    with open(reg_pkg_path, 'w', encoding='UTF-8') as fout:
-        try:
-            fout.write(reg_pkg_tpl.render(block=block,
-                                          alias_impl=alias_impl))
-        except:  # noqa F722 for template Exception handling
-            log.error(exceptions.text_error_template().render())
-            return 1
+    pkg_jobs = [(reg_pkg_path, {'block': block, 'alias_impl': alias_impl})]
 
     # Generate the register block implementation(s). For a device interface
     # with no name we generate the register module "<block>_reg_top"
     # (writing to <block>_reg_top.sv). In any other case, we also need the
     # interface name, giving <block>_<ifname>_reg_top.
+    top_jobs = []
     lblock = block.name.lower()
     for if_name, rb in block.reg_blocks.items():
         if if_name is None:
@@ -130,18 +124,14 @@ def gen_rtl(block: IpBlock, outdir: str) -> int:
 
         mod_name = mod_base + alias_impl + '_reg_top'
         reg_top_path = os.path.join(outdir, mod_name + '.sv')
-        with open(reg_top_path, 'w', encoding='UTF-8') as fout:
-            try:
-                fout.write(reg_top_tpl.render(block=block,
-                                              mod_base=mod_base,
-                                              mod_name=mod_name,
-                                              if_name=if_name,
-                                              rb=rb))
-            except:  # noqa F722 for template Exception handling
-                log.error(exceptions.text_error_template().render())
-                return 1
-
-    return 0
+        top_jobs.append((reg_top_path, {'block': block,
+                                        'mod_base': mod_base,
+                                        'mod_name': mod_name,
+                                        'if_name': if_name,
+                                        'rb': rb}))
+
+    return (render_many(reg_pkg_tpl, pkg_jobs) or
+            render_many(reg_top_tpl, top_jobs))
 
 
 def render_param(dst_type: str, value: str) -> str:
@@ -8,11 +8,11 @@ Generate Rust constants from validated register JSON tree
 import io
 import logging as log
 import sys
-import textwrap
 import warnings
 from typing import Optional, Set, TextIO
 
 
+from reggen import symbols
 from reggen.field import Field
 from reggen.ip_block import IpBlock
 from reggen.params import LocalParam
@@ -35,17 +35,8 @@ def to_snake_case(s: str) -> str:
     return ''.join(val)
 
 
-def as_define(s: str) -> str:
-    s = s.upper()
-    r = ''
-    for i in range(0, len(s)):
-        r += s[i] if s[i].isalnum() else '_'
-    return r
-
-
-def first_line(s: str) -> str:
-    """Returns the first line of a multi-line string"""
-    return s.splitlines()[0]
+as_define = symbols.as_define
+first_line = symbols.first_line
 
 
 def format_comment(s: str) -> str:
@@ -53,11 +44,7 @@ def format_comment(s: str) -> str:
 
     Returns wrapped string including newline and // comment characters.
     """
-    comment = textwrap.wrap(s,
-                            width=77,
-                            initial_indent='// ',
-                            subsequent_indent='// ')
-    return '\n'.join(comment) + '\n'
+    return symbols.wrap_comment(s, 77, '// ')
 
 
 def data_type(name: str, val: int, as_hex: bool) -> str:
@@ -122,37 +109,31 @@ def gen_const_register(outstr: TextIO,
                        width: int,
                        rnames: Set[str],
                        existing_defines: Set[str]) -> None:
-    rname = reg.name
-    offset = reg.offset
-
-    genout(outstr, format_comment(first_line(reg.desc)))
-    defname = as_define(comp + '_' + rname)
-    gen_const(outstr, defname, 'REG_OFFSET', offset, existing_defines, True)
+    syms = symbols.register_symbols(reg, comp)
 
-    for field in reg.fields:
-        dname = defname + '_' + as_define(field.name)
-        field_width = field.bits.width()
+    # A register with an empty description (like the CSRs of the prim
+    # register block of otp_ctrl) gets an empty line instead of a comment,
+    # as in the C header.
+    genout(outstr, format_comment(syms.desc))
+    gen_const(outstr, syms.define, 'REG_OFFSET', syms.offset,
+              existing_defines, True)
 
-        if field_width == 1:
+    for field in syms.fields:
+        if field.width == 1:
             # single bit
-            gen_const(outstr, dname, 'BIT', field.bits.lsb, existing_defines)
+            gen_const(outstr, field.define, 'BIT', field.lsb, existing_defines)
         else:
             # multiple bits (unless it is the whole register)
-            if field_width != width:
-                mask = field.bits.bitmask() >> field.bits.lsb
-                gen_const(outstr, dname, 'MASK', mask, existing_defines, True)
-                gen_const(outstr, dname, 'OFFSET', field.bits.lsb, existing_defines)
-
-            if field.enum is not None:
-                for enum in field.enum:
-                    ename = as_define(enum.name)
-                    gen_const(
-                        outstr,
-                        defname + '_' + as_define(field.name),
-                        'VALUE_' + ename,
-                        enum.value,
-                        existing_defines,
-                        True)
+            if field.width != width:
+                gen_const(outstr, field.define, 'MASK', field.mask,
+                          existing_defines, True)
+                gen_const(outstr, field.define, 'OFFSET', field.lsb,
+                          existing_defines)
+
+            if field.enums is not None:
+                for enum in field.enums:
+                    gen_const(outstr, field.define, 'VALUE_' + enum.define,
+                              enum.value, existing_defines, True)
 
     genout(outstr, '\n')
     return
@@ -8,10 +8,11 @@ from pathlib import Path
 
 import hjson  # type: ignore
 from mako import exceptions  # type: ignore
-from mako.lookup import TemplateLookup  # type: ignore
 import importlib_resources
 
+from reggen.incremental import track_file, write_if_changed
 from reggen.ip_block import IpBlock
+from reggen.template_loader import get_lookup
 
 
 def gen_sec_cm_testplan(block: IpBlock, outdir: str) -> int:
@@ -27,6 +28,7 @@ def gen_sec_cm_testplan(block: IpBlock, outdir: str) -> int:
 
     outfile = Path(outdir) / f"{block.name.lower()}_sec_cm_testplan.hjson"
     if outfile.exists():
+        track_file(str(outfile))
         names_from_testplan = []
         with open(outfile, "r", encoding='UTF-8') as f:
             data = hjson.load(f)
@@ -51,15 +53,14 @@ def gen_sec_cm_testplan(block: IpBlock, outdir: str) -> int:
 
         return 0
 
-    lookup = TemplateLookup(directories=[str(importlib_resources.files('reggen'))])
+    lookup = get_lookup([str(importlib_resources.files('reggen'))])
     sec_cm_testplan_tpl = lookup.get_template('sec_cm_testplan.hjson.tpl')
-    with open(outfile, 'w', encoding='UTF-8') as f:
-        try:
-            f.write(
-                sec_cm_testplan_tpl.render(block=block,
-                                           block_name=block.name.lower()))
-        except:  # noqa F722 for template Exception handling
-            log.error(exceptions.text_error_template().render())
-            return 1
+    try:
+        text = sec_cm_testplan_tpl.render(block=block,
+                                          block_name=block.name.lower())
+    except:  # noqa F722 for template Exception handling
+        log.error(exceptions.text_error_template().render())
+        return 1
+    write_if_changed(str(outfile), text)
 
     return 0
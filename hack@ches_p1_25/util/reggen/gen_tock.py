@@ -8,10 +8,10 @@ Generate Rust constants from validated register JSON tree
 import io
 import logging as log
 import sys
-import textwrap
 import warnings
 from typing import Any, Optional, Set, TextIO
 
+from reggen import symbols
 from reggen.ip_block import IpBlock
 from reggen.multi_register import MultiRegister
 from reggen.params import LocalParam
@@ -37,21 +37,18 @@ def indent(s: str, amount: int = 4) -> str:
     result = []
     indent = 0
     for line in s.splitlines():
-        indented = []
-        comment = False
-        for i, ch in enumerate(line):
-            if i > 0 and ch == '/' and line[i - 1] == '/':
-                comment = True
-            if not comment and ch in ")]}":
-                indent -= 1
-            if i == 0:
-                indented.append(' ' * indent * amount)
-            if not comment and ch in "([{":
-                indent += 1
-            indented.append(ch)
-        result.append(''.join(indented))
         if line == '':
-            result.append('')
+            result += ['', '']
+            continue
+
+        # Brackets in a trailing comment do not count. A closing bracket at
+        # the start of the line already applies to the line itself.
+        comment = line.find('//')
+        code = line if comment < 0 else line[:comment]
+        depth = indent - 1 if line[0] in ")]}" else indent
+        result.append(' ' * depth * amount + line)
+        indent += (code.count('(') + code.count('[') + code.count('{') -
+                   code.count(')') - code.count(']') - code.count('}'))
     return '\n'.join(result)
 
 
@@ -73,11 +70,7 @@ def to_studly_caps(s: str) -> str:
 
 def to_upper_snake_case(s: str) -> str:
     """Converts a string from a MixedCaseString to a UPPER_SNAKE_CASE_STRING."""
-    s = s.upper()
-    r = ''
-    for i in range(0, len(s)):
-        r += s[i] if s[i].isalnum() else '_'
-    return r
+    return symbols.as_define(s)
 
 
 def sanitize_name(s: str) -> str:
@@ -86,11 +79,7 @@ def sanitize_name(s: str) -> str:
     return r
 
 
-def first_line(s: str) -> str:
-    """Returns the first line of a multi-line string"""
-
-    # Just return the 's' if it is empty or 'None'.
-    return s.splitlines()[0] if s else s
+first_line = symbols.first_line
 
 
 def format_comment(s: str) -> str:
@@ -98,11 +87,7 @@ def format_comment(s: str) -> str:
 
     Returns wrapped string including newline and /// comment characters.
     """
-    comment = textwrap.wrap(s,
-                            width=97,
-                            initial_indent='/// ',
-                            subsequent_indent='/// ')
-    return '\n'.join(comment) + '\n'
+    return symbols.wrap_comment(s, 97, '/// ')
 
 
 def data_type(name: str, val: int, as_hex: bool) -> str:
@@ -329,6 +314,11 @@ def gen_const_interrupts(fieldout: TextIO, block: IpBlock, component: str,
 def gen_tock(block: IpBlock, outfile: TextIO, src_file: Optional[str],
              src_lic: Optional[str], src_copy: str,
              version: VersionInformation) -> int:
+    # Number the reserved gaps from 1 in each file, also when several blocks
+    # are generated in one process.
+    global filler_no
+    filler_no = 0
+
     rnames = block.get_rnames()
 
     paramout = io.StringIO()
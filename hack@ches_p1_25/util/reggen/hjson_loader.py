@@ -0,0 +1,124 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+'''Loading Hjson through a cache of the equivalent strict JSON
+
+The hjson package is written in pure Python and parsing with it is slow. This
+module parses each Hjson document with it once, writes the result as strict
+JSON to the "json" subdirectory of reggen's cache directory (see
+reggen.lib.cache_dir()), keyed by a digest of the Hjson text, and from
+then on parses the cached JSON with the json module from the standard library.
+
+The results are identical to those of hjson.load() and hjson.loads(), including
+the types of objects (hjson returns OrderedDicts by default but plain dicts if
+use_decimal is given) and of numbers. If the cache is disabled, this falls back
+to the hjson package.
+'''
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from decimal import Decimal
+from typing import IO, Callable, Dict, Optional, Union
+
+import hjson  # type: ignore
+
+from reggen.lib import cache_dir
+
+# Bump this when the format of the cached JSON changes.
+_CACHE_VERSION = 1
+
+# Canonical JSON already read in this process, keyed by the cache key.
+_json_texts: Dict[str, str] = {}
+
+
+def _hjson_float(txt: str) -> Union[int, float]:
+    '''Converts a JSON number with a fraction or exponent like hjson does.
+
+    Without use_decimal, hjson turns numbers with an integral value (below
+    1e10) into ints.
+    '''
+    value = float(txt)
+    if int(value) == value and abs(value) < 1e10:
+        return int(value)
+    return value
+
+
+def _json_dir() -> Optional[str]:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    return str(directory / 'json')
+
+
+def _to_json(txt: str) -> str:
+    '''Returns the canonical JSON for an Hjson text, using the cache.'''
+    h = hashlib.sha256()
+    h.update(str(_CACHE_VERSION).encode('utf-8'))
+    h.update(txt.encode('utf-8'))
+    key = h.hexdigest()
+
+    json_txt = _json_texts.get(key)
+    if json_txt is not None:
+        return json_txt
+
+    json_dir = _json_dir()
+    assert json_dir is not None
+    path = os.path.join(json_dir, key + '.json')
+    try:
+        with open(path, 'r', encoding='utf-8') as handle:
+            json_txt = handle.read()
+    except OSError:
+        pass
+
+    if json_txt is None:
+        # Parsing with use_decimal keeps the exact text of every number,
+        # which is needed to get the same values with and without it.
+        json_txt = hjson.dumpsJSON(hjson.loads(txt, use_decimal=True),
+                                   use_decimal=True)
+
+        # Write to a temporary file and rename it, so that concurrent readers
+        # never see a partially written entry. Failing to write the cache is
+        # not an error.
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        try:
+            os.makedirs(json_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                handle.write(json_txt)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    _json_texts[key] = json_txt
+    return json_txt
+
+
+def loads(txt: str,
+          use_decimal: bool = False,
+          object_pairs_hook: Optional[Callable] = None) -> object:
+    '''Parses an Hjson document, like hjson.loads().'''
+    if _json_dir() is None:
+        return hjson.loads(txt,
+                           use_decimal=use_decimal,
+                           object_pairs_hook=object_pairs_hook)
+
+    # hjson only uses OrderedDicts if it is called without any options.
+    if object_pairs_hook is None and not use_decimal:
+        object_pairs_hook = OrderedDict
+
+    return json.loads(_to_json(txt),
+                      object_pairs_hook=object_pairs_hook,
+                      parse_float=Decimal if use_decimal else _hjson_float)
+
+
+def load(fp: IO[str],
+         use_decimal: bool = False,
+         object_pairs_hook: Optional[Callable] = None) -> object:
+    '''Parses an Hjson document from a file object, like hjson.load().'''
+    return loads(fp.read(),
+                 use_decimal=use_decimal,
+                 object_pairs_hook=object_pairs_hook)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from pathlib import Path
+from unittest import mock
+
+import hjson
+
+from reggen import hjson_loader
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+
+
+def _all_hjson_files():
+    for path in sorted(REPO_TOP.rglob('*.hjson')):
+        if not path.name.startswith('._') and path.is_file():
+            yield path
+
+
+class TestHjsonLoader(unittest.TestCase):
+
+    def setUp(self):
+        # Use an empty cache directory.
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        env = mock.patch.dict(os.environ, {'REGGEN_CACHE_DIR': cache_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def assertSameObject(self, expected, actual, where):
+        '''Checks that two objects are equal, including types and key order.'''
+        self.assertIs(type(actual), type(expected), where)
+        if isinstance(expected, dict):
+            self.assertEqual(list(actual.keys()), list(expected.keys()), where)
+            for key, value in expected.items():
+                self.assertSameObject(value, actual[key],
+                                      '{}.{}'.format(where, key))
+        elif isinstance(expected, list):
+            self.assertEqual(len(actual), len(expected), where)
+            for idx, (exp_item, act_item) in enumerate(zip(expected, actual)):
+                self.assertSameObject(exp_item, act_item,
+                                      '{}[{}]'.format(where, idx))
+        else:
+            self.assertEqual(actual, expected, where)
+            if isinstance(expected, float):
+                self.assertEqual(repr(actual), repr(expected), where)
+
+    def check_text(self, txt, where):
+        '''Checks that txt loads like with hjson, from a cold and warm cache.'''
+        for kwargs in [{}, {'use_decimal': True},
+                       {'use_decimal': True, 'object_pairs_hook': OrderedDict}]:
+            try:
+                expected = hjson.loads(txt, **kwargs)
+            except ValueError:
+                with self.assertRaises(ValueError):
+                    hjson_loader.loads(txt, **kwargs)
+                continue
+
+            for _ in range(2):
+                # Drop the in-process cache, to load the JSON from disk.
+                hjson_loader._json_texts.clear()
+                actual = hjson_loader.loads(txt, **kwargs)
+                self.assertSameObject(expected, actual, where)
+
+    def test_numbers(self):
+        self.check_text(
+            '{a: 1, b: 1.50, c: 2.0, d: 1e-7, e: 1e15, f: -0.0, '
+            'g: 12345678901234567890123, h: 1.00000000000000000001, '
+            'i: 0x10, j: "3"}', 'numbers')
+
+    def test_tree(self):
+        for path in _all_hjson_files():
+            with self.subTest(path=str(path)):
+                txt = path.read_text(encoding='utf-8')
+                self.check_text(txt, str(path))
+
+    def test_disabled(self):
+        with mock.patch.dict(os.environ, {'REGGEN_CACHE_DIR': ''}):
+            self.assertEqual(hjson_loader.loads('{a: 1}'), {'a': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+'''Writing generated files only when they change, and skipping up-to-date ones
+
+The reggen backends write their outputs with write_if_changed(), which leaves
+a file untouched (including its modification time) if it already has the
+content that would be written. This avoids needless rebuilds downstream.
+
+A Manifest records, for each output of a run, the digest of everything that
+determines it (see digest_inputs()) together with the digests of the files
+that were produced. If the digest of the inputs is unchanged and the files
+are still on disk with the recorded content, the output is up-to-date and
+does not need to be generated again.
+'''
+
+import hashlib
+import json
+import logging as log
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import mako  # type: ignore
+
+# Bump this when the format of the manifest changes.
+_MANIFEST_VERSION = 1
+
+# The generator code. A change in any of these files invalidates all outputs.
+_GENERATOR_SOURCES = [
+    Path(__file__).parent,
+    Path(__file__).parents[1] / 'regtool.py',
+    Path(__file__).parents[1] / 'version_file.py',
+]
+
+# The files produced since the innermost track_outputs() was entered, with
+# their digests. There is a dict for each active track_outputs().
+_trackers: List[Dict[str, str]] = []
+
+
+def _digest_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as handle:
+            return hashlib.sha256(handle.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _record(path: str, digest: str) -> None:
+    for tracker in _trackers:
+        tracker[str(path)] = digest
+
+
+def write_if_changed(path: str, text: str) -> bool:
+    '''Writes text to the file at path, unless it already contains it.
+
+    Returns True if the file was written.
+    '''
+    encoded = text.encode('utf-8')
+    _record(path, hashlib.sha256(encoded).hexdigest())
+    try:
+        with open(path, 'rb') as handle:
+            if handle.read() == encoded:
+                return False
+    except OSError:
+        pass
+
+    with open(path, 'wb') as handle:
+        handle.write(encoded)
+    return True
+
+
+def track_file(path: str) -> None:
+    '''Records an existing file as an output of the current generation.
+
+    This is for a file that a backend checks but does not rewrite, so that
+    a change to it makes the output out of date.
+    '''
+    digest = _digest_file(path)
+    if digest is not None:
+        _record(path, digest)
+
+
+@contextmanager
+def track_outputs() -> Iterator[Dict[str, str]]:
+    '''Collects the files produced by the code in the with block.
+
+    Yields a dict which maps the path of each file passed to
+    write_if_changed() or track_file() to the digest of its content.
+    '''
+    tracker: Dict[str, str] = {}
+    _trackers.append(tracker)
+    try:
+        yield tracker
+    finally:
+        _trackers.remove(tracker)
+
+
+@lru_cache(maxsize=None)
+def _generator_digest() -> str:
+    h = hashlib.sha256()
+    h.update(mako.__version__.encode('utf-8'))
+    for path in _GENERATOR_SOURCES:
+        if path.is_dir():
+            files = sorted(p for p in path.iterdir()
+                           if p.suffix in ['.py', '.tpl'] and
+                           not p.name.startswith('._'))
+        else:
+            files = [path]
+        for file in files:
+            h.update(file.name.encode('utf-8'))
+            h.update((_digest_file(str(file)) or '').encode('utf-8'))
+    return h.hexdigest()
+
+
+def digest_inputs(inputs: List[object]) -> str:
+    '''Returns the digest of the inputs of an output.
+
+    inputs must be JSON-serializable: the content of input files should be
+    passed rather than their paths. The digest also covers the generator
+    code and the version of Mako.
+    '''
+    h = hashlib.sha256()
+    h.update(_generator_digest().encode('utf-8'))
+    h.update(json.dumps(inputs, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+class Manifest:
+    '''The input and output digests of the outputs generated so far.
+
+    If path is None, nothing is recorded and no output is ever up-to-date.
+    '''
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self.outputs: Dict[str, Dict[str, object]] = {}
+        if path is None:
+            return
+
+        try:
+            with open(path, 'r', encoding='utf-8') as handle:
+                manifest = json.load(handle)
+            if manifest.get('version') == _MANIFEST_VERSION:
+                self.outputs = manifest['outputs']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def is_up_to_date(self, key: str, inputs_digest: str) -> bool:
+        '''Returns True if the output with the given key can be skipped.'''
+        entry = self.outputs.get(key)
+        if entry is None or entry['inputs'] != inputs_digest:
+            return False
+
+        # Check that the files have not been removed or modified since.
+        files = entry['files']
+        assert isinstance(files, dict)
+        return all(_digest_file(path) == digest
+                   for path, digest in files.items())
+
+    def record(self, key: str, inputs_digest: str,
+               files: Dict[str, str]) -> None:
+        '''Records the inputs and files of an output that was just made.'''
+        if self.path is None:
+            return
+        self.outputs[key] = {'inputs': inputs_digest, 'files': dict(files)}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        manifest = {'version': _MANIFEST_VERSION, 'outputs': self.outputs}
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                json.dump(manifest, handle, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as err:
+            log.warning('Unable to write the manifest %s: %s', self.path,
+                        err)
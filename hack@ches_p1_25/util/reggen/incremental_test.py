@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from reggen import incremental
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+REGTOOL = REPO_TOP / 'util' / 'regtool.py'
+UART_HJSON = REPO_TOP / 'hw' / 'ip' / 'uart' / 'data' / 'uart.hjson'
+
+# An old modification time, to check that a file was not written again.
+OLD_MTIME = 1000000000
+
+
+def _regtool(*args):
+    '''Runs regtool, returns its stdout and the stderr of --timings.'''
+    proc = subprocess.run([sys.executable, str(REGTOOL), '--timings'] +
+                          [str(arg) for arg in args],
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          universal_newlines=True,
+                          check=True)
+    return proc.stdout, proc.stderr
+
+
+class TestWriteIfChanged(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+
+    def test_unchanged(self):
+        path = self.tmp_dir / 'out.txt'
+        self.assertTrue(incremental.write_if_changed(str(path), 'text\n'))
+        self.assertEqual(path.read_text(), 'text\n')
+        os.utime(path, (OLD_MTIME, OLD_MTIME))
+
+        self.assertFalse(incremental.write_if_changed(str(path), 'text\n'))
+        self.assertEqual(path.stat().st_mtime, OLD_MTIME)
+
+        self.assertTrue(incremental.write_if_changed(str(path), 'other\n'))
+        self.assertEqual(path.read_text(), 'other\n')
+        self.assertNotEqual(path.stat().st_mtime, OLD_MTIME)
+
+    def test_track_outputs(self):
+        written = self.tmp_dir / 'written.txt'
+        checked = self.tmp_dir / 'checked.txt'
+        checked.write_text('checked\n')
+        incremental.write_if_changed(str(self.tmp_dir / 'before.txt'), '')
+
+        with incremental.track_outputs() as outer:
+            incremental.write_if_changed(str(written), 'written\n')
+            with incremental.track_outputs() as inner:
+                incremental.track_file(str(checked))
+                # A missing file is not an output.
+                incremental.track_file(str(self.tmp_dir / 'missing.txt'))
+        incremental.write_if_changed(str(self.tmp_dir / 'after.txt'), '')
+
+        self.assertEqual(set(inner), {str(checked)})
+        self.assertEqual(set(outer), {str(written), str(checked)})
+        self.assertEqual(outer[str(written)],
+                         incremental._digest_file(str(written)))
+        self.assertEqual(outer[str(checked)],
+                         incremental._digest_file(str(checked)))
+
+
+class TestManifest(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.manifest_path = str(self.tmp_dir / 'manifest.json')
+        self.out = str(self.tmp_dir / 'out.txt')
+
+    def _generate(self, manifest, inputs, text):
+        '''Generates out.txt unless it is up-to-date, returns True if so.'''
+        digest = incremental.digest_inputs(inputs)
+        if manifest.is_up_to_date('out', digest):
+            return False
+        with incremental.track_outputs() as files:
+            incremental.write_if_changed(self.out, text)
+        manifest.record('out', digest, files)
+        manifest.save()
+        return True
+
+    def test_up_to_date(self):
+        self.assertTrue(
+            self._generate(incremental.Manifest(self.manifest_path),
+                           ['a'], 'A'))
+        self.assertFalse(
+            self._generate(incremental.Manifest(self.manifest_path),
+                           ['a'], 'A'))
+
+        # A change of the inputs reruns the generation.
+        self.assertTrue(
+            self._generate(incremental.Manifest(self.manifest_path),
+                           ['b'], 'B'))
+        self.assertEqual(Path(self.out).read_text(), 'B')
+        self.assertFalse(
+            self._generate(incremental.Manifest(self.manifest_path),
+                           ['b'], 'B'))
+
+        # So does a modified or removed output.
+        Path(self.out).write_text('edited')
+        self.assertTrue(
+            self._generate(incremental.Manifest(self.manifest_path),
+                           ['b'], 'B'))
+        os.remove(self.out)
+        self.assertTrue(
+            self._generate(incremental.Manifest(self.manifest_path),
+                           ['b'], 'B'))
+
+    def test_no_manifest(self):
+        for _ in range(2):
+            self.assertTrue(
+                self._generate(incremental.Manifest(None), ['a'], 'A'))
+        self.assertFalse(os.path.exists(self.manifest_path))
+
+    def test_bad_manifest(self):
+        self._generate(incremental.Manifest(self.manifest_path), ['a'], 'A')
+        with open(self.manifest_path) as handle:
+            manifest = json.load(handle)
+        manifest['version'] = incremental._MANIFEST_VERSION + 1
+        with open(self.manifest_path, 'w') as handle:
+            json.dump(manifest, handle)
+        self.assertEqual(incremental.Manifest(self.manifest_path).outputs, {})
+
+        Path(self.manifest_path).write_text('{"version": ')
+        self.assertEqual(incremental.Manifest(self.manifest_path).outputs, {})
+
+
+class TestRegtool(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.hjson = self.tmp_dir / 'uart.hjson'
+        self.hjson.write_text(UART_HJSON.read_text())
+
+    def test_manifest(self):
+        out = self.tmp_dir / 'uart.json'
+        manifest = self.tmp_dir / 'manifest.json'
+        args = ['-j', '-o', out, '--manifest', manifest, self.hjson]
+
+        stdout, stderr = _regtool(*args)
+        self.assertEqual(stdout, '')
+        self.assertIn(' generated ', stderr)
+        text = out.read_text()
+        os.utime(out, (OLD_MTIME, OLD_MTIME))
+
+        stdout, stderr = _regtool(*args)
+        self.assertIn(' up-to-date ', stderr)
+        self.assertEqual(out.stat().st_mtime, OLD_MTIME)
+
+        # Without the manifest, the output is generated again, but the file
+        # is not rewritten.
+        stdout, stderr = _regtool('-j', '-o', out, self.hjson)
+        self.assertIn(' generated ', stderr)
+        self.assertEqual(out.stat().st_mtime, OLD_MTIME)
+
+        # A change of the input file regenerates the output.
+        self.hjson.write_text(UART_HJSON.read_text().replace(
+            'Serial receive bit', 'Serial receive line'))
+        stdout, stderr = _regtool(*args)
+        self.assertIn(' generated ', stderr)
+        self.assertNotEqual(out.read_text(), text)
+        self.assertIn('Serial receive line', out.read_text())
+
+    def test_stdout(self):
+        manifest = self.tmp_dir / 'manifest.json'
+        expected = None
+        for _ in range(2):
+            stdout, stderr = _regtool('-j', '-o', '-', '--manifest', manifest,
+                                      self.hjson)
+            # Output to stdout is never up-to-date.
+            self.assertIn(' generated ', stderr)
+            self.assertIn('<stdout>', stderr)
+            self.assertEqual(json.loads(stdout)['name'], 'uart')
+            if expected is not None:
+                self.assertEqual(stdout, expected)
+            expected = stdout
+        self.assertFalse((self.tmp_dir / '-').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,17 +3,23 @@
 # SPDX-License-Identifier: Apache-2.0
 '''Code representing an IP block for reggen'''
 
+import hashlib
+import logging as log
+import os
+import pickle
+from functools import lru_cache
+from pathlib import Path
 from typing import Dict, List, Optional, Sequence, Set, Tuple
 
-import hjson  # type: ignore
 from reggen.alert import Alert
 from reggen.bus_interfaces import BusInterfaces
 from reggen.clocking import Clocking, ClockingItem
 from reggen.countermeasure import CounterMeasure
 from reggen.inter_signal import InterSignal
 from reggen.interrupt import Interrupt
-from reggen.lib import (check_bool, check_int, check_keys, check_list,
-                        check_name)
+from reggen import hjson_loader
+from reggen.lib import (cache_dir, check_bool, check_int, check_keys,
+                        check_list, check_name)
 from reggen.params import LocalParam, ReggenParams
 from reggen.reg_block import RegBlock
 from reggen.signal import Signal
@@ -154,6 +160,79 @@ OPTIONAL_REVISIONS_FIELDS = {
 }
 
 
+# Bump this when the format of the cached IpBlocks changes in a way that is not
+# covered by the digest of the reggen sources.
+_CACHE_VERSION = 1
+
+
+@lru_cache(maxsize=None)
+def _sources_digest() -> str:
+    '''Returns the digest of the reggen sources, which build the IpBlocks.'''
+    h = hashlib.sha256()
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        h.update(path.name.encode('utf-8'))
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _cache_key(txt: str, param_defaults: List[Tuple[str, str]], where: str,
+               node: str, aliases: Sequence[Tuple[bool, str, str]]) -> str:
+    h = hashlib.sha256()
+    h.update(repr((_CACHE_VERSION, _sources_digest(), param_defaults, where,
+                   node)).encode('utf-8'))
+    h.update(txt.encode('utf-8'))
+    for scrub, alias_txt, alias_where in aliases:
+        h.update(repr((scrub, alias_where)).encode('utf-8'))
+        h.update(alias_txt.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _cache_load(key: str) -> Optional['IpBlock']:
+    directory = cache_dir()
+    if directory is None:
+        return None
+    path = directory / (key + '.pickle')
+    try:
+        with open(path, 'rb') as handle:
+            block = pickle.load(handle)
+    except FileNotFoundError:
+        return None
+    except Exception as err:
+        # Unpickling a corrupted (or truncated) entry can raise just about
+        # any exception. Drop the entry, so that it is written again.
+        log.debug('Dropping the cached IpBlock %s: %s', path, err)
+        block = None
+
+    if not isinstance(block, IpBlock):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+    return block
+
+
+def _cache_store(key: str, block: 'IpBlock') -> None:
+    directory = cache_dir()
+    if directory is None:
+        return
+    # Write to a temporary file and rename it, so that concurrent readers
+    # never see a partially written entry. Failing to write the cache (e.g. in
+    # a read-only sandbox) is not an error.
+    path = directory / (key + '.pickle')
+    tmp_path = directory / '{}.{}.tmp'.format(key, os.getpid())
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump(block, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except (OSError, pickle.PicklingError):
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
 class IpBlock:
 
     def __init__(self,
@@ -396,19 +475,49 @@ class IpBlock:
     def from_text(txt: str,
                   param_defaults: List[Tuple[str, str]],
                   where: str,
-                  node: str = '') -> 'IpBlock':
-        '''Load an IpBlock from an hjson description in txt'''
-        return IpBlock.from_raw(param_defaults,
-                                hjson.loads(txt, use_decimal=True), where,
-                                node)
+                  node: str = '',
+                  alias_paths: Sequence[Tuple[bool, str]] = ()) -> 'IpBlock':
+        '''Load an IpBlock from an hjson description in txt
+
+        alias_paths is a list of (scrub, path) pairs of alias files to apply
+        to the block, in order (see alias_from_raw()).
+
+        Validated blocks are cached on disk, keyed by the content of the
+        description and alias files and all other arguments, so loading the
+        same block again skips parsing and validation altogether.
+        '''
+        aliases = []
+        for scrub, alias_path in alias_paths:
+            with open(alias_path, 'r', encoding='utf-8') as handle:
+                aliases.append((scrub, handle.read(),
+                                'alias file at {!r}'.format(alias_path)))
+
+        key = _cache_key(txt, param_defaults, where, node, aliases)
+        block = _cache_load(key)
+        if block is not None:
+            return block
+
+        block = IpBlock.from_raw(param_defaults,
+                                 hjson_loader.loads(txt, use_decimal=True), where,
+                                 node)
+        for scrub, alias_txt, alias_where in aliases:
+            block.alias_from_raw(scrub,
+                                 hjson_loader.loads(alias_txt, use_decimal=True),
+                                 alias_where)
+
+        _cache_store(key, block)
+        return block
 
     @staticmethod
-    def from_path(path: str, param_defaults: List[Tuple[str,
-                                                        str]]) -> 'IpBlock':
+    def from_path(path: str,
+                  param_defaults: List[Tuple[str, str]],
+                  alias_paths: Sequence[Tuple[bool, str]] = ()) -> 'IpBlock':
         '''Load an IpBlock from an hjson description in a file at path'''
         with open(path, 'r', encoding='utf-8') as handle:
-            return IpBlock.from_text(handle.read(), param_defaults,
-                                     'file at {!r}'.format(path))
+            return IpBlock.from_text(handle.read(),
+                                     param_defaults,
+                                     'file at {!r}'.format(path),
+                                     alias_paths=alias_paths)
 
     def alias_from_raw(self, scrub: bool, raw: object, where: str) -> None:
         '''Parses and validates an alias reg block and adds it to this IpBlock.
@@ -522,7 +631,8 @@ class IpBlock:
 
     def alias_from_text(self, scrub: bool, txt: str, where: str) -> None:
         '''Load alias regblocks from an hjson description in txt'''
-        self.alias_from_raw(scrub, hjson.loads(txt, use_decimal=True), where)
+        self.alias_from_raw(scrub, hjson_loader.loads(txt, use_decimal=True),
+                            where)
 
     def alias_from_path(self, scrub: bool, path: str) -> None:
         '''Load alias regblocks from an hjson description in a file at path'''
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from reggen import gen_json, gen_rtl, ip_block
+from reggen.ip_block import IpBlock
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+
+# Blocks with interrupts, alerts, multiregs, windows and several register
+# blocks.
+IPS = ['uart', 'hmac', 'rv_dm', 'spi_device']
+
+
+def _hjson_path(name):
+    return REPO_TOP / 'hw' / 'ip' / name / 'data' / '{}.hjson'.format(name)
+
+
+def _outputs(block, out_dir):
+    '''Returns the JSON and RTL generated for a block.'''
+    outstr = io.StringIO()
+    gen_json.gen_json(block, outstr, 'json')
+    out_dir.mkdir()
+    assert gen_rtl.gen_rtl(block, str(out_dir)) == 0
+    rtl = {p.name: p.read_text() for p in sorted(out_dir.iterdir())}
+    return outstr.getvalue(), rtl
+
+
+class TestIpBlockCache(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.cache_dir = self.tmp_dir / 'cache'
+        self.cache_dir.mkdir()
+
+    def _load(self, name, cache_dir):
+        with unittest.mock.patch.dict(os.environ,
+                                      {'REGGEN_CACHE_DIR': cache_dir}):
+            return IpBlock.from_path(str(_hjson_path(name)), [])
+
+    def _pickles(self):
+        return sorted(self.cache_dir.glob('*.pickle'))
+
+    def test_cold_warm(self):
+        for name in IPS:
+            with self.subTest(ip=name):
+                uncached = self._load(name, '')
+                cold = self._load(name, str(self.cache_dir))
+                with unittest.mock.patch.object(
+                        IpBlock, 'from_raw', side_effect=AssertionError):
+                    warm = self._load(name, str(self.cache_dir))
+                self.assertIsNot(warm, cold)
+
+                expected = _outputs(uncached, self.tmp_dir / (name + '.none'))
+                self.assertEqual(
+                    _outputs(cold, self.tmp_dir / (name + '.cold')), expected)
+                self.assertEqual(
+                    _outputs(warm, self.tmp_dir / (name + '.warm')), expected)
+        self.assertEqual(len(self._pickles()), len(IPS))
+
+    def test_corrupted_entry(self):
+        block = self._load('uart', str(self.cache_dir))
+        path, = self._pickles()
+        expected = _outputs(block, self.tmp_dir / 'expected')
+        data = path.read_bytes()
+
+        for idx, bad_data in enumerate([
+                b'', data[:len(data) // 2], b'garbage',
+                data.replace(b'IpBlock', b'IpBlocK'),
+                ip_block.pickle.dumps(['not', 'a', 'block'])
+        ]):
+            with self.subTest(bad_data=bad_data[:20]):
+                path.write_bytes(bad_data)
+                with unittest.mock.patch.dict(
+                        os.environ, {'REGGEN_CACHE_DIR': str(self.cache_dir)}):
+                    self.assertIsNone(ip_block._cache_load(path.stem))
+                # The bad entry has been dropped.
+                self.assertFalse(path.exists())
+
+                path.write_bytes(bad_data)
+                block = self._load('uart', str(self.cache_dir))
+                self.assertEqual(
+                    _outputs(block, self.tmp_dir / str(idx)),
+                    expected)
+                # And written again.
+                self.assertEqual(path.read_bytes(), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
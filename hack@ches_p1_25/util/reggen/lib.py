@@ -4,8 +4,12 @@
 
 '''Parsing support code for reggen'''
 
+import os
 import re
-from typing import Dict, List, Optional, cast
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, cast
 
 
 # Names that are prohibited (used as reserved keywords in systemverilog)
@@ -252,3 +256,107 @@ def get_basename(name: str) -> str:
     assert match
     assert match.start() > 0
     return name[0:match.start()]
+
+
+# Bounds of reggen's cache directory, see trim_cache(). The size bound can be
+# changed with $REGGEN_CACHE_MAX_MB.
+CACHE_MAX_MB = 512
+CACHE_MAX_AGE_DAYS = 30
+
+# The cache directory is trimmed at most this often (in seconds), by the first
+# process that uses it after that time.
+_TRIM_INTERVAL = 3600
+
+# The name of the file whose modification time is that of the last trim.
+_TRIM_STAMP = '.last_trim'
+
+# The cache directories already checked by this process.
+_checked_dirs: Set[Path] = set()
+
+
+def cache_dir() -> Optional[Path]:
+    '''Returns the directory of reggen's on-disk caches (e.g. of IpBlocks).
+
+    The directory is $REGGEN_CACHE_DIR if set, else opentitan/reggen in the
+    user's cache directory. Setting $REGGEN_CACHE_DIR to an empty string
+    disables the cache. The directory is trimmed to its bounds once in a
+    while (see trim_cache()).
+    '''
+    env_dir = os.environ.get('REGGEN_CACHE_DIR')
+    if env_dir is not None:
+        directory = Path(env_dir) if env_dir else None
+    else:
+        xdg_cache = os.environ.get(
+            'XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+        directory = Path(xdg_cache) / 'opentitan' / 'reggen'
+
+    if directory is not None and directory not in _checked_dirs:
+        _checked_dirs.add(directory)
+        _maybe_trim_cache(directory)
+    return directory
+
+
+def _maybe_trim_cache(directory: Path) -> None:
+    stamp = directory / _TRIM_STAMP
+    try:
+        if time.time() - stamp.stat().st_mtime < _TRIM_INTERVAL:
+            return
+    except OSError:
+        # Not trimmed yet (or there is no cache directory at all).
+        if not directory.is_dir():
+            return
+    try:
+        stamp.touch()
+    except OSError:
+        return
+
+    max_mb = int(os.environ.get('REGGEN_CACHE_MAX_MB', CACHE_MAX_MB))
+    trim_cache(directory, max_mb << 20, CACHE_MAX_AGE_DAYS * 24 * 3600)
+
+
+def _entry_size(path: Path) -> int:
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(p.stat().st_size for p in path.rglob('*') if p.is_file())
+
+
+def trim_cache(directory: Path, max_bytes: int, max_age: float) -> None:
+    '''Removes old entries from a cache directory.
+
+    The entries are the files in directory and the files and directories in
+    its subdirectories (each of reggen's caches has its own subdirectory).
+    Entries that were last written more than max_age seconds ago are
+    removed, then the oldest remaining ones until the entries take up at most
+    max_bytes. Failing to remove an entry (e.g. because another process
+    removed it first) is not an error.
+    '''
+    entries: List[Tuple[float, int, Path]] = []
+    try:
+        for child in directory.iterdir():
+            if child.name == _TRIM_STAMP:
+                continue
+            paths = list(child.iterdir()) if child.is_dir() else [child]
+            for path in paths:
+                try:
+                    entries.append((path.stat().st_mtime, _entry_size(path),
+                                    path))
+                except OSError:
+                    pass
+    except OSError:
+        return
+
+    # Oldest first.
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    now = time.time()
+    for mtime, size, path in entries:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        try:
+            if path.is_dir():
+                shutil.rmtree(path)
+            else:
+                path.unlink()
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from reggen import lib
+
+DAY = 24 * 3600
+
+
+class TestCacheDir(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_dir = Path(tmp_dir.name)
+        self.now = time.time()
+
+    def _entry(self, relpath, size, age_days):
+        '''Creates a cache entry, written age_days ago.'''
+        path = self.cache_dir / relpath
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * size)
+        mtime = self.now - age_days * DAY
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def _entries(self):
+        return sorted(str(p.relative_to(self.cache_dir))
+                      for p in self.cache_dir.rglob('*') if p.is_file())
+
+    def test_disabled(self):
+        with unittest.mock.patch.dict(os.environ, {'REGGEN_CACHE_DIR': ''}):
+            self.assertIsNone(lib.cache_dir())
+
+    def test_trim_age(self):
+        self._entry('old.pickle', 10, 40)
+        self._entry('new.pickle', 10, 1)
+        self._entry('json/old.json', 10, 31)
+        self._entry('json/new.json', 10, 29)
+        self._entry('ipgen/old/rtl/a.sv', 10, 35)
+        os.utime(self.cache_dir / 'ipgen' / 'old',
+                 (self.now - 35 * DAY, self.now - 35 * DAY))
+        lib.trim_cache(self.cache_dir, 1 << 20, 30 * DAY)
+        self.assertEqual(self._entries(), ['json/new.json', 'new.pickle'])
+        self.assertTrue((self.cache_dir / 'ipgen').is_dir())
+
+    def test_trim_size(self):
+        for age in range(5):
+            self._entry('json/{}.json'.format(age), 100, age)
+            self._entry('{}.pickle'.format(age), 100, age + 0.5)
+        # The oldest entries go first, whatever their cache.
+        lib.trim_cache(self.cache_dir, 500, 30 * DAY)
+        self.assertEqual(self._entries(), [
+            '0.pickle', '1.pickle', 'json/0.json', 'json/1.json',
+            'json/2.json'
+        ])
+        lib.trim_cache(self.cache_dir, 0, 30 * DAY)
+        self.assertEqual(self._entries(), [])
+
+    def test_trim_interval(self):
+        self._entry('old.pickle', 10, 40)
+        env = {'REGGEN_CACHE_DIR': str(self.cache_dir)}
+        with unittest.mock.patch.dict(os.environ, env):
+            self.assertEqual(lib.cache_dir(), self.cache_dir)
+        self.assertEqual(self._entries(), ['.last_trim'])
+
+        # Only the first call in a process checks the directory, and it is
+        # only trimmed again after a while.
+        self._entry('old.pickle', 10, 40)
+        with unittest.mock.patch.dict(os.environ, env):
+            lib.cache_dir()
+            lib._checked_dirs.clear()
+            lib.cache_dir()
+        self.assertEqual(self._entries(), ['.last_trim', 'old.pickle'])
+
+        stamp = self.cache_dir / '.last_trim'
+        os.utime(stamp, (self.now - 2 * 3600, self.now - 2 * 3600))
+        lib._checked_dirs.clear()
+        with unittest.mock.patch.dict(os.environ, env):
+            lib.cache_dir()
+        self.assertEqual(self._entries(), ['.last_trim'])
+        self.assertGreater(stamp.stat().st_mtime, self.now - 3600)
+
+    def test_trim_max_mb(self):
+        self._entry('big.pickle', 2 << 20, 0)
+        env = {'REGGEN_CACHE_DIR': str(self.cache_dir),
+               'REGGEN_CACHE_MAX_MB': '1'}
+        with unittest.mock.patch.dict(os.environ, env):
+            lib.cache_dir()
+        self.assertEqual(self._entries(), ['.last_trim'])
+
+
+if __name__ == '__main__':
+    unittest.main()
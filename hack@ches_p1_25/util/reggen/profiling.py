@@ -0,0 +1,306 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+'''Timing and profiling of the generators (regtool, topgen, tlgen, ipgen)
+
+The generators mark their stages with timed(), a context manager that
+records the wall and CPU time of the code in its with block, and the peak
+resident set size (RSS) of the process at its end. timed() does nothing unless
+profiling was started with start(), which the command-line tools call when
+one of the options added by add_arguments() is given:
+
+--profile FILE
+    Write a JSON report with every timed stage and the totals per category.
+--trace-events FILE
+    Write the stages as Chrome trace events (see chrome://tracing or
+    https://ui.perfetto.dev).
+--cprofile FILE
+    Also run the generator under cProfile and dump the statistics to FILE,
+    for use with pstats or snakeviz.
+
+Stages run in a process pool can be timed with call_timed(), which returns
+the events of the worker to the parent process.
+'''
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import (Any, Callable, ContextManager, Dict, Iterator, List,
+                    NamedTuple, Optional, Tuple)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None  # type: ignore
+
+# Bump this when the format of the JSON report changes.
+REPORT_VERSION = 1
+
+
+def peak_rss_kb() -> Optional[int]:
+    '''Returns the peak RSS of this process so far in KiB, if known.'''
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return maxrss // 1024 if sys.platform == 'darwin' else maxrss
+
+
+class Event(NamedTuple):
+    '''A timed stage.
+
+    start is the wall-clock time (time.time()) at which the stage started, so
+    that events from different processes can be put on one time line. wall
+    and cpu are the wall and CPU time of the stage in seconds. nested is True
+    if the stage is inside another stage of the same category.
+
+    peak_rss_kb is the peak RSS of the process that ran the stage, from the
+    start of that process up to the end of the stage, not the memory used by
+    the stage itself. For a stage run with call_timed() in a worker process,
+    that is the peak of the worker so far, which includes any stages it ran
+    before.
+    '''
+    name: str
+    category: str
+    start: float
+    wall: float
+    cpu: float
+    peak_rss_kb: Optional[int]
+    nested: bool
+    pid: int
+
+
+class Profiler:
+    '''Collects the events of the timed stages.'''
+
+    def __init__(self) -> None:
+        self.events: List[Event] = []
+        self.start = time.time()
+        self.start_cpu = time.process_time()
+        self.start_wall = time.perf_counter()
+        # The categories of the stages that are running.
+        self._categories: List[str] = []
+
+    @contextmanager
+    def timed(self, name: str, category: str) -> Iterator[None]:
+        start = time.time()
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        nested = category in self._categories
+        self._categories.append(category)
+        try:
+            yield
+        finally:
+            self._categories.pop()
+            self.events.append(
+                Event(name, category, start,
+                      time.perf_counter() - start_wall,
+                      time.process_time() - start_cpu, peak_rss_kb(), nested,
+                      os.getpid()))
+
+    def report(self, tool: str) -> Dict[str, object]:
+        '''Returns the JSON report of the events recorded so far.
+
+        The totals per category do not count nested events, so that no time
+        is counted twice.
+        '''
+        totals: Dict[str, Dict[str, float]] = {}
+        for event in self.events:
+            if event.nested:
+                continue
+            total = totals.setdefault(event.category, {
+                'count': 0,
+                'wall': 0.0,
+                'cpu': 0.0
+            })
+            total['count'] += 1
+            total['wall'] += event.wall
+            total['cpu'] += event.cpu
+
+        # The peak RSS of the whole run includes the worker processes.
+        peaks = [event.peak_rss_kb for event in self.events
+                 if event.peak_rss_kb is not None]
+        own_peak = peak_rss_kb()
+        if own_peak is not None:
+            peaks.append(own_peak)
+
+        return {
+            'version': REPORT_VERSION,
+            'tool': tool,
+            'argv': sys.argv,
+            'start': self.start,
+            'wall': time.perf_counter() - self.start_wall,
+            'cpu': time.process_time() - self.start_cpu,
+            'peak_rss_kb': max(peaks) if peaks else None,
+            'totals': totals,
+            'events': [event._asdict() for event in self.events],
+        }
+
+    def trace_events(self) -> Dict[str, object]:
+        '''Returns the events in the Chrome trace event format.'''
+        trace = []
+        for event in sorted(self.events, key=lambda e: e.start):
+            trace.append({
+                'name': event.name,
+                'cat': event.category,
+                'ph': 'X',
+                'ts': round(event.start * 1e6),
+                'dur': round(event.wall * 1e6),
+                'pid': event.pid,
+                'tid': event.pid,
+                'args': {
+                    'cpu_ms': round(event.cpu * 1e3, 3),
+                    'peak_rss_kb': event.peak_rss_kb,
+                },
+            })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+
+# The active profiler, if any.
+_profiler: Optional[Profiler] = None
+
+
+def enabled() -> bool:
+    '''Returns True if profiling is active.'''
+    return _profiler is not None
+
+
+def timed(name: str, category: str = 'stage') -> ContextManager[None]:
+    '''Times the code in the with block as a stage with the given name.
+
+    category groups stages for the totals in the report (e.g. 'pass', 'ipgen'
+    or 'xbar'). This does nothing if profiling is not active.
+    '''
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.timed(name, category)
+
+
+def call_timed(name: str, category: str, func: Callable,
+               *args: Any) -> Tuple[Any, List[Event]]:
+    '''Calls func(*args) as a timed stage, in a worker process.
+
+    Returns the result and the events recorded in the call, which the parent
+    passes to add_events(). This works whether or not the parent profiles, so
+    it can be submitted to a process pool unconditionally. The peak RSS of
+    the events is the lifetime peak of the worker, not that of the call.
+    '''
+    global _profiler
+    outer = _profiler
+    _profiler = Profiler()
+    try:
+        with _profiler.timed(name, category):
+            result = func(*args)
+        return result, _profiler.events
+    finally:
+        _profiler = outer
+
+
+def add_events(events: List[Event]) -> None:
+    '''Adds events recorded in a worker process (see call_timed()).'''
+    if _profiler is not None:
+        _profiler.events.extend(events)
+
+
+def _write_json(path: str, obj: object) -> None:
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(obj, handle, indent=1)
+        handle.write('\n')
+
+
+class _Session(NamedTuple):
+    tool: str
+    profiler: Profiler
+    profile: Optional[cProfile.Profile]
+    report: Optional[str]
+    trace: Optional[str]
+    cprofile: Optional[str]
+
+
+# The session started by start(), if any.
+_session: Optional[_Session] = None
+
+
+def start(tool: str,
+          report: Optional[str] = None,
+          trace: Optional[str] = None,
+          cprofile: Optional[str] = None) -> bool:
+    '''Starts profiling the rest of the run of a generator.
+
+    tool names the generator in the report. When stop() is called, or at the
+    latest when the process exits (also through sys.exit()), the JSON report
+    is written to report, the Chrome trace events to trace and the cProfile
+    statistics to cprofile, for each one that is not None. If all three are
+    None, nothing is profiled.
+
+    Returns True if profiling was started.
+    '''
+    global _profiler, _session
+    if report is None and trace is None and cprofile is None:
+        return False
+    assert _session is None
+
+    _profiler = Profiler()
+    profile = None
+    if cprofile is not None:
+        profile = cProfile.Profile()
+        profile.enable()
+    _session = _Session(tool, _profiler, profile, report, trace, cprofile)
+    atexit.register(stop)
+    return True
+
+
+def stop() -> None:
+    '''Stops profiling and writes the files given to start().'''
+    global _profiler, _session
+    if _session is None:
+        return
+    session = _session
+    _session = None
+    _profiler = None
+    if session.profile is not None:
+        session.profile.disable()
+
+    # The whole run is the outermost event.
+    profiler = session.profiler
+    profiler.events.append(
+        Event(session.tool, 'run', profiler.start,
+              time.perf_counter() - profiler.start_wall,
+              time.process_time() - profiler.start_cpu, peak_rss_kb(), False,
+              os.getpid()))
+
+    if session.report is not None:
+        _write_json(session.report, profiler.report(session.tool))
+    if session.trace is not None:
+        _write_json(session.trace, profiler.trace_events())
+    if session.profile is not None:
+        session.profile.dump_stats(session.cprofile)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    '''Adds the --profile, --trace-events and --cprofile options.'''
+    parser.add_argument('--profile',
+                        metavar='FILE',
+                        default=None,
+                        help='Write a JSON report with the wall and CPU time '
+                        'and the peak RSS of each generation stage to FILE.')
+    parser.add_argument('--trace-events',
+                        metavar='FILE',
+                        default=None,
+                        help='Write the generation stages to FILE as Chrome '
+                        'trace events (for chrome://tracing or Perfetto).')
+    parser.add_argument('--cprofile',
+                        metavar='FILE',
+                        default=None,
+                        help='Run under cProfile and write the statistics '
+                        'to FILE.')
+
+
+def start_from_args(tool: str, args: argparse.Namespace) -> bool:
+    '''Calls start() with the options added by add_arguments().'''
+    return start(tool, args.profile, args.trace_events, args.cprofile)
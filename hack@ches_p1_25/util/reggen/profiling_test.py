@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import json
+import os
+import pstats
+import tempfile
+import unittest
+from pathlib import Path
+
+from reggen import profiling
+
+
+def _spin(secs):
+    '''Burns CPU for about secs seconds, so that stages take some time.'''
+    end = profiling.time.perf_counter() + secs
+    while profiling.time.perf_counter() < end:
+        pass
+    return secs
+
+
+def _fail():
+    raise RuntimeError('failed')
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_nested_totals(self):
+        profiler = profiling.Profiler()
+        with profiler.timed('outer', 'pass'):
+            with profiler.timed('inner', 'pass'):
+                _spin(0.01)
+            with profiler.timed('other', 'xbar'):
+                with profiler.timed('inner', 'pass'):
+                    _spin(0.01)
+        with profiler.timed('second', 'pass'):
+            pass
+
+        events = {(e.name, e.category, e.nested) for e in profiler.events}
+        self.assertEqual(events, {('inner', 'pass', True),
+                                  ('other', 'xbar', False),
+                                  ('outer', 'pass', False),
+                                  ('second', 'pass', False)})
+        self.assertEqual(len(profiler.events), 5)
+
+        report = profiler.report('tool')
+        self.assertEqual(report['version'], profiling.REPORT_VERSION)
+        self.assertEqual(report['tool'], 'tool')
+        self.assertEqual(len(report['events']), 5)
+
+        # The inner stages of the 'pass' category are not counted again, even
+        # when they are inside a stage of another category.
+        totals = report['totals']
+        self.assertEqual(set(totals), {'pass', 'xbar'})
+        self.assertEqual(totals['pass']['count'], 2)
+        self.assertEqual(totals['xbar']['count'], 1)
+        by_name = {e.name: e for e in profiler.events if not e.nested}
+        outer, second, other = (by_name['outer'], by_name['second'],
+                                by_name['other'])
+        self.assertAlmostEqual(totals['pass']['wall'], outer.wall + second.wall)
+        self.assertAlmostEqual(totals['pass']['cpu'], outer.cpu + second.cpu)
+        self.assertAlmostEqual(totals['xbar']['wall'], other.wall)
+        self.assertGreaterEqual(outer.wall, 0.02)
+        self.assertGreaterEqual(outer.wall, other.wall)
+
+    def test_trace_events(self):
+        profiler = profiling.Profiler()
+        with profiler.timed('outer', 'pass'):
+            with profiler.timed('inner', 'xbar'):
+                _spin(0.01)
+
+        trace = profiler.trace_events()
+        self.assertEqual(trace['displayTimeUnit'], 'ms')
+        # The events are sorted by start time, so the outer one comes first
+        # although it ends last.
+        outer, inner = trace['traceEvents']
+        self.assertEqual(outer['name'], 'outer')
+        self.assertEqual(inner['name'], 'inner')
+        for entry, event in zip([outer, inner], reversed(profiler.events)):
+            self.assertEqual(set(entry),
+                             {'name', 'cat', 'ph', 'ts', 'dur', 'pid', 'tid',
+                              'args'})
+            self.assertEqual(entry['cat'], event.category)
+            self.assertEqual(entry['ph'], 'X')
+            self.assertEqual(entry['ts'], round(event.start * 1e6))
+            self.assertEqual(entry['dur'], round(event.wall * 1e6))
+            self.assertEqual(entry['pid'], os.getpid())
+            self.assertEqual(entry['tid'], os.getpid())
+            self.assertEqual(entry['args'],
+                             {'cpu_ms': round(event.cpu * 1e3, 3),
+                              'peak_rss_kb': event.peak_rss_kb})
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['dur'], inner['dur'])
+        self.assertGreaterEqual(inner['dur'], 10000)
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.assertFalse(profiling.enabled())
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        # Cleanups run in reverse order, so this stops before the removal.
+        self.addCleanup(profiling.stop)
+
+    def test_timed_disabled(self):
+        self.assertFalse(profiling.start('tool'))
+        self.assertFalse(profiling.enabled())
+        with profiling.timed('stage'):
+            pass
+        profiling.add_events([])
+        profiling.stop()
+
+    def test_call_timed_restores_outer(self):
+        # Without a profiler in the caller.
+        result, events = profiling.call_timed('job', 'ipgen', _spin, 0)
+        self.assertEqual(result, 0)
+        self.assertEqual([(e.name, e.category, e.nested) for e in events],
+                         [('job', 'ipgen', False)])
+        self.assertFalse(profiling.enabled())
+
+        # With a profiler in the caller, whose stages are not affected.
+        self.assertTrue(profiling.start('tool', str(self.tmp_dir / 'report.json')))
+        outer = profiling._profiler
+        with profiling.timed('stage', 'ipgen'):
+            result, events = profiling.call_timed('job', 'ipgen', _spin, 0)
+            self.assertIs(profiling._profiler, outer)
+        self.assertEqual([e.name for e in outer.events], ['stage'])
+        # The worker does not know about the stages of its caller.
+        self.assertFalse(events[0].nested)
+
+        # Also when the call raises.
+        with self.assertRaises(RuntimeError):
+            profiling.call_timed('job', 'ipgen', _fail)
+        self.assertIs(profiling._profiler, outer)
+
+        profiling.add_events(events)
+        self.assertEqual([e.name for e in outer.events], ['stage', 'job'])
+
+    def test_start_stop(self):
+        report = self.tmp_dir / 'report.json'
+        trace = self.tmp_dir / 'trace.json'
+        cprofile = self.tmp_dir / 'profile.prof'
+        self.assertTrue(
+            profiling.start('tool', str(report), str(trace), str(cprofile)))
+        self.assertTrue(profiling.enabled())
+        with profiling.timed('stage', 'pass'):
+            _spin(0.01)
+        profiling.stop()
+        self.assertFalse(profiling.enabled())
+
+        with open(report, encoding='utf-8') as handle:
+            report_json = json.load(handle)
+        self.assertEqual(report_json['tool'], 'tool')
+        # The whole run is added as the last event.
+        self.assertEqual([(e['name'], e['category'])
+                          for e in report_json['events']],
+                         [('stage', 'pass'), ('tool', 'run')])
+        self.assertEqual(report_json['totals']['pass']['count'], 1)
+        self.assertEqual(report_json['totals']['run']['count'], 1)
+        self.assertGreaterEqual(report_json['wall'],
+                                report_json['totals']['pass']['wall'])
+
+        with open(trace, encoding='utf-8') as handle:
+            trace_json = json.load(handle)
+        self.assertEqual([e['name'] for e in trace_json['traceEvents']],
+                         ['tool', 'stage'])
+
+        stats = pstats.Stats(str(cprofile))
+        self.assertTrue(any(func[2] == '_spin' for func in stats.stats))
+
+        # Stopping again does nothing.
+        report.unlink()
+        profiling.stop()
+        self.assertFalse(report.exists())
+
+    def test_start_report_only(self):
+        report = self.tmp_dir / 'report.json'
+        self.assertTrue(profiling.start('tool', str(report)))
+        profiling.stop()
+        self.assertTrue(report.exists())
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['report.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
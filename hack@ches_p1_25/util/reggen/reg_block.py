@@ -581,6 +581,10 @@ class RegBlock:
                                   'one alert event of this kind.'), 'wo',
                                  'hro', True, [])
 
+    def get_addrsep(self) -> int:
+        '''Return the number of bytes between consecutive register offsets'''
+        return self._addrsep
+
     def get_addr_width(self) -> int:
         '''Calculate the number of bits to address every byte of the block'''
         return (self.offset - 1).bit_length()
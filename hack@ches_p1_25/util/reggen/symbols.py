@@ -0,0 +1,97 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+'''A symbol table shared by the C, Rust and Tock header generators
+
+The header generators derive the same names and numbers from each register:
+the upper-case define name of the register, of its fields and of their enum
+values, the masks and offsets of the fields and the first line of the
+description. The functions here compute these once per process and intern
+the names, so generating several headers (or the headers of many blocks that
+share names) in one process does the work once.
+'''
+
+import sys
+import textwrap
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from reggen.register import Register
+
+
+@lru_cache(maxsize=None)
+def as_define(s: str) -> str:
+    '''Converts s to upper case, replacing other characters than letters and
+    digits with underscores.'''
+    return sys.intern(''.join(ch if ch.isalnum() else '_'
+                              for ch in s.upper()))
+
+
+def first_line(s: Optional[str]) -> Optional[str]:
+    '''Returns the first line of a multi-line string
+
+    Returns s itself if it is empty or None.
+    '''
+    return s.splitlines()[0] if s else s
+
+
+@lru_cache(maxsize=None)
+def wrap_comment(s: str, width: int, prefix: str) -> str:
+    '''Wraps s to a comment of the given line width, starting with prefix
+
+    Returns the wrapped string, including its trailing newline.
+    '''
+    return '\n'.join(
+        textwrap.wrap(s,
+                      width=width,
+                      initial_indent=prefix,
+                      subsequent_indent=prefix)) + '\n'
+
+
+class EnumSymbol(NamedTuple):
+    define: str
+    value: int
+
+
+class FieldSymbol(NamedTuple):
+    '''The symbols of a field
+
+    define is the define name of the register followed by the name of the
+    field. mask is the mask of the field, shifted down to bit 0.
+    '''
+    define: str
+    lsb: int
+    width: int
+    mask: int
+    enums: Optional[Tuple[EnumSymbol, ...]]
+
+
+class RegisterSymbols(NamedTuple):
+    '''The symbols of a register
+
+    define is the define name of the register (<component>_<register>) and
+    desc the first line of its description.
+    '''
+    define: str
+    offset: int
+    resval: int
+    desc: str
+    fields: Tuple[FieldSymbol, ...]
+
+
+@lru_cache(maxsize=None)
+def register_symbols(reg: Register, component: str) -> RegisterSymbols:
+    '''Returns the symbols of a register of the given component (block)'''
+    define = as_define(component + '_' + reg.name)
+    fields = []
+    for field in reg.fields:
+        enums = None
+        if field.enum is not None:
+            enums = tuple(EnumSymbol(as_define(enum.name), enum.value)
+                          for enum in field.enum)
+        fields.append(
+            FieldSymbol(sys.intern(define + '_' + as_define(field.name)),
+                        field.bits.lsb, field.bits.width(),
+                        field.bits.bitmask() >> field.bits.lsb, enums))
+    return RegisterSymbols(define, reg.offset, reg.resval,
+                           first_line(reg.desc), tuple(fields))
@@ -0,0 +1,187 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+'''Loading Mako templates, with an on-disk cache of the compiled templates
+
+Mako compiles each template to a Python module before rendering it. By
+default, this happens in memory each time a template is loaded, which is
+repeated in every process that runs reggen, topgen or ipgen. The loaders in
+this module write the compiled modules to the "mako" subdirectory of reggen's
+cache directory (see reggen.lib.cache_dir()), named after a digest of the
+template's content and compile options, so that the compilation is skipped
+when the same template is loaded again.
+
+Loaded templates are also kept in memory, so that rendering many blocks or
+interfaces with the same template in one process loads it only once.
+'''
+
+import hashlib
+import logging as log
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import mako  # type: ignore
+from mako import exceptions  # type: ignore
+from mako.lookup import TemplateLookup  # type: ignore
+from mako.template import Template  # type: ignore
+
+from reggen.incremental import write_if_changed
+from reggen.lib import cache_dir
+
+# Loaded templates, keyed by path, file status and compile options.
+_templates: Dict[Tuple[str, int, int, str], Template] = {}
+
+# Template lookups, keyed by directories and compile options.
+_lookups: Dict[Tuple[Tuple[str, ...], str], TemplateLookup] = {}
+
+
+def _file_status(path: str) -> Tuple[int, int]:
+    status = os.stat(path)
+    return (status.st_mtime_ns, status.st_size)
+
+
+class _Lookup(TemplateLookup):
+    '''A TemplateLookup that reloads a template whenever its file changes.
+
+    Mako's own check (with filesystem_checks) compares the modification time
+    of the file, in whole seconds, with the time the template was compiled.
+    This misses a change in the same second as the last load, and always
+    reloads templates whose compiled module comes from the cache and is older
+    than the file. So this lookup disables it, and compares the status of the
+    file with its status when the template was loaded instead.
+    '''
+
+    def __init__(self, **options: object) -> None:
+        super().__init__(filesystem_checks=False, **options)
+        self._status: Dict[str, Tuple[int, int]] = {}
+
+    def get_template(self, uri: str) -> Template:
+        template = super().get_template(uri)
+        if template.filename is None:
+            return template
+
+        try:
+            status = _file_status(template.filename)
+        except OSError as err:
+            raise exceptions.TemplateLookupException(
+                "Can't locate template for uri %r" % uri) from err
+        if self._status.setdefault(uri, status) == status:
+            return template
+
+        # The file changed since the template was loaded: load it again, as
+        # the TemplateLookup does, and replace it in the lookup.
+        module_filename = None
+        if self.modulename_callable is not None:
+            module_filename = self.modulename_callable(template.filename, uri)
+        template = Template(uri=uri,
+                            filename=template.filename,
+                            lookup=self,
+                            module_filename=module_filename,
+                            **self.template_args)
+        self.put_template(uri, template)
+        self._status[uri] = status
+        return template
+
+
+def _module_directory() -> Optional[str]:
+    '''Returns the directory of the compiled templates, or None if disabled.'''
+    directory = cache_dir()
+    if directory is None:
+        return None
+    path = directory / 'mako'
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError as err:
+        log.debug('Not caching compiled templates in %s: %s', path, err)
+        return None
+    return str(path)
+
+
+def _options_key(options: Dict[str, object]) -> str:
+    return repr(sorted(options.items()))
+
+
+def _module_filename(module_directory: str, filename: str, uri: str,
+                     options_key: str) -> str:
+    '''Returns the path of the compiled module of a template.
+
+    The name of the module depends on the content of the template (rather
+    than on its modification time, as Mako's default naming does), its URI
+    (which is compiled into the module) and the compile options.
+    '''
+    h = hashlib.sha256()
+    h.update(repr((mako.__version__, uri, options_key)).encode('utf-8'))
+    with open(filename, 'rb') as handle:
+        h.update(handle.read())
+    name = '{}.{}.py'.format(Path(filename).name, h.hexdigest()[:32])
+    return os.path.join(module_directory, name)
+
+
+def get_template(filename: str, **options: object) -> Template:
+    '''Returns the template in the given file.
+
+    options are passed on to Mako's Template (e.g. strict_undefined=True).
+    '''
+    path = os.path.abspath(filename)
+    options_key = _options_key(options)
+    key = (path, *_file_status(path), options_key)
+    template = _templates.get(key)
+    if template is not None:
+        return template
+
+    module_directory = _module_directory()
+    if module_directory is not None:
+        options['module_directory'] = module_directory
+        options['module_filename'] = _module_filename(module_directory, path,
+                                                      path, options_key)
+    template = Template(filename=path, **options)
+    _templates[key] = template
+    return template
+
+
+def get_lookup(directories: Iterable[str],
+               **options: object) -> TemplateLookup:
+    '''Returns a template lookup searching the given directories.
+
+    The lookup is shared by all callers that use the same directories and
+    options, so each template is loaded once per process. options are passed
+    on to Mako's TemplateLookup.
+    '''
+    directories = tuple(str(d) for d in directories)
+    options_key = _options_key(options)
+    key = (directories, options_key)
+    lookup = _lookups.get(key)
+    if lookup is not None:
+        return lookup
+
+    module_directory = _module_directory()
+    if module_directory is not None:
+        options['module_directory'] = module_directory
+        options['modulename_callable'] = (
+            lambda filename, uri: _module_filename(module_directory, filename,
+                                                   uri, options_key))
+    lookup = _Lookup(directories=list(directories), **options)
+    _lookups[key] = lookup
+    return lookup
+
+
+def render_many(template: Template,
+                jobs: Iterable[Tuple[str, Dict[str, object]]]) -> int:
+    '''Renders a template several times, writing each result to a file.
+
+    jobs is an iterable of pairs (path, args): the template is rendered with
+    the keyword arguments in args and the result is written to path (unless
+    the file already has that content).
+
+    Returns 0 on success. If rendering fails, logs the template error and
+    returns 1 without rendering the remaining jobs.
+    '''
+    for path, args in jobs:
+        try:
+            text = template.render(**args)
+        except:  # noqa F722 for template Exception handling
+            log.error(exceptions.text_error_template().render())
+            return 1
+        write_if_changed(path, text)
+    return 0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import os
+import tempfile
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from mako import exceptions  # type: ignore
+
+from reggen import template_loader
+
+
+class TestLookup(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.tpl_dir = self.tmp_dir / 'tpl'
+        self.tpl_dir.mkdir()
+        self.cache_dir = self.tmp_dir / 'cache'
+        env = unittest.mock.patch.dict(
+            os.environ, {'REGGEN_CACHE_DIR': str(self.cache_dir)})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _write(self, name, text, mtime=None):
+        path = self.tpl_dir / name
+        path.write_text(text)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def _lookup(self):
+        return template_loader.get_lookup([self.tpl_dir],
+                                          strict_undefined=True)
+
+    def test_shared(self):
+        self.assertIs(self._lookup(), self._lookup())
+        self.assertIsNot(self._lookup(),
+                         template_loader.get_lookup([self.tpl_dir]))
+
+    def test_reload(self):
+        self._write('part.tpl', 'a=${a}', 1000000000)
+        self._write('top.tpl', '<%include file="part.tpl"/>!')
+        lookup = self._lookup()
+        template = lookup.get_template('top.tpl')
+        self.assertEqual(template.render(a=1), 'a=1!')
+        self.assertIs(lookup.get_template('top.tpl'), template)
+        # The compiled modules are cached.
+        self.assertEqual(len(list((self.cache_dir / 'mako').glob('*.py'))),
+                         2)
+
+        # A change in the same second as the last one is noticed, also in an
+        # included template.
+        self._write('part.tpl', 'a is ${a}', 1000000000)
+        self.assertEqual(lookup.get_template('top.tpl').render(a=1),
+                         'a is 1!')
+        self._write('top.tpl', '<%include file="part.tpl"/>?')
+        template = lookup.get_template('top.tpl')
+        self.assertEqual(template.render(a=2), 'a is 2?')
+        self.assertIs(lookup.get_template('top.tpl'), template)
+
+        # The lookup options apply to reloaded templates.
+        with self.assertRaises(NameError):
+            template.render()
+
+    def test_removed(self):
+        path = self._write('top.tpl', 'top')
+        lookup = self._lookup()
+        self.assertEqual(lookup.get_template('top.tpl').render(), 'top')
+        path.unlink()
+        with self.assertRaises(exceptions.TemplateLookupException):
+            lookup.get_template('top.tpl')
+        with self.assertRaises(exceptions.TopLevelLookupException):
+            lookup.get_template('missing.tpl')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,15 +6,20 @@ r"""Command-line tool to validate and convert register hjson
 
 """
 import argparse
+import io
 import logging as log
 import re
 import sys
+import time
 from pathlib import Path
+from typing import List, Optional, Tuple
 
 from reggen import (
-    gen_cfg_md, gen_cheader, gen_dv, gen_fpv, gen_md, gen_html, gen_json, gen_rtl,
-    gen_rust, gen_sec_cm_testplan, gen_selfdoc, gen_tock, version,
+    gen_cfg_md, gen_cheader, gen_dv, gen_fpv, gen_headers, gen_md, gen_html,
+    gen_json, gen_rtl, gen_rust, gen_sec_cm_testplan, gen_selfdoc, gen_tock,
+    version,
 )
+from reggen import incremental, profiling
 from reggen.ip_block import IpBlock
 
 import version_file
@@ -24,6 +29,7 @@ DESC = """regtool, generate register info from Hjson source"""
 USAGE = '''
   regtool [options]
   regtool [options] <input>
+  regtool [options] <input> [<input> ...]
   regtool (-h | --help)
   regtool (-V | --version)
 '''
@@ -38,11 +44,13 @@ def main():
         usage=USAGE,
         description=DESC)
     parser.add_argument('input',
-                        nargs='?',
+                        nargs='*',
                         metavar='file',
                         type=argparse.FileType('r'),
-                        default=sys.stdin,
-                        help='input file in Hjson type')
+                        default=[sys.stdin],
+                        help='input file in Hjson type. Formats that write '
+                        'to an output directory (e.g. -r) accept several '
+                        'input files, which are generated in one process.')
     parser.add_argument('-d',
                         action='store_true',
                         help='Output register documentation (markdown)')
@@ -67,6 +75,11 @@ def main():
     parser.add_argument('--tock',
                         action='store_true',
                         help='Output Tock constants')
+    parser.add_argument('--headers',
+                        action='store_true',
+                        help='Output C defines, Rust constants and Tock '
+                        'constants (as -D, -R and --tock) for each input file '
+                        'to --outdir')
     parser.add_argument('--interfaces',
                         action='store_true',
                         help='Output interfaces documentation (markdown)')
@@ -103,9 +116,10 @@ def main():
         'the register models are derived.')
     parser.add_argument('--outfile',
                         '-o',
-                        type=argparse.FileType('w'),
-                        default=sys.stdout,
-                        help='Target filename for json, html, gfm.')
+                        default=None,
+                        help='Target filename for json, html, gfm. The file '
+                        'is only written if its content changes. Writes to '
+                        'stdout if not given or if it is -.')
     parser.add_argument('--verbose',
                         '-v',
                         action='store_true',
@@ -138,6 +152,16 @@ def main():
                         help='''Regblock node to generate.
                                 By default, generate for all nodes.
                                 ''')
+    parser.add_argument('--manifest',
+                        metavar='FILE',
+                        default=None,
+                        help='Generate incrementally: record the digests of '
+                        'the inputs and outputs of each output in FILE, and '
+                        'skip outputs whose inputs have not changed since.')
+    parser.add_argument('--timings',
+                        action='store_true',
+                        help='Print the time taken by each output to stderr.')
+    profiling.add_arguments(parser)
     parser.add_argument(
         '--version-stamp',
         type=str,
@@ -147,6 +171,10 @@ def main():
 
     args = parser.parse_args()
 
+    # Like for argparse.FileType, '-' stands for stdout.
+    if args.outfile == '-':
+        args.outfile = None
+
     if args.version:
         version.show_and_exit(__file__, ["Hjson", "Mako"])
 
@@ -158,6 +186,10 @@ def main():
     else:
         log.basicConfig(format="%(levelname)s: %(message)s")
 
+    # Time loading and generating each input file (written at exit, see
+    # reggen.profiling).
+    profiling.start_from_args('regtool', args)
+
     # Entries are triples of the form (arg, (fmt, dirspec)).
     #
     # arg is the name of the argument that selects the format. fmt is the
@@ -170,6 +202,7 @@ def main():
                      ('f', ('fpv', 'fpv/vip')), ('cdefines', ('cdh', None)),
                      ('sec_cm_testplan', ('sec_cm_testplan', 'data')),
                      ('rust', ('rs', None)), ('tock', ('trs', None)),
+                     ('headers', ('headers', '')),
                      ('interfaces', ('interfaces', None)),
                      ('doc_html_old', ('doc_html_old', None))]
     fmt = None
@@ -183,8 +216,11 @@ def main():
             fmt, dirspec = spec
     if fmt is None:
         fmt = 'hjson'
+    if fmt == 'headers' and args.outdir is None:
+        log.error('The headers format needs an output directory (--outdir).')
+        sys.exit(1)
 
-    infile = args.input
+    infiles = args.input
 
     # Split parameters into key=value pairs.
     raw_params = args.param.split(';') if args.param else []
@@ -197,123 +233,220 @@ def main():
                              'param=value.'.format(idx, raw_param))
         params.append((tokens[0], tokens[1]))
 
-    # Define either outfile or outdir (but not both), depending on the output
-    # format.
-    outfile = None
-    outdir = None
+    # Use either an output file or output directories (but not both),
+    # depending on the output format. There is one output directory per input
+    # file.
+    outdirs = []
     if dirspec is None:
         if args.outdir is not None:
             log.error('The {} format expects an output file, '
                       'not an output directory.'.format(fmt))
             sys.exit(1)
-
-        outfile = args.outfile
+        if len(infiles) > 1:
+            log.error('The {} format expects a single input file.'.format(fmt))
+            sys.exit(1)
     else:
-        if args.outfile is not sys.stdout:
+        if args.outfile is not None:
             log.error('The {} format expects an output directory, '
                       'not an output file.'.format(fmt))
             sys.exit(1)
 
-        if args.outdir is not None:
-            outdir = args.outdir
-        elif infile is not sys.stdin:
-            outdir = str(Path(infile.name).parents[1].joinpath(dirspec))
-        else:
-            # We're using sys.stdin, so can't infer an output directory name
-            log.error(
-                'The {} format writes to an output directory, which '
-                'cannot be inferred automatically if the input comes '
-                'from stdin. Use --outdir to specify it manually.'.format(
-                    fmt))
-            sys.exit(1)
+        for infile in infiles:
+            if args.outdir is not None:
+                outdirs.append(args.outdir)
+            elif infile is not sys.stdin:
+                outdirs.append(
+                    str(Path(infile.name).parents[1].joinpath(dirspec)))
+            else:
+                # We're using sys.stdin, so can't infer an output directory
+                # name
+                log.error(
+                    'The {} format writes to an output directory, which '
+                    'cannot be inferred automatically if the input comes '
+                    'from stdin. Use --outdir to specify it manually.'.format(
+                        fmt))
+                sys.exit(1)
 
     # Extract version stamp from file
     version_stamp = version_file.VersionInformation(args.version_stamp)
 
     if fmt == 'doc':
-        with outfile:
-            gen_selfdoc.document(outfile)
+        outstr = io.StringIO()
+        gen_selfdoc.document(outstr)
+        write_output(args.outfile, outstr.getvalue())
         exit(0)
 
-    srcfull = infile.read()
-
-    try:
-        obj = IpBlock.from_text(srcfull, params, infile.name, args.node)
-    except ValueError as err:
-        log.error(str(err))
-        exit(1)
-
     # Parse and validate alias register definitions (this ensures that the
     # structure of the original register node and the alias register file is
     # identical).
     if args.alias is not None:
-        try:
-            obj.alias_from_path(args.scrub, args.alias)
-        except ValueError as err:
-            log.error(str(err))
-            exit(1)
+        if len(infiles) > 1:
+            log.error('The --alias argument expects a single input file.')
+            sys.exit(1)
+        alias_paths = [(args.scrub, args.alias)]
+        alias_text = args.alias.read_text(encoding='utf-8')
     else:
+        alias_paths = []
+        alias_text = None
         if args.scrub:
             raise ValueError('The --scrub argument is only meaningful in '
                              'combination with the --alias argument')
 
-    if args.novalidate:
-        with outfile:
-            gen_json.gen_json(obj, outfile, fmt)
-            outfile.write('\n')
+    # Everything other than the input file that determines the outputs.
+    common_inputs = [
+        fmt, alias_text, args.scrub, params, args.node, args.novalidate,
+        args.dv_base_names
+    ]
+    if fmt in ['trs', 'headers']:
+        common_inputs.append(version_stamp.version_stamp)
+
+    # Each input file gives one output: a set of files in an output directory
+    # or a single file (or stdout).
+    if dirspec is not None and not args.novalidate:
+        dests = outdirs
     else:
-        if fmt == 'rtl':
-            return gen_rtl.gen_rtl(obj, outdir)
-        if fmt == 'sec_cm_testplan':
-            return gen_sec_cm_testplan.gen_sec_cm_testplan(obj, outdir)
-        if fmt == 'dv':
-            return gen_dv.gen_dv(obj, args.dv_base_names, outdir)
-        if fmt == 'fpv':
-            return gen_fpv.gen_fpv(obj, outdir)
-        src_lic = None
-        src_copy = ''
-        found_spdx = None
-        found_lunder = None
-        copy = re.compile(r'.*(copyright.*)|(.*\(c\).*)', re.IGNORECASE)
-        spdx = re.compile(r'.*(SPDX-License-Identifier:.+)')
-        lunder = re.compile(r'.*(Licensed under.+)', re.IGNORECASE)
-        for line in srcfull.splitlines():
-            mat = copy.match(line)
-            if mat is not None:
-                src_copy += mat.group(1)
-            mat = spdx.match(line)
-            if mat is not None:
-                found_spdx = mat.group(1)
-            mat = lunder.match(line)
-            if mat is not None:
-                found_lunder = mat.group(1)
-        if found_lunder:
-            src_lic = found_lunder
-        if found_spdx:
-            src_lic += '\n' + found_spdx
-
-        with outfile:
-            if fmt == 'registers':
-                return gen_md.gen_md(obj, outfile)
-            elif fmt == 'interfaces':
-                # Assumes the registers will be in a file called `registers.md`
-                # and within the same location as the output's destination.
-                # Exposing this as an option would nice to do.
-                return gen_cfg_md.gen_cfg_md(obj, outfile, "registers.md")
-            elif fmt == 'doc_html_old':
-                return gen_html.gen_html(obj, outfile)
-            elif fmt == 'cdh':
-                return gen_cheader.gen_cdefines(obj, outfile, src_lic,
-                                                src_copy)
-            elif fmt == 'rs':
-                return gen_rust.gen_rust(obj, outfile, src_lic, src_copy)
-            elif fmt == 'trs':
-                return gen_tock.gen_tock(obj, outfile, infile.name, src_lic,
-                                         src_copy, version_stamp)
+        dests = [args.outfile]
+
+    manifest = incremental.Manifest(args.manifest)
+    timings = []
+    ret = 0
+    for infile, dest in zip(infiles, dests):
+        start = time.perf_counter()
+        srcfull = infile.read()
+
+        key = '{} {} -> {}'.format(fmt, infile.name, dest or '<stdout>')
+        inputs_digest = incremental.digest_inputs(
+            common_inputs + [infile.name, srcfull])
+        # Output to stdout is never up-to-date.
+        if dest is not None and manifest.is_up_to_date(key, inputs_digest):
+            log.info('Skipping up-to-date output %s', dest)
+            timings.append((time.perf_counter() - start, 'up-to-date', key))
+            continue
+
+        try:
+            with profiling.timed(infile.name, 'load'):
+                obj = IpBlock.from_text(srcfull, params, infile.name,
+                                        args.node, alias_paths)
+        except ValueError as err:
+            log.error(str(err))
+            exit(1)
+
+        with incremental.track_outputs() as files, \
+                profiling.timed(infile.name, fmt):
+            if dirspec is not None and not args.novalidate:
+                ret = gen_dir_output(fmt, obj, srcfull, infile.name, dest,
+                                     version_stamp, args.dv_base_names)
             else:
-                return gen_json.gen_json(obj, outfile, fmt)
+                ret = gen_file_output(fmt, obj, srcfull, infile.name, dest,
+                                      version_stamp, args.novalidate)
+        if ret:
+            break
+
+        if dest is not None:
+            manifest.record(key, inputs_digest, files)
+        timings.append((time.perf_counter() - start, 'generated', key))
+
+    manifest.save()
+
+    if args.timings:
+        for seconds, status, key in timings:
+            print('{:8.3f}s {:<11} {}'.format(seconds, status, key),
+                  file=sys.stderr)
+
+    return ret
+
+
+def write_output(outfile: Optional[str], text: str) -> None:
+    '''Writes text to outfile (if it differs) or to stdout if it is None.'''
+    if outfile is None:
+        sys.stdout.write(text)
+    else:
+        incremental.write_if_changed(outfile, text)
+
+
+def get_src_license(srcfull: str) -> Tuple[Optional[str], str]:
+    '''Returns the license and copyright lines of an Hjson source.'''
+    src_lic = None
+    src_copy = ''
+    found_spdx = None
+    found_lunder = None
+    copy = re.compile(r'.*(copyright.*)|(.*\(c\).*)', re.IGNORECASE)
+    spdx = re.compile(r'.*(SPDX-License-Identifier:.+)')
+    lunder = re.compile(r'.*(Licensed under.+)', re.IGNORECASE)
+    for line in srcfull.splitlines():
+        mat = copy.match(line)
+        if mat is not None:
+            src_copy += mat.group(1)
+        mat = spdx.match(line)
+        if mat is not None:
+            found_spdx = mat.group(1)
+        mat = lunder.match(line)
+        if mat is not None:
+            found_lunder = mat.group(1)
+    if found_lunder:
+        src_lic = found_lunder
+    if found_spdx:
+        src_lic += '\n' + found_spdx
+    return src_lic, src_copy
+
+
+def gen_dir_output(fmt: str, obj: IpBlock, srcfull: str, src_name: str,
+                   outdir: str, version_stamp: version_file.VersionInformation,
+                   dv_base_names: Optional[List[str]]) -> int:
+    '''Generates an output format that writes to a directory.'''
+    if fmt == 'headers':
+        src_lic, src_copy = get_src_license(srcfull)
+        return gen_headers.gen_headers(obj, outdir, src_name, src_lic,
+                                       src_copy, version_stamp)
+    if fmt == 'rtl':
+        return gen_rtl.gen_rtl(obj, outdir)
+    if fmt == 'sec_cm_testplan':
+        return gen_sec_cm_testplan.gen_sec_cm_testplan(obj, outdir)
+    if fmt == 'dv':
+        return gen_dv.gen_dv(obj, dv_base_names, outdir)
+    assert fmt == 'fpv'
+    return gen_fpv.gen_fpv(obj, outdir)
+
+
+def gen_file_output(fmt: str, obj: IpBlock, srcfull: str, src_name: str,
+                    outfile: Optional[str],
+                    version_stamp: version_file.VersionInformation,
+                    novalidate: bool) -> int:
+    '''Generates an output format that writes a single file.
+
+    The file is only written if generation succeeds and its content changes.
+    '''
+    outstr = io.StringIO()
+    if novalidate:
+        gen_json.gen_json(obj, outstr, fmt)
+        outstr.write('\n')
+        write_output(outfile, outstr.getvalue())
+        return 0
+
+    src_lic, src_copy = get_src_license(srcfull)
+    if fmt == 'registers':
+        ret = gen_md.gen_md(obj, outstr)
+    elif fmt == 'interfaces':
+        # Assumes the registers will be in a file called `registers.md`
+        # and within the same location as the output's destination.
+        # Exposing this as an option would nice to do.
+        ret = gen_cfg_md.gen_cfg_md(obj, outstr, "registers.md")
+    elif fmt == 'doc_html_old':
+        ret = gen_html.gen_html(obj, outstr)
+    elif fmt == 'cdh':
+        ret = gen_cheader.gen_cdefines(obj, outstr, src_lic, src_copy)
+    elif fmt == 'rs':
+        ret = gen_rust.gen_rust(obj, outstr, src_lic, src_copy)
+    elif fmt == 'trs':
+        ret = gen_tock.gen_tock(obj, outstr, src_name, src_lic, src_copy,
+                                version_stamp)
+    else:
+        ret = gen_json.gen_json(obj, outstr, fmt)
 
-            outfile.write('\n')
+    if ret:
+        return ret
+    write_output(outfile, outstr.getvalue())
+    return 0
 
 
 if __name__ == '__main__':
@@ -9,9 +9,8 @@ import logging as log
 import sys
 from pathlib import Path
 
-import hjson
-
 import tlgen
+from reggen import hjson_loader, profiling
 
 
 def main():
@@ -38,6 +37,7 @@ def main():
         Additional path to generated rtl/ or dv/ folders: outdir/ip_path/rtl
         Only needed when there are multiple xbar in outdir''')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose')
+    profiling.add_arguments(parser)
 
     args = parser.parse_args()
 
@@ -46,6 +46,8 @@ def main():
     else:
         log.basicConfig(format="%(levelname)s: %(message)s")
 
+    profiling.start_from_args('tlgen', args)
+
     if args.doc:
         # Generate Doc and return
         sys.stdout.write(tlgen.selfdoc(heading=3, cmd='tlgen.py --doc'))
@@ -62,24 +64,29 @@ def main():
     # Load contents of top_cfg
     # Skip this part and use internal structure at this time
     try:
-        obj = hjson.load(args.topcfg, use_decimal=True)
+        with profiling.timed('load'):
+            obj = hjson_loader.load(args.topcfg, use_decimal=True)
     except ValueError:
         raise SystemExit(sys.exc_info()[1])
 
     log.info(obj)
 
-    xbar = tlgen.validate(obj)
+    with profiling.timed('validate'):
+        xbar = tlgen.validate(obj)
     if xbar is None:
         log.error("Validation failed for crossbar.")
         exit(1)
 
     xbar.ip_path = args.ip_path
 
-    if not tlgen.elaborate(xbar):
+    with profiling.timed('elaborate'):
+        elaborated = tlgen.elaborate(xbar)
+    if not elaborated:
         log.error("Elaboration failed." + repr(xbar))
 
     # Generate
-    results = tlgen.generate(xbar)
+    with profiling.timed('generate'):
+        results = tlgen.generate(xbar)
 
     dv_path = Path(args.outdir) / args.ip_path / 'dv/autogen'
     dv_path.mkdir(parents=True, exist_ok=True)
@@ -91,7 +98,8 @@ def main():
             fout.write(filecontent)
 
     # generate TB
-    tlgen.generate_tb(xbar, dv_path)
+    with profiling.timed('generate_tb'):
+        tlgen.generate_tb(xbar, dv_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,78 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+from bisect import bisect_left, bisect_right
+from typing import Generic, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class AddressMap(Generic[T]):
+    """An index of non-overlapping address ranges, sorted by base address.
+
+    Each range is inclusive, (base, limit), and has an owner (e.g. the name of
+    the device that decodes it). Since the ranges do not overlap, they are
+    sorted by their limits as well as by their bases, so that adding a range
+    and finding the owner of an address both take O(log n) comparisons.
+    """
+
+    def __init__(self) -> None:
+        self._bases: List[int] = []
+        self._entries: List[Tuple[int, int, T]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, T]]:
+        """Iterate over the ranges as (base, limit, owner), in address order."""
+        return iter(self._entries)
+
+    def overlap(self, base: int, limit: int) -> Optional[Tuple[int, int, T]]:
+        """Return a range that overlaps base..limit, or None if there is none.
+        """
+        # The range with the highest base not above limit is the only one
+        # that can overlap: any range before it ends before its base.
+        idx = bisect_right(self._bases, limit) - 1
+        if idx >= 0 and self._entries[idx][1] >= base:
+            return self._entries[idx]
+        return None
+
+    def add(self, base: int, limit: int, owner: T) -> None:
+        """Add the range base..limit, owned by owner.
+
+        Raises a ValueError if the range overlaps a range in the map.
+        """
+        assert base <= limit
+        other = self.overlap(base, limit)
+        if other is not None:
+            raise ValueError(
+                "Address range 0x{:x} - 0x{:x} of {} overlaps 0x{:x} - 0x{:x} "
+                "of {}.".format(base, limit, owner, other[0], other[1],
+                                other[2]))
+        idx = bisect_left(self._bases, base)
+        self._bases.insert(idx, base)
+        self._entries.insert(idx, (base, limit, owner))
+
+    def find(self, addr: int) -> Optional[Tuple[int, int, T]]:
+        """Return the range (base, limit, owner) containing addr, if any."""
+        return self.overlap(addr, addr)
+
+    def owner(self, addr: int) -> Optional[T]:
+        """Return the owner of the range containing addr, if any."""
+        entry = self.find(addr)
+        return None if entry is None else entry[2]
+
+    def has_base_near(self, addr: int, distance: int) -> bool:
+        """Return true if some range's base is less than distance from addr.
+
+        More precisely, if some base b satisfies addr - distance < b and
+        b <= addr + distance.
+        """
+        idx = bisect_right(self._bases, addr - distance)
+        return idx < len(self._bases) and self._bases[idx] <= addr + distance
+
+    def next_base(self, addr: int) -> Optional[int]:
+        """Return the lowest base address above addr, if any."""
+        idx = bisect_right(self._bases, addr)
+        return self._bases[idx] if idx < len(self._bases) else None
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import unittest
+
+from tlgen.addr_map import AddressMap
+
+
+class TestAddressMap(unittest.TestCase):
+
+    def setUp(self):
+        # Add the ranges out of order, with gaps between them.
+        self.addr_map = AddressMap()
+        self.addr_map.add(0x3000, 0x3fff, 'c')
+        self.addr_map.add(0x1000, 0x1fff, 'a')
+        self.addr_map.add(0x2000, 0x20ff, 'b')
+
+    def test_iter(self):
+        self.assertEqual(len(self.addr_map), 3)
+        self.assertEqual(list(self.addr_map),
+                         [(0x1000, 0x1fff, 'a'), (0x2000, 0x20ff, 'b'),
+                          (0x3000, 0x3fff, 'c')])
+
+    def test_overlap_rejected(self):
+        for base, limit, other in [(0x1000, 0x1fff, 'a'),
+                                   (0x0800, 0x1000, 'a'),
+                                   (0x1fff, 0x2000, 'b'),
+                                   (0x1800, 0x1800, 'a'),
+                                   (0x20ff, 0x2fff, 'b'),
+                                   (0x2100, 0x3000, 'c'),
+                                   (0x0000, 0xffff, 'c')]:
+            with self.subTest(base=hex(base), limit=hex(limit)):
+                self.assertEqual(self.addr_map.overlap(base, limit)[2], other)
+                with self.assertRaisesRegex(ValueError, 'overlaps'):
+                    self.addr_map.add(base, limit, 'x')
+        self.assertEqual(len(self.addr_map), 3)
+
+    def test_adjacent_ranges(self):
+        self.addr_map.add(0x2100, 0x2fff, 'd')
+        self.addr_map.add(0x0000, 0x0fff, 'e')
+        self.addr_map.add(0x4000, 0x4000, 'f')
+        self.assertEqual([owner for _, _, owner in self.addr_map],
+                         ['e', 'a', 'b', 'd', 'c', 'f'])
+
+    def test_find_at_boundaries(self):
+        for addr, owner in [(0x1000, 'a'), (0x1fff, 'a'), (0x2000, 'b'),
+                            (0x20ff, 'b'), (0x3000, 'c'), (0x3fff, 'c')]:
+            with self.subTest(addr=hex(addr)):
+                self.assertEqual(self.addr_map.owner(addr), owner)
+                self.assertEqual(self.addr_map.find(addr)[2], owner)
+
+    def test_find_in_gaps(self):
+        for addr in [0x0, 0x0fff, 0x2100, 0x2fff, 0x4000, 0xffffffff]:
+            with self.subTest(addr=hex(addr)):
+                self.assertIsNone(self.addr_map.find(addr))
+                self.assertIsNone(self.addr_map.owner(addr))
+                self.assertIsNone(self.addr_map.overlap(addr, addr))
+
+    def test_find_empty(self):
+        self.assertIsNone(AddressMap().find(0))
+        self.assertIsNone(AddressMap().next_base(0))
+
+    def test_has_base_near(self):
+        self.assertTrue(self.addr_map.has_base_near(0x2000, 1))
+        self.assertTrue(self.addr_map.has_base_near(0x1f00, 0x100))
+        self.assertFalse(self.addr_map.has_base_near(0x1eff, 0x100))
+        self.assertTrue(self.addr_map.has_base_near(0x20ff, 0x100))
+        self.assertFalse(self.addr_map.has_base_near(0x2100, 0x100))
+        self.assertFalse(self.addr_map.has_base_near(0x5000, 0x100))
+
+    def test_next_base(self):
+        self.assertEqual(self.addr_map.next_base(0), 0x1000)
+        self.assertEqual(self.addr_map.next_base(0x1000), 0x2000)
+        self.assertEqual(self.addr_map.next_base(0x2fff), 0x3000)
+        self.assertIsNone(self.addr_map.next_base(0x3000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,10 +3,11 @@
 # SPDX-License-Identifier: Apache-2.0
 import logging as log
 from functools import partial
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 from reggen.validate import check_bool, check_int, val_types
 
+from .addr_map import AddressMap
 from .item import Node, Host, Device, AsyncFifo, Socket1N, SocketM1
 from .lib import simplify_addr
 from .xbar import Xbar
@@ -226,29 +227,17 @@ def checkNameExist(name: str, xbar: Xbar) -> bool:
     return name.lower() in [x.name for x in xbar.nodes]
 
 
-def isOverlap(range1: Tuple[int, int], range2: Tuple[int, int]) -> bool:
-    return not (range2[1] < range1[0] or range2[0] > range1[1])
-
-
-def isNotMinSpacing(range1: Tuple[int, int], range2: Tuple[int, int]) -> bool:
-    return not (range2[0] < range1[0] - MIN_DEVICE_SPACING or
-                range2[0] >= range1[0] + MIN_DEVICE_SPACING)
-
-
 def isNotAligned(base: int) -> bool:
     return ((base & (MIN_DEVICE_SPACING - 1)) != 0)
 
 
-def checkAddressOverlap(addr: Tuple[int, int],
-                        ranges: List[Tuple[int, int]]) -> bool:
-    result = [x for x in ranges if isOverlap(x, addr)]
-    return len(result) != 0
+def checkAddressOverlap(addr: Tuple[int, int], ranges: AddressMap) -> bool:
+    return ranges.overlap(addr[0], addr[1]) is not None
 
 
-def checkAddressSpacing(addr: Tuple[int, int],
-                        ranges: List[Tuple[int, int]]) -> bool:
-    result = [x for x in ranges if isNotMinSpacing(x, addr)]
-    return len(result) != 0
+def checkAddressSpacing(addr: Tuple[int, int], ranges: AddressMap) -> bool:
+    # The bases of two ranges must be at least MIN_DEVICE_SPACING apart.
+    return ranges.has_base_near(addr[0], MIN_DEVICE_SPACING)
 
 
 # this returns 1 if the size mask overlapps with the address base
@@ -261,7 +250,7 @@ def validate(obj: Dict[Any, Any]) -> Optional[Xbar]:
     xbar.name = obj["name"].lower()
     xbar.clock = obj["clock"].lower()
     xbar.reset = obj["reset"].lower()
-    addr_ranges: List[Tuple[int, int]] = []
+    addr_ranges = xbar.addr_map
 
     # validate Hjson format first
     hjson_good = validate_hjson(obj)
@@ -345,7 +334,7 @@ def validate(obj: Dict[Any, Any]) -> Optional[Xbar]:
                         % (MIN_DEVICE_SPACING, addr_entry[0], addr_entry[1]))
                     raise SystemExit("Address overlapping error occurred")
 
-                addr_ranges.append(addr_entry)
+                addr_ranges.add(address_from, address_to, node.name)
                 node.addr_range.append(addr_entry)
 
         node.pipeline = False
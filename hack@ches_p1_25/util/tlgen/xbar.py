@@ -3,8 +3,9 @@
 # SPDX-License-Identifier: Apache-2.0
 
 import logging as log
-from typing import Any, List, Tuple
+from typing import Any, List, Optional, Tuple
 
+from .addr_map import AddressMap
 from .item import Edge, Node, Host, Device, AsyncFifo, Socket1N, SocketM1
 
 
@@ -22,6 +23,9 @@ class Xbar:
         self.clocks: List[Any] = []
         self.resets: List[Any] = []
 
+        # The address ranges of the devices, owned by the device names.
+        self.addr_map: AddressMap[str] = AddressMap()
+
     def get_node(self, node: str) -> Node:
         result = [x for x in self.nodes if x.name == node]
         if len(result) != 1:
@@ -29,6 +33,15 @@ class Xbar:
 
         return result[0]
 
+    def get_device_at(self, addr: int) -> Optional[Device]:
+        """Return the device whose address range contains addr, if any."""
+        name = self.addr_map.owner(addr)
+        if name is None:
+            return None
+        device = self.get_node(name)
+        assert isinstance(device, Device)
+        return device
+
     @property
     def hosts(self) -> List[Host]:
         return [x for x in self.nodes if isinstance(x, Host)]
@@ -6,6 +6,7 @@ r"""Top Module Generator
 """
 import argparse
 import logging as log
+import os
 import shutil
 import sys
 import tempfile
@@ -22,12 +23,13 @@ import version_file
 from ipgen import (IpBlockRenderer, IpConfig, IpDescriptionOnlyRenderer,
                    IpTemplate, TemplateRenderError)
 from mako import exceptions
-from mako.template import Template
-from reggen import access, gen_rtl, gen_sec_cm_testplan, window
+from reggen import (access, gen_rtl, gen_sec_cm_testplan, hjson_loader,
+                    profiling, window)
 from reggen.countermeasure import CounterMeasure
 from reggen.inter_signal import InterSignal
 from reggen.ip_block import IpBlock
 from reggen.lib import check_list
+from reggen.template_loader import get_template
 from topgen import get_hjsonobj_xbars
 from topgen import intermodule as im
 from topgen import lib as lib
@@ -39,6 +41,7 @@ from topgen.gen_top_docs import gen_top_docs
 from topgen.merge import connect_clocks, create_alert_lpgs, extract_clocks
 from topgen.resets import Resets
 from topgen.rust import TopGenRust
+from topgen.stages import Manifest, Stage, run_stages
 from topgen.top import Top
 
 # Common header for generated files
@@ -90,9 +93,74 @@ def ipgen_render(template_name: str, topname: str, params: Dict[str, object],
         sys.exit(1)
 
 
+def ipgen_render_desc(template_name: str, topname: str,
+                      params: Dict[str, object], out_path: Path) -> None:
+    """ Render only the IP description of an IP template using ipgen.
+
+    The description is written to where ipgen_render() puts it. This is all
+    that the generation passes before the last one need, since they only read
+    back the generated IP descriptions.
+
+    Aborts the program execution in case of an error.
+    """
+    module_name = params.get("module_instance_name", template_name)
+    top_name = f"top_{topname}"
+    instance_name = f"{top_name}_{module_name}"
+    ip_template = IpTemplate.from_template_path(SRCTREE_TOP / "hw" /
+                                                "ip_templates" / template_name)
+
+    params.update({"topname": topname})
+    try:
+        ip_config = IpConfig(ip_template.params, instance_name, params)
+        ip_desc = IpDescriptionOnlyRenderer(ip_template, ip_config).render()
+    except ValueError as e:
+        log.error(f"Unable to render IP template {template_name!r}: {str(e)}")
+        sys.exit(1)
+    except TemplateRenderError as e:
+        log.error(e.verbose_str())
+        sys.exit(1)
+
+    desc_path = (out_path / "ip_autogen" / module_name / "data" /
+                 f"{module_name}.hjson")
+    desc_path.parent.mkdir(parents=True, exist_ok=True)
+    desc_path.write_text(ip_desc)
+
+
+def ipgen_stage(template_name: str,
+                topname: str,
+                params: Dict[str, object],
+                out_path: Path,
+                desc_only: bool = False) -> Stage:
+    """ Return the stage rendering an IP template with ipgen.
+
+    If desc_only is set, the stage only renders the IP description (see
+    ipgen_render_desc()).
+    """
+    module_name = params.get("module_instance_name", template_name)
+    ip_path = out_path / "ip_autogen" / module_name
+    if desc_only:
+        return Stage(name=f"ipgen_desc:{module_name}",
+                     func=ipgen_render_desc,
+                     args=(template_name, topname, params, out_path),
+                     inputs=[
+                         SRCTREE_TOP / "hw" / "ip_templates" / template_name,
+                         topname, params
+                     ],
+                     outputs=[ip_path / "data" / f"{module_name}.hjson"])
+
+    return Stage(name=f"ipgen:{module_name}",
+                 func=ipgen_render,
+                 args=(template_name, topname, params, out_path),
+                 inputs=[
+                     SRCTREE_TOP / "hw" / "ip_templates" / template_name,
+                     topname, params
+                 ],
+                 outputs=[ip_path])
+
+
 def generate_top(top: Dict[str, object], name_to_block: Dict[str, IpBlock],
                  tpl_filename: str, **kwargs: Dict[str, object]) -> None:
-    top_tpl = Template(filename=tpl_filename)
+    top_tpl = get_template(tpl_filename)
 
     try:
         return top_tpl.render(top=top, name_to_block=name_to_block, **kwargs)
@@ -101,51 +169,76 @@ def generate_top(top: Dict[str, object], name_to_block: Dict[str, IpBlock],
         return ""
 
 
-def generate_xbars(top: Dict[str, object], out_path: Path) -> None:
-    top_name = "top_" + top["name"]
+def generate_xbar(obj: Dict[str, object], xbar: tlgen.Xbar, top_name: str,
+                  out_path: Path) -> None:
     gencmd = (f"// util/topgen.py -t hw/{top_name}/data/{top_name}.hjson "
               f"-o hw/{top_name}/\n\n")
 
-    for obj in top["xbar"]:
-        objname = obj["name"]
-        xbar_path = out_path / "ip" / f"xbar_{objname}" / "data" / "autogen"
-        xbar_path.mkdir(parents=True, exist_ok=True)
-        xbar = tlgen.validate(obj)
-        xbar.ip_path = "/".join(["hw", top_name, "ip", "{dut}"])
+    objname = obj["name"]
+    xbar_path = out_path / "ip" / f"xbar_{objname}" / "data" / "autogen"
+    xbar_path.mkdir(parents=True, exist_ok=True)
+    xbar.ip_path = "/".join(["hw", top_name, "ip", "{dut}"])
 
-        # Generate output of crossbar with complete fields
-        xbar_hjson_path = xbar_path / f"xbar_{xbar.name}.gen.hjson"
-        xbar_hjson_path.write_text(genhdr + gencmd +
-                                   hjson.dumps(obj, for_json=True) + '\n')
+    # Generate output of crossbar with complete fields
+    xbar_hjson_path = xbar_path / f"xbar_{xbar.name}.gen.hjson"
+    xbar_hjson_path.write_text(genhdr + gencmd +
+                               hjson.dumps(obj, for_json=True) + '\n')
 
-        if not tlgen.elaborate(xbar):
-            log.error("Elaboration failed." + repr(xbar))
+    if not tlgen.elaborate(xbar):
+        log.error("Elaboration failed." + repr(xbar))
 
-        try:
-            results = tlgen.generate(xbar, top_name)
-        except:  # noqa: E722
-            log.error(exceptions.text_error_template().render())
+    try:
+        results = tlgen.generate(xbar, top_name)
+    except:  # noqa: E722
+        log.error(exceptions.text_error_template().render())
 
-        ip_path = out_path / "ip" / f"xbar_{objname}"
+    ip_path = out_path / "ip" / f"xbar_{objname}"
 
-        for filename, filecontent in results:
-            filepath = ip_path / filename
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            with filepath.open(mode="w", encoding="UTF-8") as fout:
-                fout.write(filecontent)
+    for filename, filecontent in results:
+        filepath = ip_path / filename
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        with filepath.open(mode="w", encoding="UTF-8") as fout:
+            fout.write(filecontent)
 
-        dv_path = out_path / "ip" / f"xbar_{objname}" / "dv" / "autogen"
-        dv_path.mkdir(parents=True, exist_ok=True)
+    dv_path = out_path / "ip" / f"xbar_{objname}" / "dv" / "autogen"
+    dv_path.mkdir(parents=True, exist_ok=True)
 
-        # generate testbench for xbar
-        tlgen.generate_tb(xbar, dv_path, top_name)
+    # generate testbench for xbar
+    tlgen.generate_tb(xbar, dv_path, top_name)
+
+
+def generate_xbars(top: Dict[str, object], out_path: Path,
+                   manifest: Manifest, jobs: int) -> None:
+    top_name = "top_" + top["name"]
+
+    # Validating a crossbar completes its description (e.g. merges adjacent
+    # address ranges), which ends up in the top configuration. Do it here, as
+    # the stages may run in other processes, or not at all if up-to-date, and
+    # hand the validated crossbars to the stages.
+    xbars = [tlgen.validate(obj) for obj in top["xbar"]]
+
+    # The crossbars are independent of each other, so generate them in
+    # parallel.
+    stages = [
+        Stage(name=f"xbar:{obj['name']}",
+              func=generate_xbar,
+              args=(obj, xbar, top_name, out_path),
+              inputs=[obj, top_name],
+              outputs=[out_path / "ip" / f"xbar_{obj['name']}"])
+        for obj, xbar in zip(top["xbar"], xbars)
+    ]
+    run_stages(stages, manifest, jobs)
+
+    for obj in top["xbar"]:
+        objname = obj["name"]
+        ip_path = out_path / "ip" / f"xbar_{objname}"
 
         # Read back the comportable IP and amend to Xbar
         xbar_ipfile = ip_path / "data" / "autogen" / f"xbar_{objname}.hjson"
         with xbar_ipfile.open() as fxbar:
-            xbar_ipobj = hjson.load(fxbar,
-                                    use_decimal=True,
-                                    object_pairs_hook=OrderedDict)
+            xbar_ipobj = hjson_loader.load(fxbar,
+                                           use_decimal=True,
+                                           object_pairs_hook=OrderedDict)
 
             r_inter_signal_list = check_list(
                 xbar_ipobj.get("inter_signal_list", []),
@@ -157,7 +250,9 @@ def generate_xbars(top: Dict[str, object], out_path: Path) -> None:
             ]
 
 
-def generate_alert_handler(top: Dict[str, object], out_path: Path) -> None:
+def generate_alert_handler(top: Dict[str, object],
+                           out_path: Path,
+                           desc_only: bool = False) -> Stage:
     log.info("Generating alert_handler with ipgen")
     topname = top["name"]
 
@@ -210,10 +305,12 @@ def generate_alert_handler(top: Dict[str, object], out_path: Path) -> None:
         "lpg_map": lpg_map,
     }
 
-    ipgen_render("alert_handler", topname, params, out_path)
+    return ipgen_stage("alert_handler", topname, params, out_path, desc_only)
 
 
-def generate_plic(top: Dict[str, object], out_path: Path) -> None:
+def generate_plic(top: Dict[str, object],
+                  out_path: Path,
+                  desc_only: bool = False) -> Stage:
     log.info("Generating rv_plic with ipgen")
     topname = top["name"]
     params = {}
@@ -228,7 +325,7 @@ def generate_plic(top: Dict[str, object], out_path: Path) -> None:
     params["target"] = int(top["num_cores"], 0) if "num_cores" in top else 1
     params["prio"] = 3
 
-    ipgen_render("rv_plic", topname, params, out_path)
+    return ipgen_stage("rv_plic", topname, params, out_path, desc_only)
 
 
 # TODO(lowrisc/opentitan#8440): For templated IPs we have to search
@@ -254,7 +351,32 @@ def generate_regfile_from_path(hjson_path: Path,
         sys.exit(1)
 
 
-def generate_pinmux(top: Dict[str, object], out_path: Path) -> None:
+def regfile_stage(hjson_path: Path,
+                  generated_rtl_path: Path,
+                  original_rtl_path: Path = None) -> Stage:
+    """Return the stage running generate_regfile_from_path()."""
+    inputs = [hjson_path]
+    if original_rtl_path is not None:
+        inputs.append(original_rtl_path)
+
+    # The security countermeasures testplan is only written if it does not
+    # exist yet, else it is checked against the Hjson. Treating it as an output
+    # reruns the check whenever the testplan is edited.
+    sec_cm_testplan_path = (hjson_path.parent /
+                            f"{hjson_path.stem.lower()}_sec_cm_testplan.hjson")
+
+    return Stage(name=f"reggen:{hjson_path}",
+                 func=generate_regfile_from_path,
+                 args=(hjson_path, generated_rtl_path, original_rtl_path),
+                 inputs=inputs,
+                 outputs=[generated_rtl_path, sec_cm_testplan_path])
+
+
+def generate_pinmux(top: Dict[str, object], out_path: Path) -> Optional[Stage]:
+    """Generate the pinmux Hjson.
+
+    Returns the stage generating the pinmux register file, or None on error.
+    """
 
     topname = top["name"]
     pinmux = top["pinmux"]
@@ -273,7 +395,7 @@ def generate_pinmux(top: Dict[str, object], out_path: Path) -> None:
         # TODO: add support for no wakeup counter case
         log.error("Topgen does currently not support generation of a top " +
                   "without DIOs.")
-        return
+        return None
 
     if "wkup_cnt_width" in pinmux:
         wkup_cnt_width = pinmux["wkup_cnt_width"]
@@ -282,7 +404,7 @@ def generate_pinmux(top: Dict[str, object], out_path: Path) -> None:
 
     if wkup_cnt_width <= 1:
         log.error("Wakeup counter width must be greater equal 2.")
-        return
+        return None
 
     # MIO Pads
     n_mio_pads = pinmux["io_counts"]["muxed"]["pads"]
@@ -341,39 +463,40 @@ def generate_pinmux(top: Dict[str, object], out_path: Path) -> None:
     hjson_gen_path = data_path / "pinmux.hjson"
 
     out = StringIO()
-    with tpl_path.open(mode="r", encoding="UTF-8") as fin:
-        hjson_tpl = Template(fin.read())
-        try:
-            out = hjson_tpl.render(
-                n_mio_periph_in=n_mio_periph_in,
-                n_mio_periph_out=n_mio_periph_out,
-                n_mio_pads=n_mio_pads,
-                # each DIO has in, out and oe wires
-                # some of these have to be tied off in the
-                # top, depending on the type.
-                n_dio_periph_in=n_dio_pads,
-                n_dio_periph_out=n_dio_pads,
-                n_dio_pads=n_dio_pads,
-                attr_dw=attr_dw,
-                n_wkup_detect=num_wkup_detect,
-                wkup_cnt_width=wkup_cnt_width)
-        except:  # noqa: E722
-            log.error(exceptions.text_error_template().render())
-        log.info("PINMUX HJSON: %s" % out)
+    hjson_tpl = get_template(str(tpl_path))
+    try:
+        out = hjson_tpl.render(
+            n_mio_periph_in=n_mio_periph_in,
+            n_mio_periph_out=n_mio_periph_out,
+            n_mio_pads=n_mio_pads,
+            # each DIO has in, out and oe wires
+            # some of these have to be tied off in the
+            # top, depending on the type.
+            n_dio_periph_in=n_dio_pads,
+            n_dio_periph_out=n_dio_pads,
+            n_dio_pads=n_dio_pads,
+            attr_dw=attr_dw,
+            n_wkup_detect=num_wkup_detect,
+            wkup_cnt_width=wkup_cnt_width)
+    except:  # noqa: E722
+        log.error(exceptions.text_error_template().render())
+    log.info("PINMUX HJSON: %s" % out)
 
     if out == "":
         log.error("Cannot generate pinmux HJSON")
-        return
+        return None
 
     with hjson_gen_path.open(mode="w", encoding="UTF-8") as fout:
         fout.write(genhdr + gencmd + out)
 
     # Generate reg file
-    generate_regfile_from_path(hjson_gen_path, rtl_path, original_rtl_path)
+    return regfile_stage(hjson_gen_path, rtl_path, original_rtl_path)
 
 
 # generate clkmgr with ipgen
-def generate_clkmgr(topcfg: Dict[str, object], out_path: Path) -> None:
+def generate_clkmgr(topcfg: Dict[str, object],
+                    out_path: Path,
+                    desc_only: bool = False) -> Stage:
     log.info("Generating clkmgr with ipgen")
     topname = topcfg["name"]
 
@@ -400,10 +523,12 @@ def generate_clkmgr(topcfg: Dict[str, object], out_path: Path) -> None:
         "number_of_clock_groups": len(clocks.groups)
     }
 
-    ipgen_render("clkmgr", topname, params, out_path)
+    return ipgen_stage("clkmgr", topname, params, out_path, desc_only)
 
 
-def generate_pwrmgr(top: Dict[str, object], out_path: Path) -> None:
+def generate_pwrmgr(top: Dict[str, object],
+                    out_path: Path,
+                    desc_only: bool = False) -> Stage:
     log.info("Generating pwrmgr with ipgen")
     topname = top["name"]
 
@@ -432,7 +557,7 @@ def generate_pwrmgr(top: Dict[str, object], out_path: Path) -> None:
         "NumRstReqs": n_rstreqs
     }
 
-    ipgen_render("pwrmgr", topname, params, out_path)
+    return ipgen_stage("pwrmgr", topname, params, out_path, desc_only)
 
 
 def get_rst_ni(top: Dict[str, object]) -> object:
@@ -441,7 +566,9 @@ def get_rst_ni(top: Dict[str, object]) -> object:
 
 
 # generate rstmgr with ipgen
-def generate_rstmgr(topcfg: Dict[str, object], out_path: Path) -> None:
+def generate_rstmgr(topcfg: Dict[str, object],
+                    out_path: Path,
+                    desc_only: bool = False) -> Stage:
     log.info("Generating rstmgr with ipgen")
     topname = topcfg["name"]
 
@@ -481,11 +608,13 @@ def generate_rstmgr(topcfg: Dict[str, object], out_path: Path) -> None:
         "export_rsts": topcfg["exported_rsts"],
     }
 
-    ipgen_render("rstmgr", topname, params, out_path)
+    return ipgen_stage("rstmgr", topname, params, out_path, desc_only)
 
 
 # generate flash_ctrl with ipgen
-def generate_flash(topcfg: Dict[str, object], out_path: Path) -> None:
+def generate_flash(topcfg: Dict[str, object],
+                   out_path: Path,
+                   desc_only: bool = False) -> Optional[Stage]:
     log.info("Generating flash_ctrl with ipgen")
     topname = topcfg["name"]
 
@@ -495,7 +624,7 @@ def generate_flash(topcfg: Dict[str, object], out_path: Path) -> None:
     ]
     if len(flash_mems) > 1:
         log.error("This design does not currently support multiple flashes")
-        return
+        return None
 
     params = vars(flash_mems[0]["memory"]["mem"]["config"])
     # Additional parameters not provided in the top config.
@@ -505,13 +634,16 @@ def generate_flash(topcfg: Dict[str, object], out_path: Path) -> None:
         "infos_per_bank": [10, 1, 2]
     })
 
-    ipgen_render("flash_ctrl", topname, params, out_path)
+    return ipgen_stage("flash_ctrl", topname, params, out_path, desc_only)
 
 
 def generate_top_only(top_only_dict: Dict[str, bool], out_path: Path,
-                      top_name: str, alt_hjson_path: str) -> None:
+                      top_name: str, alt_hjson_path: str) -> List[Stage]:
+    """Return the stages generating the register files of top only modules."""
     log.info("Generating top only modules")
 
+    stages = []
+
     for ip, reggen_only in top_only_dict.items():
 
         if reggen_only and alt_hjson_path is not None:
@@ -527,7 +659,9 @@ def generate_top_only(top_only_dict: Dict[str, bool], out_path: Path,
             ip, hjson_path, genrtl_dir))
 
         # Generate reg files
-        generate_regfile_from_path(hjson_path, genrtl_dir)
+        stages.append(regfile_stage(hjson_path, genrtl_dir))
+
+    return stages
 
 
 def generate_top_ral(top: Dict[str, object], name_to_block: Dict[str, IpBlock],
@@ -668,8 +802,13 @@ def generete_rust(topname, completecfg, name_to_block, out_path, version_stamp,
 
 def _process_top(
         topcfg: Dict[str, object], args: argparse.Namespace, cfg_path: Path,
-        out_path: Path, pass_idx: int
+        out_path: Path, pass_idx: int, last_pass: bool, manifest: Manifest
 ) -> (Dict[str, object], Dict[str, IpBlock], Dict[str, Path]):
+    # The passes before the last one only need the generated IP descriptions,
+    # which are read back by the next pass. The "only" series options exit
+    # after the first pass, so all of its outputs are needed.
+    desc_only = not (last_pass or args.plic_only or args.alert_handler_only)
+
     # Create generated list
     # These modules are generated through topgen
     templated_list = lib.get_templated_modules(topcfg)
@@ -705,7 +844,8 @@ def _process_top(
     # the top hjson file
     topcfg["clocks"] = Clocks(topcfg["clocks"])
     extract_clocks(topcfg)
-    generate_clkmgr(topcfg, out_path)
+    run_stages([generate_clkmgr(topcfg, out_path, desc_only)], manifest,
+               args.jobs)
 
     # It may require two passes to check if the module is needed.
     # TODO: first run of topgen will fail due to the absent of rv_plic.
@@ -793,11 +933,13 @@ def _process_top(
                         "with the IP template for initial validation." %
                         (ip_desc_file, template_hjson_file))
                     name_to_hjson[ip_name] = template_hjson_file
-                    ip_objs.append(
-                        IpBlock.from_path(str(template_hjson_file), []))
+                    with profiling.timed(ip_name, "load"):
+                        ip_objs.append(
+                            IpBlock.from_path(str(template_hjson_file), []))
             else:
                 name_to_hjson[ip_name] = ip_desc_file
-                ip_objs.append(IpBlock.from_path(str(ip_desc_file), []))
+                with profiling.timed(ip_name, "load"):
+                    ip_objs.append(IpBlock.from_path(str(ip_desc_file), []))
 
     except ValueError:
         raise SystemExit(sys.exc_info()[1])
@@ -813,7 +955,7 @@ def _process_top(
     if args.alias_files:
         for alias in args.alias_files:
             with open(alias, 'r', encoding='utf-8') as handle:
-                raw = hjson.loads(handle.read(), use_decimal=True)
+                raw = hjson_loader.loads(handle.read(), use_decimal=True)
                 if 'alias_target' not in raw:
                     raise ValueError('Missing alias_target key '
                                      'in alias file {}.'.format(alias))
@@ -836,17 +978,27 @@ def _process_top(
     if error != 0:
         raise SystemExit("Error occured while validating top.hjson")
 
-    completecfg = merge_top(topcfg, name_to_block, xbar_objs)
+    with profiling.timed("merge_top", "merge"):
+        completecfg = merge_top(topcfg, name_to_block, xbar_objs)
+
+    # The generators below only compute the parameters of the IPs they
+    # generate. The IPs are independent of each other, so they are collected
+    # as stages and rendered in parallel at the end.
+    stages = []
 
     # Generate flash controller and flash memory
-    generate_flash(topcfg, out_path)
+    flash_stage = generate_flash(topcfg, out_path, desc_only)
+    if flash_stage is not None:
+        stages.append(flash_stage)
 
     # Generate PLIC
     if not args.no_plic and \
        not args.alert_handler_only and \
        not args.xbar_only:
-        generate_plic(completecfg, out_path)
+        stages.append(generate_plic(completecfg, out_path, desc_only))
         if args.plic_only:
+            run_stages(stages, manifest, args.jobs)
+            manifest.save()
             sys.exit()
 
     # Create Alert Handler LPGs before
@@ -855,22 +1007,31 @@ def _process_top(
 
     # Generate Alert Handler
     if not args.xbar_only:
-        generate_alert_handler(completecfg, out_path)
+        stages.append(generate_alert_handler(completecfg, out_path, desc_only))
         if args.alert_handler_only:
+            run_stages(stages, manifest, args.jobs)
+            manifest.save()
             sys.exit()
 
-    # Generate Pinmux
-    generate_pinmux(completecfg, out_path)
+    # Generate Pinmux. Its Hjson is generated right away, its register file
+    # only in the last pass.
+    pinmux_stage = generate_pinmux(completecfg, out_path)
+    if pinmux_stage is not None and not desc_only:
+        stages.append(pinmux_stage)
 
     # Generate Pwrmgr
-    generate_pwrmgr(completecfg, out_path)
+    stages.append(generate_pwrmgr(completecfg, out_path, desc_only))
 
     # Generate rstmgr
-    generate_rstmgr(completecfg, out_path)
+    stages.append(generate_rstmgr(completecfg, out_path, desc_only))
 
     # Generate top only modules
     # These modules are not templated, but are not in hw/ip
-    generate_top_only(top_only_dict, out_path, top_name, args.hjson_path)
+    if not desc_only:
+        stages += generate_top_only(top_only_dict, out_path, top_name,
+                                    args.hjson_path)
+
+    run_stages(stages, manifest, args.jobs)
 
     return completecfg, name_to_block, name_to_hjson
 
@@ -1019,6 +1180,24 @@ def main():
                         default=False,
                         action="store_true",
                         help="Only return the list of blocks and exit.")
+    # Options controlling the generation itself.
+    parser.add_argument("--jobs",
+                        "-j",
+                        type=int,
+                        default=os.cpu_count() or 1,
+                        metavar="N",
+                        help="Run up to N independent generation stages in "
+                        "parallel (default: the number of CPUs).")
+    parser.add_argument("--manifest",
+                        type=Path,
+                        default=None,
+                        help="""
+          Path of the manifest recording the inputs and outputs of each
+          generation stage. Stages whose inputs and outputs are unchanged since
+          the last run are skipped. Use one manifest per output directory. All
+          stages are run if this is not given.
+        """)
+    profiling.add_arguments(parser)
 
     args = parser.parse_args()
 
@@ -1044,6 +1223,9 @@ def main():
 
     log.basicConfig(format="%(levelname)s: %(message)s", level=log_level)
 
+    # Time the generation stages (written at exit, see reggen.profiling).
+    profiling.start_from_args("topgen", args)
+
     if not args.outdir:
         outdir = Path(args.topcfg).parents[1]
         log.info("TOP directory not given. Use %s", (outdir))
@@ -1061,9 +1243,9 @@ def main():
 
     try:
         with open(args.topcfg, "r") as ftop:
-            topcfg = hjson.load(ftop,
-                                use_decimal=True,
-                                object_pairs_hook=OrderedDict)
+            topcfg = hjson_loader.load(ftop,
+                                       use_decimal=True,
+                                       object_pairs_hook=OrderedDict)
     except ValueError:
         raise SystemExit(sys.exc_info()[1])
 
@@ -1122,19 +1304,29 @@ def main():
     else:
         out_path_gen = out_path
 
-    for pass_idx in range(process_dependencies + 1):
-        log.debug("Generation pass {}".format(pass_idx))
-        if pass_idx < process_dependencies:
-            cfg_copy = deepcopy(topcfg)
-            _, _, _ = _process_top(cfg_copy, args, cfg_path, out_path_gen,
-                                   pass_idx)
-        else:
-            completecfg, name_to_block, name_to_hjson = _process_top(
-                topcfg, args, cfg_path, out_path_gen, pass_idx)
-
     topname = topcfg["name"]
     top_name = f"top_{topname}"
 
+    # The manifest is specific to the output directory. There is no point in
+    # keeping one for the temporary directory used for the chip-level RAL.
+    if args.top_ral:
+        manifest = Manifest(None)
+    else:
+        manifest = Manifest(args.manifest)
+
+    for pass_idx in range(process_dependencies + 1):
+        log.debug("Generation pass {}".format(pass_idx))
+        with profiling.timed("pass {}".format(pass_idx), "pass"):
+            if pass_idx < process_dependencies:
+                cfg_copy = deepcopy(topcfg)
+                _, _, _ = _process_top(cfg_copy, args, cfg_path, out_path_gen,
+                                       pass_idx, False, manifest)
+            else:
+                completecfg, name_to_block, name_to_hjson = _process_top(
+                    topcfg, args, cfg_path, out_path_gen, pass_idx, True,
+                    manifest)
+    manifest.save()
+
     # Create the chip-level RAL only
     if args.top_ral:
         # See above: we only need `completecfg` and `name_to_block`, not all
@@ -1151,14 +1343,17 @@ def main():
 
     # Generate xbars
     if not args.no_xbar or args.xbar_only:
-        generate_xbars(completecfg, out_path)
+        with profiling.timed("xbars", "xbar"):
+            generate_xbars(completecfg, out_path, manifest, args.jobs)
+    manifest.save()
 
-    # All IPs are generated. Connect phase now
-    # Find {memory, module} <-> {xbar} connections first.
-    im.autoconnect(completecfg, name_to_block)
+    with profiling.timed("intermodule", "intermodule"):
+        # All IPs are generated. Connect phase now
+        # Find {memory, module} <-> {xbar} connections first.
+        im.autoconnect(completecfg, name_to_block)
 
-    # Generic Inter-module connection
-    im.elab_intermodule(completecfg)
+        # Generic Inter-module connection
+        im.elab_intermodule(completecfg)
 
     # Generate top.gen.hjson right before rendering
     genhjson_dir = out_path / "data/autogen"
@@ -1177,8 +1372,10 @@ def main():
 
     # Generate Rust toplevel definitions
     if not args.no_rust:
-        generete_rust(topname, completecfg, name_to_block, out_path.resolve(),
-                      version_stamp, SRCTREE_TOP, TOPGEN_TEMPLATE_PATH)
+        with profiling.timed("rust", "rust"):
+            generete_rust(topname, completecfg, name_to_block,
+                          out_path.resolve(), version_stamp, SRCTREE_TOP,
+                          TOPGEN_TEMPLATE_PATH)
         if args.rust_only:
             sys.exit(0)
 
@@ -1199,12 +1396,14 @@ def main():
 
         def render_template(template_path: str, rendered_path: Path,
                             **other_info):
-            template_contents = generate_top(completecfg, name_to_block,
-                                             str(template_path), **other_info)
+            with profiling.timed(str(rendered_path), "render"):
+                template_contents = generate_top(completecfg, name_to_block,
+                                                 str(template_path),
+                                                 **other_info)
 
-            rendered_path.parent.mkdir(exist_ok=True, parents=True)
-            with rendered_path.open(mode="w", encoding="UTF-8") as fout:
-                fout.write(template_contents)
+                rendered_path.parent.mkdir(exist_ok=True, parents=True)
+                with rendered_path.open(mode="w", encoding="UTF-8") as fout:
+                    fout.write(template_contents)
 
         # Header for SV files
         gencmd = warnhdr + """//
@@ -1302,17 +1501,17 @@ def main():
         for fname in tb_files:
             tpl_fname = "%s.tpl" % (fname)
             xbar_chip_data_path = TOPGEN_TEMPLATE_PATH / tpl_fname
-            template_contents = generate_top(completecfg,
-                                             name_to_block,
-                                             str(xbar_chip_data_path),
-                                             gencmd=gencmd)
-
             rendered_dir = out_path / "dv/autogen"
-            rendered_dir.mkdir(parents=True, exist_ok=True)
             rendered_path = rendered_dir / fname
+            with profiling.timed(str(rendered_path), "render"):
+                template_contents = generate_top(completecfg,
+                                                 name_to_block,
+                                                 str(xbar_chip_data_path),
+                                                 gencmd=gencmd)
 
-            with rendered_path.open(mode="w", encoding="UTF-8") as fout:
-                fout.write(template_contents)
+                rendered_dir.mkdir(parents=True, exist_ok=True)
+                with rendered_path.open(mode="w", encoding="UTF-8") as fout:
+                    fout.write(template_contents)
 
         # generate parameters for chip-level environment package
         tpl_fname = "chip_env_pkg__params.sv.tpl"
@@ -1328,7 +1527,8 @@ def main():
             fout.write(template_contents)
 
         # generate documentation for toplevel
-        gen_top_docs(completecfg, c_helper, out_path)
+        with profiling.timed("docs", "render"):
+            gen_top_docs(completecfg, c_helper, out_path)
 
         # Auto-generate tests in "sw/device/tests/autogen" area.
         gencmd = warnhdr + GENCMD.format(top_name=top_name)
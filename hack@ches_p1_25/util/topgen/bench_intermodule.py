@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark inter-module signal resolution on synthetic tops.
+
+Builds tops with an increasing number of module instances, each with a
+one-to-one 'uni' connection, a 'req_rsp' connection and a share of a
+broadcast, elaborates their inter-module connections and then looks up the
+far end of every connection. The time per connection should stay roughly
+constant as the top grows.
+
+Run from the util directory:
+
+    python3 -m topgen.bench_intermodule
+"""
+
+import argparse
+import logging as log
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from topgen import intermodule as im
+
+
+def _signal(name: str, sig_type: str, act: str, width: int = 1,
+            package: str = "", struct: str = "logic") -> Dict:
+    return OrderedDict([("name", name), ("type", sig_type), ("act", act),
+                        ("width", width), ("package", package),
+                        ("struct", struct)])
+
+
+def make_top(num_insts: int) -> OrderedDict:
+    '''Returns a synthetic top with num_insts connected module instances.
+
+    Instance i drives a 'uni' signal into instance i+1, a 'req_rsp' signal
+    into instance i+7 (both modulo num_insts) and receives a broadcast from
+    a hub instance. This gives 2 * num_insts + 1 connections.
+    '''
+    modules = []
+    connect = OrderedDict()
+    for i in range(num_insts):
+        modules.append(OrderedDict([
+            ("name", "m{}".format(i)),
+            ("type", "synth"),
+            ("inter_signal_list", [
+                _signal("ev_o", "uni", "req"),
+                _signal("ev_i", "uni", "rcv"),
+                _signal("bus_h", "req_rsp", "req", package="tlul_pkg",
+                        struct="tl"),
+                _signal("bus_d", "req_rsp", "rsp", package="tlul_pkg",
+                        struct="tl"),
+                _signal("en_i", "uni", "rcv"),
+            ]),
+        ]))
+        connect["m{}.ev_o".format(i)] = [
+            "m{}.ev_i".format((i + 1) % num_insts)
+        ]
+        connect["m{}.bus_h".format(i)] = [
+            "m{}.bus_d".format((i + 7) % num_insts)
+        ]
+
+    modules.append(OrderedDict([
+        ("name", "hub"),
+        ("type", "synth_hub"),
+        ("inter_signal_list", [_signal("en_o", "uni", "req")]),
+    ]))
+    connect["hub.en_o"] = ["m{}.en_i".format(i) for i in range(num_insts)]
+
+    return OrderedDict([
+        ("module", modules),
+        ("memory", []),
+        ("xbar", []),
+        ("port", []),
+        ("inter_module", OrderedDict([("connect", connect), ("top", []),
+                                      ("external", OrderedDict())])),
+    ])
+
+
+def endpoints(top: OrderedDict) -> List[Tuple[str, str]]:
+    '''Returns (module, signal) for both ends of every connection.'''
+    result = []
+    for req, rsps in top["inter_module"]["connect"].items():
+        for name in [req] + rsps:
+            m_name, s_name, _ = im.filter_index(name)
+            result.append((m_name, s_name))
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes',
+                        type=int,
+                        nargs='+',
+                        default=[250, 500, 1000, 2000, 4000],
+                        help='Numbers of module instances '
+                        '(default: 250 500 1000 2000 4000).')
+    args = parser.parse_args()
+
+    # elab_intermodule logs every connection at info level.
+    log.basicConfig(level=log.WARNING)
+
+    print('{:>10} {:>12} {:>10} {:>10} {:>14}'.format(
+        'instances', 'connections', 'elab', 'lookup', 'us/connection'))
+    for size in args.sizes:
+        top = make_top(size)
+        num_conns = len(top["inter_module"]["connect"])
+
+        start = time.perf_counter()
+        im.elab_intermodule(top)
+        elab_time = time.perf_counter() - start
+
+        ends = endpoints(top)
+        start = time.perf_counter()
+        index = im.index_otherside_modules(top)
+        for m_name, s_name in ends:
+            assert im.find_otherside_modules(top, m_name, s_name, index)
+        lookup_time = time.perf_counter() - start
+
+        per_conn = 1e6 * (elab_time + lookup_time) / num_conns
+        print('{:>10} {:>12} {:>9.3f}s {:>9.3f}s {:>14.1f}'.format(
+            size, num_conns, elab_time, lookup_time, per_conn))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
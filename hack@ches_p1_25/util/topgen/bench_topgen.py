@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+r"""Benchmark generating a top with topgen.
+
+Runs topgen on a top into a temporary directory with --profile (see
+reggen.profiling), prints the wall time of the run and of each category of
+stages, and the peak RSS. With --history, appends the summary to a JSON lines
+file and fails if the wall time is more than --max-regression times the median
+of the previous runs in that file, so that CI can track the generation time
+across commits. The caches of reggen and ipgen are disabled, so that every run
+does the same work.
+
+Run from the util directory:
+
+    python3 -m topgen.bench_topgen --top top_earlgrey --history bench.jsonl
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from reggen.bench_ip_block import REPO_TOP
+
+TOPGEN = str(REPO_TOP / 'util' / 'topgen.py')
+
+
+def run_topgen(topcfg: Path, jobs: int, outdir: str) -> Dict[str, object]:
+    '''Runs topgen on topcfg into outdir and returns its profile report.'''
+    report = Path(outdir) / 'profile.json'
+    cmd = [sys.executable, TOPGEN, '-t', str(topcfg), '-o', outdir,
+           '--profile', str(report)]
+    if jobs:
+        cmd += ['-j', str(jobs)]
+    env = dict(os.environ, REGGEN_CACHE_DIR='')
+    subprocess.run(cmd, check=True, env=env)
+    with report.open(encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def summarize(top: str, report: Dict[str, object]) -> Dict[str, object]:
+    '''Returns the summary of a profile report that goes in the history.'''
+    totals = report['totals']
+    assert isinstance(totals, dict)
+    return {
+        'top': top,
+        'time': time.time(),
+        'wall': report['wall'],
+        'cpu': report['cpu'],
+        'peak_rss_kb': report['peak_rss_kb'],
+        'categories': {cat: total['wall'] for cat, total in totals.items()},
+    }
+
+
+def read_history(path: Path, top: str) -> List[Dict[str, object]]:
+    '''Returns the previous summaries for top in the history file.'''
+    if not path.exists():
+        return []
+    with path.open(encoding='utf-8') as handle:
+        entries = [json.loads(line) for line in handle if line.strip()]
+    return [entry for entry in entries if entry.get('top') == top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top',
+                        default='top_earlgrey',
+                        help='Name of the top (default: top_earlgrey).')
+    parser.add_argument('--jobs',
+                        '-j',
+                        type=int,
+                        default=0,
+                        help='Number of topgen worker processes (default: '
+                        'topgen\'s default).')
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=1,
+                        help='Number of runs; the fastest one counts '
+                        '(default: 1).')
+    parser.add_argument('--history',
+                        type=Path,
+                        help='JSON lines file to append the summary to.')
+    parser.add_argument('--max-regression',
+                        type=float,
+                        default=1.5,
+                        help='Fail if the wall time exceeds this factor of '
+                        'the median in the history (default: 1.5).')
+    args = parser.parse_args()
+
+    topcfg = REPO_TOP / 'hw' / args.top / 'data' / (args.top + '.hjson')
+
+    summaries = []
+    for _ in range(args.repeat):
+        with tempfile.TemporaryDirectory() as outdir:
+            summaries.append(summarize(args.top,
+                                       run_topgen(topcfg, args.jobs, outdir)))
+    summary = min(summaries, key=lambda s: s['wall'])
+
+    print('{}: {:.3f}s wall, {:.3f}s CPU, peak RSS {} KiB'.format(
+        args.top, summary['wall'], summary['cpu'], summary['peak_rss_kb']))
+    categories = summary['categories']
+    assert isinstance(categories, dict)
+    for category, wall in sorted(categories.items(), key=lambda c: -c[1]):
+        print('  {:<14} {:8.3f}s'.format(category, wall))
+
+    if args.history is None:
+        return 0
+
+    previous = [entry['wall'] for entry in read_history(args.history, args.top)]
+    with args.history.open('a', encoding='utf-8') as handle:
+        handle.write(json.dumps(summary, sort_keys=True) + '\n')
+
+    if previous:
+        median = statistics.median(previous)
+        if summary['wall'] > args.max_regression * median:
+            print('Wall time regressed: {:.3f}s vs a median of {:.3f}s over '
+                  '{} runs'.format(summary['wall'], median, len(previous)),
+                  file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
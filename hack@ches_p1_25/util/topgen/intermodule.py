@@ -6,7 +6,7 @@ import logging as log
 import re
 from collections import OrderedDict
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from reggen.ip_block import IpBlock
 from reggen.inter_signal import InterSignal
@@ -18,6 +18,15 @@ IM_ACTS = ['req', 'rsp', 'rcv', 'none']
 IM_VALID_TYPEACT = {'uni': ['req', 'rcv'], 'req_rsp': ['req', 'rsp'], 'io': ['none']}
 IM_CONN_TYPE = ['1-to-1', '1-to-N', 'broadcast']
 
+# Inter-module signals keyed by (instance name, signal name). There should be
+# exactly one signal for each key, but the index keeps them all so that
+# duplicates can be reported.
+SignalIndex = Dict[Tuple[str, str], List[Dict]]
+
+# The far ends of inter-module connections, keyed by "module.signal". See
+# index_otherside_modules().
+OthersideIndex = Dict[str, List[Tuple[str, str, str]]]
+
 
 class ImType(Enum):
     Uni = 1
@@ -302,10 +311,11 @@ def elab_intermodule(topcfg: OrderedDict):
 
     # Add field to the topcfg
     topcfg["inter_signal"]["signals"] = list_of_intersignals
+    sig_index = index_intermodule_signals(list_of_intersignals)
 
     # TODO: Cross check Can be done here not in validate as ipobj is not
     # available in validate
-    error = check_intermodule(topcfg, "Inter-module Check")
+    error = check_intermodule(topcfg, "Inter-module Check", sig_index)
     assert error == 0, "Inter-module validation is failed cannot move forward."
 
     # intermodule
@@ -337,7 +347,7 @@ def elab_intermodule(topcfg: OrderedDict):
         req_module, req_signal, req_index = filter_index(req)
 
         # get the module signal
-        req_struct = find_intermodule_signal(list_of_intersignals, req_module,
+        req_struct = find_intermodule_signal(sig_index, req_module,
                                              req_signal)
 
         # decide signal format based on the `key`
@@ -350,8 +360,8 @@ def elab_intermodule(topcfg: OrderedDict):
         else:
             for rsp in rsps:
                 rsp_module, rsp_signal, rsp_index = filter_index(rsp)
-                rsp_struct = find_intermodule_signal(list_of_intersignals,
-                                                     rsp_module, rsp_signal)
+                rsp_struct = find_intermodule_signal(sig_index, rsp_module,
+                                                     rsp_signal)
                 if "package" in rsp_struct:
                     package = rsp_struct["package"]
                     break
@@ -412,8 +422,8 @@ def elab_intermodule(topcfg: OrderedDict):
             # Split index
             rsp_module, rsp_signal, rsp_index = filter_index(rsp)
 
-            rsp_struct = find_intermodule_signal(list_of_intersignals,
-                                                 rsp_module, rsp_signal)
+            rsp_struct = find_intermodule_signal(sig_index, rsp_module,
+                                                 rsp_signal)
 
             # determine the signal name
 
@@ -442,7 +452,7 @@ def elab_intermodule(topcfg: OrderedDict):
     for s in topcfg["inter_module"]["top"]:
         sig_m, sig_s, sig_i = filter_index(s)
         assert sig_i == -1, 'top net connection should not use bit index'
-        sig = find_intermodule_signal(list_of_intersignals, sig_m, sig_s)
+        sig = find_intermodule_signal(sig_index, sig_m, sig_s)
         sig_name = intersignal_format(sig)
         sig["top_signame"] = sig_name
         if "index" not in sig:
@@ -479,7 +489,7 @@ def elab_intermodule(topcfg: OrderedDict):
     for s, port in topcfg["inter_module"]["external"].items():
         sig_m, sig_s, sig_i = filter_index(s)
         assert sig_i == -1, 'top net connection should not use bit index'
-        sig = find_intermodule_signal(list_of_intersignals, sig_m, sig_s)
+        sig = find_intermodule_signal(sig_index, sig_m, sig_s)
 
         # To make netname `_o` or `_i`
         sig['external'] = True
@@ -596,13 +606,27 @@ def filter_index(signame: str) -> Tuple[str, str, int]:
     return m.group(1), m.group(2), -1
 
 
-def find_intermodule_signal(sig_list, m_name, s_name) -> Dict:
+def index_intermodule_signals(sig_list: List[Dict]) -> SignalIndex:
+    """Return an index of the intermodule signals in sig_list
+
+    The index is used by find_intermodule_signal(). It holds the signal
+    dictionaries themselves, so updates to the signals are visible through it,
+    but it must be rebuilt if signals are added or renamed.
+    """
+    sig_index = {}  # type: SignalIndex
+    for sig in sig_list:
+        sig_index.setdefault((sig["inst_name"], sig["name"]), []).append(sig)
+    return sig_index
+
+
+def find_intermodule_signal(sig_index: SignalIndex, m_name: str,
+                            s_name: str) -> Optional[Dict]:
     """Return the intermodule signal structure
+
+    sig_index is an index built by index_intermodule_signals().
     """
 
-    filtered = [
-        x for x in sig_list if x["name"] == s_name and x["inst_name"] == m_name
-    ]
+    filtered = sig_index.get((m_name, s_name), [])
 
     if len(filtered) == 1:
         return filtered[0]
@@ -669,9 +693,40 @@ def check_intermodule_field(sig: OrderedDict,
     return error, sig
 
 
-def find_otherside_modules(topcfg: OrderedDict, m,
-                           s) -> List[Tuple[str, str, str]]:
+def index_otherside_modules(topcfg: OrderedDict) -> OthersideIndex:
+    """Return an index of the far-end ports of the inter-module connections
+
+    The index maps "module.signal" to the list of (kind, module, signal)
+    triples that find_otherside_modules() returns. A requester (which may
+    have an array index) maps to all of its responders and a responder maps
+    to its requester. If a name appears in several connections, the first one
+    wins.
+    """
+    index = {}  # type: OthersideIndex
+    for req, rsps in topcfg["inter_module"]["connect"].items():
+        req_m, req_s, req_i = filter_index(req)
+        # return rsps after splitting module instance name and the port
+        result = []
+        for rsp in rsps:
+            rsp_m, rsp_s, rsp_i = filter_index(rsp)
+            result.append(('connect', rsp_m, rsp_s))
+        index.setdefault("{}.{}".format(req_m, req_s), result)
+
+        for rsp in rsps:
+            index.setdefault(rsp, [('connect', req_m, req_s)])
+    return index
+
+
+def find_otherside_modules(
+        topcfg: OrderedDict,
+        m,
+        s,
+        index: Optional[OthersideIndex] = None
+) -> List[Tuple[str, str, str]]:
     """Find far-end port based on given module and signal name
+
+    When looking up many ports, build the index with
+    index_otherside_modules() once and pass it in.
     """
     # TODO: handle special cases
     special_inst_names = {
@@ -681,20 +736,13 @@ def find_otherside_modules(topcfg: OrderedDict, m,
     if special_result is not None:
         return [('top', special_result[0], special_result[1])]
 
-    signame = "{}.{}".format(m, s)
-    for req, rsps in topcfg["inter_module"]["connect"].items():
-        if req.startswith(signame):
-            # return rsps after splitting module instance name and the port
-            result = []
-            for rsp in rsps:
-                rsp_m, rsp_s, rsp_i = filter_index(rsp)
-                result.append(('connect', rsp_m, rsp_s))
-            return result
+    if index is None:
+        index = index_otherside_modules(topcfg)
 
-        for rsp in rsps:
-            if signame == rsp:
-                req_m, req_s, req_i = filter_index(req)
-                return [('connect', req_m, req_s)]
+    signame = "{}.{}".format(m, s)
+    result = index.get(signame)
+    if result is not None:
+        return list(result)
 
     # if reaches here, it means either the format is wrong, or floating port.
     log.error("`find_otherside_modules()`: "
@@ -702,10 +750,16 @@ def find_otherside_modules(topcfg: OrderedDict, m,
     return []
 
 
-def check_intermodule(topcfg: Dict, prefix: str) -> int:
+def check_intermodule(topcfg: Dict,
+                      prefix: str,
+                      sig_index: Optional[SignalIndex] = None) -> int:
     if "inter_module" not in topcfg:
         return 0
 
+    if sig_index is None:
+        sig_index = index_intermodule_signals(
+            topcfg["inter_signal"]["signals"])
+
     total_error = 0
 
     for req, rsps in topcfg["inter_module"]["connect"].items():
@@ -744,8 +798,7 @@ def check_intermodule(topcfg: Dict, prefix: str) -> int:
             error += 1
             continue
 
-        req_struct = find_intermodule_signal(topcfg["inter_signal"]["signals"],
-                                             req_m, req_s)
+        req_struct = find_intermodule_signal(sig_index, req_m, req_s)
 
         err, req_struct = check_intermodule_field(req_struct)
         error += err
@@ -769,8 +822,7 @@ def check_intermodule(topcfg: Dict, prefix: str) -> int:
                     format(req=req, rsp=rsp))
                 error += 1
 
-            rsp_struct = find_intermodule_signal(
-                topcfg["inter_signal"]["signals"], rsp_m, rsp_s)
+            rsp_struct = find_intermodule_signal(sig_index, rsp_m, rsp_s)
 
             err, rsp_struct = check_intermodule_field(rsp_struct)
             error += err
@@ -863,8 +915,7 @@ def check_intermodule(topcfg: Dict, prefix: str) -> int:
             log.error("{item} cannot have index".format(item=item))
             total_error += 1
 
-        sig_struct = find_intermodule_signal(topcfg["inter_signal"]["signals"],
-                                             sig_m, sig_s)
+        sig_struct = find_intermodule_signal(sig_index, sig_m, sig_s)
         err, sig_struct = check_intermodule_field(sig_struct)
         total_error += err
 
@@ -7,15 +7,19 @@ import re
 import sys
 from collections import OrderedDict
 from copy import deepcopy
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
-import hjson
+from reggen import hjson_loader
 from reggen.ip_block import IpBlock
+from reggen.reg_block import RegBlock
+from tlgen.addr_map import AddressMap
 
 # Ignore flake8 warning as the function is used in the template
 # disable isort formating, as conflicting with flake8
 from .intermodule import find_otherside_modules  # noqa : F401 # isort:skip
+from .intermodule import index_otherside_modules  # noqa : F401 # isort:skip
 from .intermodule import im_portname, im_defname, im_netname # noqa : F401 # isort:skip
 from .intermodule import get_direction # noqa : F401 # isort:skip
 from .intermodule import get_dangling_im_def # noqa : F401 # isort:skip
@@ -125,9 +129,9 @@ def get_hjsonobj_xbars(xbar_path):
     p = xbar_path.glob('*.hjson')
     try:
         xbar_objs = [
-            hjson.load(x.open('r'),
-                       use_decimal=True,
-                       object_pairs_hook=OrderedDict) for x in p
+            hjson_loader.load(x.open('r'),
+                              use_decimal=True,
+                              object_pairs_hook=OrderedDict) for x in p
         ]
     except ValueError:
         raise SystemExit(sys.exc_info()[1])
@@ -149,6 +153,18 @@ def get_module_by_name(top, name):
     return module
 
 
+def get_modules_by_name(top) -> Dict[str, Dict]:
+    """Return a dict from the name of each module in top["module"] to it
+
+    This is an index for looking up many modules. Like get_module_by_name(),
+    it picks the first module if several have the same name.
+    """
+    modules = {}  # type: Dict[str, Dict]
+    for m in top["module"]:
+        modules.setdefault(m["name"], m)
+    return modules
+
+
 def intersignal_to_signalname(top, m_name, s_name) -> str:
 
     # TODO: Find the signal in the `inter_module_list` and get the correct signal name
@@ -463,6 +479,89 @@ def get_base_and_size(name_to_block: Dict[str, IpBlock],
     return (base_addr, size_byte)
 
 
+class AddressOwner(NamedTuple):
+    """The owner of a range in the address map of a top.
+
+    For a device interface, inst_name is the name of the instance and if_name
+    the name of the interface (None for the default one). For a memory,
+    inst_name is the name of the memory and if_name and block are None.
+    """
+    inst_name: str
+    if_name: Optional[str]
+    block: Optional[IpBlock]
+
+    def __str__(self) -> str:
+        if self.if_name is None:
+            return self.inst_name
+        return "{}.{}".format(self.inst_name, self.if_name)
+
+
+def get_address_map(top: Dict[str, object],
+                    name_to_block: Dict[str, IpBlock]
+                    ) -> AddressMap[AddressOwner]:
+    """Return the address map of the device interfaces and memories of top.
+
+    top is the completed top configuration. Raises a ValueError if any two
+    ranges overlap.
+    """
+    addr_map: AddressMap[AddressOwner] = AddressMap()
+    for inst in top["module"]:
+        block = name_to_block[inst["type"]]
+        for if_name in block.reg_blocks:
+            if if_name not in inst["base_addrs"]:
+                continue
+            base, size = get_base_and_size(name_to_block, inst, if_name)
+            addr_map.add(base, base + size - 1,
+                         AddressOwner(inst["name"], if_name, block))
+
+    for mem in top.get("memory", []):
+        base = int(mem["base_addr"], 0)
+        size = int(mem["size"], 0)
+        addr_map.add(base, base + size - 1,
+                     AddressOwner(mem["name"], None, None))
+
+    return addr_map
+
+
+@lru_cache(maxsize=None)
+def _reg_block_map(rb: RegBlock) -> AddressMap[str]:
+    """Return the map of the registers and windows of a register block."""
+    rb_map: AddressMap[str] = AddressMap()
+    for reg in rb.flat_regs:
+        rb_map.add(reg.offset, reg.offset + rb.get_addrsep() - 1, reg.name)
+    for window in rb.windows:
+        rb_map.add(window.offset, window.offset + window.size_in_bytes - 1,
+                   window.name)
+    return rb_map
+
+
+def describe_address(addr_map: AddressMap[AddressOwner],
+                     addr: int) -> Optional[str]:
+    """Return a description of what is at address addr.
+
+    addr_map is the address map returned by get_address_map(). The
+    description is "<inst>[.<if>]/<register>" for a register,
+    "<inst>[.<if>]/<window>+<offset>" for an address in a window and
+    "<owner>+<offset>" otherwise. Returns None if nothing decodes addr.
+    """
+    entry = addr_map.find(addr)
+    if entry is None:
+        return None
+    base, _, owner = entry
+    offset = addr - base
+
+    if owner.block is not None:
+        rb = owner.block.reg_blocks[owner.if_name]
+        rb_entry = _reg_block_map(rb).find(offset)
+        if rb_entry is not None:
+            rb_base, _, name = rb_entry
+            if rb_base == offset:
+                return "{}/{}".format(owner, name)
+            return "{}/{}+0x{:x}".format(owner, name, offset - rb_base)
+
+    return "{}+0x{:x}".format(owner, offset)
+
+
 def get_io_enum_literal(sig: Dict, prefix: str) -> str:
     """Returns the DIO pin enum literal with value assignment"""
     name = Name.from_snake_case(prefix) + Name.from_snake_case(sig["name"])
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import unittest
+from pathlib import Path
+
+from reggen.ip_block import IpBlock
+from topgen.lib import AddressOwner, describe_address, get_address_map
+
+REPO_TOP = Path(__file__).resolve().parents[2]
+
+UART0_BASE = 0x40000000
+UART1_BASE = 0x40010000
+HMAC_BASE = 0x41110000
+ROM_BASE = 0x00008000
+
+
+def _load_block(name):
+    path = REPO_TOP / 'hw' / 'ip' / name / 'data' / '{}.hjson'.format(name)
+    return IpBlock.from_path(str(path), [])
+
+
+class TestAddressMap(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.name_to_block = {
+            'uart': _load_block('uart'),
+            'hmac': _load_block('hmac'),
+        }
+
+    def _top(self, modules, memories=()):
+        return {
+            'module': [{
+                'name': name,
+                'type': block,
+                'base_addrs': {
+                    None: hex(base)
+                },
+            } for name, block, base in modules],
+            'memory': [{
+                'name': name,
+                'base_addr': hex(base),
+                'size': hex(size),
+            } for name, base, size in memories],
+        }
+
+    def setUp(self):
+        top = self._top([('uart0', 'uart', UART0_BASE),
+                         ('uart1', 'uart', UART1_BASE),
+                         ('hmac', 'hmac', HMAC_BASE)],
+                        [('rom', ROM_BASE, 0x1000)])
+        self.addr_map = get_address_map(top, self.name_to_block)
+
+    def test_address_map(self):
+        self.assertEqual([(base, limit, str(owner))
+                          for base, limit, owner in self.addr_map],
+                         [(ROM_BASE, ROM_BASE + 0xfff, 'rom'),
+                          (UART0_BASE, UART0_BASE + 0x3f, 'uart0'),
+                          (UART1_BASE, UART1_BASE + 0x3f, 'uart1'),
+                          (HMAC_BASE, HMAC_BASE + 0x1fff, 'hmac')])
+
+    def test_overlap_rejected(self):
+        for modules, memories in [
+            ([('uart0', 'uart', UART0_BASE),
+              ('uart1', 'uart', UART0_BASE + 0x20)], []),
+            ([('uart0', 'uart', UART0_BASE),
+              ('hmac', 'hmac', UART0_BASE - 0x1000)], []),
+            ([('uart0', 'uart', UART0_BASE)],
+             [('ram', UART0_BASE + 0x3f, 0x1000)]),
+        ]:
+            with self.subTest(modules=modules, memories=memories):
+                top = self._top(modules, memories)
+                with self.assertRaisesRegex(ValueError, 'overlaps'):
+                    get_address_map(top, self.name_to_block)
+
+    def test_registers(self):
+        for addr, desc in [
+            (UART0_BASE, 'uart0/INTR_STATE'),
+            (UART0_BASE + 0x10, 'uart0/CTRL'),
+            (UART0_BASE + 0x30, 'uart0/TIMEOUT_CTRL'),
+            (UART1_BASE + 0x10, 'uart1/CTRL'),
+            (HMAC_BASE + 0x10, 'hmac/CFG'),
+        ]:
+            with self.subTest(addr=hex(addr)):
+                self.assertEqual(describe_address(self.addr_map, addr), desc)
+
+    def test_register_offsets(self):
+        for addr, desc in [
+            (UART0_BASE + 0x12, 'uart0/CTRL+0x2'),
+            (UART0_BASE + 0x13, 'uart0/CTRL+0x3'),
+            (UART0_BASE + 0x33, 'uart0/TIMEOUT_CTRL+0x3'),
+        ]:
+            with self.subTest(addr=hex(addr)):
+                self.assertEqual(describe_address(self.addr_map, addr), desc)
+
+    def test_windows(self):
+        for addr, desc in [
+            (HMAC_BASE + 0x1000, 'hmac/MSG_FIFO'),
+            (HMAC_BASE + 0x1010, 'hmac/MSG_FIFO+0x10'),
+            (HMAC_BASE + 0x1fff, 'hmac/MSG_FIFO+0xfff'),
+        ]:
+            with self.subTest(addr=hex(addr)):
+                self.assertEqual(describe_address(self.addr_map, addr), desc)
+
+    def test_memories(self):
+        self.assertEqual(describe_address(self.addr_map, ROM_BASE), 'rom+0x0')
+        self.assertEqual(describe_address(self.addr_map, ROM_BASE + 0xfff),
+                         'rom+0xfff')
+
+    def test_gaps(self):
+        # Past the last register of a device, but within its address range.
+        self.assertEqual(describe_address(self.addr_map, UART0_BASE + 0x34),
+                         'uart0+0x34')
+        self.assertEqual(describe_address(self.addr_map, UART0_BASE + 0x3f),
+                         'uart0+0x3f')
+        # Between the registers and the window of a device.
+        self.assertEqual(describe_address(self.addr_map, HMAC_BASE + 0xffc),
+                         'hmac+0xffc')
+        # Outside of any device or memory.
+        for addr in [0, ROM_BASE - 1, ROM_BASE + 0x1000, UART0_BASE - 1,
+                     UART0_BASE + 0x40, HMAC_BASE + 0x2000, 0xffffffff]:
+            with self.subTest(addr=hex(addr)):
+                self.assertIsNone(describe_address(self.addr_map, addr))
+
+    def test_owner_names(self):
+        self.assertEqual(str(AddressOwner('rv_dm', 'mem', None)), 'rv_dm.mem')
+        self.assertEqual(str(AddressOwner('rom', None, None)), 'rom')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@
 import logging as log
 import re
 from collections import OrderedDict
-from copy import deepcopy
+from copy import copy, deepcopy
 from math import ceil, log2
 from typing import Dict, List, Union, Tuple
 
@@ -505,7 +505,8 @@ def xbar_cross_node(node_name, device_xbar, xbars, visited=[]):
                                             visited)
                 node["addr_range"] = xbar_addr
 
-        result.extend(deepcopy(node["addr_range"]))
+        # The ranges only hold strings, so copying each one is enough.
+        result.extend(copy(r) for r in node["addr_range"])
 
     visited.pop()
 
@@ -648,6 +649,7 @@ def connect_clocks(top, name_to_block: Dict[str, IpBlock]):
     # of each hint in the "idle" signal bundle. These *must* match, or we'll
     # have hard-to-debug mis-connections.
     clkmgr_idle = []
+    name_to_module = lib.get_modules_by_name(top)
     for clk_name in typed_clocks.hint_names().keys():
         sig = typed_clocks.hint_clks[clk_name]
         ep_names = list(set(ep_name for ep_name, ep_port in sig.endpoints))
@@ -658,14 +660,10 @@ def connect_clocks(top, name_to_block: Dict[str, IpBlock]):
         ep_name = ep_names[0]
 
         # We've got the name of the endpoint, but that's not enough: we need to
-        # find the corresponding IpBlock. To do this, we have to do a (linear)
-        # search through top['module'] to find the instance that matches the
-        # endpoint, then use that instance's type as a key in name_to_block.
-        ep_inst = None
-        for inst in top['module']:
-            if inst['name'] == ep_name:
-                ep_inst = inst
-                break
+        # find the corresponding IpBlock. To do this, we look up the instance
+        # that matches the endpoint, then use that instance's type as a key in
+        # name_to_block.
+        ep_inst = name_to_module.get(ep_name)
         if ep_inst is None:
             raise ValueError(f'No module instance with name {ep_name}: only '
                              f'modules can have hint clocks. Is this a '
@@ -869,14 +867,14 @@ def amend_interrupt(top: OrderedDict, name_to_block: Dict[str, IpBlock]):
     if "interrupt" not in top or top["interrupt"] == "":
         top["interrupt"] = []
 
+    name_to_module = lib.get_modules_by_name(top)
     for m in top["interrupt_module"]:
-        ips = list(filter(lambda module: module["name"] == m, top["module"]))
-        if len(ips) == 0:
+        ip = name_to_module.get(m)
+        if ip is None:
             log.warning(
                 "Cannot find IP %s which is used in the interrupt_module" % m)
             continue
 
-        ip = ips[0]
         block = name_to_block[ip['type']]
 
         log.info("Adding interrupts from module %s" % ip["name"])
@@ -916,14 +914,14 @@ def amend_alert(top: OrderedDict, name_to_block: Dict[str, IpBlock]):
     if "alert" not in top or top["alert"] == "":
         top["alert"] = []
 
+    name_to_module = lib.get_modules_by_name(top)
     for m in top["alert_module"]:
-        ips = list(filter(lambda module: module["name"] == m, top["module"]))
-        if len(ips) == 0:
+        ip = name_to_module.get(m)
+        if ip is None:
             log.warning("Cannot find IP %s which is used in the alert_module" %
                         m)
             continue
 
-        ip = ips[0]
         block = name_to_block[ip['type']]
 
         log.info("Adding alert from module %s" % ip["name"])
@@ -1084,10 +1082,11 @@ def amend_pinmux_io(top: Dict, name_to_block: Dict[str, IpBlock]):
     temp['inputs'] = []
     temp['outputs'] = []
 
+    name_to_module = lib.get_modules_by_name(top)
     for sig in pinmux['signals']:
         # Get the signal information from the IP block type of this instance/
         mod_name = sig['instance']
-        m = lib.get_module_by_name(top, mod_name)
+        m = name_to_module.get(mod_name)
 
         if m is None:
             raise SystemExit("Module {} is not searchable.".format(mod_name))
@@ -195,6 +195,20 @@ class secure_prng():
         self.CTR_DRBG_Instantiate(entropy_input)
         self.returned_bits = []
 
+    def getstate(self):
+        """Returns the internal state, which setstate() restores.
+
+        The state is a tuple of ints and a list of ints (the bytes of
+        returned_bits that have not been consumed yet).
+        """
+        return (self.V, self.Key, self.reseed_counter,
+                list(self.returned_bits))
+
+    def setstate(self, state):
+        """Restores an internal state returned by getstate()."""
+        self.V, self.Key, self.reseed_counter, returned_bits = state
+        self.returned_bits = list(returned_bits)
+
     def fetchbyte(self):
         """Fetches the next byte from the returned_bits.
 
@@ -306,6 +320,8 @@ class secure_prng():
 
 _inst = secure_prng()
 reseed = _inst.reseed
+getstate = _inst.getstate
+setstate = _inst.setstate
 fetchbyte = _inst.fetchbyte
 getrandbits = _inst.getrandbits
 randbelow = _inst.randbelow
@@ -288,6 +288,16 @@ class TestIdempotence(unittest.TestCase):
             outputs.append(sp.getrandbits(1024))
         self.assertTrue(len(set(outputs)) == 1)
 
+    def test_state(self):
+        """Ensure that a restored state produces the same result"""
+        sp.reseed(secrets.randbits(256))
+        sp.getrandbits(100)
+        state = sp.getstate()
+        expected = sp.getrandbits(1024)
+        sp.getrandbits(64)
+        sp.setstate(state)
+        self.assertEqual(sp.getrandbits(1024), expected)
+
 
 if __name__ == '__main__':
     unittest.main()
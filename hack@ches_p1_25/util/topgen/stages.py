@@ -0,0 +1,218 @@
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+"""Running topgen generation stages in parallel, skipping up-to-date ones.
+
+A stage is a call to a generator function that reads a known set of inputs
+and writes a known set of output files or directories. Stages that are run
+together do not depend on each other, so they are run in a process pool.
+
+A manifest records the digest of the inputs of each stage, together with the
+digests of the files it produced. If a stage's input digest is unchanged and
+its outputs are still on disk with the recorded content, the stage is skipped.
+"""
+
+import decimal
+import hashlib
+import json
+import logging as log
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from reggen import profiling
+
+# Bump this when the format of the manifest changes.
+_MANIFEST_VERSION = 1
+
+SRCTREE_TOP = Path(__file__).parents[2].resolve()
+
+# The generator code. A change in any of these files invalidates all stages.
+_GENERATOR_SOURCES = [
+    SRCTREE_TOP / "util" / "topgen.py",
+    SRCTREE_TOP / "util" / "topgen",
+    SRCTREE_TOP / "util" / "reggen",
+    SRCTREE_TOP / "util" / "ipgen",
+    SRCTREE_TOP / "util" / "tlgen",
+]
+
+
+class Stage(NamedTuple):
+    """A generation stage.
+
+    name:    Unique name of the stage, used as its key in the manifest.
+    func:    The generator function. It must be picklable, i.e. defined at the
+             top level of a module.
+    args:    The arguments passed to func.
+    inputs:  Everything (other than the generator code) that determines the
+             outputs of the stage: files, directories and plain data.
+    outputs: The files and directories written by the stage.
+    """
+    name: str
+    func: Callable
+    args: Tuple
+    inputs: List[object]
+    outputs: List[Path]
+
+
+def _json_default(obj: object) -> object:
+    # Only types with a stable representation may be used, as anything else
+    # (e.g. the default repr of an object, with its address) would make the
+    # digest differ between runs. Objects of the configuration are serialized
+    # with their _asdict() method, as when they are dumped to Hjson.
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    if isinstance(obj, Path):
+        return str(obj)
+    if hasattr(obj, "_asdict"):
+        return obj._asdict()
+    raise TypeError("Cannot digest stage input of type {}".format(
+        type(obj).__name__))
+
+
+def _files_under(path: Path) -> List[Path]:
+    if path.is_dir():
+        return sorted(p for p in path.rglob("*")
+                      if p.is_file() and not p.name.startswith("._"))
+    return [path]
+
+
+def _digest_file(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def _update_with_path(h: "hashlib._Hash", path: Path) -> None:
+    for file in _files_under(path):
+        h.update(str(file).encode("utf-8"))
+        h.update((_digest_file(file) or "").encode("utf-8"))
+
+
+@lru_cache(maxsize=None)
+def _generator_digest() -> str:
+    h = hashlib.sha256()
+    for path in _GENERATOR_SOURCES:
+        for file in _files_under(path):
+            if file.suffix in [".py", ".tpl"]:
+                h.update(str(file).encode("utf-8"))
+                h.update((_digest_file(file) or "").encode("utf-8"))
+    return h.hexdigest()
+
+
+def digest_inputs(inputs: List[object]) -> str:
+    """Returns the digest of the inputs of a stage.
+
+    Paths contribute the content of the file, or of all files in the
+    directory. Other objects contribute their JSON serialization.
+    """
+    h = hashlib.sha256()
+    h.update(_generator_digest().encode("utf-8"))
+    for item in inputs:
+        if isinstance(item, Path):
+            _update_with_path(h, item)
+        else:
+            h.update(
+                json.dumps(item, sort_keys=True,
+                           default=_json_default).encode("utf-8"))
+    return h.hexdigest()
+
+
+class Manifest:
+    """The input and output digests of the stages run so far.
+
+    If path is None, nothing is recorded and no stage is ever up-to-date.
+    """
+
+    def __init__(self, path: Optional[Path]) -> None:
+        self.path = path
+        self.stages: Dict[str, Dict[str, object]] = {}
+        if path is None:
+            return
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == _MANIFEST_VERSION:
+                self.stages = manifest["stages"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def is_up_to_date(self, stage: Stage, inputs_digest: str) -> bool:
+        """Returns True if the stage can be skipped."""
+        entry = self.stages.get(stage.name)
+        if entry is None or entry["inputs"] != inputs_digest:
+            return False
+
+        # Check that the outputs have not been removed or modified since.
+        outputs = {}
+        for path in stage.outputs:
+            for file in _files_under(path):
+                outputs[str(file)] = _digest_file(file)
+        return outputs == entry["outputs"]
+
+    def record(self, stage: Stage, inputs_digest: str) -> None:
+        """Records the inputs and outputs of a stage that was just run."""
+        if self.path is None:
+            return
+
+        outputs = {}
+        for path in stage.outputs:
+            for file in _files_under(path):
+                outputs[str(file)] = _digest_file(file)
+        self.stages[stage.name] = {
+            "inputs": inputs_digest,
+            "outputs": outputs,
+        }
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        manifest = {"version": _MANIFEST_VERSION, "stages": self.stages}
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning("Unable to write the topgen manifest %s: %s",
+                        self.path, e)
+
+
+def run_stages(stages: List[Stage], manifest: Manifest, jobs: int) -> None:
+    """Runs the stages that are not up-to-date.
+
+    The stages must not depend on each other. Up to 'jobs' stages are run in
+    parallel. The manifest is updated but not saved. Each stage that is run
+    is timed (see reggen.profiling), also in the worker processes.
+    """
+    to_run = []
+    for stage in stages:
+        inputs_digest = digest_inputs(stage.inputs)
+        if manifest.is_up_to_date(stage, inputs_digest):
+            log.info("Skipping up-to-date stage %s", stage.name)
+        else:
+            to_run.append((stage, inputs_digest))
+
+    if jobs > 1 and len(to_run) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(to_run))) as ex:
+            futures = [(stage, inputs_digest,
+                        ex.submit(profiling.call_timed, stage.name, "stage",
+                                  stage.func, *stage.args))
+                       for stage, inputs_digest in to_run]
+            for stage, inputs_digest, future in futures:
+                _, events = future.result()
+                profiling.add_events(events)
+                manifest.record(stage, inputs_digest)
+    else:
+        for stage, inputs_digest in to_run:
+            with profiling.timed(stage.name, "stage"):
+                stage.func(*stage.args)
+            manifest.record(stage, inputs_digest)
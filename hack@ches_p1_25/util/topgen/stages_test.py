@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Copyright lowRISC contributors (OpenTitan project).
+# Licensed under the Apache License, Version 2.0, see LICENSE for details.
+# SPDX-License-Identifier: Apache-2.0
+
+import decimal
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from topgen.stages import (Manifest, Stage, _MANIFEST_VERSION, digest_inputs,
+                           run_stages)
+
+
+def _write_output(out_dir: Path, name: str, text: str) -> None:
+    '''A stage writing one output file, and logging that it ran.'''
+    (out_dir / name).write_text(text)
+    with open(out_dir / 'runs.log', 'a') as log_file:
+        log_file.write(name + '\n')
+
+
+class _Config:
+    '''An object of the top configuration, with an _asdict() method.'''
+
+    def __init__(self, value):
+        self.value = value
+
+    def _asdict(self):
+        return {'value': self.value}
+
+
+class TestDigest(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+
+    def test_data(self):
+        inputs = ['top', {'b': 1, 'a': [decimal.Decimal('1.5'), {3, 1}]}]
+        digest = digest_inputs(inputs)
+        self.assertEqual(digest, digest_inputs(inputs))
+        # The order of the keys of a dict does not matter.
+        self.assertEqual(
+            digest,
+            digest_inputs(['top', {'a': [decimal.Decimal('1.5'), {1, 3}],
+                                   'b': 1}]))
+        self.assertNotEqual(digest, digest_inputs(['top', {'b': 1}]))
+        self.assertNotEqual(digest_inputs([_Config(1)]),
+                            digest_inputs([_Config(2)]))
+        self.assertEqual(digest_inputs([_Config(1)]),
+                         digest_inputs([{'value': 1}]))
+
+    def test_unknown_type(self):
+        with self.assertRaisesRegex(TypeError, 'object'):
+            digest_inputs([{'a': object()}])
+
+    def test_paths(self):
+        path = self.tmp_dir / 'input.hjson'
+        path.write_text('a')
+        digest = digest_inputs([path])
+        self.assertEqual(digest, digest_inputs([path]))
+        # A path contributes the content of the file, not just its name.
+        self.assertNotEqual(digest, digest_inputs([str(path)]))
+        path.write_text('b')
+        self.assertNotEqual(digest, digest_inputs([path]))
+
+        # And the content of all the files in a directory.
+        dir_digest = digest_inputs([self.tmp_dir])
+        (self.tmp_dir / 'other.hjson').write_text('c')
+        self.assertNotEqual(dir_digest, digest_inputs([self.tmp_dir]))
+
+
+class TestStages(unittest.TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.manifest_path = self.tmp_dir / 'manifest' / 'top.json'
+        self.out_dir = self.tmp_dir / 'out'
+        self.out_dir.mkdir()
+
+    def _stages(self, texts):
+        return [
+            Stage(name=name,
+                  func=_write_output,
+                  args=(self.out_dir, name, text),
+                  inputs=[name, text],
+                  outputs=[self.out_dir / name]) for name, text in texts
+        ]
+
+    def _run(self, texts, jobs=1):
+        '''Runs stages with the saved manifest, returns those that ran.'''
+        runs = self.out_dir / 'runs.log'
+        if runs.exists():
+            runs.unlink()
+        manifest = Manifest(self.manifest_path)
+        run_stages(self._stages(texts), manifest, jobs)
+        manifest.save()
+        if not runs.exists():
+            return []
+        return sorted(runs.read_text().split())
+
+    def test_skip_up_to_date(self):
+        texts = [('a', 'A'), ('b', 'B')]
+        self.assertEqual(self._run(texts), ['a', 'b'])
+        self.assertEqual((self.out_dir / 'a').read_text(), 'A')
+        self.assertEqual(self._run(texts), [])
+
+        # A change in the inputs of a stage only reruns that stage.
+        self.assertEqual(self._run([('a', 'A'), ('b', 'B2')]), ['b'])
+        self.assertEqual((self.out_dir / 'b').read_text(), 'B2')
+
+        # So does a modified or removed output.
+        texts = [('a', 'A'), ('b', 'B2')]
+        (self.out_dir / 'a').write_text('edited')
+        self.assertEqual(self._run(texts), ['a'])
+        self.assertEqual((self.out_dir / 'a').read_text(), 'A')
+        (self.out_dir / 'b').unlink()
+        self.assertEqual(self._run(texts), ['b'])
+        self.assertEqual(self._run(texts), [])
+
+    def test_parallel(self):
+        texts = [('a', 'A'), ('b', 'B'), ('c', 'C')]
+        self.assertEqual(self._run(texts, jobs=2), ['a', 'b', 'c'])
+        for name, text in texts:
+            self.assertEqual((self.out_dir / name).read_text(), text)
+        self.assertEqual(self._run(texts, jobs=2), [])
+        self.assertEqual(self._run([('a', 'A'), ('b', 'B'), ('c', 'C2')],
+                                   jobs=2), ['c'])
+
+    def test_no_manifest(self):
+        texts = [('a', 'A')]
+        for _ in range(2):
+            manifest = Manifest(None)
+            run_stages(self._stages(texts), manifest, 1)
+            manifest.save()
+        self.assertEqual((self.out_dir / 'runs.log').read_text(), 'a\na\n')
+        self.assertFalse(self.manifest_path.parent.exists())
+
+    def test_manifest_file(self):
+        self.assertEqual(self._run([('a', 'A')]), ['a'])
+        with open(self.manifest_path) as handle:
+            manifest = json.load(handle)
+        self.assertEqual(manifest['version'], _MANIFEST_VERSION)
+        self.assertEqual(list(manifest['stages']), ['a'])
+        self.assertEqual(list(manifest['stages']['a']['outputs']),
+                         [str(self.out_dir / 'a')])
+
+        # A manifest in another format, or that cannot be read, is ignored.
+        manifest['version'] = _MANIFEST_VERSION + 1
+        self.manifest_path.write_text(json.dumps(manifest))
+        self.assertEqual(self._run([('a', 'A')]), ['a'])
+        self.manifest_path.write_text('{"version": ')
+        self.assertEqual(Manifest(self.manifest_path).stages, {})
+        self.assertEqual(self._run([('a', 'A')]), ['a'])
+        self.assertEqual(self._run([('a', 'A')]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
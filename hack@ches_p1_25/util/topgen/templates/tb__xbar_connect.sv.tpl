@@ -12,6 +12,8 @@ import topgen.lib as lib
 top_hier = 'tb.dut.top_' + top["name"] + '.'
 clk_hier = top_hier + top["clocks"].hier_paths["top"]
 
+otherside = lib.index_otherside_modules(top)
+
 clk_src = OrderedDict()
 for xbar in top["xbar"]:
   for clk, src in xbar["clock_srcs"].items():
@@ -102,7 +104,8 @@ initial begin
 <%
 clk = 'clk_' + clk_src[node["clock"]]
 esc_name = node['name'].replace('.', '__')
-inst_sig_list = lib.find_otherside_modules(top, xbar["name"], 'tl_' + esc_name)
+inst_sig_list = lib.find_otherside_modules(top, xbar["name"], 'tl_' + esc_name,
+                                           otherside)
 inst_name = inst_sig_list[0][1]
 sig_name = inst_sig_list[0][2]
 %>\